@@ -0,0 +1,77 @@
+"""add_message_text_hash
+
+Revision ID: 3b9e4d7a1f20
+Revises: c0f071ac6aaa
+Create Date: 2026-10-17 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e4d7a1f20'
+down_revision: Union[str, Sequence[str], None] = 'c0f071ac6aaa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    """
+    Add messages.text_hash (hash of normalize_text(text)) and backfill it.
+
+    Target query:
+    - BehaviorEngine.is_duplicate_recent (runs before every send and after
+      every paraphrase attempt; used to load the bot's last 100 messages
+      and normalize each one)
+
+    Expected impact: exact-duplicate check is one indexed EXISTS lookup.
+    """
+    from backend.behavior.deduplication import text_hash
+
+    op.add_column('messages', sa.Column('text_hash', sa.String(length=16), nullable=True))
+
+    # Backfill: normalize_text Python'da, bu yüzden satırlar batch'ler halinde okunup güncellenir
+    bind = op.get_bind()
+    messages = sa.table(
+        'messages',
+        sa.column('id', sa.BigInteger()),
+        sa.column('text', sa.Text()),
+        sa.column('text_hash', sa.String(length=16)),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(messages.c.id, messages.c.text)
+            .where(messages.c.id > last_id, messages.c.text_hash.is_(None))
+            .order_by(messages.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            messages.update()
+            .where(messages.c.id == sa.bindparam('row_id'))
+            .values(text_hash=sa.bindparam('hash')),
+            [{'row_id': row.id, 'hash': text_hash(row.text or '')} for row in rows],
+        )
+        last_id = rows[-1].id
+
+    # Index after backfill (bulk update does not maintain it row by row)
+    op.create_index(
+        'ix_messages_bot_text_hash_created',
+        'messages',
+        ['bot_id', 'text_hash', 'created_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Remove messages.text_hash"""
+    op.drop_index('ix_messages_bot_text_hash_created', table_name='messages')
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.drop_column('text_hash')
@@ -0,0 +1,61 @@
+"""widen_messages_id_to_bigint
+
+Revision ID: 7c2d5e8a9b14
+Revises: 3b9e4d7a1f20
+Create Date: 2026-10-17 15:40:12.208391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2d5e8a9b14'
+down_revision: Union[str, Sequence[str], None] = '3b9e4d7a1f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Make sure messages.id and its sequence are BIGINT on PostgreSQL.
+
+    Message.id is BigInteger (SQLite variant: INTEGER, so the write-behind
+    buffer's bulk inserts get rowid ids). The initial migration already
+    widened the column, but a table created from SERIAL keeps an
+    `AS integer` sequence that still stops at 2^31 - 1. Both steps only run
+    when needed, so databases that are already BIGINT are not rewritten.
+
+    SQLite stores every INTEGER as 64-bit; nothing to do there.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    column_type = bind.execute(sa.text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = 'messages' AND column_name = 'id'"
+    )).scalar()
+    if column_type == 'integer':
+        op.alter_column(
+            'messages', 'id',
+            existing_type=sa.Integer(),
+            type_=sa.BigInteger(),
+            existing_nullable=False,
+            autoincrement=True,
+        )
+
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence('messages', 'id')")).scalar()
+    if sequence:
+        sequence_type = bind.execute(
+            sa.text("SELECT format_type(seqtypid, NULL) FROM pg_sequence WHERE seqrelid = CAST(:seq AS regclass)"),
+            {'seq': sequence},
+        ).scalar()
+        if sequence_type and sequence_type != 'bigint':
+            op.execute(f"ALTER SEQUENCE {sequence} AS BIGINT")
+
+
+def downgrade() -> None:
+    """No-op: narrowing ids back to INTEGER could fail on existing rows."""
@@ -18,6 +18,7 @@ from schemas import (
 from security import mask_token, SecurityConfigError
 from backend.api.dependencies import viewer_dependencies, operator_dependencies, admin_dependencies
 from backend.api.routes.control import get_redis, publish_config_update
+from backend.behavior_engine.roster import bump_roster_version
 from backend.api.utils.memory_generator import auto_generate_bot_memories
 
 # Cache invalidation helpers
@@ -90,6 +91,7 @@ def create_bot(bot: BotCreate, db: Session = Depends(get_db)):
     except Exception as e:
         logger.warning(f"Failed to auto-generate memories for bot {db_bot.id}: {e}")
 
+    bump_roster_version(db, get_redis())
     publish_config_update(get_redis(), {"type": "bot_added", "bot_id": db_bot.id})
     return _bot_to_response(db_bot)
 
@@ -123,6 +125,7 @@ def update_bot(bot_id: int, patch: BotUpdate, db: Session = Depends(get_db)):
     except Exception as e:
         logger.warning(f"Cache invalidation failed for bot {db_bot.id}: {e}")
 
+    bump_roster_version(db, get_redis())
     publish_config_update(get_redis(), {"type": "bot_updated", "bot_id": db_bot.id})
     return _bot_to_response(db_bot)
 
@@ -145,6 +148,7 @@ def delete_bot(bot_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         logger.warning(f"Cache invalidation failed for bot {bot_id}: {e}")
 
+    bump_roster_version(db, get_redis())
     publish_config_update(get_redis(), {"type": "bot_deleted", "bot_id": bot_id})
     return None
 
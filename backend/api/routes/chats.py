@@ -11,6 +11,7 @@ from database import get_db, Chat
 from schemas import ChatCreate, ChatUpdate, ChatResponse
 from backend.api.dependencies import viewer_dependencies, operator_dependencies
 from backend.api.routes.control import get_redis, publish_config_update
+from backend.behavior_engine.roster import bump_roster_version
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,7 @@ def create_chat(chat: ChatCreate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(db_chat)
 
+    bump_roster_version(db, get_redis())
     publish_config_update(get_redis(), {"type": "chat_added", "chat_id": db_chat.id})
 
     return db_chat
@@ -61,6 +63,7 @@ def update_chat(chat_id: int, patch: ChatUpdate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(db_chat)
 
+    bump_roster_version(db, get_redis())
     publish_config_update(get_redis(), {"type": "chat_updated", "chat_id": chat_id})
 
     return db_chat
@@ -79,6 +82,7 @@ def delete_chat(chat_id: int, db: Session = Depends(get_db)):
     db.delete(db_chat)
     db.commit()
 
+    bump_roster_version(db, get_redis())
     publish_config_update(get_redis(), {"type": "chat_deleted", "chat_id": chat_id})
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -4,6 +4,7 @@ System routes - System checks and health monitoring.
 import os
 import sys
 import time
+import uuid
 import logging
 import subprocess
 from collections import defaultdict
@@ -11,7 +12,7 @@ from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from database import get_db, SystemCheck
@@ -23,7 +24,16 @@ from schemas import (
     SystemCheckSummaryRun,
     SystemCheckSummaryInsight,
 )
-from backend.api.dependencies import viewer_dependencies, operator_dependencies
+from backend.api.dependencies import viewer_dependencies, operator_dependencies, admin_dependencies
+from runtime_profiler import (
+    MAX_PROFILE_SECONDS,
+    PROFILE_FORMATS,
+    PROFILE_REQUEST_TYPE,
+    ProfilerBusyError,
+    aprofile_for,
+    decode_artifact,
+    profile_result_key,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -620,3 +630,112 @@ def export_health_json(db: Session = Depends(get_db)):
         content=export_data,
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
+
+
+# ============================================================================
+# On-demand Profiling Endpoints
+# ============================================================================
+
+def _check_profile_format(fmt: str) -> None:
+    if fmt not in PROFILE_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(PROFILE_FORMATS)}",
+        )
+
+
+def _profile_filename(source: str, filename: str) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    return f"{source}_{stamp}_{filename}"
+
+
+@router.post("/profile", dependencies=admin_dependencies)
+async def profile_api_process(
+    duration: float = Query(10.0, gt=0, le=MAX_PROFILE_SECONDS, description="Capture length (seconds)"),
+    format: str = Query("collapsed", description="collapsed | pstats | json"),
+    interval_ms: float = Query(10.0, ge=1, le=1000, description="Sampling interval (ms)"),
+    tracemalloc: bool = Query(False, description="Also snapshot top allocation sites (json format)"),
+):
+    """
+    Capture a sampling CPU profile of this API process and download it.
+
+    The request waits `duration` seconds while live traffic is sampled.
+    Requires admin role.
+    """
+    _check_profile_format(format)
+    try:
+        result = await aprofile_for(duration, interval=interval_ms / 1000.0, trace_memory=tracemalloc)
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+
+    body, media_type, filename = result.artifact(format)
+    logger.info("API profile captured (%.1fs, %d samples, format=%s)", result.duration, result.samples, format)
+    return Response(
+        content=body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={_profile_filename('api', filename)}"},
+    )
+
+
+@router.post("/profile/worker", status_code=status.HTTP_202_ACCEPTED, dependencies=admin_dependencies)
+def request_worker_profile(
+    duration: float = Query(10.0, gt=0, le=MAX_PROFILE_SECONDS, description="Capture length (seconds)"),
+    format: str = Query("collapsed", description="collapsed | pstats | json"),
+    interval_ms: float = Query(10.0, ge=1, le=1000, description="Sampling interval (ms)"),
+    tracemalloc: bool = Query(False, description="Also snapshot top allocation sites (json format)"),
+) -> Dict[str, Any]:
+    """
+    Ask every worker to capture a profile (via the config_updates channel).
+
+    Download each worker's artifact from /system/profile/worker/{request_id}
+    once `duration` seconds have passed. Requires admin role.
+    """
+    from backend.api.routes.control import get_redis, publish_config_update
+
+    _check_profile_format(format)
+    r = get_redis()
+    if r is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Redis is required to reach worker processes",
+        )
+    request_id = uuid.uuid4().hex
+    publish_config_update(r, {
+        "type": PROFILE_REQUEST_TYPE,
+        "request_id": request_id,
+        "duration": duration,
+        "format": format,
+        "interval": interval_ms / 1000.0,
+        "tracemalloc": tracemalloc,
+    })
+    return {"request_id": request_id, "ready_after_seconds": duration}
+
+
+@router.get("/profile/worker/{request_id}", dependencies=admin_dependencies)
+def download_worker_profile(request_id: str, worker_id: int = Query(0, ge=0)):
+    """
+    Download a worker's profile artifact. Requires admin role.
+
+    Returns 404 while the capture is still running (or after the result expired).
+    """
+    from backend.api.routes.control import get_redis
+
+    r = get_redis()
+    if r is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Redis is required to reach worker processes",
+        )
+    raw = r.get(profile_result_key(request_id, worker_id))
+    if not raw:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not ready or expired")
+
+    payload = decode_artifact(raw)
+    if payload.get("error"):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=payload["error"])
+    filename = _profile_filename(f"worker{worker_id}", payload["filename"])
+    return Response(
+        content=payload["body"],
+        media_type=payload["media_type"],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
@@ -13,6 +13,7 @@ from schemas import PersonaProfile, EmotionProfile, StanceCreate, HoldingCreate
 from security import SecurityConfigError
 from backend.api.dependencies import viewer_dependencies, admin_dependencies
 from backend.api.routes.control import get_redis, publish_config_update, _set_setting
+from backend.behavior_engine.roster import bump_roster_version
 from backend.api.utils.memory_generator import auto_generate_bot_memories
 
 logger = logging.getLogger(__name__)
@@ -154,6 +155,8 @@ def wizard_setup(payload: WizardSetup, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(bot)
     db.refresh(chat)
+    bump_roster_version(db, r)
+    publish_config_update(r, {"type": "roster_changed", "bot_id": bot.id, "chat_id": chat.id})
 
     # --- Persona (opsiyonel) ---
     if payload.persona is not None:
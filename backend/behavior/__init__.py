@@ -11,6 +11,7 @@ Architecture:
 - persona_manager.py: Persona refresh and emotion handling
 - stance_manager.py: Stance consistency and cooldown management
 - reply_handler.py: Reply target selection and @mentions
+- message_features.py: Per-message text features precomputed at insert time
 - micro_behaviors.py: Ellipsis, emoji placement, deduplication
 
 Status: Foundation created (Session 9)
@@ -45,8 +46,14 @@ from backend.behavior.reply_handler import (
     detect_topics,
     extract_symbols,
 )
+from backend.behavior.message_features import (
+    attach_message_features,
+    compute_message_features,
+    get_message_features,
+)
 from backend.behavior.deduplication import (
     normalize_text,
+    text_hash,
 )
 from backend.behavior.message_utils import (
     choose_message_length_category,
@@ -84,7 +91,11 @@ __all__ = [
     "detect_sentiment",
     "detect_topics",
     "extract_symbols",
+    "attach_message_features",
+    "compute_message_features",
+    "get_message_features",
     "normalize_text",
+    "text_hash",
     "choose_message_length_category",
     "compose_length_hint",
     "generate_time_context",
@@ -8,6 +8,8 @@ used to determine when bots should be active in conversations.
 from datetime import datetime
 from typing import List, Optional
 
+from clock import now_local
+
 
 def parse_ranges(ranges: List[str]) -> List[tuple]:
     """
@@ -76,7 +78,7 @@ def is_prime_hours(ranges: List[str]) -> bool:
     Returns:
         True if current local time is within prime hours, False otherwise
     """
-    local = datetime.now()  # Local system time
+    local = now_local()  # Local system time (virtual in simulations)
     hm = local.hour * 60 + local.minute
     if not ranges:
         return False
@@ -107,6 +109,6 @@ def is_within_active_hours(ranges: Optional[List[str]], *, moment: Optional[date
     if not ranges:
         return True  # No restrictions = always active
 
-    local = moment or datetime.now()
+    local = moment or now_local()
     hm = local.hour * 60 + local.minute
     return _time_matches_ranges(list(ranges), hm)
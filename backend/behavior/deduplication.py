@@ -1,11 +1,16 @@
 """
 Text deduplication utilities for the behavior engine.
 
-This module provides text normalization for duplicate detection.
+This module provides text normalization for duplicate detection and the
+normalized-text hash stored in messages.text_hash, which turns the exact
+duplicate check into one indexed (bot_id, text_hash, created_at) lookup.
 """
 
+import hashlib
 import re
 
+TEXT_HASH_LENGTH = 16  # hex karakter (64 bit)
+
 
 def normalize_text(s: str) -> str:
     """
@@ -35,3 +40,19 @@ def normalize_text(s: str) -> str:
     s = re.sub(r"\s+", " ", s)          # Collapse multiple spaces
     s = re.sub(r"[^\w\sçğıöşü]", "", s) # Remove emojis/punctuation (keep Turkish chars)
     return s[:400]  # Short excerpt sufficient for comparison
+
+
+def text_hash(s: str) -> str:
+    """
+    Hash of normalize_text(s) (messages.text_hash).
+
+    Two texts that normalize to the same string get the same hash.
+
+    Args:
+        s: Input text
+
+    Returns:
+        TEXT_HASH_LENGTH hex characters
+    """
+    digest = hashlib.blake2b(normalize_text(s).encode("utf-8"), digest_size=TEXT_HASH_LENGTH // 2)
+    return digest.hexdigest()
@@ -0,0 +1,72 @@
+"""
+Per-message text features computed once at insert time.
+
+Reply-target scoring and topic selection used to re-run topic detection,
+sentiment analysis, symbol extraction and tokenization on the same recent
+messages every tick. These features are now computed when a Message is
+written (engine sends, webhook) and stored in msg_metadata["features"];
+readers fall back to computing them for older rows.
+"""
+
+from typing import Any, Dict, Optional
+
+from backend.behavior.reply_handler import detect_sentiment, detect_topics, extract_symbols
+from backend.behavior.topic_manager import tokenize_text
+
+FEATURES_KEY = "features"
+FEATURES_VERSION = 1
+
+
+def compute_message_features(text: Optional[str]) -> Dict[str, Any]:
+    """
+    Compute reusable text features of a message.
+
+    Args:
+        text: Message text
+
+    Returns:
+        Dict with topics, sentiment, symbols, is_question, tokens and version
+    """
+    text = text or ""
+    return {
+        "v": FEATURES_VERSION,
+        "topics": detect_topics(text),
+        "sentiment": detect_sentiment(text),
+        "symbols": sorted(extract_symbols(text)),
+        "is_question": "?" in text,
+        "tokens": tokenize_text(text),
+    }
+
+
+def attach_message_features(metadata: Optional[Dict[str, Any]], text: Optional[str]) -> Dict[str, Any]:
+    """
+    Add precomputed features to a message metadata dict before insert.
+
+    Args:
+        metadata: Existing msg_metadata (None creates a new dict)
+        text: Message text
+
+    Returns:
+        The metadata dict with a "features" entry
+    """
+    metadata = dict(metadata or {})
+    metadata[FEATURES_KEY] = compute_message_features(text)
+    return metadata
+
+
+def get_message_features(msg: Any) -> Dict[str, Any]:
+    """
+    Read precomputed features of a message, computing them for legacy rows.
+
+    Args:
+        msg: Message-like object with text and msg_metadata attributes
+
+    Returns:
+        Features dict (see compute_message_features)
+    """
+    metadata = getattr(msg, "msg_metadata", None)
+    if isinstance(metadata, dict):
+        features = metadata.get(FEATURES_KEY)
+        if isinstance(features, dict) and features.get("v") == FEATURES_VERSION:
+            return features
+    return compute_message_features(getattr(msg, "text", None))
@@ -16,12 +16,13 @@ Extracted from behavior_engine.py (lines 495-794)
 
 import random
 import re
-from datetime import datetime
+
+from clock import now_local
 
 
 def generate_time_context() -> str:
     """Generate human-like time-of-day context for more natural conversations."""
-    local = datetime.now()
+    local = now_local()
     hour = local.hour
 
     # Sabah (06:00-09:00)
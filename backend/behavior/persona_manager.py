@@ -10,6 +10,7 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Sequence
 
+import clock
 from system_prompt import summarize_persona
 
 UTC = timezone.utc
@@ -284,6 +285,6 @@ def now_utc() -> datetime:
     Get current UTC datetime.
 
     Returns:
-        Current datetime with UTC timezone
+        Current datetime with UTC timezone (virtual time in simulations)
     """
-    return datetime.now(UTC)
+    return clock.now_utc()
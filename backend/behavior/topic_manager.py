@@ -8,7 +8,7 @@ and keyword matching for market discussions.
 import random
 import re
 from collections import Counter
-from typing import Any, Dict, Optional, Sequence
+from typing import Any, Dict, List, Optional, Sequence
 
 # Topic keywords for Turkish financial markets
 TOPIC_KEYWORDS: Dict[str, set] = {
@@ -19,10 +19,32 @@ TOPIC_KEYWORDS: Dict[str, set] = {
 }
 
 
+def tokenize_text(text: str) -> List[str]:
+    """
+    Split a message text into lowercase tokens (punctuation stripped).
+
+    Args:
+        text: Message text
+
+    Returns:
+        List of tokens in message order
+    """
+    tokens: List[str] = []
+    for raw_token in text.split():
+        token = raw_token.strip().lower()
+        token = token.strip("#.,;:!?()[]{}\"'`""'")
+        if token:
+            tokens.append(token)
+    return tokens
+
+
 def _tokenize_messages(messages: Sequence[Any]) -> Counter:
     """
     Tokenize messages into word frequency counter.
 
+    Uses tokens precomputed at insert time (msg_metadata["features"]["tokens"])
+    when available, and tokenizes the text otherwise.
+
     Args:
         messages: Sequence of message objects with 'text' attribute
 
@@ -33,15 +55,15 @@ def _tokenize_messages(messages: Sequence[Any]) -> Counter:
     for msg in messages:
         if msg is None:
             continue
+        metadata = getattr(msg, "msg_metadata", None)
+        features = metadata.get("features") if isinstance(metadata, dict) else None
+        if isinstance(features, dict) and isinstance(features.get("tokens"), list):
+            tokens.update(features["tokens"])
+            continue
         text = getattr(msg, "text", None)
         if not isinstance(text, str):
             continue
-        for raw_token in text.split():
-            token = raw_token.strip().lower()
-            token = token.strip("#.,;:!?()[]{}\"'`""'")
-            if not token:
-                continue
-            tokens[token] += 1
+        tokens.update(tokenize_text(text))
     return tokens
 
 
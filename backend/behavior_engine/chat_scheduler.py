@@ -0,0 +1,147 @@
+"""
+Per-Chat Pipeline Scheduler
+
+Runs one independent asyncio pipeline per enabled chat instead of a single
+serial tick loop. Each pipeline repeatedly runs a tick for its own chat and
+then sleeps for the delay returned by that tick; a global semaphore caps how
+many ticks may be in flight at the same time across all chats.
+
+Rate limits (max_msgs_per_min, per-bot hourly limits) are NOT enforced here;
+the engine reserves send slots atomically before any await, so concurrent
+pipelines cannot overshoot them.
+"""
+
+import asyncio
+import contextlib
+import logging
+import random
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger("behavior.scheduler")
+
+TickFn = Callable[[int], Awaitable[float]]
+ChatListFn = Callable[[], Awaitable[Iterable[int]]]
+
+
+class ChatPipelineScheduler:
+    """
+    Supervisor for per-chat conversation pipelines.
+
+    The supervisor periodically refreshes the list of enabled chats, starts a
+    pipeline task for every new chat and cancels pipelines of chats that were
+    disabled or removed.
+
+    Args:
+        run_tick: Coroutine function ``run_tick(chat_db_id) -> delay_seconds``
+        list_chats: Coroutine function returning the enabled chat DB ids
+        max_concurrency: Global cap for simultaneously running ticks
+        refresh_interval: Seconds between chat list refreshes
+        start_jitter: Max random delay before a new pipeline's first tick
+    """
+
+    def __init__(
+        self,
+        run_tick: TickFn,
+        list_chats: ChatListFn,
+        *,
+        max_concurrency: int = 16,
+        refresh_interval: float = 15.0,
+        start_jitter: float = 2.0,
+    ) -> None:
+        self._run_tick = run_tick
+        self._list_chats = list_chats
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.refresh_interval = max(1.0, float(refresh_interval))
+        self.start_jitter = max(0.0, float(start_jitter))
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pipelines: Dict[int, asyncio.Task] = {}
+        self._refresh_event: Optional[asyncio.Event] = None
+        self._running = False
+        self.ticks_in_flight = 0
+
+    @property
+    def active_chats(self) -> int:
+        """Number of chats with a running pipeline."""
+        return len(self._pipelines)
+
+    def request_refresh(self) -> None:
+        """Wake the supervisor so the chat list is reloaded immediately."""
+        if self._refresh_event is not None:
+            self._refresh_event.set()
+
+    async def run(self) -> None:
+        """Supervisor loop; runs until cancelled or stop() is called."""
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._refresh_event = asyncio.Event()
+        self._running = True
+        logger.info("Chat pipeline scheduler started (max_concurrency=%d)", self.max_concurrency)
+
+        try:
+            while self._running:
+                try:
+                    chat_ids = set(await self._list_chats())
+                    self._sync_pipelines(chat_ids)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    logger.warning("Chat list refresh failed: %s", exc)
+
+                self._refresh_event.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._refresh_event.wait(), timeout=self.refresh_interval)
+        finally:
+            await self._cancel_all()
+            self._running = False
+
+    async def stop(self) -> None:
+        """Stop the supervisor and all chat pipelines."""
+        self._running = False
+        self.request_refresh()
+        await self._cancel_all()
+
+    def _sync_pipelines(self, chat_ids: set) -> None:
+        # Yeni chat'ler için pipeline başlat
+        for chat_id in chat_ids:
+            task = self._pipelines.get(chat_id)
+            if task is None or task.done():
+                self._pipelines[chat_id] = asyncio.create_task(
+                    self._chat_loop(chat_id), name=f"chat_pipeline:{chat_id}"
+                )
+                logger.debug("Chat pipeline started: chat_db_id=%s", chat_id)
+
+        # Kaldırılan/pasif chat'lerin pipeline'larını durdur
+        for chat_id in list(self._pipelines.keys()):
+            if chat_id not in chat_ids:
+                self._pipelines.pop(chat_id).cancel()
+                logger.debug("Chat pipeline stopped: chat_db_id=%s", chat_id)
+
+    async def _chat_loop(self, chat_id: int) -> None:
+        # Thundering herd'i önlemek için ilk tick'i rastgele geciktir
+        if self.start_jitter:
+            await asyncio.sleep(random.uniform(0.0, self.start_jitter))
+
+        assert self._semaphore is not None
+        while True:
+            async with self._semaphore:
+                self.ticks_in_flight += 1
+                try:
+                    delay = await self._run_tick(chat_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    logger.exception("Chat pipeline tick failed (chat_db_id=%s): %s", chat_id, exc)
+                    delay = 3.0
+                finally:
+                    self.ticks_in_flight -= 1
+            # Slot'u bırakıp bekle: uyuyan pipeline'lar kapasite tüketmez
+            await asyncio.sleep(max(0.0, float(delay or 0.0)))
+
+    async def _cancel_all(self) -> None:
+        tasks = list(self._pipelines.values())
+        self._pipelines.clear()
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await task
@@ -0,0 +1,145 @@
+"""
+Event Loop Lag Monitor
+
+The worker runs sync SQLAlchemy, sync Redis calls, RateLimiter's time.sleep
+and NewsClient's sync httpx inside one asyncio loop; while any of them runs,
+every pipeline, typing refresher and the priority lane stand still. Stalls
+used to show up only as missed messages.
+
+- Sampler: a task sleeps for `interval` and measures how late it wakes up.
+  The lateness is the loop lag and is exported as event_loop_lag_seconds
+  (histogram) / event_loop_lag_last_seconds (gauge); lags above the stall
+  threshold also count in event_loop_stalls_total.
+- Stall debug (LOOP_STALL_DEBUG=true): a watchdog thread watches the loop's
+  heartbeat; when the loop has not come back for longer than the threshold
+  it logs the loop thread's current stack once per stall, i.e. the exact
+  sync call that is holding the loop.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("behavior.loop")
+
+try:
+    from backend.metrics import (
+        event_loop_lag_last_seconds as _LAG_GAUGE,
+        event_loop_lag_seconds as _LAG_HISTOGRAM,
+        event_loop_stalls_total as _STALL_COUNTER,
+    )
+except Exception:  # prometheus_client yoksa sadece log/istatistik
+    _LAG_HISTOGRAM = _LAG_GAUGE = _STALL_COUNTER = None
+
+
+class LoopLagMonitor:
+    """
+    Loop lag sampler with an optional blocking-call detector.
+
+    Args:
+        interval: Seconds between lag samples
+        stall_threshold: Lag (seconds) counted as a stall
+        debug: Start the watchdog thread that logs the blocking stack
+        max_stack_depth: Frames logged per stall
+        clock: Time source (perf_counter)
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.5,
+        stall_threshold: float = 0.25,
+        debug: bool = False,
+        max_stack_depth: int = 25,
+        clock: Callable[[], float] = perf_counter,
+    ) -> None:
+        self.interval = max(0.01, float(interval))
+        self.stall_threshold = max(0.001, float(stall_threshold))
+        self.debug = bool(debug)
+        self.max_stack_depth = max(1, int(max_stack_depth))
+        self.clock = clock
+
+        self.samples = 0
+        self.stalls = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stacks_logged = 0
+
+        self._heartbeat = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    async def run(self) -> None:
+        """Ölçüm döngüsü; iptal edilene kadar çalışır."""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = self.clock()
+        if self.debug:
+            self._start_watchdog()
+        logger.info(
+            "Loop lag monitor started (interval=%.2fs, stall_threshold=%.3fs, debug=%s)",
+            self.interval, self.stall_threshold, self.debug,
+        )
+        try:
+            while True:
+                scheduled = self.clock()
+                await asyncio.sleep(self.interval)
+                now = self.clock()
+                self._heartbeat = now
+                self.record(max(0.0, now - scheduled - self.interval))
+        finally:
+            self._stop.set()
+
+    def record(self, lag: float) -> None:
+        self.samples += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        if _LAG_HISTOGRAM is not None:
+            _LAG_HISTOGRAM.observe(lag)
+            _LAG_GAUGE.set(lag)
+        if lag >= self.stall_threshold:
+            self.stalls += 1
+            if _STALL_COUNTER is not None:
+                _STALL_COUNTER.inc()
+            logger.warning("Event loop blocked for %.3fs", lag)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "stalls": self.stalls,
+            "last_lag": round(self.last_lag, 4),
+            "max_lag": round(self.max_lag, 4),
+            "stacks_logged": self.stacks_logged,
+        }
+
+    # ---- Stall debug ----
+    def _start_watchdog(self) -> None:
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def _watch(self) -> None:
+        # Heartbeat normalde her interval'de yenilenir; interval + eşik kadar eskiyse loop kilitli
+        poll = max(0.005, self.stall_threshold / 4)
+        reported_beat = None
+        while not self._stop.wait(poll):
+            beat = self._heartbeat
+            if beat == reported_beat:
+                continue  # Bu stall için stack zaten loglandı
+            blocked_for = self.clock() - beat - self.interval
+            if blocked_for < self.stall_threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)  # type: ignore[arg-type]
+            if frame is None:
+                continue
+            reported_beat = beat
+            self.stacks_logged += 1
+            stack = "".join(traceback.format_stack(frame, limit=self.max_stack_depth))
+            logger.warning(
+                "Event loop blocked for >%.3fs; loop thread is currently at:\n%s",
+                blocked_for, stack,
+            )
@@ -20,7 +20,7 @@ from system_prompt import summarize_persona, summarize_stances
 # Consistency & Reaction Application
 # ==============================================================================
 
-def apply_consistency_guard(
+async def apply_consistency_guard(
     llm: LLMClient,
     *,
     draft_text: str,
@@ -66,7 +66,7 @@ def apply_consistency_guard(
 - SADECE nihai metni döndür, başka açıklama yazma.
 """
     # Düşük sıcaklık, kısa yanıt
-    revised = llm.generate(user_prompt=guard_prompt, temperature=0.3, max_tokens=220)
+    revised = await llm.agenerate(user_prompt=guard_prompt, temperature=0.3, max_tokens=220)
     if not revised:
         return None
 
@@ -158,7 +158,7 @@ def apply_micro_behaviors(
     return updated
 
 
-def paraphrase_safe(llm: LLMClient, text: str) -> Optional[str]:
+async def paraphrase_safe(llm: LLMClient, text: str) -> Optional[str]:
     """
     Basit yeniden yazım; anlamı korur, tekrar algılamayı aşmaya çalışır.
 
@@ -174,7 +174,7 @@ def paraphrase_safe(llm: LLMClient, text: str) -> Optional[str]:
 METİN:
 {text}
 """
-    return llm.generate(user_prompt=prompt, temperature=0.4, max_tokens=120)
+    return await llm.agenerate(user_prompt=prompt, temperature=0.4, max_tokens=120)
 
 
 # ==============================================================================
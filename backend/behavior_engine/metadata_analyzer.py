@@ -53,6 +53,19 @@ def fetch_bot_memories(
         .all()
     )
 
+    return memories_to_dicts(memories)
+
+
+def memories_to_dicts(memories: List[BotMemory]) -> List[Dict[str, Any]]:
+    """
+    BotMemory satırlarını prompt için kullanılan dict biçimine çevirir.
+
+    Args:
+        memories: BotMemory satırları (relevance sırasıyla)
+
+    Returns:
+        Hafıza listesi (fetch_bot_memories ile aynı biçim)
+    """
     result = []
     for m in memories:
         result.append({
@@ -241,6 +254,36 @@ def find_relevant_past_messages(
         .all()
     )
 
+    return score_past_messages(
+        past_messages,
+        current_topic=current_topic,
+        current_symbols=current_symbols,
+        days_back=days_back,
+        limit=limit,
+    )
+
+
+def score_past_messages(
+    past_messages: List[Message],
+    *,
+    current_topic: str,
+    current_symbols: List[str],
+    days_back: int = 7,
+    limit: int = 5,
+) -> List[Dict[str, Any]]:
+    """
+    Önceden okunmuş aday mesajları konu/sembol/yakınlık ile puanlar.
+
+    Args:
+        past_messages: Bot'un geçmiş mesajları (en yeni önce)
+        current_topic: Mevcut mesaj konusu
+        current_symbols: Mevcut mesaj sembolleri
+        days_back: Aday penceresi (gün), yakınlık çarpanı için
+        limit: Maksimum sonuç sayısı
+
+    Returns:
+        İlgili geçmiş mesajlar listesi
+    """
     # Relevance skorlama
     relevant: List[tuple[float, Message]] = []
 
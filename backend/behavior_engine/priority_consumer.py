@@ -0,0 +1,173 @@
+"""
+Priority Queue Consumer
+
+Blocking consumer for the user-message priority queues. Mentions and replies
+are LPUSHed to 'priority_queue:high' / 'priority_queue:normal' by the webhook
+and the message listener; this consumer waits on them with BRPOP (high is
+always served first because BRPOP checks keys in order) and hands each item
+to the engine as its own task.
+
+- A semaphore caps how many priority items are processed at once; the next
+  BRPOP is only issued when a slot is free, so items this worker cannot take
+  yet stay in Redis for other workers.
+- Items of the same chat are processed in arrival order (per-chat lock).
+- Optional batching: after a blocking pop, up to batch_size - 1 more items
+  are drained without blocking and handled together.
+
+Mention-to-reply latency is bounded by processing time instead of the
+ambient tick schedule.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set
+
+logger = logging.getLogger("behavior.priority")
+
+PRIORITY_QUEUES = ("priority_queue:high", "priority_queue:normal")
+
+BatchHandler = Callable[[List[Dict[str, Any]]], Awaitable[Any]]
+
+
+class PriorityQueueConsumer:
+    """
+    BRPOP-based consumer for the priority queues.
+
+    Args:
+        redis_client: redis.asyncio client (decode_responses=True)
+        handler: Coroutine function processing a list of priority items
+        queues: Queue keys in priority order
+        max_concurrency: Max priority batches processed at the same time
+        block_timeout: BRPOP timeout in seconds (loop re-checks state after it)
+        batch_size: Callable returning how many items to handle together
+        is_active: Coroutine function; while it returns False nothing is popped
+        idle_delay: Sleep while inactive (seconds)
+    """
+
+    def __init__(
+        self,
+        redis_client: Any,
+        handler: BatchHandler,
+        *,
+        queues: Sequence[str] = PRIORITY_QUEUES,
+        max_concurrency: int = 4,
+        block_timeout: int = 5,
+        batch_size: Callable[[], int] = lambda: 1,
+        is_active: Optional[Callable[[], Awaitable[bool]]] = None,
+        idle_delay: float = 1.0,
+    ) -> None:
+        self.redis = redis_client
+        self.handler = handler
+        self.queues = tuple(queues)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.block_timeout = max(1, int(block_timeout))
+        self.batch_size = batch_size
+        self.is_active = is_active
+        self.idle_delay = max(0.05, float(idle_delay))
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._chat_locks: Dict[str, asyncio.Lock] = {}
+        self._chat_refs: Counter = Counter()
+        self._tasks: Set[asyncio.Task] = set()
+        self.processed = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def run(self) -> None:
+        """Tüketici döngüsü; iptal edilene kadar çalışır."""
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        logger.info(
+            "Priority consumer started (queues=%s, max_concurrency=%d)",
+            list(self.queues), self.max_concurrency,
+        )
+        try:
+            while True:
+                if self.is_active is not None and not await self._safe_is_active():
+                    await asyncio.sleep(self.idle_delay)
+                    continue
+
+                # Slot yoksa pop etme: kuyruktaki iş başka worker'a kalsın
+                await self._semaphore.acquire()
+                try:
+                    items = await self._pop_items()
+                except asyncio.CancelledError:
+                    self._semaphore.release()
+                    raise
+                except Exception as exc:
+                    self._semaphore.release()
+                    logger.warning("Priority queue pop failed: %s", exc)
+                    await asyncio.sleep(self.idle_delay)
+                    continue
+
+                if not items:
+                    self._semaphore.release()
+                    continue
+
+                task = asyncio.create_task(self._process(items), name="priority_item")
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            for task in list(self._tasks):
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await task
+
+    async def _safe_is_active(self) -> bool:
+        try:
+            return bool(await self.is_active())
+        except Exception as exc:
+            logger.debug("Priority consumer activity check failed: %s", exc)
+            return False
+
+    async def _pop_items(self) -> List[Dict[str, Any]]:
+        popped = await self.redis.brpop(list(self.queues), timeout=self.block_timeout)
+        if not popped:
+            return []
+        raw_items = [popped[1]]
+
+        # Batch modu: bekleyen diğer item'ları bloklamadan topla (high önce)
+        extra = max(1, int(self.batch_size())) - 1
+        for queue in self.queues:
+            while extra > 0:
+                raw = await self.redis.rpop(queue)
+                if raw is None:
+                    break
+                raw_items.append(raw)
+                extra -= 1
+
+        items: List[Dict[str, Any]] = []
+        for raw in raw_items:
+            try:
+                items.append(json.loads(raw))
+            except (TypeError, ValueError) as exc:
+                logger.warning("Dropping malformed priority item: %s", exc)
+        return items
+
+    async def _process(self, items: List[Dict[str, Any]]) -> None:
+        # Aynı chat'e gelen mention'lar sırayla cevaplansın
+        chat_keys = sorted({str(item.get("chat_id")) for item in items})
+        for key in chat_keys:
+            self._chat_refs[key] += 1
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                for key in chat_keys:
+                    await stack.enter_async_context(self._chat_locks.setdefault(key, asyncio.Lock()))
+                await self.handler(items)
+            self.processed += len(items)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.exception("Priority item processing failed: %s", exc)
+        finally:
+            self._semaphore.release()
+            for key in chat_keys:
+                self._chat_refs[key] -= 1
+                if self._chat_refs[key] <= 0:
+                    del self._chat_refs[key]
+                    self._chat_locks.pop(key, None)
@@ -0,0 +1,327 @@
+"""
+Rate Accounting
+
+In-memory sliding-window counters for the engine's rate limits
+(max_msgs_per_min and per-bot hourly limits). They replace the per-tick
+COUNT(*) / GROUP BY queries over the messages table.
+
+- Counters are ring buffers of per-second buckets; expired buckets are
+  dropped lazily, so reads and writes are O(1) amortized.
+- The engine records every bot message right after it is committed.
+  Only bot sends are counted: max_msgs_per_min caps bot output. Incoming
+  user messages (webhook inserts in the API process) no longer count
+  toward it, unlike the old COUNT(*) over all messages.
+- On first use the counters are hydrated from the last hour of bot messages
+  (one query per process lifetime).
+- In-flight reservations (picked but not yet committed) are tracked here too,
+  so concurrent pipelines cannot overshoot the limits.
+- Shared mode keeps the buckets in Redis so all workers see the same
+  global/per-bot counts; it is required with more than one worker, since a
+  bot's sends (and, under lease sharding, the bot itself) move between them.
+  Redis is hydrated only while no live buckets exist: every record() refreshes
+  the hydration flag, which outlives the buckets it guards.
+- Without Redis in a multi-worker deployment the counts come from the
+  messages table instead (count_from_db), like the old per-tick queries.
+"""
+
+import logging
+import threading
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from clock import wall_time
+
+logger = logging.getLogger("behavior.rates")
+
+GLOBAL_WINDOW_SECONDS = 60
+BOT_WINDOW_SECONDS = 3600
+
+
+def _to_epoch(value: datetime) -> float:
+    # SQLite naive datetime döner; DB'deki tüm zamanlar UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class SlidingWindowCounter:
+    """
+    Per-second bucket ring for a fixed window.
+
+    Only non-empty buckets are stored (deque of [second, count]); a running
+    total avoids summing the window on every read.
+    """
+
+    __slots__ = ("window", "_buckets", "_total")
+
+    def __init__(self, window_seconds: int) -> None:
+        self.window = int(window_seconds)
+        self._buckets: Deque[List[int]] = deque()
+        self._total = 0
+
+    def add(self, ts: float, n: int = 1) -> None:
+        sec = int(ts)
+        if self._buckets and self._buckets[-1][0] == sec:
+            self._buckets[-1][1] += n
+        elif not self._buckets or self._buckets[-1][0] < sec:
+            self._buckets.append([sec, n])
+        else:
+            # Sıra dışı kayıt (hydrate / saat kayması): doğru kovaya yerleştir
+            for bucket in self._buckets:
+                if bucket[0] == sec:
+                    bucket[1] += n
+                    break
+            else:
+                items = sorted(list(self._buckets) + [[sec, n]])
+                self._buckets = deque(items)
+        self._total += n
+
+    def count(self, now: float) -> int:
+        cutoff = int(now) - self.window
+        buckets = self._buckets
+        while buckets and buckets[0][0] <= cutoff:
+            self._total -= buckets.popleft()[1]
+        return self._total
+
+
+class RateAccountant:
+    """
+    Global and per-bot sliding-window message counters.
+
+    Args:
+        redis_client: Sync Redis client; when given, buckets are shared across workers
+        global_window: Window for max_msgs_per_min (seconds)
+        bot_window: Window for per-bot hourly limits (seconds)
+        clock: Epoch-seconds time source
+        key_prefix: Redis key prefix for shared buckets
+        count_from_db: Read counts from the messages table (multi-worker without Redis)
+    """
+
+    def __init__(
+        self,
+        *,
+        redis_client: Any = None,
+        global_window: int = GLOBAL_WINDOW_SECONDS,
+        bot_window: int = BOT_WINDOW_SECONDS,
+        clock: Callable[[], float] = wall_time,
+        key_prefix: str = "rate",
+        count_from_db: bool = False,
+    ) -> None:
+        self.redis = redis_client
+        self.global_window = int(global_window)
+        self.bot_window = int(bot_window)
+        self.clock = clock
+        self.key_prefix = key_prefix
+        self.count_from_db = bool(count_from_db) and redis_client is None
+
+        self._global = SlidingWindowCounter(self.global_window)
+        self._bots: Dict[int, SlidingWindowCounter] = {}
+        self._pending_total = 0
+        self._pending_by_bot: Counter = Counter()
+        self._hydrated = False
+        self._lock = threading.Lock()
+
+        # Shared modda Redis okumalarını kısa süre önbellekle (tick başına tek round trip)
+        self._shared_snapshot: Optional[Dict[str, Any]] = None
+        self._shared_snapshot_at = 0.0
+
+    @property
+    def shared(self) -> bool:
+        return self.redis is not None
+
+    # ---- Hydration ----
+    def ensure_hydrated(self, db: Session) -> None:
+        """Son saatin bot mesajlarını bir kez DB'den yükle."""
+        if self._hydrated or self.count_from_db:
+            return
+        with self._lock:
+            if self._hydrated:
+                return
+            try:
+                self._hydrate(db)
+            except Exception as exc:
+                logger.warning("Rate counters hydration failed: %s", exc)
+            self._hydrated = True
+
+    def _hydrate(self, db: Session) -> None:
+        from database import Message
+
+        rows = (
+            db.query(Message.bot_id, Message.created_at)
+            .filter(Message.bot_id.isnot(None), Message.created_at >= self._cutoff(self.bot_window))
+            .order_by(Message.created_at.asc())
+            .all()
+        )
+
+        if self.shared:
+            # Canlı kova varken bayrak da vardır (record() yeniler); satırlar iki kez sayılmaz
+            if not self.redis.set(self._hydrated_key, "1", nx=True, ex=self._bucket_ttl):
+                logger.info("Shared rate counters already hydrated by another worker")
+                return
+            pipe = self.redis.pipeline(transaction=False)
+            for bot_id, created_at in rows:
+                self._redis_incr(pipe, bot_id, _to_epoch(created_at))
+            pipe.execute()
+        else:
+            for bot_id, created_at in rows:
+                ts = _to_epoch(created_at)
+                self._global.add(ts)
+                self._bot_counter(bot_id).add(ts)
+
+        logger.info("Rate counters hydrated from DB (%d messages, shared=%s)", len(rows), self.shared)
+
+    # ---- Writes ----
+    def record(self, bot_id: Optional[int], ts: Optional[float] = None) -> None:
+        """Commit edilen bir bot mesajını say."""
+        if bot_id is None:
+            return
+        ts = self.clock() if ts is None else ts
+        if self.shared:
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                self._redis_incr(pipe, bot_id, ts)
+                pipe.execute()
+                self._shared_snapshot = None
+                return
+            except Exception as exc:
+                logger.warning("Shared rate counter update failed, counting locally: %s", exc)
+        self._global.add(ts)
+        self._bot_counter(bot_id).add(ts)
+
+    def reserve(self, bot_id: int) -> None:
+        """Limit kontrolünden commit'e kadar sürecek gönderim için slot ayır."""
+        self._pending_total += 1
+        self._pending_by_bot[bot_id] += 1
+
+    def release(self, bot_id: int) -> None:
+        self._pending_total = max(0, self._pending_total - 1)
+        self._pending_by_bot[bot_id] -= 1
+        if self._pending_by_bot[bot_id] <= 0:
+            del self._pending_by_bot[bot_id]
+
+    # ---- Reads ----
+    def global_count(self, *, include_pending: bool = True, db: Optional[Session] = None) -> int:
+        """Son global_window saniyedeki bot mesajı sayısı (count_from_db modunda `db` gerekir)."""
+        if self.count_from_db and db is not None:
+            count = self._db_global_count(db)
+        elif self.shared:
+            snapshot = self._snapshot()
+            count = snapshot["global"] if snapshot is not None else self._global.count(self.clock())
+        else:
+            count = self._global.count(self.clock())
+        return count + (self._pending_total if include_pending else 0)
+
+    def bot_count(self, bot_id: int, *, include_pending: bool = True, db: Optional[Session] = None) -> int:
+        """Bir botun son bot_window saniyedeki mesaj sayısı."""
+        return self.bot_counts([bot_id], include_pending=include_pending, db=db).get(bot_id, 0)
+
+    def bot_counts(
+        self,
+        bot_ids: Iterable[int],
+        *,
+        include_pending: bool = True,
+        db: Optional[Session] = None,
+    ) -> Dict[int, int]:
+        """Birden fazla bot için sayaçlar (tek okuma)."""
+        bot_ids = list(bot_ids)
+        now = self.clock()
+        db_counts = self._db_bot_counts(db, bot_ids) if self.count_from_db and db is not None else None
+        snapshot = self._snapshot() if self.shared else None
+        out: Dict[int, int] = {}
+        for bot_id in bot_ids:
+            if db_counts is not None:
+                count = db_counts.get(bot_id, 0)
+            elif snapshot is not None:
+                count = snapshot["bots"].get(bot_id, 0)
+            else:
+                counter = self._bots.get(bot_id)
+                count = counter.count(now) if counter is not None else 0
+            if include_pending:
+                count += self._pending_by_bot.get(bot_id, 0)
+            out[bot_id] = count
+        return out
+
+    # ---- Internals ----
+    @property
+    def _hydrated_key(self) -> str:
+        return f"{self.key_prefix}:hydrated"
+
+    @property
+    def _bucket_ttl(self) -> int:
+        return self.bot_window + 120
+
+    def _cutoff(self, window: int) -> datetime:
+        return datetime.fromtimestamp(self.clock() - window, tz=timezone.utc)
+
+    def _db_global_count(self, db: Session) -> int:
+        from database import Message
+
+        return (
+            db.query(Message.id)
+            .filter(Message.bot_id.isnot(None), Message.created_at >= self._cutoff(self.global_window))
+            .count()
+        )
+
+    def _db_bot_counts(self, db: Session, bot_ids: List[int]) -> Dict[int, int]:
+        from sqlalchemy import func
+
+        from database import Message
+
+        if not bot_ids:
+            return {}
+        rows = (
+            db.query(Message.bot_id, func.count(Message.id))
+            .filter(Message.bot_id.in_(bot_ids), Message.created_at >= self._cutoff(self.bot_window))
+            .group_by(Message.bot_id)
+            .all()
+        )
+        return {bot_id: count for bot_id, count in rows}
+
+    def _bot_counter(self, bot_id: int) -> SlidingWindowCounter:
+        counter = self._bots.get(bot_id)
+        if counter is None:
+            counter = self._bots[bot_id] = SlidingWindowCounter(self.bot_window)
+        return counter
+
+    def _redis_incr(self, pipe: Any, bot_id: int, ts: float) -> None:
+        # Global: saniyelik kova; bot: dakikalık hash (tüm botlar tek HGETALL ile okunur)
+        sec = int(ts)
+        minute = sec // 60
+        global_key = f"{self.key_prefix}:global:{sec}"
+        bots_key = f"{self.key_prefix}:bots:{minute}"
+        pipe.incr(global_key)
+        pipe.expire(global_key, self.global_window * 2)
+        pipe.hincrby(bots_key, str(bot_id), 1)
+        pipe.expire(bots_key, self._bucket_ttl)
+        # Bayrak son kovadan önce düşmesin: yeni worker canlı kovalara tekrar hydrate etmez
+        pipe.set(self._hydrated_key, "1", ex=self._bucket_ttl)
+
+    def _snapshot(self) -> Optional[Dict[str, Any]]:
+        now = self.clock()
+        if self._shared_snapshot is not None and now - self._shared_snapshot_at < 1.0:
+            return self._shared_snapshot
+        try:
+            sec = int(now)
+            minute = sec // 60
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.mget([f"{self.key_prefix}:global:{s}" for s in range(sec - self.global_window + 1, sec + 1)])
+            minutes = range(minute - self.bot_window // 60 + 1, minute + 1)
+            for m in minutes:
+                pipe.hgetall(f"{self.key_prefix}:bots:{m}")
+            results = pipe.execute()
+        except Exception as exc:
+            logger.warning("Shared rate counter read failed, using local counters: %s", exc)
+            return None
+
+        global_count = sum(int(v) for v in results[0] if v)
+        bots: Counter = Counter()
+        for mapping in results[1:]:
+            for bot_id, value in (mapping or {}).items():
+                bots[int(bot_id)] += int(value)
+
+        self._shared_snapshot = {"global": global_count, "bots": dict(bots)}
+        self._shared_snapshot_at = now
+        return self._shared_snapshot
@@ -0,0 +1,249 @@
+"""
+Roster Snapshot
+
+In-process snapshot of enabled bots and chats used by pick_chat / pick_bot.
+The engine used to load every enabled Chat and Bot row (including JSON
+persona/emotion/speed profiles) on every tick just to pick one at random;
+the snapshot keeps only lightweight records and is rebuilt when the roster
+actually changes:
+
+- a 'config_updates' message about bots/chats calls invalidate()
+- the roster version counter moves (Redis key 'roster:version', or the
+  'roster_version' settings row when Redis is not available)
+- as a safety net, after max_age seconds
+
+Active hours are parsed once per rebuild and worker-shard membership
+(bot_id % total_workers == worker_id, or the lease-based owns_bot predicate)
+is precomputed; lease ownership changes call invalidate().
+"""
+
+import logging
+import random
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.behavior.bot_selector import parse_ranges
+from clock import monotonic, now_local
+
+logger = logging.getLogger("behavior.roster")
+
+ROSTER_VERSION_KEY = "roster:version"
+ROSTER_VERSION_SETTING = "roster_version"
+
+# Bu event'ler bot/chat listesini (veya active_hours/is_enabled alanlarını) değiştirir
+ROSTER_EVENT_TYPES = frozenset({
+    "bot_added",
+    "bot_updated",
+    "bot_deleted",
+    "chat_added",
+    "chat_updated",
+    "chat_deleted",
+    "demo_bots_created",
+    "roster_changed",
+})
+
+
+@dataclass(frozen=True)
+class BotRecord:
+    """Lightweight view of an enabled bot."""
+
+    id: int
+    username: Optional[str]
+    # None: active_hours tanımlı değil; () : tanımlı ama hiçbir aralık parse edilemedi
+    active_ranges: Optional[Tuple[Tuple[int, int], ...]] = None
+    in_shard: bool = True
+
+    def is_active_at(self, minute_of_day: int) -> bool:
+        if self.active_ranges is None:
+            return True  # Kısıtlama yok = her zaman aktif
+        for start, end in self.active_ranges:
+            if start <= end:
+                if start <= minute_of_day <= end:
+                    return True
+            elif minute_of_day >= start or minute_of_day <= end:
+                # Gece yarısını geçen aralık (22:00-02:00)
+                return True
+        return False
+
+
+@dataclass(frozen=True)
+class ChatRecord:
+    """Lightweight view of an enabled chat."""
+
+    id: int
+    chat_id: str
+
+
+@dataclass(frozen=True)
+class RosterSnapshot:
+    version: Any
+    bots: Tuple[BotRecord, ...] = ()
+    chats: Tuple[ChatRecord, ...] = ()
+    shard_bots: Tuple[BotRecord, ...] = ()
+    chat_ids: FrozenSet[int] = field(default_factory=frozenset)
+
+    def random_chat(self) -> Optional[ChatRecord]:
+        return random.choice(self.chats) if self.chats else None
+
+    def active_shard_bots(self, moment: Optional[datetime] = None) -> List[BotRecord]:
+        local = moment or now_local()
+        minute_of_day = local.hour * 60 + local.minute
+        return [b for b in self.shard_bots if b.is_active_at(minute_of_day)]
+
+
+class RosterCache:
+    """
+    Versioned roster snapshot holder.
+
+    Args:
+        redis_client: Sync Redis client for the version counter (optional)
+        worker_id: This worker's shard index
+        total_workers: Number of worker shards
+        owns_bot: Dynamic shard predicate (lease mode); overrides worker_id/total_workers
+        version_check_interval: Seconds between version counter checks
+        max_age: Rebuild unconditionally after this many seconds
+        clock: Monotonic time source
+    """
+
+    def __init__(
+        self,
+        *,
+        redis_client: Any = None,
+        worker_id: int = 0,
+        total_workers: int = 1,
+        owns_bot: Optional[Callable[[int], bool]] = None,
+        version_check_interval: float = 5.0,
+        max_age: float = 300.0,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.redis = redis_client
+        self.worker_id = int(worker_id)
+        self.total_workers = max(1, int(total_workers))
+        self.owns_bot = owns_bot
+        self.version_check_interval = max(0.0, float(version_check_interval))
+        self.max_age = max(1.0, float(max_age))
+        self.clock = clock
+
+        self._snapshot: Optional[RosterSnapshot] = None
+        self._built_at = 0.0
+        self._checked_at = 0.0
+        self._dirty = True
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Bir sonraki erişimde snapshot yeniden oluşturulsun."""
+        self._dirty = True
+
+    def get(self, db: Session) -> RosterSnapshot:
+        """Güncel snapshot'ı döndür; gerekirse DB'den yeniden oluştur."""
+        now = self.clock()
+        snapshot = self._snapshot
+        if snapshot is not None and not self._dirty:
+            if now - self._built_at < self.max_age:
+                if now - self._checked_at < self.version_check_interval:
+                    return snapshot
+                self._checked_at = now
+                if self._current_version(db) == snapshot.version:
+                    return snapshot
+
+        with self._lock:
+            self._snapshot = self._build(db)
+            self._built_at = self._checked_at = self.clock()
+            self._dirty = False
+            return self._snapshot
+
+    def _in_shard(self, bot_id: int) -> bool:
+        if self.owns_bot is not None:
+            return bool(self.owns_bot(bot_id))
+        return self.total_workers <= 1 or bot_id % self.total_workers == self.worker_id
+
+    def _current_version(self, db: Session) -> Any:
+        if self.redis is not None:
+            try:
+                return self.redis.get(ROSTER_VERSION_KEY)
+            except Exception as exc:
+                logger.debug("Roster version read from Redis failed: %s", exc)
+        try:
+            from database import Setting
+
+            row = db.get(Setting, ROSTER_VERSION_SETTING)
+            return row.value if row is not None else None
+        except Exception as exc:
+            logger.debug("Roster version read from settings failed: %s", exc)
+            return None
+
+    def _build(self, db: Session) -> RosterSnapshot:
+        from database import Bot, Chat
+
+        version = self._current_version(db)
+
+        # Sadece seçim için gereken kolonlar (persona/emotion JSON'ları yüklenmez)
+        bot_rows = (
+            db.query(Bot.id, Bot.username, Bot.active_hours)
+            .filter(Bot.is_enabled.is_(True))
+            .order_by(Bot.id.asc())
+            .all()
+        )
+        chat_rows = (
+            db.query(Chat.id, Chat.chat_id)
+            .filter(Chat.is_enabled.is_(True))
+            .order_by(Chat.id.asc())
+            .all()
+        )
+
+        bots = tuple(
+            BotRecord(
+                id=bot_id,
+                username=username,
+                active_ranges=(
+                    tuple(parse_ranges(active_hours)) if isinstance(active_hours, list) and active_hours else None
+                ),
+                in_shard=self._in_shard(bot_id),
+            )
+            for bot_id, username, active_hours in bot_rows
+        )
+        chats = tuple(ChatRecord(id=chat_db_id, chat_id=chat_id) for chat_db_id, chat_id in chat_rows)
+
+        snapshot = RosterSnapshot(
+            version=version,
+            bots=bots,
+            chats=chats,
+            shard_bots=tuple(b for b in bots if b.in_shard),
+            chat_ids=frozenset(c.id for c in chats),
+        )
+        logger.debug(
+            "Roster rebuilt: %d bots (%d in shard), %d chats, version=%s",
+            len(bots), len(snapshot.shard_bots), len(chats), version,
+        )
+        return snapshot
+
+
+def bump_roster_version(db: Session, redis_client: Any = None) -> None:
+    """
+    Bot/chat listesi değiştiğinde roster sürüm sayacını artır.
+
+    Settings satırı her zaman güncellenir (Redis olmayan kurulumlar için);
+    Redis varsa 'roster:version' anahtarı da artırılır.
+    """
+    from database import Setting
+
+    try:
+        row = db.get(Setting, ROSTER_VERSION_SETTING)
+        if row is None:
+            db.add(Setting(key=ROSTER_VERSION_SETTING, value=1))
+        else:
+            row.value = int(row.value or 0) + 1
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        logger.warning("Roster version bump (settings) failed: %s", exc)
+
+    if redis_client is not None:
+        try:
+            redis_client.incr(ROSTER_VERSION_KEY)
+        except Exception as exc:
+            logger.warning("Roster version bump (redis) failed: %s", exc)
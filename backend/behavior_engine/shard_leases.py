@@ -0,0 +1,240 @@
+"""
+Lease-Based Bot Sharding
+
+Replaces the static ``bot_id % TOTAL_WORKERS == WORKER_ID`` split with
+Redis-backed partition leases:
+
+- Bots map to a fixed number of partitions (bot_id % partitions).
+- Every worker heartbeats into a membership set; members whose heartbeat is
+  older than lease_ttl are considered dead.
+- A consistent-hash ring over live members decides which partitions each
+  worker should own, so a join/leave only moves ~1/N of the partitions.
+- A worker serves a partition only while it holds that partition's lease
+  (atomic acquire-or-renew with EX). Leases are renewed on every heartbeat;
+  a crashed worker's leases expire after lease_ttl and are picked up by the
+  new owner.
+
+No WORKER_ID/TOTAL_WORKERS coordination is needed, so worker replicas can be
+scaled freely (e.g. by an HPA).
+"""
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger("behavior.shards")
+
+# Lease boşsa al, bizdeyse yenile; başkasındaysa (düşene kadar) dokunma
+_ACQUIRE_SCRIPT = """
+local owner = redis.call('get', KEYS[1])
+if owner == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+if not owner then
+    redis.call('set', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return 1
+end
+return 0
+"""
+# Lease'i yalnızca sahibi bırakır
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+def default_worker_name() -> str:
+    """POD_NAME / HOSTNAME + pid (k8s'te pod adı benzersizdir)."""
+    host = os.getenv("POD_NAME") or os.getenv("HOSTNAME") or socket.gethostname()
+    return f"{host}:{os.getpid()}"
+
+
+class ConsistentHashRing:
+    """
+    Consistent-hash ring with virtual nodes.
+
+    Args:
+        members: Worker names
+        vnodes: Virtual nodes per member (smooths the distribution)
+    """
+
+    def __init__(self, members: Iterable[str], vnodes: int = 64) -> None:
+        self.members = tuple(sorted(set(members)))
+        points: List[Tuple[int, str]] = []
+        for member in self.members:
+            for i in range(vnodes):
+                points.append((_hash(f"{member}#{i}"), member))
+        points.sort()
+        self._keys = [p[0] for p in points]
+        self._owners = [p[1] for p in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._keys:
+            return None
+        idx = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._owners[idx]
+
+
+class ShardLeaseManager:
+    """
+    Worker membership, partition assignment and lease bookkeeping.
+
+    Args:
+        redis_client: Sync Redis client (decode_responses=True)
+        worker_name: Unique worker name (default: pod/host name + pid)
+        partitions: Number of bot partitions
+        heartbeat_interval: Seconds between heartbeat/rebalance rounds
+        lease_ttl: Lease and membership expiry (seconds)
+        on_change: Called with the new owned partition set when it changes
+        key_prefix: Redis key prefix
+        clock: Epoch-seconds time source
+    """
+
+    def __init__(
+        self,
+        redis_client: Any,
+        *,
+        worker_name: Optional[str] = None,
+        partitions: int = 64,
+        heartbeat_interval: float = 5.0,
+        lease_ttl: int = 15,
+        on_change: Optional[Callable[[FrozenSet[int]], None]] = None,
+        key_prefix: str = "shards",
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.redis = redis_client
+        self.worker_name = worker_name or default_worker_name()
+        self.partitions = max(1, int(partitions))
+        self.heartbeat_interval = max(0.1, float(heartbeat_interval))
+        self.lease_ttl = max(1, int(lease_ttl))
+        self.on_change = on_change
+        self.key_prefix = key_prefix
+        self.clock = clock
+
+        self._owned: FrozenSet[int] = frozenset()
+        self._members: Tuple[str, ...] = ()
+
+    # ---- Public API ----
+    @property
+    def owned_partitions(self) -> FrozenSet[int]:
+        return self._owned
+
+    @property
+    def members(self) -> Tuple[str, ...]:
+        return self._members
+
+    def partition_for_bot(self, bot_id: int) -> int:
+        return int(bot_id) % self.partitions
+
+    def owns_bot(self, bot_id: int) -> bool:
+        return self.partition_for_bot(bot_id) in self._owned
+
+    def step(self) -> FrozenSet[int]:
+        """Tek tur: heartbeat, üyelik okuma, hedef partition'lar ve lease'ler."""
+        members = self._heartbeat()
+        ring = ConsistentHashRing(members)
+        desired = {p for p in range(self.partitions) if ring.owner(f"partition:{p}") == self.worker_name}
+
+        owned: Set[int] = set()
+        pipe = self.redis.pipeline(transaction=False)
+        ordered = sorted(desired)
+        for p in ordered:
+            # Eski sahibin lease'i düşene kadar alınamaz (çift sahiplik yok)
+            pipe.eval(_ACQUIRE_SCRIPT, 1, self._lease_key(p), self.worker_name, self.lease_ttl)
+        for p, ok in zip(ordered, pipe.execute() if ordered else []):
+            if ok:
+                owned.add(p)
+
+        # Artık bize düşmeyen partition'ları hemen bırak (yeni sahip beklemesin)
+        released = self._owned - desired
+        if released:
+            pipe = self.redis.pipeline(transaction=False)
+            for p in released:
+                pipe.eval(_RELEASE_SCRIPT, 1, self._lease_key(p), self.worker_name)
+            pipe.execute()
+
+        self._set_owned(frozenset(owned))
+        return self._owned
+
+    async def run(self) -> None:
+        """Heartbeat/rebalance döngüsü (sync Redis çağrıları thread'de)."""
+        logger.info(
+            "Shard lease manager started: worker=%s partitions=%d ttl=%ds",
+            self.worker_name, self.partitions, self.lease_ttl,
+        )
+        while True:
+            try:
+                await asyncio.to_thread(self.step)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # Redis erişilemezse lease'ler zaten düşer; kendi payımızı da bırak
+                logger.warning("Shard lease round failed: %s", exc)
+                self._set_owned(frozenset())
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def release_all(self) -> None:
+        """Kapanışta lease'leri ve üyeliği bırak (devir TTL beklemeden olur)."""
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for p in self._owned:
+                pipe.eval(_RELEASE_SCRIPT, 1, self._lease_key(p), self.worker_name)
+            pipe.zrem(self._members_key, self.worker_name)
+            pipe.execute()
+        except Exception as exc:
+            logger.warning("Shard lease release failed: %s", exc)
+        self._set_owned(frozenset())
+
+    # ---- Internals ----
+    @property
+    def _members_key(self) -> str:
+        return f"{self.key_prefix}:members"
+
+    def _lease_key(self, partition: int) -> str:
+        return f"{self.key_prefix}:lease:{partition}"
+
+    def _heartbeat(self) -> Tuple[str, ...]:
+        now = self.clock()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zadd(self._members_key, {self.worker_name: now})
+        pipe.zremrangebyscore(self._members_key, "-inf", now - self.lease_ttl)
+        pipe.zrange(self._members_key, 0, -1)
+        members = tuple(sorted(pipe.execute()[2]))
+        if members != self._members:
+            logger.info("Shard membership changed: %d workers %s", len(members), list(members))
+            self._members = members
+        return members
+
+    def _set_owned(self, owned: FrozenSet[int]) -> None:
+        if owned == self._owned:
+            return
+        gained = sorted(owned - self._owned)
+        lost = sorted(self._owned - owned)
+        self._owned = owned
+        logger.info(
+            "Shard ownership changed: %d partitions (gained=%s lost=%s)",
+            len(owned), gained, lost,
+        )
+        if self.on_change is not None:
+            try:
+                self.on_change(owned)
+            except Exception as exc:
+                logger.debug("Shard on_change callback failed: %s", exc)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker": self.worker_name,
+            "members": list(self._members),
+            "owned_partitions": sorted(self._owned),
+        }
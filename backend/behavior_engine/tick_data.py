@@ -0,0 +1,435 @@
+"""
+Tick Data Loader
+
+Loads every database read a generation tick needs once the chat and bot are
+chosen, without blocking the event loop:
+
+- recent chat history (with bot/chat eagerly loaded) and reply counts for it
+- bot stances and holdings
+- bot memories
+- past-message candidates for the reference system
+
+load_batch() does the same for a priority batch: every entity type is read
+with one IN (...) query (history and past messages with a per-chat / per-bot
+window), so a batch costs a constant number of round trips and items that
+share a chat or bot share its rows.
+
+With an AsyncSession factory (database_async, requires an async driver such
+as asyncpg/aiosqlite) the queries run concurrently on separate connections.
+Checkouts are capped loader-wide (max_connections, sized to the async pool)
+so concurrent ticks queue for a connection instead of exhausting the pool.
+Without one they run in a worker thread on a single sync Session, so DB
+latency still overlaps with other chats' work instead of stalling the loop.
+
+duplicate_exists() runs the exact-match dedup check the same way: one
+EXISTS on (bot_id, text_hash, created_at) per candidate text. The text is
+only known after generation, so it is not part of the prefetch.
+"""
+
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import exists, func, select
+from sqlalchemy.orm import Session, selectinload
+
+from backend.behavior import now_utc
+
+logger = logging.getLogger("behavior.tick_data")
+
+
+@dataclass
+class TickData:
+    """Rows read for one (chat, bot) tick. Message lists are newest first."""
+
+    recent_messages: List[Any] = field(default_factory=list)
+    reply_counts: Dict[int, int] = field(default_factory=dict)
+    stances: List[Any] = field(default_factory=list)
+    holdings: List[Any] = field(default_factory=list)
+    memories: List[Any] = field(default_factory=list)
+    past_messages: List[Any] = field(default_factory=list)
+
+
+@dataclass
+class BatchContext:
+    """Rows read for a priority batch, keyed by id. Message lists are newest first."""
+
+    bots: Dict[int, Any] = field(default_factory=dict)
+    chats: Dict[int, Any] = field(default_factory=dict)
+    incoming: Dict[Tuple[int, int], Any] = field(default_factory=dict)
+    recent_messages: Dict[int, List[Any]] = field(default_factory=dict)
+    stances: Dict[int, List[Any]] = field(default_factory=dict)
+    holdings: Dict[int, List[Any]] = field(default_factory=dict)
+    memories: Dict[int, List[Any]] = field(default_factory=dict)
+    past_messages: Dict[int, List[Any]] = field(default_factory=dict)
+
+
+def _group_by(rows: Iterable[Any], attr: str) -> Dict[int, List[Any]]:
+    grouped: Dict[int, List[Any]] = defaultdict(list)
+    for row in rows:
+        grouped[getattr(row, attr)].append(row)
+    return dict(grouped)
+
+
+# ---- Statements (sync Session ve AsyncSession için ortak) ----
+def recent_messages_stmt(chat_db_id: int, limit: int):
+    from database import Message
+
+    return (
+        select(Message)
+        .options(selectinload(Message.bot), selectinload(Message.chat))
+        .where(Message.chat_db_id == chat_db_id)
+        .order_by(Message.created_at.desc())
+        .limit(limit)
+    )
+
+
+def reply_counts_stmt(chat_db_id: int, window: int):
+    """Son `window` mesaja gelen cevap sayıları (tek gruplu sorgu, alt sorgulu)."""
+    from database import Message
+
+    window_ids = (
+        select(Message.telegram_message_id)
+        .where(Message.chat_db_id == chat_db_id)
+        .order_by(Message.created_at.desc())
+        .limit(window)
+        .scalar_subquery()
+    )
+    return (
+        select(Message.reply_to_message_id, func.count(Message.id))
+        .where(
+            Message.chat_db_id == chat_db_id,
+            Message.reply_to_message_id.in_(window_ids),
+        )
+        .group_by(Message.reply_to_message_id)
+    )
+
+
+def bot_stances_stmt(bot_id: int):
+    from database import BotStance
+
+    return select(BotStance).where(BotStance.bot_id == bot_id).order_by(BotStance.updated_at.desc())
+
+
+def bot_holdings_stmt(bot_id: int):
+    from database import BotHolding
+
+    return select(BotHolding).where(BotHolding.bot_id == bot_id).order_by(BotHolding.updated_at.desc())
+
+
+def bot_memories_stmt(bot_id: int, limit: int):
+    from database import BotMemory
+
+    return (
+        select(BotMemory)
+        .where(BotMemory.bot_id == bot_id)
+        .order_by(BotMemory.relevance_score.desc(), BotMemory.last_used_at.desc())
+        .limit(limit)
+    )
+
+
+def past_messages_stmt(bot_id: int, days_back: int, limit: int = 50):
+    """find_relevant_past_messages ile aynı aday penceresi (son 2 saat hariç)."""
+    from database import Message
+
+    now = now_utc()
+    return (
+        select(Message)
+        .where(
+            Message.bot_id == bot_id,
+            Message.created_at >= now - timedelta(days=days_back),
+            Message.created_at < now - timedelta(hours=2),
+            Message.msg_metadata.isnot(None),
+        )
+        .order_by(Message.created_at.desc())
+        .limit(limit)
+    )
+
+
+def duplicate_exists_stmt(bot_id: int, text_hash: str, since: datetime):
+    """Bot `since`'ten beri bu text_hash'li mesaj gönderdi mi (ix_messages_bot_text_hash_created)."""
+    from database import Message
+
+    return select(
+        exists().where(
+            Message.bot_id == bot_id,
+            Message.text_hash == text_hash,
+            Message.created_at >= since,
+        )
+    )
+
+
+# ---- Batch statements (IN listeleri, öğe sayısından bağımsız sorgu sayısı) ----
+def _ranked_messages_stmt(partition_col: Any, where: List[Any], limit: int):
+    """Her partition (chat/bot) için en yeni `limit` mesaj: ROW_NUMBER() penceresi."""
+    from database import Message
+
+    ranked = (
+        select(
+            Message.id.label("id"),
+            func.row_number()
+            .over(partition_by=partition_col, order_by=(Message.created_at.desc(), Message.id.desc()))
+            .label("rn"),
+        )
+        .where(*where)
+        .subquery()
+    )
+    return (
+        select(Message)
+        .options(selectinload(Message.bot), selectinload(Message.chat))
+        .join(ranked, ranked.c.id == Message.id)
+        .where(ranked.c.rn <= limit)
+        .order_by(Message.created_at.desc(), Message.id.desc())
+    )
+
+
+def _ranked_memories_stmt(bot_ids: List[int], limit: int):
+    """Her bot için en alakalı `limit` hafıza (bot_memories_stmt sıralamasıyla, ROW_NUMBER() penceresi)."""
+    from database import BotMemory
+
+    order = (BotMemory.relevance_score.desc(), BotMemory.last_used_at.desc())
+    ranked = (
+        select(
+            BotMemory.id.label("id"),
+            func.row_number()
+            .over(partition_by=BotMemory.bot_id, order_by=order + (BotMemory.id.desc(),))
+            .label("rn"),
+        )
+        .where(BotMemory.bot_id.in_(bot_ids))
+        .subquery()
+    )
+    return (
+        select(BotMemory)
+        .join(ranked, ranked.c.id == BotMemory.id)
+        .where(ranked.c.rn <= limit)
+        .order_by(*order, BotMemory.id.desc())
+    )
+
+
+def batch_statements(
+    bot_ids: List[int],
+    chat_ids: List[int],
+    telegram_message_ids: List[int],
+    *,
+    recent_limit: int,
+    past_days: int,
+    memory_limit: int = 8,
+) -> Dict[str, Any]:
+    from database import Bot, BotHolding, BotStance, Chat, Message
+
+    now = now_utc()
+    return {
+        "bots": select(Bot).where(Bot.id.in_(bot_ids), Bot.is_enabled.is_(True)),
+        "chats": select(Chat).where(Chat.id.in_(chat_ids)),
+        "incoming": (
+            select(Message)
+            .options(selectinload(Message.bot), selectinload(Message.chat))
+            .where(Message.chat_db_id.in_(chat_ids), Message.telegram_message_id.in_(telegram_message_ids))
+        ),
+        "recent_messages": _ranked_messages_stmt(
+            Message.chat_db_id, [Message.chat_db_id.in_(chat_ids)], recent_limit
+        ),
+        "stances": (
+            select(BotStance).where(BotStance.bot_id.in_(bot_ids)).order_by(BotStance.updated_at.desc())
+        ),
+        "holdings": (
+            select(BotHolding).where(BotHolding.bot_id.in_(bot_ids)).order_by(BotHolding.updated_at.desc())
+        ),
+        "memories": _ranked_memories_stmt(bot_ids, memory_limit),
+        "past_messages": _ranked_messages_stmt(
+            Message.bot_id,
+            [
+                Message.bot_id.in_(bot_ids),
+                Message.created_at >= now - timedelta(days=past_days),
+                Message.created_at < now - timedelta(hours=2),
+                Message.msg_metadata.isnot(None),
+            ],
+            50,
+        ),
+    }
+
+
+def create_async_session_factory() -> Optional[Callable[[], Any]]:
+    """
+    database_async.AsyncSessionLocal'ı döndür; async sürücü yoksa None.
+
+    create_async_engine import sırasında sürücüyü yüklediği için hata burada
+    yakalanır ve loader thread'li sync yola düşer.
+    """
+    try:
+        from database_async import AsyncSessionLocal
+    except Exception as exc:
+        logger.warning("Async DB unavailable (%s); tick reads run in a worker thread.", exc)
+        return None
+    return AsyncSessionLocal
+
+
+class TickDataLoader:
+    """
+    Loads TickData for a chat/bot pair.
+
+    Args:
+        session_factory: Sync Session factory (thread fallback)
+        async_session_factory: AsyncSession factory; None disables the async path
+        max_connections: Upper bound on concurrently open AsyncSessions across
+            all loads (default: async pool size)
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        async_session_factory: Optional[Callable[[], Any]] = None,
+        max_connections: Optional[int] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        if max_connections is None:
+            max_connections = int(os.getenv("ASYNC_DB_POOL_SIZE", "20"))
+        self.max_connections = max(1, int(max_connections))
+        self._connection_slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def mode(self) -> str:
+        return "async" if self.async_session_factory is not None else "thread"
+
+    async def load(
+        self,
+        *,
+        chat_db_id: int,
+        bot_id: int,
+        recent_limit: int = 40,
+        reply_window: int = 30,
+        memory_limit: int = 8,
+        past_days: int = 7,
+    ) -> TickData:
+        """
+        Tick için gereken tüm satırları oku.
+
+        Returns:
+            TickData (ORM nesneleri session'dan ayrılmış, ilişkiler önceden yüklü)
+        """
+        statements = {
+            "recent_messages": (recent_messages_stmt(chat_db_id, recent_limit), True),
+            "reply_counts": (reply_counts_stmt(chat_db_id, reply_window), False),
+            "stances": (bot_stances_stmt(bot_id), True),
+            "holdings": (bot_holdings_stmt(bot_id), True),
+            "memories": (bot_memories_stmt(bot_id, memory_limit), True),
+            "past_messages": (past_messages_stmt(bot_id, past_days), True),
+        }
+        rows = await self._execute_all(statements)
+        rows["reply_counts"] = {
+            reply_to: count for reply_to, count in rows["reply_counts"] if reply_to is not None
+        }
+        return TickData(**rows)
+
+    async def duplicate_exists(self, *, bot_id: int, text_hash: str, since: datetime) -> bool:
+        """
+        Exact-match dedup lookup, off the event loop.
+
+        Args:
+            bot_id: Bot ID
+            text_hash: backend.behavior.text_hash of the candidate text
+            since: Start of the dedup window
+
+        Returns:
+            True if the bot sent a message with this hash since `since`
+        """
+        rows = await self._execute_all({"exists": (duplicate_exists_stmt(bot_id, text_hash, since), True)})
+        return bool(rows["exists"] and rows["exists"][0])
+
+    async def load_batch(
+        self,
+        items: List[Dict[str, Any]],
+        *,
+        recent_limit: int = 40,
+        memory_limit: int = 8,
+        past_days: int = 7,
+    ) -> BatchContext:
+        """
+        Priority batch'i için bot, chat, gelen mesaj ve bağlam satırlarını toplu oku.
+
+        Args:
+            items: Priority queue item'ları (bot_id, chat_id, telegram_message_id)
+
+        Returns:
+            BatchContext (id'ye göre sözlükler; aynı chat/bot'u hedefleyen item'lar paylaşır)
+        """
+        bot_ids = sorted({int(i["bot_id"]) for i in items if i.get("bot_id")})
+        chat_ids = sorted({int(i["chat_id"]) for i in items if i.get("chat_id")})
+        message_ids = sorted({
+            int(i["telegram_message_id"]) for i in items if i.get("telegram_message_id") is not None
+        })
+        if not bot_ids or not chat_ids:
+            return BatchContext()
+
+        statements = {
+            name: (stmt, True)
+            for name, stmt in batch_statements(
+                bot_ids, chat_ids, message_ids,
+                recent_limit=recent_limit, past_days=past_days, memory_limit=memory_limit,
+            ).items()
+        }
+        rows = await self._execute_all(statements)
+
+        wanted = {
+            (int(i["chat_id"]), int(i["telegram_message_id"]))
+            for i in items
+            if i.get("chat_id") and i.get("telegram_message_id") is not None
+        }
+        return BatchContext(
+            bots={b.id: b for b in rows["bots"]},
+            chats={c.id: c for c in rows["chats"]},
+            incoming={
+                (m.chat_db_id, m.telegram_message_id): m
+                for m in rows["incoming"]
+                if (m.chat_db_id, m.telegram_message_id) in wanted
+            },
+            recent_messages=_group_by(rows["recent_messages"], "chat_db_id"),
+            stances=_group_by(rows["stances"], "bot_id"),
+            holdings=_group_by(rows["holdings"], "bot_id"),
+            memories=_group_by(rows["memories"], "bot_id"),
+            past_messages=_group_by(rows["past_messages"], "bot_id"),
+        )
+
+    async def _execute_all(self, statements: Dict[str, Any]) -> Dict[str, List[Any]]:
+        if self.async_session_factory is not None:
+            results = await asyncio.gather(*(
+                self._execute_async(stmt, scalars) for stmt, scalars in statements.values()
+            ))
+            return dict(zip(statements.keys(), results))
+        return await asyncio.to_thread(self._load_sync, statements)
+
+    def _slots(self) -> asyncio.Semaphore:
+        # Semaphore loop'a bağlanır; loop değişirse (testler, yeniden başlatma) yenisi kurulur
+        loop = asyncio.get_running_loop()
+        if self._connection_slots is None or self._slots_loop is not loop:
+            self._connection_slots = asyncio.Semaphore(self.max_connections)
+            self._slots_loop = loop
+        return self._connection_slots
+
+    async def _execute_async(self, stmt: Any, scalars: bool) -> List[Any]:
+        # Her sorgu kendi bağlantısında: round trip'ler paralel ilerler.
+        # Toplam açık session sayısı havuz boyutuyla sınırlı; fazlası slot bekler
+        async with self._slots():
+            async with self.async_session_factory() as session:
+                result = await session.execute(stmt)
+                return list(result.scalars().all() if scalars else result.all())
+
+    def _load_sync(self, statements: Dict[str, Any]) -> Dict[str, List[Any]]:
+        db = self.session_factory()
+        try:
+            out: Dict[str, List[Any]] = {}
+            for name, (stmt, scalars) in statements.items():
+                result = db.execute(stmt)
+                out[name] = list(result.scalars().all() if scalars else result.all())
+            # Nesneler session kapandıktan sonra da okunabilsin
+            db.expunge_all()
+            return out
+        finally:
+            db.close()
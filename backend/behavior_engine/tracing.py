@@ -0,0 +1,184 @@
+"""
+Stage Tracing
+
+Per-stage latency for the tick pipeline and the priority paths. Until now
+message_generation_duration_seconds was the only timing (tick start to
+commit), so a throughput drop could not be attributed to settings, roster
+selection, context building, LLM generation, dedup, typing or the Telegram
+send.
+
+- A Trace is opened per tick / priority message / priority batch and bound
+  to the current asyncio context (ContextVar), so helpers deep in the call
+  chain open spans with span("stage") without threading a parameter.
+- Every span is observed into tick_stage_duration_seconds{stage, outcome};
+  the trace total is observed as stage="total".
+- With TICK_TRACE_LOG=true one structured (JSON) log line is emitted per
+  traced message on the 'behavior.trace' logger.
+- Trace sinks (add_trace_sink) receive every finished trace; the throughput
+  benchmark uses this to compute per-stage percentiles.
+
+A span is two perf_counter() calls, a list append and a cached histogram
+child lookup: well under the cost of the cheapest stage it measures.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from contextvars import ContextVar, Token
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("behavior.trace")
+
+try:
+    from backend.metrics import tick_stage_duration_seconds as _STAGE_HISTOGRAM
+except Exception:  # prometheus_client yoksa sadece trace log
+    _STAGE_HISTOGRAM = None
+
+TRACE_LOG_ENABLED = os.getenv("TICK_TRACE_LOG", "false").lower() in {"1", "true", "yes"}
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("behavior_trace", default=None)
+_histogram_children: Dict[Tuple[str, str], Any] = {}
+
+TraceSink = Callable[["Trace", float], None]
+_trace_sinks: Tuple[TraceSink, ...] = ()
+
+
+def _observe(stage: str, outcome: str, seconds: float) -> None:
+    if _STAGE_HISTOGRAM is None:
+        return
+    key = (stage, outcome)
+    child = _histogram_children.get(key)
+    if child is None:
+        child = _histogram_children[key] = _STAGE_HISTOGRAM.labels(stage=stage, outcome=outcome)
+    child.observe(seconds)
+
+
+class Span:
+    """Timed stage; set ``outcome`` inside the block to label a skip etc."""
+
+    __slots__ = ("trace", "stage", "outcome", "_start")
+
+    def __init__(self, trace: Optional["Trace"], stage: str) -> None:
+        self.trace = trace
+        self.stage = stage
+        self.outcome = "ok"
+        self._start = 0.0
+
+    def __enter__(self) -> "Span":
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = perf_counter() - self._start
+        if exc_type is not None and self.outcome == "ok":
+            self.outcome = "cancelled" if issubclass(exc_type, asyncio.CancelledError) else "error"
+        if self.trace is not None:
+            self.trace.record(self.stage, elapsed, self.outcome)
+        else:
+            _observe(self.stage, self.outcome, elapsed)
+        return False
+
+
+class Trace:
+    """
+    Stage timings of one tick / priority message.
+
+    Args:
+        kind: Trace type ('tick', 'priority', 'priority_batch')
+        log_enabled: Emit the structured log line on finish (default: TICK_TRACE_LOG)
+        **fields: Extra fields for the log line (chat_db_id, bot_id, ...)
+    """
+
+    __slots__ = ("kind", "fields", "spans", "outcome", "log_enabled", "_start", "_lap", "_token")
+
+    def __init__(self, kind: str, *, log_enabled: Optional[bool] = None, **fields: Any) -> None:
+        self.kind = kind
+        self.fields: Dict[str, Any] = dict(fields)
+        self.spans: List[Tuple[str, float, str]] = []
+        self.outcome = "idle"
+        self.log_enabled = TRACE_LOG_ENABLED if log_enabled is None else bool(log_enabled)
+        self._start = self._lap = perf_counter()
+        self._token: Optional[Token] = None
+
+    def span(self, stage: str) -> Span:
+        return Span(self, stage)
+
+    def record(self, stage: str, seconds: float, outcome: str = "ok") -> None:
+        self.spans.append((stage, seconds, outcome))
+        _observe(stage, outcome, seconds)
+
+    def lap(self, stage: str, outcome: str = "ok") -> None:
+        """Önceki lap'ten (ya da başlangıçtan) bu yana geçen süreyi stage olarak kaydet."""
+        now = perf_counter()
+        self.record(stage, now - self._lap, outcome)
+        self._lap = now
+
+    def annotate(self, **fields: Any) -> None:
+        self.fields.update(fields)
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Stage adı -> toplam saniye (aynı stage birden çok kez açılmış olabilir)."""
+        totals: Dict[str, float] = {}
+        for stage, seconds, _ in self.spans:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def activate(self) -> "Trace":
+        """Trace'i mevcut asyncio context'ine bağla (span() bunu kullanır)."""
+        self._token = _current_trace.set(self)
+        return self
+
+    def finish(self, outcome: Optional[str] = None) -> float:
+        """
+        Trace'i kapat: toplam süreyi kaydet, context'ten ayır, gerekiyorsa logla.
+
+        Returns:
+            Total seconds since the trace was opened
+        """
+        if outcome is not None:
+            self.outcome = outcome
+        total = perf_counter() - self._start
+        if self._token is not None:
+            _current_trace.reset(self._token)
+            self._token = None
+        if self.outcome == "idle":
+            return total  # Chat/bot seçilmeden biten tick'ler dağılımı bozmasın
+
+        _observe("total", self.outcome, total)
+        for sink in _trace_sinks:
+            try:
+                sink(self, total)
+            except Exception as exc:
+                logger.debug("Trace sink failed: %s", exc)
+        if self.log_enabled and logger.isEnabledFor(logging.INFO):
+            payload = {
+                "kind": self.kind,
+                "outcome": self.outcome,
+                "total_ms": round(total * 1000.0, 1),
+                "stages_ms": {k: round(v * 1000.0, 1) for k, v in self.stage_totals().items()},
+                **self.fields,
+            }
+            logger.info("trace %s", json.dumps(payload, ensure_ascii=False, default=str))
+        return total
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def span(stage: str) -> Span:
+    """Aktif trace'e bağlı span (trace yoksa sadece histogram'a yazar)."""
+    return Span(_current_trace.get(), stage)
+
+
+def add_trace_sink(sink: TraceSink) -> None:
+    """Biten (idle olmayan) her trace için ``sink(trace, total_seconds)`` çağrılsın."""
+    global _trace_sinks
+    _trace_sinks = _trace_sinks + (sink,)
+
+
+def remove_trace_sink(sink: TraceSink) -> None:
+    global _trace_sinks
+    _trace_sinks = tuple(s for s in _trace_sinks if s is not sink)
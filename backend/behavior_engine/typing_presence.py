@@ -0,0 +1,192 @@
+"""
+Typing Presence
+
+Background "typing..." indicators. The engine used to await
+TelegramClient.send_typing (a sendChatAction loop for the whole typing
+duration) right before send_message, so every message held its pipeline slot
+idle for 2-8 seconds, and messages for the same chat each ran their own
+refresh loop.
+
+Here a typing indicator is a handle on a shared presence:
+
+- start() is called as soon as a bot commits to writing (before the LLM
+  call), so the indicator is shown while the reply is being generated.
+- join(duration) waits only for what is left of the human typing time since
+  start(); usually generation already covered most of it.
+- cancel() ends the handle (after sending, or when the message is skipped).
+
+Handles for the same (bot, chat) share one refresher task, so overlapping
+messages to a chat do not send redundant sendChatAction calls. Telegram
+clears the indicator when a message is sent; if other handles are still
+open, the refresher re-sends it right away.
+"""
+
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from clock import monotonic
+
+logger = logging.getLogger("behavior.typing")
+
+SendAction = Callable[[str, Any], Awaitable[Any]]
+PresenceKey = Tuple[str, str]
+
+
+@dataclass(eq=False)
+class TypingHandle:
+    """One message's typing indicator (see TypingPresence.start)."""
+
+    presence: "TypingPresence"
+    key: PresenceKey
+    started_at: float
+    deadline: float
+    closed: bool = False
+
+    @property
+    def elapsed(self) -> float:
+        return self.presence.clock() - self.started_at
+
+    async def join(self, duration_seconds: float) -> None:
+        """Typing süresinin start()'tan bu yana kalan kısmını bekle."""
+        remaining = float(duration_seconds) - self.elapsed
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+    def cancel(self, *, message_sent: bool = False) -> None:
+        """Handle'ı kapat (idempotent). message_sent: Telegram göstergeyi sıfırladı."""
+        if not self.closed:
+            self.closed = True
+            self.presence._release(self, message_sent=message_sent)
+
+
+@dataclass(eq=False)
+class _Presence:
+    token: str
+    chat_id: Any
+    handles: Set[TypingHandle] = field(default_factory=set)
+    last_sent: Optional[float] = None
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+
+
+class TypingPresence:
+    """
+    Per-(bot, chat) coalescing scheduler for typing indicators.
+
+    Args:
+        send_action: Coroutine function ``send_action(token, chat_id)`` sending one
+            'typing' chat action
+        refresh_interval: Seconds between sendChatAction calls (Telegram shows
+            the action for ~5 seconds)
+        max_seconds: A handle expires after this long even if never cancelled
+        clock: Monotonic time source
+    """
+
+    def __init__(
+        self,
+        send_action: SendAction,
+        *,
+        refresh_interval: float = 4.0,
+        max_seconds: float = 60.0,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.send_action = send_action
+        self.refresh_interval = max(0.05, float(refresh_interval))
+        self.max_seconds = max(1.0, float(max_seconds))
+        self.clock = clock
+
+        self._presences: Dict[PresenceKey, _Presence] = {}
+        self.actions_sent = 0
+        self.coalesced = 0
+
+    @property
+    def active(self) -> int:
+        """Number of (bot, chat) pairs currently showing typing."""
+        return len(self._presences)
+
+    def start(self, token: str, chat_id: Any) -> TypingHandle:
+        """Typing göstergesini başlat (aynı bot/chat için açık presence varsa ona katıl)."""
+        key = (str(token), str(chat_id))
+        now = self.clock()
+        handle = TypingHandle(presence=self, key=key, started_at=now, deadline=now + self.max_seconds)
+
+        presence = self._presences.get(key)
+        if presence is None:
+            presence = _Presence(token=token, chat_id=chat_id)
+            self._presences[key] = presence
+            presence.handles.add(handle)
+            presence.task = asyncio.create_task(self._refresh(key, presence), name="typing_presence")
+        else:
+            presence.handles.add(handle)
+            self.coalesced += 1
+        return handle
+
+    async def aclose(self) -> None:
+        """Tüm göstergeleri durdur (kapanış)."""
+        presences = list(self._presences.values())
+        self._presences.clear()
+        for presence in presences:
+            for handle in presence.handles:
+                handle.closed = True
+            presence.handles.clear()
+            if presence.task is not None:
+                presence.task.cancel()
+        for presence in presences:
+            if presence.task is not None:
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await presence.task
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "actions_sent": self.actions_sent,
+            "coalesced": self.coalesced,
+        }
+
+    # ---- Internals ----
+    def _release(self, handle: TypingHandle, *, message_sent: bool) -> None:
+        presence = self._presences.get(handle.key)
+        if presence is None:
+            return
+        presence.handles.discard(handle)
+        if not presence.handles:
+            del self._presences[handle.key]
+            if presence.task is not None:
+                presence.task.cancel()
+        elif message_sent:
+            # Gönderilen mesaj göstergeyi söndürdü; diğer mesajlar hâlâ yazılıyor
+            presence.last_sent = None
+            presence.wakeup.set()
+
+    async def _refresh(self, key: PresenceKey, presence: _Presence) -> None:
+        try:
+            while True:
+                now = self.clock()
+                for handle in [h for h in presence.handles if h.deadline <= now]:
+                    handle.closed = True
+                    presence.handles.discard(handle)
+                if not presence.handles:
+                    break
+
+                presence.wakeup.clear()
+                if presence.last_sent is None or now - presence.last_sent >= self.refresh_interval:
+                    try:
+                        await self.send_action(presence.token, presence.chat_id)
+                        self.actions_sent += 1
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as exc:
+                        logger.debug("sendChatAction error: %s", exc)
+                    if presence.wakeup.is_set():
+                        continue  # Gönderim sırasında bir mesaj gitti: göstergeyi hemen yenile
+                    presence.last_sent = self.clock()
+
+                wait = self.refresh_interval - (self.clock() - presence.last_sent)
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(presence.wakeup.wait(), timeout=max(0.01, wait))
+        finally:
+            if self._presences.get(key) is presence:
+                del self._presences[key]
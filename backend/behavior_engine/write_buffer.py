@@ -0,0 +1,320 @@
+"""
+Write-Behind Buffer
+
+Coalesces the engine's per-message database writes:
+
+- bot Message inserts (one transaction per sent message before)
+- BotMemory usage_count / last_used_at updates (one SELECT + COMMIT per
+  memory used in a prompt before)
+
+Both are flushed as bulk statements in a single transaction on a short
+interval, when the buffer reaches a size threshold, and explicitly on
+shutdown. Until a message is flushed, readers that need it (recent chat
+history, duplicate check, last-speaker check) see it through
+pending_messages().
+
+If the bulk transaction fails with a data error (e.g. an FK violation after
+the chat was deleted), the writes are retried one at a time: the ones that
+still fail are logged and dropped, the rest are applied. Other failures
+(database unreachable) requeue the batch for the next flush.
+"""
+
+import asyncio
+import contextlib
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.behavior import now_utc, text_hash
+
+logger = logging.getLogger("behavior.write_buffer")
+
+
+@dataclass
+class PendingMessage:
+    """Read-side view of a buffered (not yet inserted) bot message."""
+
+    bot_id: Optional[int]
+    chat_db_id: int
+    telegram_message_id: Optional[int]
+    text: str
+    reply_to_message_id: Optional[int]
+    msg_metadata: Dict[str, Any]
+    created_at: datetime
+    bot: Any = None
+    chat: Any = None
+    id: Optional[int] = None
+    text_hash: Optional[str] = None
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            "bot_id": self.bot_id,
+            "chat_db_id": self.chat_db_id,
+            "telegram_message_id": self.telegram_message_id,
+            "text": self.text,
+            "text_hash": self.text_hash,
+            "reply_to_message_id": self.reply_to_message_id,
+            "msg_metadata": self.msg_metadata,
+            "created_at": self.created_at,
+        }
+
+
+@dataclass
+class _Batch:
+    messages: List[PendingMessage] = field(default_factory=list)
+    memory_uses: Counter = field(default_factory=Counter)
+    memory_last_used: Dict[int, datetime] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.messages) + len(self.memory_uses)
+
+    def merge(self, other: "_Batch") -> None:
+        self.messages.extend(other.messages)
+        self.memory_uses.update(other.memory_uses)
+        self.memory_last_used.update(other.memory_last_used)
+
+    def split(self) -> List["_Batch"]:
+        """Mesaj başına bir parça, hafıza güncellemeleri tek parça."""
+        parts = [_Batch(messages=[m]) for m in self.messages]
+        if self.memory_uses:
+            parts.append(_Batch(memory_uses=Counter(self.memory_uses), memory_last_used=dict(self.memory_last_used)))
+        return parts
+
+
+class WriteBehindBuffer:
+    """
+    Buffered Message inserts and BotMemory usage increments.
+
+    Args:
+        session_factory: Callable returning a new Session (used by flush)
+        max_items: Flush as soon as this many writes are buffered
+        flush_interval: Seconds between periodic flushes
+        on_flushed: Callback with the chat ids whose messages were inserted
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        max_items: int = 50,
+        flush_interval: float = 1.0,
+        on_flushed: Optional[Callable[[Iterable[int]], None]] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_items = max(1, int(max_items))
+        self.flush_interval = max(0.05, float(flush_interval))
+        self.on_flushed = on_flushed
+
+        self._batch = _Batch()
+        # Flush sırasında (commit bitene kadar) mesajlar okuyuculara görünür kalsın
+        self._inflight: List[PendingMessage] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._batch)
+
+    # ---- Writes ----
+    def add_message(
+        self,
+        *,
+        bot: Any,
+        chat_db_id: int,
+        telegram_message_id: Optional[int],
+        text: str,
+        reply_to_message_id: Optional[int],
+        msg_metadata: Optional[Dict[str, Any]],
+    ) -> PendingMessage:
+        """Bot mesajını insert kuyruğuna ekle."""
+        bot_id = getattr(bot, "id", None)
+        pending = PendingMessage(
+            bot_id=bot_id,
+            chat_db_id=chat_db_id,
+            telegram_message_id=telegram_message_id,
+            text=text,
+            reply_to_message_id=reply_to_message_id,
+            msg_metadata=msg_metadata or {},
+            created_at=now_utc(),
+            text_hash=text_hash(text),
+            # ORM nesnesi bağlamayız (session cascade ile çift insert olmasın)
+            bot=SimpleNamespace(
+                id=bot_id,
+                name=getattr(bot, "name", None),
+                username=getattr(bot, "username", None),
+            ) if bot is not None else None,
+        )
+        with self._lock:
+            self._batch.messages.append(pending)
+        self._maybe_wake()
+        return pending
+
+    def increment_memory_usage(self, memory_id: int, used_at: Optional[datetime] = None) -> None:
+        """BotMemory.usage_count += 1 ve last_used_at güncellemesini biriktir."""
+        used_at = used_at or now_utc()
+        with self._lock:
+            self._batch.memory_uses[memory_id] += 1
+            self._batch.memory_last_used[memory_id] = used_at
+        self._maybe_wake()
+
+    # ---- Reads ----
+    def pending_messages(
+        self,
+        *,
+        chat_db_id: Optional[int] = None,
+        bot_id: Optional[int] = None,
+    ) -> List[PendingMessage]:
+        """Henüz DB'ye yazılmamış mesajlar (en yeni önce)."""
+        with self._lock:
+            items = self._inflight + self._batch.messages
+        out = [
+            m for m in items
+            if (chat_db_id is None or m.chat_db_id == chat_db_id)
+            and (bot_id is None or m.bot_id == bot_id)
+        ]
+        out.reverse()
+        return out
+
+    # ---- Flush ----
+    def flush(self) -> int:
+        """
+        Biriken yazmaları tek transaction'da toplu olarak uygula.
+
+        Returns:
+            Number of buffered writes applied
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._batch = self._batch, _Batch()
+                self._inflight = list(batch.messages)
+            if not len(batch):
+                return 0
+
+            db = self.session_factory()
+            try:
+                self._apply(db, batch)
+                db.commit()
+                applied, retry = batch, _Batch()
+            except (IntegrityError, DataError) as exc:
+                db.rollback()
+                logger.warning("Write-behind flush failed (%d writes), retrying one by one: %s", len(batch), exc)
+                applied, retry = self._apply_one_by_one(db, batch)
+            except Exception as exc:
+                db.rollback()
+                logger.error("Write-behind flush failed (%d writes), requeued: %s", len(batch), exc)
+                applied, retry = _Batch(), batch
+            finally:
+                db.close()
+
+            with self._lock:
+                self._inflight = []
+                if len(retry):
+                    self._requeue(retry)
+
+        chat_ids = {m.chat_db_id for m in applied.messages}
+        if chat_ids and self.on_flushed is not None:
+            try:
+                self.on_flushed(chat_ids)
+            except Exception as exc:
+                logger.debug("Write-behind on_flushed callback failed: %s", exc)
+        logger.debug(
+            "Write-behind flush: %d messages, %d memory updates",
+            len(applied.messages), len(applied.memory_uses),
+        )
+        return len(applied)
+
+    def _apply_one_by_one(self, db: Session, batch: _Batch) -> Tuple[_Batch, _Batch]:
+        """
+        Toplu yazma başarısız olunca her yazmayı kendi transaction'ında dene.
+
+        Returns:
+            (yazılanlar, tekrar kuyruğa alınacaklar); veri hatası verenler ikisinde de yoktur
+        """
+        applied, retry = _Batch(), _Batch()
+        parts = batch.split()
+        for index, part in enumerate(parts):
+            try:
+                self._apply(db, part)
+                db.commit()
+            except (IntegrityError, DataError) as exc:
+                db.rollback()
+                # Tekrar denense de düzelmez (ör. chat silinmiş): kuyruğu tıkamasın
+                dropped = part.messages[0] if part.messages else None
+                logger.error(
+                    "Write-behind dropped a failing write (bot=%s, chat=%s, memory_updates=%d): %s",
+                    getattr(dropped, "bot_id", None), getattr(dropped, "chat_db_id", None),
+                    len(part.memory_uses), exc,
+                )
+                continue
+            except Exception as exc:
+                db.rollback()
+                # DB'ye ulaşılamıyor: kalan yazmalar sonraki flush'ta tekrar denenir
+                for rest in parts[index:]:
+                    retry.merge(rest)
+                logger.error("Write-behind flush failed, %d writes requeued: %s", len(retry), exc)
+                break
+            applied.merge(part)
+        return applied, retry
+
+    def _apply(self, db: Session, batch: _Batch) -> None:
+        from database import BotMemory, Message
+
+        if batch.messages:
+            db.execute(insert(Message), [m.to_row() for m in batch.messages])
+
+        if batch.memory_uses:
+            table = BotMemory.__table__
+            stmt = (
+                update(table)
+                .where(table.c.id == bindparam("memory_id"))
+                .values(
+                    usage_count=table.c.usage_count + bindparam("uses"),
+                    last_used_at=bindparam("used_at"),
+                )
+            )
+            db.execute(stmt, [
+                {"memory_id": mid, "uses": uses, "used_at": batch.memory_last_used[mid]}
+                for mid, uses in batch.memory_uses.items()
+            ])
+
+    def _requeue(self, batch: _Batch) -> None:
+        # Başarısız batch'i sıranın başına geri koy; sınırsız büyümesin
+        limit = self.max_items * 20
+        messages = batch.messages + self._batch.messages
+        if len(messages) > limit:
+            logger.error("Write-behind buffer overflow, dropping %d messages", len(messages) - limit)
+            messages = messages[-limit:]
+        self._batch.messages = messages
+        for mid, uses in batch.memory_uses.items():
+            self._batch.memory_uses[mid] += uses
+            self._batch.memory_last_used.setdefault(mid, batch.memory_last_used[mid])
+
+    # ---- Background flusher ----
+    def _maybe_wake(self) -> None:
+        if self._wakeup is not None and len(self._batch) >= self.max_items:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        """Periyodik (veya eşik aşılınca) flush döngüsü."""
+        self._wakeup = asyncio.Event()
+        logger.info(
+            "Write-behind buffer started (interval=%.2fs, max_items=%d)",
+            self.flush_interval, self.max_items,
+        )
+        try:
+            while True:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                self._wakeup.clear()
+                if len(self._batch):
+                    await asyncio.to_thread(self.flush)
+        finally:
+            self._wakeup = None
@@ -11,11 +11,12 @@ Provides L1 (in-memory) and L2 (Redis) caching with:
 
 import logging
 import pickle
-import time
 from typing import Any, Callable, Optional, Dict
 from threading import Lock
 import os
 
+from clock import wall_time
+
 # Redis (optional dependency)
 try:
     import redis
@@ -33,13 +34,13 @@ class CacheEntry:
 
     def __init__(self, value: Any, ttl: Optional[int] = None):
         self.value = value
-        self.expires_at = time.time() + ttl if ttl else None
+        self.expires_at = wall_time() + ttl if ttl else None
 
     def is_expired(self) -> bool:
         """Check if entry has expired."""
         if self.expires_at is None:
             return False
-        return time.time() > self.expires_at
+        return wall_time() > self.expires_at
 
 
 class L1Cache:
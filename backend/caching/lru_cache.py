@@ -4,12 +4,13 @@ In-memory LRU (Least Recently Used) Cache implementation
 Thread-safe, TTL-based cache with max size limit.
 """
 
-import time
 import threading
 from typing import Any, Optional, Dict
 from collections import OrderedDict
 from dataclasses import dataclass
 
+from clock import wall_time
+
 
 @dataclass
 class CacheEntry:
@@ -60,7 +61,7 @@ class LRUCache:
             entry = self._cache[key]
 
             # Check if expired
-            if time.time() > entry.expires_at:
+            if wall_time() > entry.expires_at:
                 # Remove expired entry
                 del self._cache[key]
                 self._misses += 1
@@ -83,7 +84,7 @@ class LRUCache:
         with self._lock:
             # Calculate expiration time
             ttl = ttl_seconds if ttl_seconds is not None else self.default_ttl_seconds
-            expires_at = time.time() + ttl
+            expires_at = wall_time() + ttl
 
             # Create entry
             entry = CacheEntry(value=value, expires_at=expires_at)
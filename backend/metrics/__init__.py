@@ -8,6 +8,12 @@ from .prometheus_exporter import (
     # Metrics
     message_generation_total,
     message_generation_duration_seconds,
+    tick_stage_duration_seconds,
+    event_loop_lag_seconds,
+    event_loop_lag_last_seconds,
+    event_loop_stalls_total,
+    embedding_cache_lookups_total,
+    embedding_cache_bytes_total,
     active_bots_gauge,
     database_query_duration_seconds,
     database_connections_gauge,
@@ -22,12 +28,19 @@ from .prometheus_exporter import (
 
     # Functions
     setup_metrics,
+    MetricTimer,
 )
 
 __all__ = [
     # Metrics
     "message_generation_total",
     "message_generation_duration_seconds",
+    "tick_stage_duration_seconds",
+    "event_loop_lag_seconds",
+    "event_loop_lag_last_seconds",
+    "event_loop_stalls_total",
+    "embedding_cache_lookups_total",
+    "embedding_cache_bytes_total",
     "active_bots_gauge",
     "database_query_duration_seconds",
     "database_connections_gauge",
@@ -42,4 +55,5 @@ __all__ = [
 
     # Functions
     "setup_metrics",
+    "MetricTimer",
 ]
@@ -45,6 +45,44 @@ Basit Açıklama: Mesaj üretmek ne kadar sürdü?
 - %99'u: 10 saniye altında
 """
 
+tick_stage_duration_seconds = Histogram(
+    "tick_stage_duration_seconds",
+    "Tick/priority pipeline aşama süreleri (saniye)",
+    ["stage", "outcome"],  # stage: settings | roster | llm | dedup | typing | telegram_send | total ...
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+)
+"""
+Basit Açıklama: Süre hangi aşamaya gitti? (LLM mi, dedup mu, Telegram mı?)
+Örnek: tick_stage_duration_seconds{stage="llm", outcome="ok"} p95 = 2.1s
+"""
+
+# ============================================================================
+# EVENT LOOP METRİKLERİ
+# ============================================================================
+
+event_loop_lag_seconds = Histogram(
+    "event_loop_lag_seconds",
+    "Worker event loop gecikmesi: planlanan uyanma ile gerçek uyanma arası (saniye)",
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+)
+"""
+Basit Açıklama: Loop'u bloklayan sync kod (DB, Redis, time.sleep) ne kadar bekletiyor?
+Örnek: event_loop_lag_seconds p99 = 0.4s -> bir yerde sync çağrı loop'u tutuyor
+"""
+
+event_loop_lag_last_seconds = Gauge(
+    "event_loop_lag_last_seconds",
+    "Son ölçülen event loop gecikmesi (saniye)"
+)
+
+event_loop_stalls_total = Counter(
+    "event_loop_stalls_total",
+    "Eşik değerinden uzun süren event loop blokajı sayısı"
+)
+"""
+Basit Açıklama: Loop kaç kez LOOP_STALL_THRESHOLD'dan uzun kilitlendi?
+"""
+
 # ============================================================================
 # BOT METRİKLERİ
 # ============================================================================
@@ -122,6 +160,26 @@ Basit Açıklama: Kaç token harcadık? (maliyet = token * birim fiyat)
 Örnek: openai, gpt-4o-mini, prompt: 100000 token
 """
 
+# ============================================================================
+# EMBEDDING CACHE METRİKLERİ
+# ============================================================================
+
+embedding_cache_lookups_total = Counter(
+    "embedding_cache_lookups_total",
+    "Embedding cache sorguları",
+    ["layer", "result"]  # layer: l1 | redis, result: hit | miss | error
+)
+"""
+Basit Açıklama: Semantic dedup embedding'leri bellekte/Redis'te bulundu mu?
+Örnek: l1 hit: 9000, redis hit: 800, redis miss: 200 (miss = model encode)
+"""
+
+embedding_cache_bytes_total = Counter(
+    "embedding_cache_bytes_total",
+    "Redis embedding cache trafiği (byte)",
+    ["direction"]  # direction: read | write
+)
+
 # ============================================================================
 # HTTP API METRİKLERİ
 # ============================================================================
@@ -0,0 +1,41 @@
+"""
+Simulation Backends
+
+In-process stand-ins for the external services the engine talks to, used by
+the throughput benchmark (scripts/benchmark_engine_throughput.py) and for
+local runs without API keys:
+
+- latency.py: Seeded latency distributions (fixed / uniform / lognormal)
+- fake_llm.py: FakeLLMProvider (LLM_PROVIDER=fake)
+- replay_llm.py: ReplayProvider, record/replay cassettes (LLM_PROVIDER=replay)
+- fake_telegram.py: ASGI stand-in for the Telegram Bot API
+- benchmark.py: End-to-end engine throughput run and result comparison
+- virtual_time.py: Event loop on virtual time (timers jump instead of waiting)
+- day_simulation.py: Full trading day on virtual time for capacity planning
+"""
+
+from backend.simulation.latency import LatencyModel
+from backend.simulation.fake_llm import FakeLLMProvider, install_fake_llm
+from backend.simulation.replay_llm import ReplayProvider, load_cassette, prompt_fingerprint
+from backend.simulation.virtual_time import VirtualTimeLoop, run_virtual
+from backend.simulation.fake_telegram import (
+    FAKE_TELEGRAM_BASE_URL,
+    FakeTelegramAPI,
+    UnlimitedRateLimiter,
+    attach_fake_telegram,
+)
+
+__all__ = [
+    "LatencyModel",
+    "FakeLLMProvider",
+    "install_fake_llm",
+    "ReplayProvider",
+    "load_cassette",
+    "prompt_fingerprint",
+    "FAKE_TELEGRAM_BASE_URL",
+    "FakeTelegramAPI",
+    "UnlimitedRateLimiter",
+    "attach_fake_telegram",
+    "VirtualTimeLoop",
+    "run_virtual",
+]
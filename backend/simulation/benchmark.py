@@ -0,0 +1,312 @@
+"""
+Engine Throughput Benchmark
+
+Hermetic end-to-end run of BehaviorEngine: real scheduler, real tick
+pipeline and real database (SQLite by default, or any DATABASE_URL), with the
+two external services replaced by FakeLLMProvider (or a ReplayProvider
+cassette) and FakeTelegramAPI.
+
+Stage timings come from the tracing module (add_trace_sink); every finished
+tick / priority trace inside the measurement window contributes its
+per-stage totals. Results are plain JSON so two runs (e.g. two commits) can be
+compared with compare_results().
+
+DATABASE_URL (and TOKEN_ENCRYPTION_KEY) must be configured before calling
+run_engine_benchmark(); the database is wiped and re-seeded.
+"""
+
+import asyncio
+import contextlib
+import logging
+import math
+import os
+import platform
+import random
+import sys
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from backend.behavior_engine.tracing import add_trace_sink, remove_trace_sink
+from backend.simulation.fake_llm import FakeLLMProvider
+from backend.simulation.fake_telegram import FakeTelegramAPI, attach_fake_telegram
+from backend.simulation.replay_llm import ReplayProvider
+
+logger = logging.getLogger("behavior.benchmark")
+
+RESULT_SCHEMA_VERSION = 1
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class BenchmarkConfig:
+    """
+    Benchmark parameters (stored in the result JSON).
+
+    Args:
+        bots: Number of enabled bots
+        chats: Number of enabled chats (one pipeline per chat)
+        duration: Measurement window (seconds)
+        warmup: Run time before measuring starts (seconds)
+        llm_latency: Fake LLM latency spec (see LatencyModel.parse)
+        llm_cassette: Replay this recorded cassette instead of the fake LLM
+        llm_latency_scale: Multiplier for the cassette's recorded latencies
+        telegram_latency: Fake Telegram latency spec
+        tick_delay: Mean pause between two ticks of the same chat (seconds)
+        typing: Enable the typing simulation (adds human typing time per message)
+        telegram_rate_limits: Keep the real 20 msg/min per chat Telegram limiter
+        llm_failure_rate: Fraction of fake LLM requests that fail
+        max_concurrent_chats: ENGINE_MAX_CONCURRENT_CHATS override
+        seed: Seed for the fakes and the engine's random choices
+    """
+
+    bots: int = 8
+    chats: int = 4
+    duration: float = 30.0
+    warmup: float = 3.0
+    llm_latency: str = "lognormal:0.8,0.35"
+    llm_cassette: Optional[str] = None
+    llm_latency_scale: float = 1.0
+    telegram_latency: str = "uniform:0.02,0.08"
+    tick_delay: float = 0.2
+    typing: bool = False
+    telegram_rate_limits: bool = False
+    llm_failure_rate: float = 0.0
+    max_concurrent_chats: Optional[int] = None
+    seed: int = 1
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank yüzdelik (values boşsa 0)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """Saniye listesi -> count/mean/p50/p95/p99/max (ms)."""
+    summary: Dict[str, float] = {"count": len(values)}
+    summary["mean_ms"] = round(sum(values) / len(values) * 1000.0, 3) if values else 0.0
+    for q in PERCENTILES:
+        summary[f"p{q}_ms"] = round(percentile(values, q) * 1000.0, 3)
+    summary["max_ms"] = round(max(values) * 1000.0, 3) if values else 0.0
+    return summary
+
+
+class StageCollector:
+    """Trace sink: ölçüm penceresindeki trace'lerin stage sürelerini toplar."""
+
+    def __init__(self) -> None:
+        self.recording = False
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self.outcomes: Counter = Counter()
+
+    def __call__(self, trace: Any, total: float) -> None:
+        if not self.recording:
+            return
+        self.outcomes[f"{trace.kind}:{trace.outcome}"] += 1
+        for stage, seconds in trace.stage_totals().items():
+            self.stages[stage].append(seconds)
+        if trace.outcome == "sent":
+            self.stages["total"].append(total)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {stage: summarize(values) for stage, values in sorted(self.stages.items())}
+
+
+def benchmark_settings(config: BenchmarkConfig) -> Dict[str, Any]:
+    """Limitler ölçümü kısmasın; ağa çıkan özellikler (RSS, embedding modeli) kapalı."""
+    return {
+        "simulation_active": True,
+        "max_msgs_per_min": 1_000_000,
+        "bot_hourly_msg_limit": {"min": 1_000_000, "max": 1_000_000},
+        "prime_hours_boost": False,
+        "scale_factor": 1.0,
+        "typing_enabled": bool(config.typing),
+        "news_trigger_enabled": False,
+        "semantic_dedup_enabled": False,
+        "batch_processing_enabled": False,
+    }
+
+
+def seed_database(
+    database: Any,
+    *,
+    bots: int,
+    chats: int,
+    settings: Dict[str, Any],
+    speed_profile: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[int], List[int]]:
+    """
+    Şemayı sıfırla; bot/chat satırlarını yaz, varsayılan ayarların üzerine settings'i uygula.
+
+    Args:
+        database: database module
+        bots: Number of bots
+        chats: Number of chats
+        settings: Setting overrides (on top of init_default_settings)
+        speed_profile: Bot speed_profile (None = production delay distribution)
+    """
+    from database import Base, engine as db_engine
+
+    Base.metadata.drop_all(bind=db_engine)
+    Base.metadata.create_all(bind=db_engine)
+    database.init_default_settings()
+
+    db = database.SessionLocal()
+    try:
+        bot_rows = []
+        for i in range(bots):
+            bot = database.Bot(
+                name=f"Bench Bot {i}",
+                username=f"bench_{i}_bot",
+                is_enabled=True,
+                speed_profile=dict(speed_profile or {}),
+            )
+            bot.token = f"{100000 + i}:BENCH{i}"
+            bot_rows.append(bot)
+        chat_rows = [
+            database.Chat(chat_id=f"-100{500 + i}", title=f"Bench Chat {i}", is_enabled=True, topics=["BIST", "FX", "Kripto"])
+            for i in range(chats)
+        ]
+        db.add_all(bot_rows + chat_rows)
+        for key, value in settings.items():
+            db.merge(database.Setting(key=key, value=value))
+        db.commit()
+        return [b.id for b in bot_rows], [c.id for c in chat_rows]
+    finally:
+        db.close()
+
+
+async def _measure(engine: Any, api: FakeTelegramAPI, llm: Any,
+                   collector: StageCollector, config: BenchmarkConfig) -> Dict[str, Any]:
+    runner = asyncio.create_task(engine.run_forever(), name="benchmark_engine")
+    try:
+        await asyncio.sleep(config.warmup)
+        calls_before = api.snapshot()
+        llm_before = llm.calls
+        collector.recording = True
+        started = perf_counter()
+        await asyncio.sleep(config.duration)
+        elapsed = perf_counter() - started
+        collector.recording = False
+        calls_after = api.snapshot()
+        llm_calls = llm.calls - llm_before
+    finally:
+        runner.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await runner
+        await engine.shutdown()
+
+    telegram_calls = {
+        method: calls_after.get(method, 0) - calls_before.get(method, 0)
+        for method in sorted(calls_after)
+    }
+    messages = telegram_calls.get("sendMessage", 0)
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "messages": messages,
+        "messages_per_sec": round(messages / elapsed, 3) if elapsed > 0 else 0.0,
+        "llm_calls": llm_calls,
+        "telegram_calls": telegram_calls,
+    }
+
+
+def run_engine_benchmark(config: BenchmarkConfig) -> Dict[str, Any]:
+    """
+    Engine'i sahte LLM/Telegram ile çalıştır ve sonuçları döndür.
+
+    Returns:
+        JSON-serializable result (config, throughput, per-stage percentiles)
+    """
+    import database
+    from llm_client import LLMClient
+
+    if config.max_concurrent_chats is not None:
+        os.environ["ENGINE_MAX_CONCURRENT_CHATS"] = str(int(config.max_concurrent_chats))
+    import behavior_engine as behavior_engine_module
+
+    random.seed(config.seed)
+    seed_database(
+        database,
+        bots=config.bots,
+        chats=config.chats,
+        settings=benchmark_settings(config),
+        speed_profile={
+            "delay": {
+                "base_delay_seconds": config.tick_delay,
+                "min_seconds": 0.0,
+                "max_seconds": max(config.tick_delay * 5, 0.05),
+            }
+        },
+    )
+
+    if config.llm_cassette:
+        llm: Any = ReplayProvider(config.llm_cassette, mode="replay", latency_scale=config.llm_latency_scale)
+    else:
+        llm = FakeLLMProvider(config.llm_latency, seed=config.seed, failure_rate=config.llm_failure_rate)
+    api = FakeTelegramAPI(config.telegram_latency, seed=config.seed)
+    collector = StageCollector()
+
+    previous_llm = LLMClient._instance
+    LLMClient._instance = llm
+    add_trace_sink(collector)
+    try:
+        engine = behavior_engine_module.BehaviorEngine()
+        engine.news = None
+        attach_fake_telegram(engine.tg, api, rate_limits=config.telegram_rate_limits)
+        throughput = asyncio.run(_measure(engine, api, llm, collector, config))
+    finally:
+        remove_trace_sink(collector)
+        LLMClient._instance = previous_llm
+
+    return {
+        "schema": RESULT_SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": asdict(config),
+        "environment": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "database": database.engine.dialect.name,
+        },
+        "throughput": throughput,
+        "outcomes": dict(sorted(collector.outcomes.items())),
+        "llm": llm.stats() if isinstance(llm, ReplayProvider) else {"provider": "fake"},
+        "stages": collector.summary(),
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    İki sonuç dosyasını karşılaştır.
+
+    Returns:
+        Rows of {metric, baseline, current, change_pct}; for latencies a
+        positive change is a slowdown, for messages_per_sec a speedup
+    """
+    def row(metric: str, old: Optional[float], new: Optional[float]) -> Dict[str, Any]:
+        change = None
+        if old not in (None, 0) and new is not None:
+            change = round((new - old) / old * 100.0, 1)
+        return {"metric": metric, "baseline": old, "current": new, "change_pct": change}
+
+    rows = [row(
+        "messages_per_sec",
+        baseline.get("throughput", {}).get("messages_per_sec"),
+        current.get("throughput", {}).get("messages_per_sec"),
+    )]
+    old_stages = baseline.get("stages", {})
+    new_stages = current.get("stages", {})
+    for stage in sorted(set(old_stages) | set(new_stages)):
+        for q in PERCENTILES:
+            key = f"p{q}_ms"
+            rows.append(row(
+                f"{stage}.{key}",
+                old_stages.get(stage, {}).get(key),
+                new_stages.get(stage, {}).get(key),
+            ))
+    return rows
@@ -0,0 +1,275 @@
+"""
+Virtual Day Simulation
+
+Capacity planning run: BehaviorEngine with production settings (delay
+distribution, typing, prime hours, per-minute and hourly limits) on virtual
+time, so a full 24h day for a large roster finishes in minutes. LLM and
+Telegram are the in-process fakes (or a ReplayProvider cassette); latencies
+are virtual too.
+
+A sampler records, every sample_minutes of simulated time: messages sent,
+reactions, LLM calls, message rows and database size, L1 cache hit rate and
+queue depths (message queue, write-behind buffer, typing indicators, ticks
+in flight).
+
+DATABASE_URL (and TOKEN_ENCRYPTION_KEY) must be configured before calling
+run_day_simulation(); the database is wiped and re-seeded.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import clock
+from backend.simulation.benchmark import seed_database
+from backend.simulation.fake_llm import FakeLLMProvider
+from backend.simulation.fake_telegram import FakeTelegramAPI, attach_fake_telegram
+from backend.simulation.replay_llm import ReplayProvider
+from backend.simulation.virtual_time import run_virtual
+
+logger = logging.getLogger("behavior.simulation")
+
+
+@dataclass
+class DaySimulationConfig:
+    """
+    Virtual day parameters (stored in the result JSON).
+
+    Args:
+        bots: Number of enabled bots
+        chats: Number of enabled chats
+        hours: Simulated hours
+        start: Virtual start time, ISO format in local time (default: today 00:00)
+        sample_minutes: Simulated minutes between samples
+        llm_latency: Fake LLM latency spec (see LatencyModel.parse)
+        llm_cassette: Replay this recorded cassette instead of the fake LLM
+        llm_latency_scale: Multiplier for the cassette's recorded latencies
+        telegram_latency: Fake Telegram latency spec
+        settings: Setting overrides on top of the production defaults
+        seed: Seed for the fakes and the engine's random choices
+    """
+
+    bots: int = 50
+    chats: int = 10
+    hours: float = 24.0
+    start: Optional[str] = None
+    sample_minutes: float = 15.0
+    llm_latency: str = "lognormal:0.8,0.35"
+    llm_cassette: Optional[str] = None
+    llm_latency_scale: float = 1.0
+    telegram_latency: str = "uniform:0.02,0.08"
+    settings: Dict[str, Any] = field(default_factory=dict)
+    seed: int = 1
+
+    def start_time(self) -> datetime:
+        if self.start:
+            return datetime.fromisoformat(self.start)
+        return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def simulation_settings(config: DaySimulationConfig) -> Dict[str, Any]:
+    """Üretim varsayılanları; sadece ağa çıkan özellikler (RSS, embedding modeli) kapalı."""
+    settings = {
+        "simulation_active": True,
+        "news_trigger_enabled": False,
+        "semantic_dedup_enabled": False,
+    }
+    settings.update(config.settings)
+    return settings
+
+
+class _Sampler:
+    """Sanal zamanda periyodik ölçüm (her örnek sync ve sıfır sanal süre)."""
+
+    def __init__(self, engine: Any, api: FakeTelegramAPI, llm: Any, database: Any) -> None:
+        self.engine = engine
+        self.api = api
+        self.llm = llm
+        self.database = database
+        self.samples: List[Dict[str, Any]] = []
+        self._last_calls: Dict[str, int] = {}
+        self._last_cache = (0, 0)
+        self._last_llm = 0
+
+    def sample(self) -> Dict[str, Any]:
+        from sqlalchemy import func
+
+        engine = self.engine
+        calls = self.api.snapshot()
+        db = self.database.SessionLocal()
+        try:
+            message_rows = db.query(func.count(self.database.Message.id)).scalar() or 0
+        finally:
+            db.close()
+
+        hits = misses = 0
+        if engine.cache is not None:
+            l1 = engine.cache.get_stats().get("l1", {})
+            hits, misses = int(l1.get("hits", 0)), int(l1.get("misses", 0))
+        d_hits, d_misses = hits - self._last_cache[0], misses - self._last_cache[1]
+        lookups = d_hits + d_misses
+
+        queue_stats = engine.msg_queue.get_stats()
+        scheduler = engine._scheduler
+        row = {
+            "virtual_time": clock.now_local().isoformat(timespec="minutes"),
+            "elapsed_hours": round(clock.monotonic() / 3600.0, 4),
+            "messages_sent": calls.get("sendMessage", 0) - self._last_calls.get("sendMessage", 0),
+            "reactions": calls.get("setMessageReaction", 0) - self._last_calls.get("setMessageReaction", 0),
+            "chat_actions": calls.get("sendChatAction", 0) - self._last_calls.get("sendChatAction", 0),
+            "llm_calls": self.llm.calls - self._last_llm,
+            "message_rows": message_rows,
+            "db_bytes": database_size(db_engine=self.database.engine),
+            "cache_lookups": lookups,
+            "cache_hit_rate": round(d_hits / lookups, 4) if lookups else None,
+            "message_queue_depth": sum(v for k, v in queue_stats.items() if k != "dlq"),
+            "write_buffer_depth": len(engine.write_buffer),
+            "typing_active": engine.typing.active,
+            "ticks_in_flight": scheduler.ticks_in_flight if scheduler is not None else 0,
+        }
+        self._last_calls = calls
+        self._last_cache = (hits, misses)
+        self._last_llm = self.llm.calls
+        self.samples.append(row)
+        return row
+
+
+def database_size(db_engine: Any) -> Optional[int]:
+    """SQLite dosya boyutu veya Postgres veritabanı boyutu (byte)."""
+    dialect = db_engine.dialect.name
+    try:
+        if dialect == "sqlite":
+            path = db_engine.url.database
+            if not path or path == ":memory:":
+                return None
+            total = 0
+            for suffix in ("", "-wal"):
+                with contextlib.suppress(OSError):
+                    total += os.path.getsize(path + suffix)
+            return total
+        if dialect == "postgresql":
+            from sqlalchemy import text
+
+            with db_engine.connect() as conn:
+                return int(conn.execute(text("SELECT pg_database_size(current_database())")).scalar())
+    except Exception as exc:
+        logger.debug("Database size lookup failed: %s", exc)
+    return None
+
+
+def hourly_summary(samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Örnekleri simüle saat başına topla (toplamlar, son değerler, maks. kuyruklar)."""
+    hours: Dict[int, Dict[str, Any]] = {}
+    for row in samples:
+        hour = max(0, int(row["elapsed_hours"] - 1e-9))
+        bucket = hours.setdefault(hour, {
+            "hour": hour, "virtual_time": row["virtual_time"], "messages_sent": 0, "reactions": 0,
+            "llm_calls": 0, "cache_lookups": 0, "_cache_hits": 0.0,
+            "max_message_queue_depth": 0, "max_write_buffer_depth": 0, "max_ticks_in_flight": 0,
+        })
+        bucket["virtual_time"] = row["virtual_time"]
+        for key in ("messages_sent", "reactions", "llm_calls", "cache_lookups"):
+            bucket[key] += row[key]
+        if row["cache_hit_rate"] is not None:
+            bucket["_cache_hits"] += row["cache_hit_rate"] * row["cache_lookups"]
+        bucket["message_rows"] = row["message_rows"]
+        bucket["db_bytes"] = row["db_bytes"]
+        bucket["max_message_queue_depth"] = max(bucket["max_message_queue_depth"], row["message_queue_depth"])
+        bucket["max_write_buffer_depth"] = max(bucket["max_write_buffer_depth"], row["write_buffer_depth"])
+        bucket["max_ticks_in_flight"] = max(bucket["max_ticks_in_flight"], row["ticks_in_flight"])
+
+    summary = []
+    for hour in sorted(hours):
+        bucket = hours[hour]
+        hits = bucket.pop("_cache_hits")
+        bucket["cache_hit_rate"] = round(hits / bucket["cache_lookups"], 4) if bucket["cache_lookups"] else None
+        summary.append(bucket)
+    return summary
+
+
+def run_day_simulation(config: DaySimulationConfig) -> Dict[str, Any]:
+    """
+    Engine'i sanal zamanda config.hours saat çalıştır.
+
+    Returns:
+        JSON-serializable result (config, totals, samples, hourly summary)
+    """
+    import database
+    from llm_client import LLMClient
+
+    import behavior_engine as behavior_engine_module
+
+    random.seed(config.seed)
+    seed_database(database, bots=config.bots, chats=config.chats, settings=simulation_settings(config))
+
+    if config.llm_cassette:
+        llm: Any = ReplayProvider(config.llm_cassette, mode="replay", latency_scale=config.llm_latency_scale)
+    else:
+        llm = FakeLLMProvider(config.llm_latency, seed=config.seed)
+    api = FakeTelegramAPI(config.telegram_latency, seed=config.seed)
+    start = config.start_time()
+    sample_seconds = max(60.0, config.sample_minutes * 60.0)
+    end_seconds = max(0.0, config.hours) * 3600.0
+
+    async def main() -> _Sampler:
+        # Engine saat kaynaklarını (RateAccountant, RosterCache, typing) sanal loop içinde kursun
+        engine = behavior_engine_module.BehaviorEngine()
+        engine.news = None
+        engine.loop_monitor = None  # Sanal zamanda lag ölçümü anlamsız
+        attach_fake_telegram(engine.tg, api)
+        sampler = _Sampler(engine, api, llm, database)
+        runner = asyncio.create_task(engine.run_forever(), name="simulation_engine")
+        loop = asyncio.get_running_loop()
+        try:
+            while loop.time() < end_seconds:
+                await asyncio.sleep(min(sample_seconds, end_seconds - loop.time()))
+                if runner.done():
+                    runner.result()  # Engine çöktüyse hatayı yüzeye çıkar
+                row = sampler.sample()
+                logger.info(
+                    "%s sent=%d rows=%d queue=%d",
+                    row["virtual_time"], row["messages_sent"], row["message_rows"], row["message_queue_depth"],
+                )
+        finally:
+            runner.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await runner
+            await engine.shutdown()
+        return sampler
+
+    previous_llm = LLMClient._instance
+    LLMClient._instance = llm
+    real_start = time.perf_counter()
+    try:
+        sampler = run_virtual(main, start=start)
+    finally:
+        LLMClient._instance = previous_llm
+    real_seconds = time.perf_counter() - real_start
+
+    samples = sampler.samples
+    total_messages = sum(row["messages_sent"] for row in samples)
+    return {
+        "config": asdict(config),
+        "virtual_start": start.isoformat(timespec="minutes"),
+        "simulated_hours": round(end_seconds / 3600.0, 3),
+        "real_seconds": round(real_seconds, 2),
+        "speedup": round(end_seconds / real_seconds, 1) if real_seconds > 0 else None,
+        "database": database.engine.dialect.name,
+        "totals": {
+            "messages_sent": total_messages,
+            "reactions": sum(row["reactions"] for row in samples),
+            "llm_calls": sum(row["llm_calls"] for row in samples),
+            "message_rows": samples[-1]["message_rows"] if samples else 0,
+            "db_bytes": samples[-1]["db_bytes"] if samples else None,
+            "messages_per_bot_hour": round(total_messages / (config.bots * end_seconds / 3600.0), 3)
+            if config.bots and end_seconds else 0.0,
+        },
+        "hourly": hourly_summary(samples),
+        "samples": samples,
+    }
@@ -0,0 +1,127 @@
+"""
+Fake LLM Provider
+
+Deterministic BaseLLMProvider for benchmarks and local runs: no network, no
+API key, seeded output and a configurable latency distribution. It goes
+through the same agenerate() path (LLM_MAX_CONCURRENCY semaphore) as the real
+providers, so queueing in front of the LLM shows up in the measurements.
+
+Selected with LLM_PROVIDER=fake (FAKE_LLM_LATENCY, FAKE_LLM_SEED,
+FAKE_LLM_FAILURE_RATE) or installed directly via install_fake_llm().
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from typing import Any, Optional
+
+from llm_client import BaseLLMProvider, LLMClient
+from backend.simulation.latency import LatencyModel
+
+_OPENERS = (
+    "Bence", "Açıkçası", "Şu an", "Bugün", "Kısa vadede", "Grafiğe bakınca",
+    "Hacme bakarsak", "Dünkü kapanışa göre", "Bu seviyelerde", "Sabah itibarıyla",
+)
+_SUBJECTS = (
+    "BIST tarafı", "bankacılık endeksi", "dolar/TL", "altın", "bitcoin",
+    "enerji hisseleri", "faiz beklentisi", "holdingler", "sanayi endeksi", "ons altın",
+)
+_VIEWS = (
+    "biraz yorgun görünüyor", "destekten tepki arıyor", "direnci zorluyor",
+    "yatay bantta sıkıştı", "hacimsiz yükseliyor", "kâr satışı yiyebilir",
+    "yeni zirve denemesi yapabilir", "haber akışına çok duyarlı", "temkinli izlenmeli",
+    "kademeli alım için fena değil",
+)
+_CLOSERS = (
+    "", "", " bakalım.", " acele etmemek lazım.", " stop seviyesi önemli.",
+    " kapanışı görmek lazım.", " benim fikrim bu.",
+)
+
+
+class FakeLLMProvider(BaseLLMProvider):
+    """
+    Seeded stand-in for an LLM API.
+
+    Args:
+        latency: Latency spec or model per request (see LatencyModel.parse)
+        seed: RNG seed; same seed + same call order -> same texts and delays
+        failure_rate: Fraction of requests that return None (provider error)
+    """
+
+    def __init__(
+        self,
+        latency: "str | float | LatencyModel | None" = "lognormal:0.8,0.35",
+        *,
+        seed: int = 0,
+        failure_rate: float = 0.0,
+    ) -> None:
+        self.latency = LatencyModel.parse(latency)
+        self.seed = int(seed)
+        self.failure_rate = min(max(float(failure_rate), 0.0), 1.0)
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMProvider":
+        return cls(
+            os.getenv("FAKE_LLM_LATENCY", "lognormal:0.8,0.35"),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+            failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")),
+        )
+
+    def generate(
+        self,
+        *,
+        user_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 220,
+        system_prompt: Optional[str] = None,
+        top_p: float = 0.95,
+        frequency_penalty: float = 0.4,
+    ) -> Optional[str]:
+        delay, text = self._next(user_prompt)
+        if delay > 0:
+            time.sleep(delay)
+        return text
+
+    def _create_async_client(self) -> Any:
+        return self  # Native async yol: thread havuzu yerine asyncio.sleep
+
+    async def _agenerate(self, client: Any, *, user_prompt: str, **_: Any) -> Optional[str]:
+        async with self._request_slot():
+            delay, text = self._next(user_prompt)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return text
+
+    def _next(self, user_prompt: str) -> "tuple[float, Optional[str]]":
+        # Gecikme ve metin aynı RNG'den, kilit altında: çağrı sırası sabitse çıktı da sabit
+        with self._lock:
+            self.calls += 1
+            call_no = self.calls
+            delay = self.latency.sample(self._rng)
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                self.failures += 1
+                return delay, None
+            pick = self._rng.randrange(1 << 30)
+
+        digest = int(hashlib.blake2b((user_prompt or "").encode("utf-8"), digest_size=4).hexdigest(), 16)
+        key = pick ^ digest
+        text = (
+            f"{_OPENERS[key % len(_OPENERS)]} {_SUBJECTS[(key >> 4) % len(_SUBJECTS)]} "
+            f"{_VIEWS[(key >> 8) % len(_VIEWS)]}, {call_no}. kez söylüyorum"
+            f"{_CLOSERS[(key >> 12) % len(_CLOSERS)] or '.'}"
+        )
+        return delay, text
+
+
+def install_fake_llm(provider: Optional[FakeLLMProvider] = None) -> FakeLLMProvider:
+    """LLMClient factory'sinin paylaşılan provider'ını fake ile değiştir."""
+    provider = provider or FakeLLMProvider.from_env()
+    LLMClient._instance = provider
+    return provider
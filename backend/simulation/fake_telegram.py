@@ -0,0 +1,179 @@
+"""
+Fake Telegram Bot API
+
+Minimal ASGI stand-in for https://api.telegram.org. TelegramClient talks to it
+through httpx.ASGITransport, so requests go through the real client code
+(_post retries, circuit breaker, JSON parsing) without leaving the process.
+
+Handled methods:
+- sendMessage        -> Message object with an incrementing message_id
+- sendChatAction     -> true
+- setMessageReaction -> true
+- getMe              -> bot User object
+- anything else      -> true
+
+Every call is counted per method; sent messages are counted per chat.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from backend.simulation.latency import LatencyModel
+
+FAKE_TELEGRAM_BASE_URL = "http://telegram.fake"
+
+
+class FakeTelegramAPI:
+    """
+    ASGI app imitating the Telegram Bot API.
+
+    Args:
+        latency: Latency spec or model per request (see LatencyModel.parse)
+        seed: RNG seed for the latency samples
+        error_rate: Fraction of requests answered with HTTP 500
+    """
+
+    def __init__(
+        self,
+        latency: "str | float | LatencyModel | None" = "uniform:0.02,0.08",
+        *,
+        seed: int = 0,
+        error_rate: float = 0.0,
+    ) -> None:
+        self.latency = LatencyModel.parse(latency)
+        self.error_rate = min(max(float(error_rate), 0.0), 1.0)
+        self._rng = random.Random(int(seed))
+        self._lock = threading.Lock()
+        self._next_message_id = 1000
+        self.calls: Counter = Counter()
+        self.messages_by_chat: Counter = Counter()
+        self.errors = 0
+
+    @property
+    def messages_sent(self) -> int:
+        return self.calls["sendMessage"]
+
+    def snapshot(self) -> Dict[str, int]:
+        """Method -> çağrı sayısı (ölçüm penceresi farkları için)."""
+        return dict(self.calls)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        # /bot<token>/<method>
+        parts = scope.get("path", "").strip("/").split("/")
+        if len(parts) != 2 or not parts[0].startswith("bot"):
+            await self._respond(send, 404, {"ok": False, "error_code": 404, "description": "Not Found"})
+            return
+        token, method = parts[0][3:], parts[1]
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            await self._respond(send, 400, {"ok": False, "error_code": 400, "description": "Bad Request: invalid JSON"})
+            return
+
+        with self._lock:
+            delay = self.latency.sample(self._rng)
+            failed = bool(self.error_rate) and self._rng.random() < self.error_rate
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if failed:
+            self.errors += 1
+            await self._respond(send, 500, {"ok": False, "error_code": 500, "description": "Internal Server Error"})
+            return
+
+        self.calls[method] += 1
+        await self._respond(send, 200, {"ok": True, "result": self._result(token, method, payload)})
+
+    def _result(self, token: str, method: str, payload: Dict[str, Any]) -> Any:
+        if method == "sendMessage":
+            chat_id = payload.get("chat_id")
+            self.messages_by_chat[str(chat_id)] += 1
+            with self._lock:
+                self._next_message_id += 1
+                message_id = self._next_message_id
+            result: Dict[str, Any] = {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "supergroup"},
+                "text": payload.get("text", ""),
+            }
+            if payload.get("reply_to_message_id"):
+                result["reply_to_message"] = {"message_id": payload["reply_to_message_id"]}
+            return result
+        if method == "getMe":
+            bot_id = token.split(":", 1)[0]
+            return {"id": int(bot_id) if bot_id.isdigit() else 0, "is_bot": True, "username": f"fake_{bot_id}_bot"}
+        return True
+
+    @staticmethod
+    async def _respond(send: Any, status: int, data: Dict[str, Any]) -> None:
+        raw = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(raw)).encode())],
+        })
+        await send({"type": "http.response.body", "body": raw})
+
+
+class UnlimitedRateLimiter:
+    """TelegramRateLimiter yerine: Telegram'ın 20 msg/dk chat limiti motor ölçümünü kısmasın."""
+
+    def can_send(self, chat_id: str, max_wait: float = 0.0) -> bool:
+        return True
+
+    def get_limits(self, chat_id: str) -> Dict[str, Any]:
+        return {"global": None, "chat": None}
+
+
+def attach_fake_telegram(
+    tg_client: Any,
+    api: Optional[FakeTelegramAPI] = None,
+    *,
+    rate_limits: bool = False,
+) -> FakeTelegramAPI:
+    """
+    TelegramClient'ı sahte API'ye bağla.
+
+    Args:
+        tg_client: TelegramClient instance
+        api: FakeTelegramAPI (default: new one with default latency)
+        rate_limits: Keep the real TelegramRateLimiter (20 msg/min per chat)
+
+    Returns:
+        The attached FakeTelegramAPI
+    """
+    import httpx
+
+    api = api or FakeTelegramAPI()
+    tg_client.client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=api),
+        timeout=tg_client.client.timeout,
+    )
+    tg_client.base_url = FAKE_TELEGRAM_BASE_URL
+    if not rate_limits:
+        tg_client.rate_limiter = UnlimitedRateLimiter()
+    return api
@@ -0,0 +1,86 @@
+"""
+Latency Models
+
+Seeded latency distributions for the fake LLM / Telegram backends. A model is
+parsed from a short spec so benchmark runs can be described on the command
+line and stored alongside their results:
+
+- "0" or "fixed:0.8"          -> always 0.8 s
+- "uniform:0.2,1.2"           -> uniform between 0.2 s and 1.2 s
+- "lognormal:0.8,0.35"        -> log-normal with median 0.8 s and sigma 0.35
+                                 (heavy right tail, like real LLM APIs)
+
+Optional third value for uniform/lognormal caps a single sample (seconds).
+"""
+
+import math
+import random
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+LATENCY_KINDS = ("fixed", "uniform", "lognormal")
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """
+    Latency distribution.
+
+    Args:
+        kind: 'fixed', 'uniform' or 'lognormal'
+        params: fixed -> (seconds,), uniform -> (low, high), lognormal -> (median, sigma)
+        cap: Upper bound for a single sample (seconds, optional)
+    """
+
+    kind: str = "fixed"
+    params: Tuple[float, ...] = (0.0,)
+    cap: Optional[float] = None
+
+    @classmethod
+    def parse(cls, spec: "str | float | LatencyModel | None") -> "LatencyModel":
+        """'lognormal:0.8,0.35' gibi bir tanımı modele çevir (sayı = sabit gecikme)."""
+        if isinstance(spec, LatencyModel):
+            return spec
+        if spec is None or spec == "":
+            return cls()
+        if isinstance(spec, (int, float)):
+            return cls("fixed", (max(0.0, float(spec)),))
+
+        text = str(spec).strip().lower()
+        kind, _, raw = text.partition(":")
+        if not raw:
+            kind, raw = "fixed", kind
+        if kind not in LATENCY_KINDS:
+            raise ValueError(f"Unknown latency model '{kind}' (expected one of {', '.join(LATENCY_KINDS)})")
+        try:
+            values = [float(v) for v in raw.split(",") if v.strip()]
+        except ValueError as exc:
+            raise ValueError(f"Invalid latency spec '{spec}': {exc}") from exc
+
+        expected = 1 if kind == "fixed" else 2
+        if len(values) not in (expected, expected + 1):
+            raise ValueError(f"Latency model '{kind}' expects {expected} value(s), got '{spec}'")
+        if any(v < 0 for v in values):
+            raise ValueError(f"Latency values must be >= 0: '{spec}'")
+        cap = values[expected] if len(values) > expected else None
+        params = tuple(values[:expected])
+        if kind == "uniform" and params[1] < params[0]:
+            params = (params[1], params[0])
+        return cls(kind, params, cap)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            value = rng.uniform(self.params[0], self.params[1])
+        elif self.kind == "lognormal":
+            median, sigma = self.params
+            value = rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        else:
+            value = self.params[0]
+        if self.cap is not None:
+            value = min(value, self.cap)
+        return max(0.0, value)
+
+    @property
+    def spec(self) -> str:
+        values = list(self.params) + ([self.cap] if self.cap is not None else [])
+        return f"{self.kind}:{','.join(f'{v:g}' for v in values)}"
@@ -0,0 +1,272 @@
+"""
+Record / Replay LLM Provider
+
+Lets a real workload be replayed against the engine offline: no API cost and
+no dependency on provider availability, but realistic texts and timings.
+
+- record: wraps a real provider (LLM_REPLAY_TARGET, default openai) and
+  appends every request to a cassette: prompt fingerprint, response and the
+  observed service time (measured inside the concurrency slot, so queueing in
+  front of the provider is not baked into the recording).
+- replay: serves responses from the cassette and sleeps for the recorded
+  latency multiplied by LLM_REPLAY_LATENCY_SCALE (0 = no waiting).
+
+A cassette is a gzip JSON-lines file: a header line followed by one compact
+entry per request ({"fp", "r", "t"}). Prompts themselves are not stored,
+only a 16-byte BLAKE2b fingerprint of system + user prompt.
+
+Prompts in production embed timestamps, recent messages and random picks, so
+an exact fingerprint match is not guaranteed when replaying. On a miss the
+provider falls back to the recorded sequence (LLM_REPLAY_ON_MISS=sequence,
+default), which keeps the response/latency distribution of the recording;
+with LLM_REPLAY_ON_MISS=error a miss returns None like a failed request.
+"""
+
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from llm_client import BaseLLMProvider, LLMClient
+
+logger = logging.getLogger("llm.replay")
+
+CASSETTE_VERSION = 1
+REPLAY_MODES = ("record", "replay")
+MISS_POLICIES = ("sequence", "error")
+
+
+def prompt_fingerprint(user_prompt: str, system_prompt: Optional[str] = None) -> str:
+    """System + user prompt için kısa, kararlı parmak izi (boşluk farkları yok sayılır)."""
+    normalized = " ".join((system_prompt or "").split()) + "\x1f" + " ".join((user_prompt or "").split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def load_cassette(path: "str | Path") -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Cassette dosyasını oku.
+
+    Returns:
+        (header, entries) - entries in recording order
+    """
+    header: Dict[str, Any] = {}
+    entries: List[Dict[str, Any]] = []
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "fp" in record:
+                entries.append(record)
+            elif not header:
+                header = record  # Append ile kaydedilen dosyalarda sonraki başlıklar atlanır
+    return header, entries
+
+
+class ReplayProvider(BaseLLMProvider):
+    """
+    Cassette-backed provider.
+
+    Args:
+        cassette_path: Cassette file (gzip JSON lines)
+        mode: 'record' or 'replay'
+        target: Provider to record (record mode; instance or LLM_PROVIDER name)
+        latency_scale: Multiplier for recorded latencies (replay mode)
+        on_miss: 'sequence' or 'error' (replay mode)
+        flush_every: Recorded entries buffered before writing to disk
+    """
+
+    def __init__(
+        self,
+        cassette_path: "str | Path",
+        *,
+        mode: str = "replay",
+        target: "BaseLLMProvider | str | None" = None,
+        latency_scale: float = 1.0,
+        on_miss: str = "sequence",
+        flush_every: int = 20,
+    ) -> None:
+        mode = (mode or "replay").lower()
+        if mode not in REPLAY_MODES:
+            raise RuntimeError(f"LLM_REPLAY_MODE must be one of {', '.join(REPLAY_MODES)} (got '{mode}')")
+        on_miss = (on_miss or "sequence").lower()
+        if on_miss not in MISS_POLICIES:
+            raise RuntimeError(f"LLM_REPLAY_ON_MISS must be one of {', '.join(MISS_POLICIES)} (got '{on_miss}')")
+
+        self.cassette_path = Path(cassette_path)
+        self.mode = mode
+        self.latency_scale = max(0.0, float(latency_scale))
+        self.on_miss = on_miss
+        self.flush_every = max(1, int(flush_every))
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.target: Optional[BaseLLMProvider] = None
+        self._pending: List[Dict[str, Any]] = []
+        self._by_fingerprint: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._sequence: List[Dict[str, Any]] = []
+        self._sequence_pos = 0
+
+        if mode == "record":
+            if isinstance(target, str) or target is None:
+                name = (target or "openai").lower()
+                if name == "replay":
+                    raise RuntimeError("LLM_REPLAY_TARGET cannot be 'replay'")
+                target = LLMClient.create_provider(name)
+            self.target = target
+            self.cassette_path.parent.mkdir(parents=True, exist_ok=True)
+            self._header = {
+                "version": CASSETTE_VERSION,
+                "provider": type(target).__name__,
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+            self._header_written = self.cassette_path.exists() and self.cassette_path.stat().st_size > 0
+            atexit.register(self.flush)  # Süreç kapanırken tampondaki kayıtlar kaybolmasın
+            logger.info("ReplayProvider recording %s to %s", self._header["provider"], self.cassette_path)
+        else:
+            if not self.cassette_path.exists():
+                raise RuntimeError(f"LLM replay cassette not found: {self.cassette_path}")
+            header, entries = load_cassette(self.cassette_path)
+            if not entries:
+                raise RuntimeError(f"LLM replay cassette is empty: {self.cassette_path}")
+            grouped: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+            for entry in entries:
+                grouped[entry["fp"]].append(entry)
+            self._by_fingerprint = dict(grouped)
+            self._sequence = entries
+            logger.info(
+                "ReplayProvider loaded %d responses (%d prompts, recorded from %s, latency_scale=%.2f)",
+                len(entries), len(grouped), header.get("provider", "?"), self.latency_scale,
+            )
+
+    @classmethod
+    def from_env(cls) -> "ReplayProvider":
+        return cls(
+            os.getenv("LLM_REPLAY_CASSETTE", "llm_cassette.jsonl.gz"),
+            mode=os.getenv("LLM_REPLAY_MODE", "replay"),
+            target=os.getenv("LLM_REPLAY_TARGET", "openai"),
+            latency_scale=float(os.getenv("LLM_REPLAY_LATENCY_SCALE", "1.0")),
+            on_miss=os.getenv("LLM_REPLAY_ON_MISS", "sequence"),
+        )
+
+    # ---- Generation ----
+    def generate(
+        self,
+        *,
+        user_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 220,
+        system_prompt: Optional[str] = None,
+        top_p: float = 0.95,
+        frequency_penalty: float = 0.4,
+    ) -> Optional[str]:
+        kwargs = dict(
+            user_prompt=user_prompt, temperature=temperature, max_tokens=max_tokens,
+            system_prompt=system_prompt, top_p=top_p, frequency_penalty=frequency_penalty,
+        )
+        if self.mode == "record":
+            start = time.perf_counter()
+            text = self.target.generate(**kwargs)  # type: ignore[union-attr]
+            self._record(user_prompt, system_prompt, text, time.perf_counter() - start)
+            return text
+
+        delay, text = self._replay(user_prompt, system_prompt)
+        if delay > 0:
+            time.sleep(delay)
+        return text
+
+    async def agenerate(self, **kwargs: Any) -> Optional[str]:
+        if self.mode != "record":
+            return await super().agenerate(**kwargs)
+
+        # Süre hedef provider'ın ilk istek slotundan itibaren ölçülür (kuyruk beklemesi hariç)
+        target = self.target
+        timeout = kwargs.pop("timeout", None)
+        text, started = await target._from_first_slot(  # type: ignore[union-attr]
+            target._agenerate_call(**kwargs),  # type: ignore[union-attr]
+            timeout if timeout and timeout > 0 else None,
+        )
+        self._record(kwargs.get("user_prompt", ""), kwargs.get("system_prompt"), text, time.perf_counter() - started)
+        return text
+
+    def _create_async_client(self) -> Any:
+        return self  # Replay: asyncio.sleep ile native async
+
+    async def _agenerate(self, client: Any, *, user_prompt: str, system_prompt: Optional[str] = None,
+                         **_: Any) -> Optional[str]:
+        async with self._request_slot():
+            delay, text = self._replay(user_prompt, system_prompt)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return text
+
+    # ---- Cassette ----
+    def _replay(self, user_prompt: str, system_prompt: Optional[str]) -> Tuple[float, Optional[str]]:
+        fp = prompt_fingerprint(user_prompt, system_prompt)
+        with self._lock:
+            self.calls += 1
+            queue = self._by_fingerprint.get(fp)
+            if queue:
+                entry = queue[0]
+                queue.rotate(-1)  # Aynı prompt tekrar gelirse sıradaki kayıt
+                self.hits += 1
+            else:
+                self.misses += 1
+                if self.on_miss == "error":
+                    logger.debug("Replay miss (fp=%s)", fp)
+                    return 0.0, None
+                entry = self._sequence[self._sequence_pos % len(self._sequence)]
+                self._sequence_pos += 1
+        return float(entry.get("t", 0.0)) * self.latency_scale, entry.get("r")
+
+    def _record(self, user_prompt: str, system_prompt: Optional[str], text: Optional[str], elapsed: float) -> None:
+        entry = {"fp": prompt_fingerprint(user_prompt, system_prompt), "r": text, "t": round(elapsed, 4)}
+        with self._lock:
+            self.calls += 1
+            self._pending.append(entry)
+            if len(self._pending) < self.flush_every:
+                return
+            pending, self._pending = self._pending, []
+            self._write(pending)
+
+    def _write(self, entries: List[Dict[str, Any]]) -> None:
+        # Her flush ayrı bir gzip üyesi; gzip.open bunları tek akış olarak okur
+        lines = []
+        if not self._header_written:
+            lines.append(json.dumps(self._header, separators=(",", ":")))
+            self._header_written = True
+        lines.extend(json.dumps(e, ensure_ascii=False, separators=(",", ":")) for e in entries)
+        with gzip.open(self.cassette_path, "at", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+
+    def flush(self) -> int:
+        """Bekleyen kayıtları diske yaz (record modu)."""
+        if self.mode != "record":
+            return 0
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if pending:
+                self._write(pending)
+        return len(pending)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "calls": self.calls,
+            "hits": self.hits,
+            "misses": self.misses,
+            "pending": len(self._pending),
+        }
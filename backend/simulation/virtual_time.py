@@ -0,0 +1,125 @@
+"""
+Virtual Time
+
+Event loop whose clock jumps ahead instead of waiting. Every asyncio.sleep,
+wait_for timeout and call_later in the engine (per-chat tick delays, typing
+durations, write-behind flush interval, fake LLM/Telegram latencies) is a
+timer on the loop; when nothing is ready to run, VirtualTimeLoop advances its
+time straight to the next timer. Paired with clock.VirtualClock, now_utc(),
+active/prime hours and the hourly limits follow the same virtual time.
+
+CPU work takes zero virtual time. Work handed to a thread
+(asyncio.to_thread / run_in_executor, e.g. DB loads and write-behind
+flushes) is awaited in real time while the virtual clock is held, so a
+thread's result is never "late" relative to the timers around it.
+"""
+
+import asyncio
+import contextlib
+import selectors
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+import clock
+
+T = TypeVar("T")
+
+# Thread'e verilmiş iş varken selector'ün gerçek zamanda en fazla bu kadar beklemesi
+_EXECUTOR_POLL_SECONDS = 1.0
+
+
+class _VirtualSelector:
+    """Selector wrapper: boşta beklemek yerine loop saatini ilerletir."""
+
+    def __init__(self, selector: selectors.BaseSelector, loop: "VirtualTimeLoop") -> None:
+        self._selector = selector
+        self._loop = loop
+
+    def select(self, timeout: Optional[float] = None) -> List[Tuple[selectors.SelectorKey, int]]:
+        loop = self._loop
+        if loop.executor_inflight:
+            # Thread sonucu self-pipe üzerinden gelir; sanal saat beklerken durur
+            real_timeout = _EXECUTOR_POLL_SECONDS if timeout is None else min(timeout, _EXECUTOR_POLL_SECONDS)
+            return self._selector.select(real_timeout)
+        events = self._selector.select(0)
+        if events:
+            return events
+        if timeout is None:
+            # Ne timer ne thread işi var: loop'u yalnızca gerçek I/O uyandırabilir
+            return self._selector.select(None)
+        loop.advance(timeout)
+        return events
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._selector, name)
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """
+    SelectorEventLoop with virtual time.
+
+    time() starts at 0.0 and only moves when the loop would otherwise idle
+    (or via advance()), so it is the simulated time elapsed so far.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._virtual_now = 0.0
+        self.executor_inflight = 0
+        self._selector = _VirtualSelector(self._selector, self)  # type: ignore[assignment]
+
+    def time(self) -> float:
+        return self._virtual_now
+
+    def advance(self, seconds: float) -> None:
+        """Sanal saati ilerlet (vadesi gelen timer'lar bir sonraki turda çalışır)."""
+        if seconds > 0:
+            self._virtual_now += seconds
+
+    def run_in_executor(self, executor: Any, func: Callable[..., T], *args: Any) -> "asyncio.Future[T]":
+        future = super().run_in_executor(executor, func, *args)
+        self.executor_inflight += 1
+        future.add_done_callback(self._executor_done)
+        return future
+
+    def _executor_done(self, _future: "asyncio.Future[Any]") -> None:
+        self.executor_inflight -= 1
+
+
+def run_virtual(main: Callable[[], Awaitable[T]], *, start: datetime) -> T:
+    """
+    main() coroutine'ini sanal zamanda çalıştır.
+
+    clock modülü çalışma süresince VirtualClock'a bağlanır (start anından
+    başlayarak); bitince önceki saat geri yüklenir.
+
+    Args:
+        main: Coroutine function to run
+        start: Virtual wall-clock time at the start (naive = local time)
+
+    Returns:
+        Result of main()
+    """
+    loop = VirtualTimeLoop()
+    previous = clock.set_clock(clock.VirtualClock(start, loop.time))
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(main())
+    finally:
+        try:
+            _cancel_all_tasks(loop)
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+            clock.set_clock(previous)
+
+
+def _cancel_all_tasks(loop: asyncio.AbstractEventLoop) -> None:
+    tasks = [t for t in asyncio.all_tasks(loop) if not t.done()]
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        with contextlib.suppress(Exception):
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
@@ -35,7 +35,32 @@ from system_prompt import (
 from telegram_client import TelegramClient
 from message_queue import MessageQueue, QueuedMessage, MessagePriority
 from news_client import NewsClient, DEFAULT_FEEDS  # <-- HABER TETIKLEYICI
+from runtime_profiler import (
+    PROFILE_FORMATS,
+    PROFILE_REQUEST_TYPE,
+    PROFILE_RESULT_TTL,
+    ProfilerBusyError,
+    aprofile_for,
+    encode_artifact,
+    profile_result_key,
+)
 from voice_profiles import VoiceProfileGenerator  # <-- PHASE 2 Week 3 Day 4-5: Voice Profiles
+from backend.behavior_engine.chat_scheduler import ChatPipelineScheduler
+from backend.behavior_engine.loop_monitor import LoopLagMonitor
+from backend.behavior_engine.priority_consumer import PriorityQueueConsumer
+from backend.behavior_engine.rate_accounting import RateAccountant
+from backend.behavior_engine.roster import ROSTER_EVENT_TYPES, RosterCache
+from backend.behavior_engine.shard_leases import ShardLeaseManager
+from backend.behavior_engine.tick_data import (
+    BatchContext,
+    TickData,
+    TickDataLoader,
+    create_async_session_factory,
+    duplicate_exists_stmt,
+)
+from backend.behavior_engine.tracing import Trace, span
+from backend.behavior_engine.typing_presence import TypingHandle, TypingPresence
+from backend.behavior_engine.write_buffer import WriteBehindBuffer
 
 # Backend behavior modules (Session 10-11: Modularization)
 from backend.behavior import (
@@ -53,14 +78,12 @@ from backend.behavior import (
     update_persona_refresh_state,
     # Bot selection utilities
     is_prime_hours,
-    is_within_active_hours,
     parse_ranges,
-    # Reply handler utilities
-    detect_sentiment,
-    detect_topics,
-    extract_symbols,
+    # Precomputed message features
+    attach_message_features,
+    get_message_features,
     # Deduplication
-    normalize_text,
+    text_hash,
     # Message utilities
     choose_message_length_category,
     compose_length_hint,
@@ -97,6 +120,8 @@ from backend.behavior_engine.metadata_analyzer import (
     extract_message_metadata,
     find_relevant_past_messages,
     format_past_references_for_prompt,
+    memories_to_dicts,
+    score_past_messages,
 )
 
 # Prometheus metrics (opsiyonel)
@@ -205,6 +230,7 @@ def load_settings(db: Session) -> Dict[str, Any]:
 class BehaviorEngine:
     """
     - Aktif sohbetler ve botları DB'den seçer
+    - Her aktif sohbet için bağımsız pipeline çalıştırır (global eşzamanlılık sınırı ile)
     - Poisson gecikme, reply/@mention, typing simülasyonu, reaksiyon uygular
     - Limitlere saygı duyar (dk başı, saat başı)
     - Redis 'config_updates' kanalını dinleyip ayar cache'ini canlı günceller (opsiyonel)
@@ -219,6 +245,12 @@ class BehaviorEngine:
         self.llm = LLMClient()
         self.llm_batch = LLMBatchClient(max_workers=10)  # SESSION 38: Parallel LLM processing
         self.tg = TelegramClient()
+        # Typing göstergeleri arka planda: gönderim adımı beklemek yerine kalan süreye katılır,
+        # aynı bot/chat için tek sendChatAction yenileyicisi çalışır
+        self.typing = TypingPresence(
+            lambda token, chat_id: self.tg.send_chat_action(token, chat_id),
+            refresh_interval=float(os.getenv("TYPING_REFRESH_SECONDS", "4.0")),
+        )
         self._last_settings: Dict[str, Any] = {}
         self._settings_loaded_at: datetime = datetime.min.replace(tzinfo=UTC)
 
@@ -227,6 +259,21 @@ class BehaviorEngine:
         self.total_workers = int(os.getenv("TOTAL_WORKERS", "1"))
         logger.info(f"Worker {self.worker_id}/{self.total_workers} initialized")
 
+        # Per-chat eşzamanlı pipeline'lar ("serial" eski tek döngü davranışı)
+        self.scheduler_mode = os.getenv("ENGINE_SCHEDULER_MODE", "per_chat").strip().lower()
+        self.max_concurrent_chats = int(os.getenv("ENGINE_MAX_CONCURRENT_CHATS", "16"))
+        self._scheduler: Optional[ChatPipelineScheduler] = None
+        self._priority_task: Optional[asyncio.Task] = None
+        # Priority lane: BRPOP tüketicisi, kendi eşzamanlılık sınırıyla
+        self.priority_max_concurrency = int(os.getenv("PRIORITY_MAX_CONCURRENCY", "4"))
+        self.priority_block_timeout = int(os.getenv("PRIORITY_BLOCK_TIMEOUT", "5"))
+        self.priority_consumer: Optional[PriorityQueueConsumer] = None
+        # Batch sonrası teslimat (guard + typing + send) için eşzamanlı item sınırı
+        self.priority_delivery_concurrency = max(1, int(os.getenv("PRIORITY_DELIVERY_CONCURRENCY", "5")))
+        self._priority_redis: Any = None
+        self._priority_batch_size = 1
+
+
         # Cache manager (PHASE 1A.2: Multi-layer caching)
         # Will be initialized after Redis client is set up below
         self.cache = None  # type: ignore
@@ -257,11 +304,88 @@ class BehaviorEngine:
                 logger.warning("Priority queue Redis init failed: %s. User message responses disabled.", e)
                 self._redis_sync_client = None
 
+        # Rate limit sayaçları (bellek içi sliding window; paylaşımlı modda Redis'te)
+        # Gönderim rezervasyonları da burada tutulur: limit kontrolünden commit'e kadar
+        # süren (henüz DB'de olmayan) mesajlar limit hesabına dahil edilir.
+        # Birden fazla worker varsa (TOTAL_WORKERS>1 veya lease sharding) sayaçlar paylaşılmak
+        # zorunda; Redis yoksa limitler eskisi gibi DB'den sayılır.
+        multi_worker = self.total_workers > 1 or os.getenv("SHARDING_MODE", "static").strip().lower() == "lease"
+        shared_env = os.getenv("RATE_ACCOUNTING_SHARED", "").strip().lower()
+        shared_rates = shared_env in {"1", "true", "yes"} or (not shared_env and multi_worker)
+        self.rates = RateAccountant(
+            redis_client=self._redis_sync_client if shared_rates else None,
+            count_from_db=multi_worker,
+        )
+        if self.rates.count_from_db:
+            logger.warning("Multiple workers without shared (Redis) rate counters; rate limits are counted from the DB")
+
+        # Bot sharding: "static" (bot_id % TOTAL_WORKERS == WORKER_ID) veya
+        # "lease" (Redis partition lease'leri, consistent hashing ile otomatik dengeleme)
+        self.sharding_mode = os.getenv("SHARDING_MODE", "static").strip().lower()
+        self.shard_leases: Optional[ShardLeaseManager] = None
+        self._shard_partitions: frozenset = frozenset()
+        self._shard_task: Optional[asyncio.Task] = None
+        if self.sharding_mode == "lease":
+            if self._redis_sync_client is not None:
+                self.shard_leases = ShardLeaseManager(
+                    self._redis_sync_client,
+                    partitions=int(os.getenv("SHARD_PARTITIONS", "64")),
+                    heartbeat_interval=float(os.getenv("SHARD_HEARTBEAT_SECONDS", "5")),
+                    lease_ttl=int(os.getenv("SHARD_LEASE_TTL", "15")),
+                    on_change=self._on_shard_change,
+                )
+                logger.info("Lease-based sharding enabled (worker=%s)", self.shard_leases.worker_name)
+            else:
+                logger.warning("SHARDING_MODE=lease requires Redis; falling back to static sharding.")
+
+        # Aktif bot/chat snapshot'ı (pick_chat/pick_bot her tick'te tüm tabloları yüklemez)
+        self.roster = RosterCache(
+            redis_client=self._redis_sync_client,
+            worker_id=self.worker_id,
+            total_workers=self.total_workers,
+            owns_bot=self.shard_leases.owns_bot if self.shard_leases else None,
+            version_check_interval=float(os.getenv("ROSTER_VERSION_CHECK_SECONDS", "5")),
+        )
+
+        # Write-behind: mesaj insert'leri ve hafıza kullanım sayaçları toplu yazılır
+        self.write_behind_enabled = os.getenv("WRITE_BEHIND_ENABLED", "true").lower() in {"1", "true", "yes"}
+        self.write_buffer = WriteBehindBuffer(
+            SessionLocal,
+            max_items=int(os.getenv("WRITE_BEHIND_MAX_ITEMS", "50")),
+            flush_interval=float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1.0")),
+            on_flushed=self._on_writes_flushed,
+        )
+        self._write_buffer_task: Optional[asyncio.Task] = None
+
+        # Tick okumaları: chat/bot seçildikten sonra tüm satırlar loop'u bloklamadan okunur
+        # (AsyncSession varsa paralel sorgular, yoksa tek sync session ile thread'de)
+        self.tick_prefetch_enabled = os.getenv("ENGINE_TICK_PREFETCH", "true").lower() in {"1", "true", "yes"}
+        use_async_db = os.getenv("ENGINE_ASYNC_DB", "true").lower() in {"1", "true", "yes"}
+        self.tick_data = TickDataLoader(
+            SessionLocal,
+            async_session_factory=(
+                create_async_session_factory() if self.tick_prefetch_enabled and use_async_db else None
+            ),
+        )
+        if self.tick_prefetch_enabled:
+            logger.info("Tick data prefetch enabled (mode=%s)", self.tick_data.mode)
+
         # Message queue for rate-limited messages
         self.msg_queue = MessageQueue(self._redis_sync_client)
         self._queue_processor_task: Optional[asyncio.Task] = None
         logger.info("Message queue initialized")
 
+        # Event loop lag ölçümü; LOOP_STALL_DEBUG ile loop'u tutan çağrının stack'i loglanır
+        self.loop_monitor: Optional[LoopLagMonitor] = None
+        if os.getenv("LOOP_LAG_MONITOR", "true").lower() in {"1", "true", "yes"}:
+            self.loop_monitor = LoopLagMonitor(
+                interval=float(os.getenv("LOOP_LAG_INTERVAL", "0.5")),
+                stall_threshold=float(os.getenv("LOOP_STALL_THRESHOLD", "0.25")),
+                debug=os.getenv("LOOP_STALL_DEBUG", "false").lower() in {"1", "true", "yes"},
+            )
+        self._loop_monitor_task: Optional[asyncio.Task] = None
+        self._profile_task: Optional[asyncio.Task] = None
+
         # Initialize cache manager (SESSION 13: Multi-layer caching)
         try:
             from backend.caching import CacheManager
@@ -276,6 +400,7 @@ class BehaviorEngine:
 
         # PHASE 2 Week 3 Day 1-3: Semantic Deduplication (P0.1: with embedding cache)
         self.semantic_dedup = None
+        self.semantic_dedup_warmup = os.getenv("SEMANTIC_DEDUP_WARMUP", "true").lower() in {"1", "true", "yes"}
         try:
             from semantic_dedup import SemanticDeduplicator
             # Pass Redis client for embedding cache
@@ -412,8 +537,18 @@ class BehaviorEngine:
                 except Exception:
                     data = {}
 
+                # Admin profil isteği: config değişikliği değil, cache'e dokunma
+                if data.get("type") == PROFILE_REQUEST_TYPE:
+                    self._start_profile_capture(data)
+                    continue
+
                 # Şimdilik herkes için cache invalid
                 self._invalidate_settings_cache()
+                if data.get("type") in ROSTER_EVENT_TYPES or not data.get("type"):
+                    self.roster.invalidate()
+                # Chat eklenmiş/pasifleşmiş olabilir: pipeline listesini tazele
+                if self._scheduler is not None:
+                    self._scheduler.request_refresh()
 
                 if (
                     self.news is not None
@@ -449,10 +584,32 @@ class BehaviorEngine:
 
     # ---- Seçimler ----
     def pick_chat(self, db: Session) -> Optional[Chat]:
-        chats = db.query(Chat).filter(Chat.is_enabled.is_(True)).all()
-        if not chats:
+        record = self.roster.get(db).random_chat()
+        if record is None:
+            return None
+        return self._load_roster_row(db, Chat, record.id)
+
+    def _get_enabled_chat(self, db: Session, chat_db_id: int) -> Optional[Chat]:
+        """Per-chat pipeline için chat'i getir (pasifleştirildiyse None)."""
+        if chat_db_id not in self.roster.get(db).chat_ids:
             return None
-        return random.choice(chats)
+        return self._load_roster_row(db, Chat, chat_db_id)
+
+    def _load_roster_row(self, db: Session, model: Any, row_id: int) -> Optional[Any]:
+        """Snapshot'tan seçilen kaydı PK ile yükle; silinmiş/pasifse snapshot'ı tazele."""
+        row = db.get(model, row_id)
+        if row is None or not row.is_enabled:
+            self.roster.invalidate()
+            return None
+        return row
+
+    async def _enabled_chat_ids(self) -> List[int]:
+        """Scheduler için aktif chat DB id'leri."""
+        db = SessionLocal()
+        try:
+            return [c.id for c in self.roster.get(db).chats]
+        finally:
+            db.close()
 
     def pick_bot(
         self,
@@ -460,61 +617,36 @@ class BehaviorEngine:
         hourly_limit: Dict[str, Any],
         chat: Optional[Chat] = None,
     ) -> Optional[Bot]:
-        bots = db.query(Bot).filter(Bot.is_enabled.is_(True)).all()
+        # Roster snapshot: shard üyeliği (bot_id % total_workers == worker_id) ve
+        # active_hours aralıkları önceden hesaplı; bot tablosu her tick'te yüklenmez
+        bots = self.roster.get(db).active_shard_bots()
         if not bots:
             return None
 
-        # Multi-worker coordination: Consistent hashing for bot distribution
-        # Each worker only handles bots where bot_id % total_workers == worker_id
-        if self.total_workers > 1:
-            my_bots = [b for b in bots if b.id % self.total_workers == self.worker_id]
-            if not my_bots:
-                return None  # This worker has no bots assigned
-            bots = my_bots
-
-        # Saatlik limit kontrolü
-        # SESSION 27: Optimized to avoid N+1 query problem
-        # Instead of querying each bot separately, fetch all counts in one query
-        one_hour_ago = now_utc() - timedelta(hours=1)
+        # Saatlik limit kontrolü: bellek içi sliding window sayaçları (DB sorgusu yok)
         max_hourly = hourly_limit.get("max", 12)
+        self.rates.ensure_hydrated(db)
+        bot_message_counts = self.rates.bot_counts((b.id for b in bots), db=db)
 
-        # Single query to get message counts for all bots in the last hour
-        bot_ids = [b.id for b in bots]
-        hourly_counts = (
-            db.query(Message.bot_id, func.count(Message.id))
-            .filter(
-                Message.bot_id.in_(bot_ids),
-                Message.created_at >= one_hour_ago
-            )
-            .group_by(Message.bot_id)
-            .all()
-        )
-
-        # Build a dict for O(1) lookup
-        bot_message_counts = {bot_id: count for bot_id, count in hourly_counts}
-
-        # Filter eligible bots
-        eligible: List[Bot] = []
-        for b in bots:
-            if not self._bot_is_active_now(b):
-                continue
-            sent_last_hour = bot_message_counts.get(b.id, 0)
-            if sent_last_hour < max_hourly:
-                eligible.append(b)
+        eligible = [b for b in bots if bot_message_counts.get(b.id, 0) < max_hourly]
 
         if not eligible:
             return None
 
         last_bot_id: Optional[int] = None
         if chat is not None:
-            from sqlalchemy.orm import joinedload
-            last_message = (
-                db.query(Message)
-                .options(joinedload(Message.bot))
-                .filter(Message.chat_db_id == chat.id)
-                .order_by(Message.created_at.desc())
-                .first()
-            )
+            pending = self.write_buffer.pending_messages(chat_db_id=chat.id)
+            if pending:
+                last_message = pending[0]
+            else:
+                from sqlalchemy.orm import joinedload
+                last_message = (
+                    db.query(Message)
+                    .options(joinedload(Message.bot))
+                    .filter(Message.chat_db_id == chat.id)
+                    .order_by(Message.created_at.desc())
+                    .first()
+                )
             if last_message and last_message.bot_id is not None:
                 last_bot_id = last_message.bot_id
 
@@ -523,14 +655,7 @@ class BehaviorEngine:
             if alternative:
                 eligible = alternative
 
-        return random.choice(eligible)
-
-    def _bot_is_active_now(self, bot: Bot) -> bool:
-        try:
-            ranges = bot.active_hours  # type: ignore[attr-defined]
-        except Exception:
-            ranges = None
-        return is_within_active_hours(ranges if isinstance(ranges, list) else None)
+        return self._load_roster_row(db, Bot, random.choice(eligible).id)
 
     def _active_cooldown_topics(self, stances: List[Dict[str, Any]]) -> List[str]:
         active: List[str] = []
@@ -553,6 +678,41 @@ class BehaviorEngine:
 
     # ---- Smart Reply Target Selection ----
 
+    def reply_counts(
+        self,
+        db: Session,
+        chat_db_id: int,
+        telegram_message_ids: List[Optional[int]],
+    ) -> Dict[int, int]:
+        """
+        Verilen mesajlara gelen cevap sayıları (tek gruplu sorgu).
+
+        Args:
+            db: Database session
+            chat_db_id: Chat DB id (telegram_message_id'ler chat bazında benzersiz)
+            telegram_message_ids: Aday mesajların Telegram id'leri (None'lar atlanır)
+
+        Returns:
+            {telegram_message_id: reply_count}; cevap almayanlar sözlükte yer almaz
+        """
+        ids = {mid for mid in telegram_message_ids if mid is not None}
+        if not ids:
+            return {}
+        try:
+            rows = (
+                db.query(Message.reply_to_message_id, func.count(Message.id))
+                .filter(
+                    Message.chat_db_id == chat_db_id,
+                    Message.reply_to_message_id.in_(ids),
+                )
+                .group_by(Message.reply_to_message_id)
+                .all()
+            )
+        except Exception as exc:
+            logger.debug("Reply count query failed: %s", exc)
+            return {}
+        return {reply_to: count for reply_to, count in rows}
+
     def pick_reply_target(
         self,
         db: Session,
@@ -562,6 +722,8 @@ class BehaviorEngine:
         active_bot_id: Optional[int] = None,
         active_bot_username: Optional[str] = None,
         active_bot: Optional[Bot] = None,
+        recent_msgs: Optional[List[Message]] = None,
+        known_reply_counts: Optional[Dict[int, int]] = None,
     ) -> tuple[Optional[Message], Optional[str]]:
         """
         Smart Reply Target Selection V2 (Week 2 Day 1-3)
@@ -570,12 +732,17 @@ class BehaviorEngine:
         - Bot mesajlarına artık pozitif puan (+2.5)
         - Akıllı scoring: mention, soru, uzmanlık alanı, sentiment, popülerlik
         - Top 3'ten weighted random seçim (çeşitlilik için)
+
+        recent_msgs / known_reply_counts verilirse (TickData) DB'ye gidilmez.
         """
         if random.random() > reply_p:
             return None, None
 
         # Son 30 mesajı al (20'den artırıldı) - PHASE 1A.2: Cache-aware
-        last_msgs = self.fetch_recent_messages(db, chat.id, limit=30)
+        if recent_msgs is not None:
+            last_msgs = list(recent_msgs[:30])
+        else:
+            last_msgs = self.fetch_recent_messages(db, chat.id, limit=30)
         if not last_msgs:
             return None, None
 
@@ -602,6 +769,14 @@ class BehaviorEngine:
                 except:
                     bot_empathy = 0.5
 
+        # Aday penceresi için cevap sayıları: tek GROUP BY sorgusu (aday başına sorgu yok)
+        if known_reply_counts is not None:
+            reply_counts = known_reply_counts
+        else:
+            reply_counts = self.reply_counts(
+                db, chat.id, [getattr(m, "telegram_message_id", None) for m in last_msgs]
+            )
+
         scored_candidates: list[tuple[float, int, Message, Optional[str]]] = []
         now = now_utc()
 
@@ -612,6 +787,8 @@ class BehaviorEngine:
 
             text = getattr(msg, "text", "") or ""
             lower_text = text.lower()
+            # Insert anında hesaplanmış özellikler (eski kayıtlar için anında hesaplanır)
+            features = get_message_features(msg)
 
             score = 0.0
 
@@ -646,7 +823,7 @@ class BehaviorEngine:
                 score -= 1.0  # Eski mesaj
 
             # === 3. SORU VAR MI? ===
-            if "?" in text:
+            if features["is_question"]:
                 score += 4.0  # Soru kesinlikle cevap bekliyor
 
             # Merak ifadeleri
@@ -667,12 +844,12 @@ class BehaviorEngine:
 
             # === 5. UZMANLIK ALANI (watchlist overlap) ===
             if bot_watchlist:
-                msg_symbols = extract_symbols(text)
+                msg_symbols = features["symbols"]
                 overlap = set(msg_symbols) & set(bot_watchlist)
                 score += len(overlap) * 2.5  # Her eşleşen sembol +2.5
 
             # === 6. KONU UYUMU ===
-            msg_topics = detect_topics(text)
+            msg_topics = features["topics"]
             if msg_topics:
                 # Eğer bot'un expertise'i varsa kontrol et
                 # (Şimdilik basit: her topic +1.5)
@@ -680,21 +857,14 @@ class BehaviorEngine:
 
             # === 7. SENTIMENT UYUMU ===
             # Empatik botlar negatif mesajlara daha çok tepki verir
-            msg_sentiment = detect_sentiment(text)
+            msg_sentiment = features["sentiment"]
             if msg_sentiment < -0.3 and bot_empathy > 0.7:
                 score += 2.0  # Empatik bot, negatif mesaja tepki verir
 
             # === 8. POPÜLER MESAJ (çok cevap alıyorsa) ===
             # Eğer birçok bot cevap verdiyse, bu bot da katılabilir
-            try:
-                reply_count = db.query(Message).filter(
-                    Message.reply_to_message_id == msg.telegram_message_id
-                ).count()
-
-                if reply_count >= 2:
-                    score += 1.5  # Popüler tartışma
-            except:
-                pass  # Hata olursa geç
+            if reply_counts.get(msg.telegram_message_id, 0) >= 2:
+                score += 1.5  # Popüler tartışma
 
             # Mention handle'ı belirle
             mention_handle = None
@@ -859,13 +1029,51 @@ class BehaviorEngine:
         tempo_multiplier = clamp(float(tempo_multiplier or 1.0), 0.5, 1.6)
         return seconds * tempo_multiplier
 
+    # ---- On-demand profiling ----
+    def _start_profile_capture(self, request: Dict[str, Any]) -> None:
+        if self._profile_task is not None and not self._profile_task.done():
+            logger.warning("Profile request %s ignored: a capture is already running", request.get("request_id"))
+            return
+        self._profile_task = asyncio.create_task(self._capture_profile(request), name="profile_capture")
+
+    async def _capture_profile(self, request: Dict[str, Any]) -> None:
+        """API'nin yayınladığı profil isteğini yürüt; artifact'ı Redis'e yaz."""
+        request_id = str(request.get("request_id") or "")
+        fmt = request.get("format") or "collapsed"
+        if not request_id or fmt not in PROFILE_FORMATS:
+            logger.warning("Invalid profile request: %s", request)
+            return
+        key = profile_result_key(request_id, self.worker_id)
+        try:
+            result = await aprofile_for(
+                float(request.get("duration", 10.0)),
+                interval=float(request.get("interval", 0.01)),
+                trace_memory=bool(request.get("tracemalloc")),
+            )
+            payload = encode_artifact(result, fmt, worker_id=self.worker_id)
+            logger.info("Profile %s captured (%.1fs, %d samples)", request_id, result.duration, result.samples)
+        except ProfilerBusyError as exc:
+            payload = json.dumps({"worker_id": self.worker_id, "error": str(exc)})
+        try:
+            if self._redis is not None:
+                await self._redis.set(key, payload, ex=PROFILE_RESULT_TTL)
+        except Exception as exc:
+            logger.warning("Failed to store profile %s: %s", request_id, exc)
+
     # ---- Rate limit ----
     def global_rate_ok(self, db: Session) -> bool:
+        """Son 60 sn'deki bot gönderimleri (rezervasyonlar dahil) max_msgs_per_min altında mı?"""
         s = self.settings(db)
         per_min_limit = int(s.get("max_msgs_per_min", 6))
-        one_min_ago = now_utc() - timedelta(seconds=60)
-        last_min_msgs = db.query(Message).filter(Message.created_at >= one_min_ago).count()
-        return last_min_msgs < per_min_limit
+        self.rates.ensure_hydrated(db)
+        return self.rates.global_count(db=db) < per_min_limit
+
+    def _reserve_send_slot(self, bot_id: int) -> None:
+        """Seçilen bot için gönderim slotu ayır (commit ya da vazgeçilene kadar)."""
+        self.rates.reserve(bot_id)
+
+    def _release_send_slot(self, bot_id: int) -> None:
+        self.rates.release(bot_id)
 
     # ---- Cached Message History Fetch (PHASE 1A.2) ----
     def fetch_recent_messages(self, db: Session, chat_id: int, limit: int) -> List[Message]:
@@ -886,7 +1094,7 @@ class BehaviorEngine:
         # Use cached helper function
         if self.cache:
             from backend.caching import get_recent_messages_cached
-            return get_recent_messages_cached(chat_id, db, limit=limit)
+            messages = get_recent_messages_cached(chat_id, db, limit=limit)
         else:
             # Fallback to direct DB query
             # SESSION 41: Added joinedload to prevent DetachedInstance errors
@@ -900,7 +1108,18 @@ class BehaviorEngine:
                 .limit(limit)
                 .all()
             )
-            return messages
+        # Write-behind: henüz flush edilmemiş bot mesajları da geçmişte görünsün
+        return self._with_pending(self.write_buffer.pending_messages(chat_db_id=chat_id), messages, limit)
+
+    @staticmethod
+    def _with_pending(pending: List[Any], rows: List[Any], limit: int) -> List[Any]:
+        """Pending (en yeni önce) mesajları DB sonuçlarının önüne ekle."""
+        if not pending:
+            return rows
+        keys = {(m.bot_id, m.telegram_message_id) for m in pending if m.telegram_message_id is not None}
+        merged = list(pending)
+        merged.extend(m for m in rows if (m.bot_id, m.telegram_message_id) not in keys)
+        return merged[:limit]
 
     # ---- Persona/Stance/Holdings çekme ----
     def fetch_psh(
@@ -914,11 +1133,6 @@ class BehaviorEngine:
 
         SESSION 13: Now uses helper functions with multi-layer caching
         """
-        # Get persona and emotion profiles (cached)
-        persona_profile = bot.persona_profile or {}
-        emotion_profile = bot.emotion_profile or {}
-        persona_hint = (bot.persona_hint or "").strip()
-
         # Stance'ler: son güncellenene öncelik (cached with helper)
         if self.cache:
             from backend.caching import get_bot_stances_cached
@@ -931,16 +1145,6 @@ class BehaviorEngine:
                 .all()
             )
 
-        stances: List[Dict[str, Any]] = []
-        for s in stance_rows:
-            stances.append({
-                "topic": s.topic,
-                "stance_text": (s.stance_text or "").strip(),
-                "confidence": s.confidence,
-                "updated_at": s.updated_at.isoformat() if s.updated_at else None,
-                "cooldown_until": s.cooldown_until.isoformat() if s.cooldown_until else None,
-            })
-
         # Holdings: son güncellenene öncelik (cached with helper)
         if self.cache:
             from backend.caching import get_bot_holdings_cached
@@ -953,6 +1157,30 @@ class BehaviorEngine:
                 .all()
             )
 
+        return self._shape_psh(bot, stance_rows, holding_rows, topic_hint)
+
+    @staticmethod
+    def _shape_psh(
+        bot: Bot,
+        stance_rows: Sequence[Any],
+        holding_rows: Sequence[Any],
+        topic_hint: Optional[str],
+    ) -> tuple[Dict[str, Any], Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]], str]:
+        """Bot profilleri ve stance/holding satırlarını prompt için sadeleştir."""
+        persona_profile = getattr(bot, "persona_profile", None) or {}
+        emotion_profile = getattr(bot, "emotion_profile", None) or {}
+        persona_hint = (getattr(bot, "persona_hint", None) or "").strip()
+
+        stances: List[Dict[str, Any]] = []
+        for s in stance_rows:
+            stances.append({
+                "topic": s.topic,
+                "stance_text": (s.stance_text or "").strip(),
+                "confidence": s.confidence,
+                "updated_at": s.updated_at.isoformat() if s.updated_at else None,
+                "cooldown_until": s.cooldown_until.isoformat() if s.cooldown_until else None,
+            })
+
         holdings: List[Dict[str, Any]] = []
         for h in holding_rows:
             holdings.append({
@@ -971,21 +1199,37 @@ class BehaviorEngine:
 
     # ---- Dedup (tekrar) kontrolü ----
     def is_duplicate_recent(self, db: Session, *, bot_id: int, text: str, hours: int) -> bool:
+        """
+        Bot son `hours` saatte birebir aynı (normalize edilmiş) metni gönderdi mi?
+
+        Karşılaştırma messages.text_hash üzerinden: önce write-behind buffer'daki
+        henüz yazılmamış mesajlar (bellekte), sonra (bot_id, text_hash, created_at)
+        indeksinde tek bir EXISTS sorgusu. Event loop'ta ais_duplicate_recent() kullanın.
+        """
         if not text:
             return False
-        cutoff = now_utc() - timedelta(hours=int(max(1, hours)))
-        last_msgs = (
-            db.query(Message)
-            .filter(Message.bot_id == bot_id, Message.created_at >= cutoff)
-            .order_by(Message.created_at.desc())
-            .limit(100)
-            .all()
+        target = text_hash(text)
+        if self._pending_duplicate(bot_id, target):
+            return True
+        return bool(db.execute(duplicate_exists_stmt(bot_id, target, self._dedup_cutoff(hours))).scalar())
+
+    async def ais_duplicate_recent(self, *, bot_id: int, text: str, hours: int) -> bool:
+        """is_duplicate_recent() for the event loop: the EXISTS lookup runs through TickDataLoader."""
+        if not text:
+            return False
+        target = text_hash(text)
+        if self._pending_duplicate(bot_id, target):
+            return True
+        return await self.tick_data.duplicate_exists(
+            bot_id=bot_id, text_hash=target, since=self._dedup_cutoff(hours)
         )
-        target = normalize_text(text)
-        for m in last_msgs:
-            if normalize_text(m.text or "") == target:
-                return True
-        return False
+
+    def _pending_duplicate(self, bot_id: int, target: str) -> bool:
+        return any(m.text_hash == target for m in self.write_buffer.pending_messages(bot_id=bot_id))
+
+    @staticmethod
+    def _dedup_cutoff(hours: int) -> datetime:
+        return now_utc() - timedelta(hours=int(max(1, hours)))
 
     # ---- Context Data Preparation (SESSION 25: Extracted from tick_once) ----
     def _prepare_context_data(
@@ -995,6 +1239,7 @@ class BehaviorEngine:
         chat: Chat,
         bot: Bot,
         s: Dict[str, Any],
+        tick_data: Optional[TickData] = None,
     ) -> tuple:
         """
         Prepare context data for message generation (history, reply target, examples).
@@ -1006,13 +1251,19 @@ class BehaviorEngine:
             chat: Selected chat
             bot: Selected bot
             s: Settings dictionary
+            tick_data: Prefetched tick rows (None: query inline)
 
         Returns:
             Tuple of (recent_msgs, reply_msg, mention_handle, mode, mention_ctx,
                      history_excerpt, reply_excerpt, contextual_examples)
         """
         # Geçmiş mesajları al - PHASE 1A.2: Cache-aware
-        recent_msgs = self.fetch_recent_messages(db, chat.id, limit=40)
+        if tick_data is not None:
+            recent_msgs = self._with_pending(
+                self.write_buffer.pending_messages(chat_db_id=chat.id), tick_data.recent_messages, 40
+            )
+        else:
+            recent_msgs = self.fetch_recent_messages(db, chat.id, limit=40)
 
         # Week 2 Day 4-5: Reply Probability Tuning
         # Son mesaj bot'tansa, reply_to_bots_probability kullan
@@ -1032,6 +1283,8 @@ class BehaviorEngine:
             active_bot_id=bot.id,
             active_bot_username=getattr(bot, "username", None),
             active_bot=bot,  # Smart Reply Target Selection V2 için gerekli
+            recent_msgs=recent_msgs if tick_data is not None else None,
+            known_reply_counts=tick_data.reply_counts if tick_data is not None else None,
         )
         mode = "reply" if reply_msg else "new"
         mention_ctx = f"@{mention_handle}" if mention_handle else ""
@@ -1059,7 +1312,7 @@ class BehaviorEngine:
         )
 
     # ---- Message Processing (SESSION 25: Extracted from tick_once) ----
-    def _process_generated_text(
+    async def _process_generated_text(
         self,
         db: Session,
         *,
@@ -1087,52 +1340,57 @@ class BehaviorEngine:
             should_skip is True if message should be skipped (empty or duplicate)
         """
         # ==== LLM ÜRETİMİ (YENİ PARAMETRELERLE) ====
-        text = self.llm.generate(
-            user_prompt=user_prompt,
-            system_prompt=system_prompt,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            top_p=top_p,
-            frequency_penalty=frequency_penalty,
-        )
+        with span("llm") as sp:
+            text = await self.llm.agenerate(
+                user_prompt=user_prompt,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                frequency_penalty=frequency_penalty,
+            )
+            if not text:
+                sp.outcome = "empty"
         if not text:
             logger.warning("LLM boş/filtreli çıktı; atlanıyor.")
             return ("", True)
 
         # Tutarlılık koruması
         if bool(s.get("consistency_guard_enabled", True)):
-            revised = apply_consistency_guard(
-                self.llm,
-                draft_text=text,
-                persona_profile=persona_profile,
-                stances=stances,
-            )
+            with span("consistency_guard"):
+                revised = await apply_consistency_guard(
+                    self.llm,
+                    draft_text=text,
+                    persona_profile=persona_profile,
+                    stances=stances,
+                )
             if revised:
                 text = revised
 
-        text = apply_reaction_overrides(text, reaction_plan)
+        with span("humanize"):
+            text = apply_reaction_overrides(text, reaction_plan)
 
-        text = apply_micro_behaviors(
-            text,
-            emotion_profile=emotion_profile,
-            plan=reaction_plan,
-        )
+            text = apply_micro_behaviors(
+                text,
+                emotion_profile=emotion_profile,
+                plan=reaction_plan,
+            )
 
-        # İnsancıl geliştirmeler (ARTIK DAHA AGRESIF!)
-        # 1. Konuşma açılışları ekle
-        text = add_conversation_openings(text, probability=0.40)
+            # İnsancıl geliştirmeler (ARTIK DAHA AGRESIF!)
+            # 1. Konuşma açılışları ekle
+            text = add_conversation_openings(text, probability=0.40)
 
-        # 2. Belirsizlik belirteçleri ekle (en kritik özellik) - ARTIRDI!
-        text = add_hesitation_markers(text, probability=0.55)
+            # 2. Belirsizlik belirteçleri ekle (en kritik özellik) - ARTIRDI!
+            text = add_hesitation_markers(text, probability=0.55)
 
-        # 3. Günlük kısaltmalar ekle - ARTIRDI!
-        text = add_colloquial_shortcuts(text, probability=0.40)
+            # 3. Günlük kısaltmalar ekle - ARTIRDI!
+            text = add_colloquial_shortcuts(text, probability=0.40)
 
-        # 4. Dolgu kelimeleri ekle - ARTIRDI!
-        text = add_filler_words(text, probability=0.35)
+            # 4. Dolgu kelimeleri ekle - ARTIRDI!
+            text = add_filler_words(text, probability=0.35)
 
-        # 5. Doğal kusurlar uygula (yazım hataları + düzeltmeler) - ARTIRDI!
-        text = apply_natural_imperfections(text, probability=0.30)
+            # 5. Doğal kusurlar uygula (yazım hataları + düzeltmeler) - ARTIRDI!
+            text = apply_natural_imperfections(text, probability=0.30)
 
         # Mention'ı metne kibarca ekle (başta değilse)
         if mention_ctx and mention_ctx not in text:
@@ -1147,21 +1405,26 @@ class BehaviorEngine:
             window_h = int(s.get("dedup_window_hours", 12))
             attempts = int(s.get("dedup_max_attempts", 2))
             tries = 0
-            while self.is_duplicate_recent(db, bot_id=bot.id, text=text, hours=window_h) and tries < attempts:
-                alt = paraphrase_safe(self.llm, text)
+            while True:
+                with span("dedup"):
+                    duplicate = await self.ais_duplicate_recent(bot_id=bot.id, text=text, hours=window_h)
+                if not duplicate or tries >= attempts:
+                    break
+                with span("paraphrase"):
+                    alt = await paraphrase_safe(self.llm, text)
                 if not alt or alt.strip() == text.strip():
                     break
                 text = alt.strip()
                 tries += 1
             # Hâlâ birebir aynıysa mesajı es geç
-            if self.is_duplicate_recent(db, bot_id=bot.id, text=text, hours=window_h):
+            if duplicate:
                 logger.info("Dedup: aynı metin tespit edildi, gönderim atlandı.")
                 return ("", True)
 
         return (text, False)
 
     # ---- Message Finalization (SESSION 25: Extracted from tick_once) ----
-    def _finalize_message_text(
+    async def _finalize_message_text(
         self,
         db: Session,
         *,
@@ -1181,14 +1444,15 @@ class BehaviorEngine:
         """
         # PHASE 2 Week 3 Day 1-3: Semantic Deduplication
         if bool(s.get("semantic_dedup_enabled", True)) and self.semantic_dedup and self.semantic_dedup.enabled:
-            # Son 50 bot mesajını al
+            # Son 50 bot mesajını al (bot'un embedding store'u ilk kontrolde bunlarla dolar)
             recent_bot_msgs = [
                 m.text for m in recent_msgs[:50]
                 if m.text and m.bot_id == bot.id
             ]
 
-            if recent_bot_msgs:
-                is_dup, similarity = self.semantic_dedup.is_duplicate(text, recent_bot_msgs)
+            if recent_bot_msgs or self.semantic_dedup.has_history(bot.id):
+                with span("semantic_dedup"):
+                    is_dup, similarity = await self.semantic_dedup.ais_duplicate(text, recent_bot_msgs, bot_id=bot.id)
 
                 if is_dup:
                     logger.warning(f"Semantic duplicate detected! Similarity={similarity:.3f}")
@@ -1196,8 +1460,10 @@ class BehaviorEngine:
                     # 2 deneme: Paraphrase et (P1.2: with cache)
                     paraphrase_attempts = 2
                     for attempt in range(paraphrase_attempts):
-                        text = self.semantic_dedup.paraphrase_message(text, self.llm, bot_id=bot.id)
-                        is_dup, similarity = self.semantic_dedup.is_duplicate(text, recent_bot_msgs)
+                        with span("paraphrase"):
+                            text = await self.semantic_dedup.paraphrase_message(text, self.llm, bot_id=bot.id)
+                        with span("semantic_dedup"):
+                            is_dup, similarity = await self.semantic_dedup.ais_duplicate(text, recent_bot_msgs, bot_id=bot.id)
 
                         if not is_dup:
                             logger.info(f"Paraphrase successful! New similarity={similarity:.3f}")
@@ -1210,14 +1476,80 @@ class BehaviorEngine:
 
         # PHASE 2 Week 3 Day 4-5: Voice Profile Application (P0.3: deterministic)
         # Mesaja bot'un unique writing style'ını uygula
-        voice = self.get_bot_voice(bot)
-        original_text = text
-        text = self.voice_generator.apply_voice(text, voice, bot_id=bot.id)  # P0.3: pass bot_id for determinism
+        with span("voice"):
+            voice = self.get_bot_voice(bot)
+            original_text = text
+            text = self.voice_generator.apply_voice(text, voice, bot_id=bot.id)  # P0.3: pass bot_id for determinism
         if text != original_text:
             logger.debug(f"Voice profile applied: '{original_text[:50]}...' -> '{text[:50]}...'")
 
         return (text, False)
 
+    # ---- Message persistence (write-behind) ----
+    def _store_bot_message(
+        self,
+        db: Session,
+        *,
+        bot: Bot,
+        chat: Chat,
+        telegram_message_id: Optional[int],
+        text: str,
+        reply_to_message_id: Optional[int],
+        msg_metadata: Dict[str, Any],
+    ) -> None:
+        """
+        Gönderilen bot mesajını kaydet.
+
+        Write-behind açıkken mesaj buffer'a eklenir ve toplu insert ile yazılır
+        (okuyucular flush'a kadar pending_messages() üzerinden görür); kapalıysa
+        doğrudan commit edilir.
+        """
+        with span("store"):
+            if self.write_behind_enabled:
+                self.write_buffer.add_message(
+                    bot=bot,
+                    chat_db_id=chat.id,
+                    telegram_message_id=telegram_message_id,
+                    text=text,
+                    reply_to_message_id=reply_to_message_id,
+                    msg_metadata=msg_metadata,
+                )
+            else:
+                db.add(Message(
+                    bot_id=bot.id,
+                    chat_db_id=chat.id,
+                    telegram_message_id=telegram_message_id,
+                    text=text,
+                    reply_to_message_id=reply_to_message_id,
+                    msg_metadata=msg_metadata,
+                    created_at=now_utc(),
+                ))
+                db.commit()
+                # PHASE 1A.2: Invalidate chat cache after new message
+                self.invalidate_chat_cache(chat.id)
+            self.rates.record(bot.id)
+            if self.semantic_dedup is not None:
+                self.semantic_dedup.remember(bot.id, text)
+
+    def _on_shard_change(self, owned) -> None:
+        # Lease thread'inden çağrılır: roster yeniden kurulsun
+        self.roster.invalidate()
+        previous, self._shard_partitions = self._shard_partitions, owned
+        if self.semantic_dedup is None or self.shard_leases is None:
+            return
+        # Devralınan/bırakılan partition'lardaki botların embedding store'u başka
+        # worker'ın gönderimlerini görmedi: bir sonraki kontrolde DB'den yeniden seed'lensin
+        changed = previous ^ owned
+        self.semantic_dedup.forget(
+            bot_id for bot_id in self.semantic_dedup.store.bot_ids()
+            if self.shard_leases.partition_for_bot(bot_id) in changed
+        )
+
+    def _on_writes_flushed(self, chat_ids) -> None:
+        # Flush edilen mesajlar artık DB'de: cache'teki geçmiş listeleri tazelensin
+        for chat_id in chat_ids:
+            self.invalidate_chat_cache(chat_id)
+
     # ---- Message Sending (SESSION 25: Extracted from tick_once) ----
     async def _send_message_to_chat(
         self,
@@ -1234,48 +1566,39 @@ class BehaviorEngine:
         start_time: float,
         refresh_state: Dict[str, Any],
         should_refresh: bool,
+        typing: Optional[TypingHandle] = None,
     ) -> None:
         """
         Send message to chat with typing simulation, DB logging, and metrics.
 
         SESSION 25: Extracted from tick_once to reduce complexity.
         """
-        # Typing simülasyonu
-        if bool(s.get("typing_enabled", True)):
-            await self.tg.send_typing(
-                bot.token,
-                chat.chat_id,
-                self.typing_seconds(
-                    db,
-                    len(text),
-                    bot=bot,
-                    tempo_multiplier=tempo_multiplier,
-                ),
-            )
+        # Typing simülasyonu: gösterge üretim başından beri açık, sadece kalan süre beklenir
+        await self._join_typing(db, s, typing, bot=bot, chat=chat, text=text, tempo_multiplier=tempo_multiplier)
 
         # Mesajı gönder
-        msg_id = await self.tg.send_message(
-            token=bot.token,
-            chat_id=chat.chat_id,
-            text=text,
-            reply_to_message_id=reply_msg.telegram_message_id if reply_msg else None,
-            disable_preview=True,
-        )
+        with span("telegram_send"):
+            msg_id = await self.tg.send_message(
+                token=bot.token,
+                chat_id=chat.chat_id,
+                text=text,
+                reply_to_message_id=reply_msg.telegram_message_id if reply_msg else None,
+                disable_preview=True,
+            )
+        if typing is not None:
+            typing.cancel(message_sent=True)
 
         # DB log (metadata ile birlikte kaydet)
-        msg_metadata = extract_message_metadata(text, topic)
-        db.add(Message(
-            bot_id=bot.id,
-            chat_db_id=chat.id,
+        msg_metadata = attach_message_features(extract_message_metadata(text, topic), text)
+        self._store_bot_message(
+            db,
+            bot=bot,
+            chat=chat,
             telegram_message_id=msg_id,
             text=text,
             reply_to_message_id=reply_msg.telegram_message_id if reply_msg else None,
             msg_metadata=msg_metadata,
-        ))
-        db.commit()
-
-        # PHASE 1A.2: Invalidate chat cache after new message
-        self.invalidate_chat_cache(chat.id)
+        )
 
         # ✅ PROMETHEUS METRIC: Başarılı mesaj
         if METRICS_ENABLED and bot_id_for_metric:
@@ -1294,6 +1617,38 @@ class BehaviorEngine:
             now=now_utc(),
         )
 
+    def _start_typing(self, s: Dict[str, Any], bot: Bot, chat: Chat) -> Optional[TypingHandle]:
+        """Bot yazmaya karar verdiğinde (LLM çağrısından önce) typing göstergesini aç."""
+        if not bool(s.get("typing_enabled", True)):
+            return None
+        return self.typing.start(bot.token, chat.chat_id)
+
+    async def _join_typing(
+        self,
+        db: Session,
+        s: Dict[str, Any],
+        typing: Optional[TypingHandle],
+        *,
+        bot: Bot,
+        chat: Chat,
+        text: str,
+        tempo_multiplier: float,
+    ) -> None:
+        """Metin uzunluğuna göre typing süresinin henüz geçmemiş kısmını bekle."""
+        if not bool(s.get("typing_enabled", True)):
+            return
+        duration = self.typing_seconds(db, len(text), bot=bot, tempo_multiplier=tempo_multiplier)
+        with span("typing"):
+            if typing is None:
+                # Gösterge erken açılmadıysa (eski çağrı yolu) tam süre gösterilir
+                typing = self.typing.start(bot.token, chat.chat_id)
+                try:
+                    await typing.join(duration)
+                finally:
+                    typing.cancel()
+                return
+            await typing.join(duration)
+
     # ---- Generation Inputs Building (SESSION 25: Extracted from tick_once) ----
     def _build_generation_inputs(
         self,
@@ -1316,6 +1671,7 @@ class BehaviorEngine:
         mode: str,
         mention_ctx: str,
         contextual_examples: str,
+        tick_data: Optional[TickData] = None,
     ) -> tuple:
         """
         Build all generation inputs (prompts, LLM parameters).
@@ -1335,7 +1691,8 @@ class BehaviorEngine:
             if bool(s.get("news_trigger_enabled", True)) and self.news is not None:
                 # PHASE 2 Week 4 Day 1-3: Rich News Integration (%50 olasılık)
                 if random.random() < float(s.get("news_trigger_probability", 0.5)):
-                    brief = self.news.get_brief(topic)
+                    with span("news"):
+                        brief = self.news.get_brief(topic)
                     if brief:
                         market_trigger = brief
                         logger.debug(f"News trigger applied for topic '{topic}': {brief[:60]}...")
@@ -1362,13 +1719,19 @@ class BehaviorEngine:
 
         # ---- KİŞİSEL HAFIZA SİSTEMİ ----
         # Bot'un kişisel hafızalarını çek ve prompt'a ekle
-        bot_memories = fetch_bot_memories(db, bot.id, limit=8)
+        if tick_data is not None:
+            bot_memories = memories_to_dicts(tick_data.memories)
+        else:
+            bot_memories = fetch_bot_memories(db, bot.id, limit=8)
         memories_text = format_memories_for_prompt(bot_memories)
 
         # Kullanılan hafızaları işaretle (usage_count güncelle)
         for memory in bot_memories:
             try:
-                update_memory_usage(db, memory["id"])
+                if self.write_behind_enabled:
+                    self.write_buffer.increment_memory_usage(memory["id"])
+                else:
+                    update_memory_usage(db, memory["id"])
             except Exception as e:
                 logger.debug("Memory usage update error: %s", e)
 
@@ -1378,14 +1741,24 @@ class BehaviorEngine:
         current_symbols = temp_metadata.get("symbols", [])
 
         # Bot'un bu konu/sembollerde daha önce söylediklerini bul
-        past_references = find_relevant_past_messages(
-            db,
-            bot_id=bot.id,
-            current_topic=topic,
-            current_symbols=current_symbols,
-            days_back=7,
-            limit=3,
-        )
+        with span("past_references"):
+            if tick_data is not None:
+                past_references = score_past_messages(
+                    tick_data.past_messages,
+                    current_topic=topic,
+                    current_symbols=current_symbols,
+                    days_back=7,
+                    limit=3,
+                )
+            else:
+                past_references = find_relevant_past_messages(
+                    db,
+                    bot_id=bot.id,
+                    current_topic=topic,
+                    current_symbols=current_symbols,
+                    days_back=7,
+                    limit=3,
+                )
         past_references_text = format_past_references_for_prompt(past_references)
 
         user_prompt = generate_user_prompt(
@@ -1547,11 +1920,90 @@ class BehaviorEngine:
             logger.warning("Batch priority queue check failed: %s", e)
             return []
 
+    async def _load_priority_context(self, db: Session, priority_item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Tek bir priority item'ın bağlamını event loop dışında oku.
+
+        TickDataLoader.load_batch() ile (AsyncSession ya da worker thread); loader hata
+        verirse aynı inline sorgular `db` ile bir worker thread'de çalışır.
+
+        Returns:
+            bot, chat, incoming_msg, psh, recent_msgs, memories ve past_messages
+            (skorlanacak adaylar; inline yolda None) anahtarlı sözlük
+        """
+        bot_id = int(priority_item["bot_id"])
+        chat_id = int(priority_item["chat_id"])
+        telegram_message_id = priority_item.get("telegram_message_id")
+        try:
+            batch_ctx = await self.tick_data.load_batch([priority_item], recent_limit=40, memory_limit=8, past_days=7)
+        except Exception as exc:
+            logger.warning("Priority context load failed, using inline queries in a thread: %s", exc)
+            return await asyncio.to_thread(self._read_priority_context, db, bot_id, chat_id, telegram_message_id)
+
+        bot = batch_ctx.bots.get(bot_id)
+        chat = batch_ctx.chats.get(chat_id)
+        if bot is None or chat is None:
+            return {"bot": bot, "chat": chat}
+        return {
+            "bot": bot,
+            "chat": chat,
+            "incoming_msg": (
+                batch_ctx.incoming.get((chat_id, int(telegram_message_id)))
+                if telegram_message_id is not None else None
+            ),
+            "psh": self._shape_psh(bot, batch_ctx.stances.get(bot_id, []), batch_ctx.holdings.get(bot_id, []), None),
+            "recent_msgs": self._with_pending(
+                self.write_buffer.pending_messages(chat_db_id=chat_id),
+                batch_ctx.recent_messages.get(chat_id, []),
+                40,
+            ),
+            "memories": memories_to_dicts(batch_ctx.memories.get(bot_id, [])),
+            "past_messages": batch_ctx.past_messages.get(bot_id, []),
+        }
+
+    def _read_priority_context(
+        self,
+        db: Session,
+        bot_id: int,
+        chat_id: int,
+        telegram_message_id: Optional[int],
+    ) -> Dict[str, Any]:
+        """_load_priority_context() için inline (sync) okuma; worker thread'de çalışır."""
+        bot = db.query(Bot).filter(Bot.id == bot_id, Bot.is_enabled.is_(True)).first()
+        chat = db.query(Chat).filter(Chat.id == chat_id).first()
+        if bot is None or chat is None:
+            return {"bot": bot, "chat": chat}
+
+        from sqlalchemy.orm import joinedload
+        incoming_msg = db.query(Message).options(
+            joinedload(Message.bot),
+            joinedload(Message.chat)
+        ).filter(
+            Message.telegram_message_id == telegram_message_id,
+            Message.chat_db_id == chat_id,
+        ).first()
+        return {
+            "bot": bot,
+            "chat": chat,
+            "incoming_msg": incoming_msg,
+            "psh": self.fetch_psh(db, bot, topic_hint=None),
+            "recent_msgs": self.fetch_recent_messages(db, chat.id, limit=40),
+            "memories": fetch_bot_memories(db, bot.id, limit=8),
+            "past_messages": None,
+        }
+
     async def _process_priority_message(self, db: Session, priority_item: Dict[str, Any]) -> bool:
         """
         Priority queue'dan gelen mesajı işle ve bot'un yanıt vermesini sağla.
         Returns: True if successfully processed
         """
+        typing: Optional[TypingHandle] = None
+        trace = Trace(
+            "priority",
+            bot_id=priority_item.get("bot_id"),
+            chat_db_id=priority_item.get("chat_id"),
+        ).activate()
+        trace.outcome = "skip"
         try:
             bot_id = priority_item.get("bot_id")
             chat_id = priority_item.get("chat_id")
@@ -1564,27 +2016,17 @@ class BehaviorEngine:
                 logger.warning("Invalid priority item: missing bot_id or chat_id")
                 return False
 
-            # Bot'u DB'den çek
-            bot = db.query(Bot).filter(Bot.id == bot_id, Bot.is_enabled.is_(True)).first()
+            # Bot, chat, kullanıcı mesajı ve bağlam satırları loop'u bloklamadan okunur
+            # (eşzamanlı priority handler'ları ambient pipeline'ları DB gecikmesiyle durdurmasın)
+            ctx = await self._load_priority_context(db, priority_item)
+            bot, chat = ctx["bot"], ctx["chat"]
             if not bot:
                 logger.warning("Bot %s not found or disabled for priority response", bot_id)
                 return False
-
-            # Chat'i DB'den çek
-            chat = db.query(Chat).filter(Chat.id == chat_id).first()
             if not chat:
                 logger.warning("Chat %s not found for priority response", chat_id)
                 return False
-
-            # Kullanıcı mesajını DB'den bul (context için)
-            from sqlalchemy.orm import joinedload
-            incoming_msg = db.query(Message).options(
-                joinedload(Message.bot),
-                joinedload(Message.chat)
-            ).filter(
-                Message.telegram_message_id == telegram_message_id,
-                Message.chat_db_id == chat_id,
-            ).first()
+            incoming_msg = ctx["incoming_msg"]
 
             logger.info(
                 "Processing priority message: bot=%s, chat=%s, mentioned=%s, reply=%s",
@@ -1601,10 +2043,10 @@ class BehaviorEngine:
                 stances,
                 holdings,
                 persona_hint,
-            ) = self.fetch_psh(db, bot, topic_hint=None)
+            ) = ctx["psh"]
 
-            # Son mesajları context olarak al - PHASE 1A.2: Cache-aware
-            recent_msgs = self.fetch_recent_messages(db, chat.id, limit=40)
+            # Son mesajlar (buffer'daki henüz yazılmamış gönderimler dahil)
+            recent_msgs = ctx["recent_msgs"]
 
             # History transcript (kullanıcı mesajları da dahil!)
             history_source = list(recent_msgs[:8])  # Daha fazla context
@@ -1651,20 +2093,19 @@ class BehaviorEngine:
             time_context = generate_time_context()
 
             # Memories
-            bot_memories = fetch_bot_memories(db, bot.id, limit=8)
+            bot_memories = ctx["memories"]
             memories_text = format_memories_for_prompt(bot_memories)
 
-            # Past references
+            # Past references (adaylar önceden okunduysa bellekte puanlanır)
             temp_metadata = extract_message_metadata(text=user_text, topic=topic)
             current_symbols = temp_metadata.get("symbols", [])
-            past_references = find_relevant_past_messages(
-                db,
-                bot_id=bot.id,
-                current_topic=topic,
-                current_symbols=current_symbols,
-                days_back=7,
-                limit=3,
-            )
+            past_kwargs = dict(current_topic=topic, current_symbols=current_symbols, days_back=7, limit=3)
+            if ctx["past_messages"] is not None:
+                past_references = score_past_messages(ctx["past_messages"], **past_kwargs)
+            else:
+                past_references = await asyncio.to_thread(
+                    find_relevant_past_messages, db, bot_id=bot.id, **past_kwargs
+                )
             past_references_text = format_past_references_for_prompt(past_references)
 
             # User prompt için reply context
@@ -1693,20 +2134,25 @@ class BehaviorEngine:
                 time_context=time_context,
             )
 
-            # LLM üretimi
-            text = self.llm.generate(user_prompt=user_prompt, temperature=0.75, max_tokens=220)
+            trace.lap("context")
+
+            # LLM üretimi (typing göstergesi üretim boyunca açık)
+            typing = self._start_typing(s, bot, chat)
+            with span("llm"):
+                text = await self.llm.agenerate(user_prompt=user_prompt, temperature=0.75, max_tokens=220)
             if not text:
                 logger.warning("LLM returned empty response for priority message")
                 return False
 
             # Tutarlılık koruması
             if bool(s.get("consistency_guard_enabled", True)):
-                revised = apply_consistency_guard(
-                    self.llm,
-                    draft_text=text,
-                    persona_profile=persona_profile,
-                    stances=stances,
-                )
+                with span("consistency_guard"):
+                    revised = await apply_consistency_guard(
+                        self.llm,
+                        draft_text=text,
+                        persona_profile=persona_profile,
+                        stances=stances,
+                    )
                 if revised:
                     text = revised
 
@@ -1724,52 +2170,48 @@ class BehaviorEngine:
             text = add_filler_words(text, probability=0.25)
             text = apply_natural_imperfections(text, probability=0.12)
 
-            # Typing simülasyonu
-            if bool(s.get("typing_enabled", True)):
-                await self.tg.send_typing(
-                    bot.token,
-                    chat.chat_id,
-                    self.typing_seconds(
-                        db,
-                        len(text),
-                        bot=bot,
-                        tempo_multiplier=tempo_multiplier,
-                    ),
-                )
+            # Typing simülasyonu: üretim sırasında geçen süre düşülür
+            await self._join_typing(db, s, typing, bot=bot, chat=chat, text=text, tempo_multiplier=tempo_multiplier)
 
             # Mesajı gönder (reply olarak)
-            msg_id = await self.tg.send_message(
-                token=bot.token,
-                chat_id=chat.chat_id,
-                text=text,
-                reply_to_message_id=telegram_message_id,  # Kullanıcı mesajına yanıt
-                disable_preview=True,
-            )
+            with span("telegram_send"):
+                msg_id = await self.tg.send_message(
+                    token=bot.token,
+                    chat_id=chat.chat_id,
+                    text=text,
+                    reply_to_message_id=telegram_message_id,  # Kullanıcı mesajına yanıt
+                    disable_preview=True,
+                )
+            if typing is not None:
+                typing.cancel(message_sent=True)
 
             # DB log
-            msg_metadata = extract_message_metadata(text, topic)
+            msg_metadata = attach_message_features(extract_message_metadata(text, topic), text)
             msg_metadata["is_priority_response"] = True
             msg_metadata["responded_to_message_id"] = telegram_message_id
 
-            db.add(Message(
-                bot_id=bot.id,
-                chat_db_id=chat.id,
+            self._store_bot_message(
+                db,
+                bot=bot,
+                chat=chat,
                 telegram_message_id=msg_id,
                 text=text,
                 reply_to_message_id=telegram_message_id,
                 msg_metadata=msg_metadata,
-            ))
-            db.commit()
-
-            # PHASE 1A.2: Invalidate chat cache after new message
-            self.invalidate_chat_cache(chat.id)
+            )
 
             logger.info("Priority response sent: bot=%s, text_preview=%s", bot.name, text[:50])
+            trace.outcome = "sent"
             return True
 
         except Exception as e:
             logger.exception("Priority message processing failed: %s", e)
+            trace.outcome = "error"
             return False
+        finally:
+            if typing is not None:
+                typing.cancel()
+            trace.finish()
 
     async def _process_priority_queue_batch(self, db: Session, priority_items: List[Dict[str, Any]]) -> int:
         """
@@ -1780,9 +2222,19 @@ class BehaviorEngine:
         if not priority_items:
             return 0
 
+        trace = Trace("priority_batch", items=len(priority_items)).activate()
         s = self.settings(db)
         prompts_data = []  # List of (item, bot, chat, user_prompt, context) tuples
 
+        # Batch bağlamını toplu oku: varlık tipi başına tek IN (...) sorgusu,
+        # aynı chat/bot'u hedefleyen item'lar geçmişi ve hafızayı paylaşır
+        batch_ctx: Optional[BatchContext] = None
+        if self.tick_prefetch_enabled:
+            try:
+                batch_ctx = await self.tick_data.load_batch(priority_items, recent_limit=40, memory_limit=8, past_days=7)
+            except Exception as exc:
+                logger.warning("Batch context load failed, falling back to per-item queries: %s", exc)
+
         # 1. Tüm item'lar için promptları hazırla
         for priority_item in priority_items:
             try:
@@ -1796,25 +2248,46 @@ class BehaviorEngine:
                     continue
 
                 # Bot ve chat çek
-                bot = db.query(Bot).filter(Bot.id == bot_id, Bot.is_enabled.is_(True)).first()
-                chat = db.query(Chat).filter(Chat.id == chat_id).first()
+                if batch_ctx is not None:
+                    bot = batch_ctx.bots.get(int(bot_id))
+                    chat = batch_ctx.chats.get(int(chat_id))
+                else:
+                    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.is_enabled.is_(True)).first()
+                    chat = db.query(Chat).filter(Chat.id == chat_id).first()
 
                 if not bot or not chat:
                     logger.warning("Bot %s or Chat %s not found for batch processing", bot_id, chat_id)
                     continue
 
                 # Context hazırla (tek mesaj için olanla aynı mantık)
-                from sqlalchemy.orm import joinedload
-                incoming_msg = db.query(Message).options(
-                    joinedload(Message.bot),
-                    joinedload(Message.chat)
-                ).filter(
-                    Message.telegram_message_id == telegram_message_id,
-                    Message.chat_db_id == chat_id,
-                ).first()
-
-                (persona_profile, emotion_profile, stances, holdings, persona_hint) = self.fetch_psh(db, bot, topic_hint=None)
-                recent_msgs = self.fetch_recent_messages(db, chat.id, limit=40)
+                if batch_ctx is not None:
+                    incoming_msg = (
+                        batch_ctx.incoming.get((chat.id, int(telegram_message_id)))
+                        if telegram_message_id is not None else None
+                    )
+                    (persona_profile, emotion_profile, stances, holdings, persona_hint) = self._shape_psh(
+                        bot,
+                        batch_ctx.stances.get(bot.id, []),
+                        batch_ctx.holdings.get(bot.id, []),
+                        None,
+                    )
+                    recent_msgs = self._with_pending(
+                        self.write_buffer.pending_messages(chat_db_id=chat.id),
+                        batch_ctx.recent_messages.get(chat.id, []),
+                        40,
+                    )
+                else:
+                    from sqlalchemy.orm import joinedload
+                    incoming_msg = db.query(Message).options(
+                        joinedload(Message.bot),
+                        joinedload(Message.chat)
+                    ).filter(
+                        Message.telegram_message_id == telegram_message_id,
+                        Message.chat_db_id == chat_id,
+                    ).first()
+
+                    (persona_profile, emotion_profile, stances, holdings, persona_hint) = self.fetch_psh(db, bot, topic_hint=None)
+                    recent_msgs = self.fetch_recent_messages(db, chat.id, limit=40)
                 history_source = list(recent_msgs[:8])
                 history_excerpt = build_history_transcript(list(reversed(history_source)))
                 contextual_examples = build_contextual_examples(list(reversed(recent_msgs)), bot_id=bot.id, max_pairs=3)
@@ -1837,12 +2310,24 @@ class BehaviorEngine:
                 selected_length_category = choose_message_length_category(s.get("message_length_profile"))
                 length_hint = compose_length_hint(persona_profile=persona_profile, selected_category=selected_length_category)
                 time_context = generate_time_context()
-                bot_memories = fetch_bot_memories(db, bot.id, limit=8)
+                if batch_ctx is not None:
+                    bot_memories = memories_to_dicts(batch_ctx.memories.get(bot.id, []))
+                else:
+                    bot_memories = fetch_bot_memories(db, bot.id, limit=8)
                 memories_text = format_memories_for_prompt(bot_memories)
 
                 temp_metadata = extract_message_metadata(text=user_text, topic=topic)
                 current_symbols = temp_metadata.get("symbols", [])
-                past_references = find_relevant_past_messages(db, bot_id=bot.id, current_topic=topic, current_symbols=current_symbols, days_back=7, limit=3)
+                if batch_ctx is not None:
+                    past_references = score_past_messages(
+                        batch_ctx.past_messages.get(bot.id, []),
+                        current_topic=topic,
+                        current_symbols=current_symbols,
+                        days_back=7,
+                        limit=3,
+                    )
+                else:
+                    past_references = find_relevant_past_messages(db, bot_id=bot.id, current_topic=topic, current_symbols=current_symbols, days_back=7, limit=3)
                 past_references_text = format_past_references_for_prompt(past_references)
 
                 reply_excerpt = shorten(user_text, 240)
@@ -1888,64 +2373,144 @@ class BehaviorEngine:
                 logger.exception("Failed to prepare prompt for batch item: %s", e)
                 continue
 
+        trace.lap("context")
         if not prompts_data:
             logger.warning("No valid prompts prepared for batch processing")
+            trace.finish("skip")
             return 0
 
         # 2. Tüm promptları batch olarak LLM'e gönder (PARALLEL!)
+        # Sonuçlar tamamlandıkça gelir: hazır olan yanıt en yavaş prompt'u beklemeden gönderilir
         prompts = [pd["user_prompt"] for pd in prompts_data]
         logger.info("Sending %d prompts to batch LLM (parallel processing)...", len(prompts))
+        # Typing göstergeleri üretim boyunca açık; aynı bot/chat'e giden item'lar tek göstergeyi paylaşır
+        for pd in prompts_data:
+            pd["typing"] = self._start_typing(s, pd["bot"], pd["chat"])
+
+        # 3. Sonuçları işle ve Telegram'a gönder: her sonuç kendi task'ında
+        # (guard + typing + send paralel), aynı chat'te gönderim sırası korunur
+        semaphore = asyncio.Semaphore(self.priority_delivery_concurrency)
+        sent_events = [asyncio.Event() for _ in prompts_data]
+        predecessors: List[Optional[int]] = []
+        last_in_chat: Dict[Any, int] = {}
+        for index, pd in enumerate(prompts_data):
+            predecessors.append(last_in_chat.get(pd["chat"].id))
+            last_in_chat[pd["chat"].id] = index
+
+        async def deliver(index: int, text: Optional[str]) -> bool:
+            try:
+                async with semaphore:
+                    text = await self._polish_batch_result(s, prompts_data[index], text)
+                if not text:
+                    return False
+                # Slot tutmadan önceki mesajın gönderilmesini bekle (deadlock olmaz)
+                previous = predecessors[index]
+                if previous is not None:
+                    await sent_events[previous].wait()
+                async with semaphore:
+                    return await self._deliver_batch_result(db, s, prompts_data[index], text)
+            finally:
+                if prompts_data[index]["typing"] is not None:
+                    prompts_data[index]["typing"].cancel()
+                sent_events[index].set()
+
+        tasks: List[asyncio.Task] = []
+        scheduled = set()
+        try:
+            # Teslimat task'ları bu trace'e bağlı context'i devralır (typing/send/store span'leri)
+            with span("llm_batch"):
+                async for index, text in self.llm_batch.generate_batch_async(
+                    prompts,
+                    temperature=0.75,
+                    max_tokens=220,
+                ):
+                    scheduled.add(index)
+                    tasks.append(asyncio.create_task(deliver(index, text), name=f"priority_delivery:{index}"))
+        finally:
+            # Sonucu hiç gelmeyen item'lar sıradakileri bekletmesin
+            for index, event in enumerate(sent_events):
+                if index not in scheduled:
+                    if prompts_data[index]["typing"] is not None:
+                        prompts_data[index]["typing"].cancel()
+                    event.set()
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        success_count = sum(1 for ok in results if ok is True)
+        trace.annotate(sent=success_count)
+        trace.finish("sent" if success_count else "skip")
 
-        results = self.llm_batch.generate_batch(
-            prompts=prompts,
-            temperature=0.75,
-            max_tokens=220,
-            preserve_order=True,  # Sıralama önemli!
-        )
+        logger.info("Batch processing complete: %d/%d messages sent successfully", success_count, len(priority_items))
+        return success_count
 
-        # 3. Sonuçları işle ve Telegram'a gönder
-        success_count = 0
-        for prompt_data, text in zip(prompts_data, results):
-            if not text:
-                logger.warning("LLM returned empty response for batch item (bot=%s)", prompt_data["bot"].name)
-                continue
+    async def _polish_batch_result(
+        self,
+        s: Dict[str, Any],
+        prompt_data: Dict[str, Any],
+        text: Optional[str],
+    ) -> Optional[str]:
+        """
+        Batch LLM sonucuna tutarlılık koruması ve insancıl dönüşümleri uygula.
+        Returns: Final text, or None if there is nothing to send
+        """
+        if not text:
+            logger.warning("LLM returned empty response for batch item (bot=%s)", prompt_data["bot"].name)
+            return None
 
-            try:
-                bot = prompt_data["bot"]
-                chat = prompt_data["chat"]
-                telegram_message_id = prompt_data["telegram_message_id"]
-                persona_profile = prompt_data["persona_profile"]
-                emotion_profile = prompt_data["emotion_profile"]
-                stances = prompt_data["stances"]
-                reaction_plan = prompt_data["reaction_plan"]
-                tempo_multiplier = prompt_data["tempo_multiplier"]
-                topic = prompt_data["topic"]
-
-                # Tutarlılık koruması
-                if bool(s.get("consistency_guard_enabled", True)):
-                    revised = apply_consistency_guard(self.llm, draft_text=text, persona_profile=persona_profile, stances=stances)
-                    if revised:
-                        text = revised
-
-                text = apply_reaction_overrides(text, reaction_plan)
-                text = apply_micro_behaviors(text, emotion_profile=emotion_profile, plan=reaction_plan)
-
-                # İnsancıl geliştirmeler
-                text = add_conversation_openings(text, probability=0.35)
-                text = add_hesitation_markers(text, probability=0.25)
-                text = add_colloquial_shortcuts(text, probability=0.20)
-                text = add_filler_words(text, probability=0.25)
-                text = apply_natural_imperfections(text, probability=0.12)
-
-                # Typing simülasyonu
-                if bool(s.get("typing_enabled", True)):
-                    await self.tg.send_typing(
-                        bot.token,
-                        chat.chat_id,
-                        self.typing_seconds(db, len(text), bot=bot, tempo_multiplier=tempo_multiplier),
-                    )
+        try:
+            persona_profile = prompt_data["persona_profile"]
+            emotion_profile = prompt_data["emotion_profile"]
+            stances = prompt_data["stances"]
+            reaction_plan = prompt_data["reaction_plan"]
+
+            # Tutarlılık koruması
+            if bool(s.get("consistency_guard_enabled", True)):
+                with span("consistency_guard"):
+                    revised = await apply_consistency_guard(self.llm, draft_text=text, persona_profile=persona_profile, stances=stances)
+                if revised:
+                    text = revised
+
+            text = apply_reaction_overrides(text, reaction_plan)
+            text = apply_micro_behaviors(text, emotion_profile=emotion_profile, plan=reaction_plan)
 
-                # Mesajı gönder
+            # İnsancıl geliştirmeler
+            text = add_conversation_openings(text, probability=0.35)
+            text = add_hesitation_markers(text, probability=0.25)
+            text = add_colloquial_shortcuts(text, probability=0.20)
+            text = add_filler_words(text, probability=0.25)
+            text = apply_natural_imperfections(text, probability=0.12)
+            return text
+
+        except Exception as e:
+            logger.exception("Failed to post-process batch result for bot %s: %s", prompt_data["bot"].name, e)
+            return None
+
+    async def _deliver_batch_result(
+        self,
+        db: Session,
+        s: Dict[str, Any],
+        prompt_data: Dict[str, Any],
+        text: Optional[str],
+    ) -> bool:
+        """
+        Son işlemden geçmiş batch yanıtını typing simülasyonuyla gönderir ve loglar.
+        Returns: True if the reply was sent
+        """
+        if not text:
+            return False
+
+        try:
+            bot = prompt_data["bot"]
+            chat = prompt_data["chat"]
+            telegram_message_id = prompt_data["telegram_message_id"]
+            tempo_multiplier = prompt_data["tempo_multiplier"]
+            topic = prompt_data["topic"]
+
+            # Typing simülasyonu: batch üretimi sırasında geçen süre düşülür
+            typing = prompt_data.get("typing")
+            await self._join_typing(db, s, typing, bot=bot, chat=chat, text=text, tempo_multiplier=tempo_multiplier)
+
+            # Mesajı gönder
+            with span("telegram_send"):
                 msg_id = await self.tg.send_message(
                     token=bot.token,
                     chat_id=chat.chat_id,
@@ -1953,111 +2518,175 @@ class BehaviorEngine:
                     reply_to_message_id=telegram_message_id,
                     disable_preview=True,
                 )
+            if typing is not None:
+                typing.cancel(message_sent=True)
 
-                # DB log
-                msg_metadata = extract_message_metadata(text, topic)
-                msg_metadata["is_priority_response"] = True
-                msg_metadata["is_batch_processed"] = True  # Batch flag
-                msg_metadata["responded_to_message_id"] = telegram_message_id
-
-                db.add(Message(
-                    bot_id=bot.id,
-                    chat_db_id=chat.id,
-                    telegram_message_id=msg_id,
-                    text=text,
-                    reply_to_message_id=telegram_message_id,
-                    msg_metadata=msg_metadata,
-                ))
-                db.commit()
-
-                self.invalidate_chat_cache(chat.id)
+            # DB log
+            msg_metadata = attach_message_features(extract_message_metadata(text, topic), text)
+            msg_metadata["is_priority_response"] = True
+            msg_metadata["is_batch_processed"] = True  # Batch flag
+            msg_metadata["responded_to_message_id"] = telegram_message_id
 
-                logger.info("Batch priority response sent: bot=%s, text_preview=%s", bot.name, text[:50])
-                success_count += 1
+            self._store_bot_message(
+                db,
+                bot=bot,
+                chat=chat,
+                telegram_message_id=msg_id,
+                text=text,
+                reply_to_message_id=telegram_message_id,
+                msg_metadata=msg_metadata,
+            )
 
-            except Exception as e:
-                logger.exception("Failed to process batch result for bot %s: %s", prompt_data["bot"].name, e)
-                continue
+            logger.info("Batch priority response sent: bot=%s, text_preview=%s", bot.name, text[:50])
+            return True
 
-        logger.info("Batch processing complete: %d/%d messages sent successfully", success_count, len(priority_items))
-        return success_count
+        except Exception as e:
+            logger.exception("Failed to process batch result for bot %s: %s", prompt_data["bot"].name, e)
+            return False
 
     # ---- Akış ----
     async def tick_once(self) -> None:
+        """Tek bir tick çalıştır ve dönen gecikme kadar bekle (seri mod / testler)."""
+        delay = await self._run_tick()
+        if self.write_behind_enabled and self._write_buffer_task is None:
+            # Arka plan flusher yoksa (tek tick / testler) yazmaları hemen uygula
+            await asyncio.to_thread(self.write_buffer.flush)
+        await asyncio.sleep(delay)
+
+    async def _load_tick_data(self, chat: Chat, bot: Bot) -> Optional[TickData]:
+        """
+        Tick satırlarını TickDataLoader ile oku (prefetch kapalıysa None).
+
+        Hata olursa None döner; tick inline sync sorgularla devam eder.
+        """
+        if not self.tick_prefetch_enabled:
+            return None
+        try:
+            return await self.tick_data.load(
+                chat_db_id=chat.id,
+                bot_id=bot.id,
+                recent_limit=40,
+                reply_window=30,
+                memory_limit=8,
+                past_days=7,
+            )
+        except Exception as exc:
+            logger.warning("Tick data prefetch failed, using inline queries: %s", exc)
+            return None
+
+    async def _handle_priority_queue(self, db: Session, s: Dict[str, Any]) -> Optional[float]:
+        """
+        Priority queue'da bekleyen kullanıcı mesajlarını işle.
+
+        Returns:
+            İşlem yapıldıysa sonraki denemeden önce beklenecek süre, kuyruk boşsa None
+        """
+        # SESSION 38: Batch processing support
+        batch_enabled = bool(s.get("batch_processing_enabled", False))
+        batch_size = int(s.get("batch_size", 5))
+
+        if batch_enabled and batch_size > 1:
+            # Batch mode: Birden fazla mesajı paralel işle
+            priority_items = self._check_priority_queue_batch(db, batch_size)
+            if priority_items:
+                logger.info("Batch mode: Processing %d priority messages in parallel", len(priority_items))
+                success_count = await self._process_priority_queue_batch(db, priority_items)
+                logger.info("Batch processing result: %d/%d messages sent", success_count, len(priority_items))
+                # Batch işlendikten sonra kısa gecikme
+                return 2.0
+            return None
+
+        # Sequential mode: Tek mesaj işle (mevcut davranış)
+        priority_item = self._check_priority_queue(db)
+        if priority_item:
+            # Priority mesajı işle (kullanıcı mention/reply'leri)
+            success = await self._process_priority_message(db, priority_item)
+            # Başarısızsa biraz daha bekle
+            return 2.0 if success else 5.0
+        return None
+
+    async def _run_tick(self, chat_db_id: Optional[int] = None) -> float:
+        """
+        Tek bir üretim adımı. Uyumak yerine bir sonraki tick'ten önce beklenecek
+        süreyi döner; böylece per-chat pipeline'lar beklerken eşzamanlılık slotu tutmaz.
+
+        Args:
+            chat_db_id: Verilirse sadece bu chat için üretim yapılır (per-chat pipeline).
+                None ise seri mod: önce priority queue, sonra rastgele chat.
+
+        Returns:
+            Sonraki tick öncesi beklenecek saniye
+        """
         db: Session = SessionLocal()
         import time  # Timer için
         start_time = time.time()  # Kronometre başlat
         bot_id_for_metric = None  # Metrik için bot ID'yi saklayacağız
+        reserved_bot_id: Optional[int] = None
+        typing: Optional[TypingHandle] = None
+        # Aşama süreleri (tick_stage_duration_seconds + opsiyonel trace log satırı)
+        trace = Trace("tick", chat_db_id=chat_db_id).activate()
 
         try:
-            s = self.settings(db)
+            with span("settings"):
+                s = self.settings(db)
             if not bool(s.get("simulation_active", False)):
-                await asyncio.sleep(1.0)
-                return
+                return 1.0
 
             # ÖNCELİK 1: Priority queue'dan gelen mesajları kontrol et
-            # SESSION 38: Batch processing support
-            batch_enabled = bool(s.get("batch_processing_enabled", False))
-            batch_size = int(s.get("batch_size", 5))
-
-            if batch_enabled and batch_size > 1:
-                # Batch mode: Birden fazla mesajı paralel işle
-                priority_items = self._check_priority_queue_batch(db, batch_size)
-                if priority_items:
-                    logger.info("Batch mode: Processing %d priority messages in parallel", len(priority_items))
-                    success_count = await self._process_priority_queue_batch(db, priority_items)
-                    logger.info("Batch processing result: %d/%d messages sent", success_count, len(priority_items))
-                    # Batch işlendikten sonra kısa gecikme
-                    await asyncio.sleep(2.0)
-                    return
-            else:
-                # Sequential mode: Tek mesaj işle (mevcut davranış)
-                priority_item = self._check_priority_queue(db)
-                if priority_item:
-                    # Priority mesajı işle (kullanıcı mention/reply'leri)
-                    success = await self._process_priority_message(db, priority_item)
-                    if success:
-                        # Priority mesaj işlendikten sonra kısa bir gecikme
-                        await asyncio.sleep(2.0)
-                    else:
-                        # Başarısızsa biraz daha bekle
-                        await asyncio.sleep(5.0)
-                    return  # Priority işlendikten sonra normal akışa geri dön
-
-            # Global rate limit
-            if not self.global_rate_ok(db):
-                await asyncio.sleep(2.5)
-                return
+            # (priority lane çalışıyorsa kuyruğu o tüketir)
+            if chat_db_id is None and self._priority_task is None:
+                priority_delay = await self._handle_priority_queue(db, s)
+                if priority_delay is not None:
+                    return priority_delay  # Priority işlendikten sonra normal akışa geri dön
+
+            with span("roster"):
+                # Global rate limit
+                if not self.global_rate_ok(db):
+                    return 2.5
+
+                chat = self.pick_chat(db) if chat_db_id is None else self._get_enabled_chat(db, chat_db_id)
+                if not chat:
+                    logger.info("Aktif chat yok; bekleniyor.")
+                    return 2.0
+
+                bot = self.pick_bot(
+                    db,
+                    hourly_limit=s.get("bot_hourly_msg_limit", {"max": 12}),
+                    chat=chat,
+                )
+                if not bot:
+                    logger.info("Saatlik sınır nedeniyle uygun bot bulunamadı; bekleniyor.")
+                    return 3.0
 
-            chat = self.pick_chat(db)
-            if not chat:
-                logger.info("Aktif chat yok; bekleniyor.")
-                await asyncio.sleep(2.0)
-                return
-
-            bot = self.pick_bot(
-                db,
-                hourly_limit=s.get("bot_hourly_msg_limit", {"max": 12}),
-                chat=chat,
-            )
-            if not bot:
-                logger.info("Saatlik sınır nedeniyle uygun bot bulunamadı; bekleniyor.")
-                await asyncio.sleep(3.0)
-                return
+            # Limit kontrolü ile rezervasyon arasında await yok: eşzamanlı
+            # pipeline'lar aynı boş slotu ikinci kez kullanamaz
+            self._reserve_send_slot(bot.id)
+            reserved_bot_id = bot.id
 
             # Metrik için bot ID'yi sakla
             bot_id_for_metric = bot.id
+            # Buradan sonra gönderimle bitmeyen her dönüş "skip" sayılır
+            trace.annotate(chat_db_id=chat.id, bot_id=bot.id)
+            trace.outcome = "skip"
+
+            # Tick'in okuyacağı tüm satırlar tek seferde, loop'u bloklamadan
+            with span("tick_data"):
+                tick_data = await self._load_tick_data(chat, bot)
 
             # Persona/Stance/Holdings verilerini çek (erken çekiyoruz çünkü topic seçiminde cooldown gerekiyor)
             topic_hint_pool = (chat.topics or ["BIST", "FX", "Kripto", "Makro"]).copy()
 
+            if tick_data is not None:
+                psh = self._shape_psh(bot, tick_data.stances, tick_data.holdings, None)
+            else:
+                psh = self.fetch_psh(db, bot, topic_hint=None)
             (
                 persona_profile,
                 emotion_profile,
                 stances,
                 holdings,
                 persona_hint,
-            ) = self.fetch_psh(db, bot, topic_hint=None)
+            ) = psh
 
             refresh_state = self._persona_refresh.setdefault(
                 bot.id,
@@ -2092,15 +2721,12 @@ class BehaviorEngine:
 
             # Reaksiyon-only olayı
             if random.random() < float(s.get("short_reaction_probability", 0.12)):
-                from sqlalchemy.orm import joinedload
-                last = (
-                    db.query(Message)
-                    .options(joinedload(Message.bot))
-                    .filter(Message.chat_db_id == chat.id)
-                    .order_by(Message.created_at.desc())
-                    .limit(10)
-                    .all()
-                )
+                if tick_data is not None:
+                    last = self._with_pending(
+                        self.write_buffer.pending_messages(chat_db_id=chat.id), tick_data.recent_messages, 10
+                    )
+                else:
+                    last = self.fetch_recent_messages(db, chat.id, limit=10)
                 candidates = [m for m in last if m.bot_id != bot.id]
                 if candidates:
                     target = random.choice(candidates)
@@ -2110,80 +2736,91 @@ class BehaviorEngine:
                     if not ok:
                         # fallback: çok kısa bir emoji mesajı
                         emoji = LLMClient.pick_reaction_for_text(getattr(target, "text", ""))
-                        msg_id = await self.tg.send_message(
-                            token=bot.token,
-                            chat_id=chat.chat_id,
-                            text=emoji,
-                            reply_to_message_id=target.telegram_message_id,
-                            disable_preview=True,
-                        )
+                        with span("telegram_send"):
+                            msg_id = await self.tg.send_message(
+                                token=bot.token,
+                                chat_id=chat.chat_id,
+                                text=emoji,
+                                reply_to_message_id=target.telegram_message_id,
+                                disable_preview=True,
+                            )
+                        trace.outcome = "reaction"
                         # logla (metadata ile)
-                        emoji_metadata = extract_message_metadata(emoji, topic_hint_pool[0] if topic_hint_pool else "")
-                        db.add(Message(
-                            bot_id=bot.id,
-                            chat_db_id=chat.id,
+                        emoji_metadata = attach_message_features(
+                            extract_message_metadata(emoji, topic_hint_pool[0] if topic_hint_pool else ""),
+                            emoji,
+                        )
+                        self._store_bot_message(
+                            db,
+                            bot=bot,
+                            chat=chat,
                             telegram_message_id=msg_id,
                             text=emoji,
                             reply_to_message_id=target.telegram_message_id,
                             msg_metadata=emoji_metadata,
-                        ))
-                        db.commit()
-                    await asyncio.sleep(self.next_delay_seconds(db, bot=bot))
-                    return
+                        )
+                    return self.next_delay_seconds(db, bot=bot)
 
             # SESSION 25: Context preparation (extracted)
-            (
-                recent_msgs,
-                reply_msg,
-                mention_handle,
-                mode,
-                mention_ctx,
-                history_excerpt,
-                reply_excerpt,
-                contextual_examples,
-            ) = self._prepare_context_data(
-                db,
-                chat=chat,
-                bot=bot,
-                s=s,
-            )
+            with span("context"):
+                (
+                    recent_msgs,
+                    reply_msg,
+                    mention_handle,
+                    mode,
+                    mention_ctx,
+                    history_excerpt,
+                    reply_excerpt,
+                    contextual_examples,
+                ) = self._prepare_context_data(
+                    db,
+                    chat=chat,
+                    bot=bot,
+                    s=s,
+                    tick_data=tick_data,
+                )
             history_source = list(recent_msgs[:15])  # For topic selection
 
             # SESSION 25: Generation inputs building (extracted)
-            (
-                user_prompt,
-                system_prompt,
-                temperature,
-                max_tokens,
-                top_p,
-                frequency_penalty,
-                topic,
-                reaction_plan,
-                tempo_multiplier,
-                bot_memories,
-            ) = self._build_generation_inputs(
-                db,
-                bot=bot,
-                chat=chat,
-                s=s,
-                persona_profile=persona_profile,
-                emotion_profile=emotion_profile,
-                stances=stances,
-                holdings=holdings,
-                persona_hint=persona_hint,
-                persona_refresh_note=persona_refresh_note,
-                topic_hint_pool=topic_hint_pool,
-                history_source=history_source,
-                history_excerpt=history_excerpt,
-                reply_msg=reply_msg,
-                reply_excerpt=reply_excerpt,
-                mode=mode,
-                mention_ctx=mention_ctx,
-                contextual_examples=contextual_examples,
-            )
+            with span("prompt"):
+                (
+                    user_prompt,
+                    system_prompt,
+                    temperature,
+                    max_tokens,
+                    top_p,
+                    frequency_penalty,
+                    topic,
+                    reaction_plan,
+                    tempo_multiplier,
+                    bot_memories,
+                ) = self._build_generation_inputs(
+                    db,
+                    bot=bot,
+                    chat=chat,
+                    s=s,
+                    persona_profile=persona_profile,
+                    emotion_profile=emotion_profile,
+                    stances=stances,
+                    holdings=holdings,
+                    persona_hint=persona_hint,
+                    persona_refresh_note=persona_refresh_note,
+                    topic_hint_pool=topic_hint_pool,
+                    history_source=history_source,
+                    history_excerpt=history_excerpt,
+                    reply_msg=reply_msg,
+                    reply_excerpt=reply_excerpt,
+                    mode=mode,
+                    mention_ctx=mention_ctx,
+                    contextual_examples=contextual_examples,
+                    tick_data=tick_data,
+                )
+
+            # Typing göstergesi üretim boyunca açık (gönderimde sadece kalan süre beklenir)
+            typing = self._start_typing(s, bot, chat)
 
             # SESSION 25: Message processing (extracted)
-            text, should_skip = self._process_generated_text(
+            text, should_skip = await self._process_generated_text(
                 db,
                 bot=bot,
                 s=s,
@@ -2200,11 +2837,10 @@ class BehaviorEngine:
                 mention_ctx=mention_ctx,
             )
             if should_skip:
-                await asyncio.sleep(self.next_delay_seconds(db, bot=bot))
-                return
+                return self.next_delay_seconds(db, bot=bot)
 
             # SESSION 25: Message finalization (extracted)
-            text, should_skip = self._finalize_message_text(
+            text, should_skip = await self._finalize_message_text(
                 db,
                 bot=bot,
                 s=s,
@@ -2212,8 +2848,7 @@ class BehaviorEngine:
                 recent_msgs=recent_msgs,
             )
             if should_skip:
-                await asyncio.sleep(self.next_delay_seconds(db, bot=bot))
-                return
+                return self.next_delay_seconds(db, bot=bot)
 
             # SESSION 25: Message sending (extracted)
             await self._send_message_to_chat(
@@ -2229,13 +2864,16 @@ class BehaviorEngine:
                 start_time=start_time,
                 refresh_state=refresh_state,
                 should_refresh=should_refresh,
+                typing=typing,
             )
+            trace.outcome = "sent"
 
             # Sonraki gecikme
-            await asyncio.sleep(self.next_delay_seconds(db, bot=bot))
+            return self.next_delay_seconds(db, bot=bot)
 
         except Exception as e:
-            logger.exception("tick_once error: %s", e)
+            logger.exception("tick error: %s", e)
+            trace.outcome = "error"
 
             # ❌ PROMETHEUS METRIC: Başarısız mesaj
             if METRICS_ENABLED and bot_id_for_metric:
@@ -2245,9 +2883,14 @@ class BehaviorEngine:
                 ).inc()
                 logger.debug(f"📊 Metric kaydedildi: bot={bot_id_for_metric}, status=failed")
 
-            await asyncio.sleep(3.0)
+            return 3.0
         finally:
+            if typing is not None:
+                typing.cancel()
+            if reserved_bot_id is not None:
+                self._release_send_slot(reserved_bot_id)
             db.close()
+            trace.finish()
 
     # ---- Message queue processor ----
     async def _process_message_queue(self) -> None:
@@ -2255,18 +2898,18 @@ class BehaviorEngine:
         Background task to process queued messages.
 
         Continuously dequeues messages and attempts to send them via Telegram.
-        Uses blocking dequeue with timeout to avoid busy-waiting.
+        Polls without blocking and sleeps asynchronously while the queue is empty.
         """
         logger.info("Message queue processor started")
 
         while True:
             try:
-                # Dequeue next message (blocks for up to 1 second)
-                message = self.msg_queue.dequeue(block=True, timeout=1.0)
+                # Bloklamadan dene: dequeue(block=True) sync bekler ve tüm event loop'u durdurur
+                message = self.msg_queue.dequeue(block=False)
 
                 if message is None:
                     # No messages in queue, continue
-                    await asyncio.sleep(0.1)
+                    await asyncio.sleep(1.0)
                     continue
 
                 # Attempt to send message
@@ -2328,6 +2971,18 @@ class BehaviorEngine:
         if self._redis_url and self._redis_task is None:
             self._redis_task = asyncio.create_task(self._config_listener(), name="config_listener")
 
+        # Shard lease heartbeat/rebalance
+        if self.shard_leases is not None and self._shard_task is None:
+            self._shard_task = asyncio.create_task(self.shard_leases.run(), name="shard_leases")
+
+        # Write-behind flusher
+        if self.write_behind_enabled and self._write_buffer_task is None:
+            self._write_buffer_task = asyncio.create_task(self.write_buffer.run(), name="write_behind")
+
+        # Event loop lag sampler
+        if self.loop_monitor is not None and self._loop_monitor_task is None:
+            self._loop_monitor_task = asyncio.create_task(self.loop_monitor.run(), name="loop_monitor")
+
         # Message queue processor'ı başlat
         if self._queue_processor_task is None:
             self._queue_processor_task = asyncio.create_task(
@@ -2336,12 +2991,121 @@ class BehaviorEngine:
             )
             logger.info("Message queue processor task created")
 
+        # Priority lane: kullanıcı mention/reply'leri ambient akışı beklemesin
+        if self._priority_task is None:
+            self._start_priority_lane()
+
+        # Semantic dedup modelini ilk tick'ten önce yükle ve ısıt (ilk mesaj yükleme gecikmesi ödemesin)
+        if self.semantic_dedup is not None and self.semantic_dedup.enabled and self.semantic_dedup_warmup:
+            await self.semantic_dedup.warm_up()
+
+        if self.scheduler_mode == "serial":
+            while True:
+                await self.tick_once()
+
+        self._scheduler = ChatPipelineScheduler(
+            run_tick=lambda chat_db_id: self._run_tick(chat_db_id),
+            list_chats=self._enabled_chat_ids,
+            max_concurrency=self.max_concurrent_chats,
+        )
+        await self._scheduler.run()
+
+    def _start_priority_lane(self) -> None:
+        """BRPOP tüketicisini başlat; redis.asyncio yoksa polling döngüsüne düş."""
+        if not self._redis_url or self._redis_sync_client is None:
+            return  # Priority queue Redis'te; Redis yoksa kuyruk da yok
+
+        try:
+            from redis import asyncio as aioredis  # type: ignore
+        except Exception:
+            logger.warning("redis.asyncio bulunamadı; priority lane polling ile çalışacak.")
+            self._priority_task = asyncio.create_task(self._priority_loop(), name="priority_lane")
+            return
+
+        # Bloklayan BRPOP pubsub/diğer komutlarla aynı bağlantıyı paylaşmasın
+        self._priority_redis = aioredis.from_url(self._redis_url, decode_responses=True)
+        self.priority_consumer = PriorityQueueConsumer(
+            self._priority_redis,
+            self._handle_priority_items,
+            max_concurrency=self.priority_max_concurrency,
+            block_timeout=self.priority_block_timeout,
+            batch_size=lambda: self._priority_batch_size,
+            is_active=self._priority_lane_active,
+        )
+        self._priority_task = asyncio.create_task(self.priority_consumer.run(), name="priority_lane")
+
+    async def _priority_lane_active(self) -> bool:
+        """Simülasyon açık mı? Batch ayarını da tazeler (settings 15 sn cache'li)."""
+        db: Session = SessionLocal()
+        try:
+            s = self.settings(db)
+        finally:
+            db.close()
+        batch_enabled = bool(s.get("batch_processing_enabled", False))
+        self._priority_batch_size = max(1, int(s.get("batch_size", 5))) if batch_enabled else 1
+        return bool(s.get("simulation_active", False))
+
+    async def _handle_priority_items(self, items: List[Dict[str, Any]]) -> None:
+        """Priority tüketicisinden gelen item(lar)ı işle (her çağrı kendi session'ı ile)."""
+        db: Session = SessionLocal()
+        try:
+            if len(items) > 1:
+                logger.info("Batch mode: Processing %d priority messages in parallel", len(items))
+                success_count = await self._process_priority_queue_batch(db, items)
+                logger.info("Batch processing result: %d/%d messages sent", success_count, len(items))
+            else:
+                await self._process_priority_message(db, items[0])
+        finally:
+            db.close()
+
+    async def _priority_loop(self) -> None:
+        """Priority queue'yu ambient pipeline'lardan bağımsız işler (redis.asyncio yoksa polling)."""
+        logger.info("Priority lane started")
         while True:
-            await self.tick_once()
+            delay = 1.0
+            db: Session = SessionLocal()
+            try:
+                s = self.settings(db)
+                if bool(s.get("simulation_active", False)):
+                    handled = await self._handle_priority_queue(db, s)
+                    delay = handled if handled is not None else 0.5
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Priority lane error: %s", e)
+                delay = 3.0
+            finally:
+                db.close()
+            await asyncio.sleep(delay)
 
     # ---- Temiz kapanış ----
     async def shutdown(self) -> None:
         """Worker sinyali geldiğinde kaynakları nazikçe kapat."""
+        # Per-chat pipeline'lar ve priority lane
+        if self._scheduler is not None:
+            await self._scheduler.stop()
+            self._scheduler = None
+        if self._priority_task:
+            self._priority_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._priority_task
+            self._priority_task = None
+        self.priority_consumer = None
+        await self.typing.aclose()
+        if self._priority_redis is not None:
+            with contextlib.suppress(Exception):
+                await self._priority_redis.aclose()
+            self._priority_redis = None
+
+        # Shard lease'lerini bırak: diğer worker'lar TTL beklemeden devralır
+        if self._shard_task:
+            self._shard_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._shard_task
+            self._shard_task = None
+        if self.shard_leases is not None:
+            await asyncio.to_thread(self.shard_leases.release_all)
+
         # Redis listener iptali
         if self._redis_task:
             self._redis_task.cancel()
@@ -2357,6 +3121,37 @@ class BehaviorEngine:
             self._queue_processor_task = None
             logger.info("Message queue processor stopped")
 
+        # Write-behind: bekleyen yazmaları kaybetmeden son kez flush et
+        if self._write_buffer_task:
+            self._write_buffer_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._write_buffer_task
+            self._write_buffer_task = None
+        try:
+            flushed = await asyncio.to_thread(self.write_buffer.flush)
+            if flushed:
+                logger.info("Write-behind buffer flushed on shutdown (%d writes)", flushed)
+        except Exception as exc:
+            logger.error("Write-behind flush on shutdown failed: %s", exc)
+
+        # Batch LLM worker pool ve async LLM istemcisinin bağlantı havuzu
+        self.llm_batch.shutdown()
+        with contextlib.suppress(Exception):
+            await self.llm.aclose()
+        if self.semantic_dedup is not None:
+            self.semantic_dedup.shutdown()
+
+        if self._loop_monitor_task:
+            self._loop_monitor_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._loop_monitor_task
+            self._loop_monitor_task = None
+        if self._profile_task:
+            self._profile_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._profile_task
+            self._profile_task = None
+
         # Telegram HTTP istemcisi
         try:
             await self.tg.close()
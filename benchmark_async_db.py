@@ -1,7 +1,10 @@
 """
 Performance benchmark: Sync vs Async Database Queries
 
-Compares query performance for common operations.
+Compares query performance for common operations, and the worker tick path
+end to end: the reads one generation tick performs (history, reply counts,
+stances, holdings, memories, past references, dedup) done inline on the event
+loop vs. through the engine's TickDataLoader for several chats concurrently.
 """
 
 import asyncio
@@ -78,6 +81,97 @@ async def benchmark_concurrent_async():
     return elapsed, results
 
 
+WORKER_TICKS = 20
+
+
+async def _measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Event loop'un en uzun bloklandığı süre (saniye)."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+def _worker_pairs(limit: int):
+    db = SessionLocal()
+    try:
+        chats = db.query(Chat.id).filter(Chat.is_enabled == True).all()
+        bots = db.query(Bot.id).filter(Bot.is_enabled == True).all()
+    finally:
+        db.close()
+    if not chats or not bots:
+        return []
+    return [(chats[i % len(chats)][0], bots[i % len(bots)][0]) for i in range(limit)]
+
+
+def _inline_tick_reads(engine, chat_db_id: int, bot_id: int) -> None:
+    """Eski yol: tick okumaları loop üzerinde, sıralı sync sorgular."""
+    from backend.behavior_engine.metadata_analyzer import fetch_bot_memories, find_relevant_past_messages
+
+    db = SessionLocal()
+    try:
+        bot = db.get(Bot, bot_id)
+        recent = engine.fetch_recent_messages(db, chat_db_id, limit=40)
+        engine.reply_counts(db, chat_db_id, [m.telegram_message_id for m in recent[:30]])
+        engine.fetch_psh(db, bot, topic_hint=None)
+        fetch_bot_memories(db, bot_id, limit=8)
+        find_relevant_past_messages(db, bot_id=bot_id, current_topic="BIST", current_symbols=[], days_back=7, limit=3)
+        engine.is_duplicate_recent(db, bot_id=bot_id, text="benchmark", hours=12)
+    finally:
+        db.close()
+
+
+async def benchmark_worker_path(pairs):
+    """Worker tick okumaları: inline sync vs TickDataLoader (eşzamanlı chat'ler)"""
+    import behavior_engine as behavior_engine_module
+    from backend.behavior_engine.tick_data import TickDataLoader, create_async_session_factory
+
+    engine = behavior_engine_module.BehaviorEngine()
+    engine.cache = None  # Her tick DB'ye gitsin
+
+    async def run(label, fn):
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(_measure_loop_lag(stop))
+        await asyncio.sleep(0.02)  # Lag ölçer çalışmaya başlasın
+        start = time.perf_counter()
+        await fn()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        worst_lag = await lag_task
+        print(f"  {label:<34} total={elapsed:.3f}s  per tick={elapsed / len(pairs) * 1000:.1f}ms  "
+              f"max loop block={worst_lag * 1000:.1f}ms")
+        return elapsed
+
+    async def inline_tick(chat_db_id, bot_id):
+        # Eski davranış: pipeline sync sorguları loop üzerinde yapar
+        _inline_tick_reads(engine, chat_db_id, bot_id)
+
+    async def inline():
+        await asyncio.gather(*(inline_tick(chat_db_id, bot_id) for chat_db_id, bot_id in pairs))
+
+    def loader_run(loader):
+        async def _run():
+            await asyncio.gather(*(
+                loader.load(chat_db_id=chat_db_id, bot_id=bot_id) for chat_db_id, bot_id in pairs
+            ))
+        return _run
+
+    results = {"inline": await run("inline sync (old)", inline)}
+    results["thread"] = await run("TickDataLoader (thread)", loader_run(TickDataLoader(SessionLocal)))
+    async_factory = create_async_session_factory()
+    if async_factory is not None:
+        results["async"] = await run(
+            "TickDataLoader (AsyncSession)",
+            loader_run(TickDataLoader(SessionLocal, async_session_factory=async_factory)),
+        )
+    else:
+        print("  TickDataLoader (AsyncSession)      skipped (async driver not installed)")
+    await engine.shutdown()
+    return results
+
+
 def main():
     print("=" * 60)
     print("Database Performance Benchmark: Sync vs Async")
@@ -107,12 +201,24 @@ def main():
     speedup = sync_time / concurrent_time
     print(f"  Speedup vs sync: {speedup:.2f}x\n")
 
+    # Benchmark 4: Worker tick path end to end
+    print(f"Benchmark 4: Worker Tick Reads ({WORKER_TICKS} concurrent chat ticks)")
+    pairs = _worker_pairs(WORKER_TICKS)
+    worker_results = asyncio.run(benchmark_worker_path(pairs)) if pairs else {}
+    if not pairs:
+        print("  skipped (no enabled chats/bots)")
+    print()
+
     print("=" * 60)
     print("Summary")
     print("=" * 60)
     print(f"Sync (baseline):      {sync_time:.3f}s (1.00x)")
     print(f"Async (sequential):   {async_time:.3f}s ({sync_time/async_time:.2f}x)")
     print(f"Async (concurrent):   {concurrent_time:.3f}s ({sync_time/concurrent_time:.2f}x) ← TARGET")
+    if worker_results:
+        base = worker_results["inline"]
+        for mode, elapsed in worker_results.items():
+            print(f"Worker ticks ({mode}):{' ' * max(1, 9 - len(mode))}{elapsed:.3f}s ({base / elapsed:.2f}x)")
     print("\nConclusion:")
     if speedup >= 3.0:
         print(f"  SUCCESS: {speedup:.1f}x speedup achieved (target: 3x)")
@@ -0,0 +1,104 @@
+"""
+Clock
+
+Process-wide time source for the engine. Everything that needs "now"
+(now_utc, active/prime hours, hourly limits, roster/typing/cache timers) reads
+it through this module instead of datetime.now() / time.time() directly, so a
+simulation can swap in a VirtualClock and run a whole trading day on virtual
+time (see backend/simulation/virtual_time.py).
+
+Durations that are measured for metrics (perf_counter) stay on real time.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+UTC = timezone.utc
+
+
+class SystemClock:
+    """Real wall clock (default)."""
+
+    def now_utc(self) -> datetime:
+        return datetime.now(UTC)
+
+    def now_local(self) -> datetime:
+        """Naive local time (active_hours / prime_hours are written in local time)."""
+        return datetime.now()
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+
+class VirtualClock:
+    """
+    Clock driven by a virtual time source.
+
+    Args:
+        start: Virtual wall-clock time at source() == 0 (naive = local time)
+        source: Seconds since the start of the simulation (e.g. VirtualTimeLoop.time)
+    """
+
+    def __init__(self, start: datetime, source: Callable[[], float]) -> None:
+        if start.tzinfo is None:
+            start = start.astimezone()  # Naive -> sistemin yerel saat dilimi
+        self.start = start
+        self.source = source
+        self._start_epoch = start.timestamp()
+
+    @property
+    def elapsed(self) -> float:
+        return self.source()
+
+    def now_utc(self) -> datetime:
+        return (self.start + timedelta(seconds=self.source())).astimezone(UTC)
+
+    def now_local(self) -> datetime:
+        return (self.start + timedelta(seconds=self.source())).astimezone().replace(tzinfo=None)
+
+    def time(self) -> float:
+        return self._start_epoch + self.source()
+
+    def monotonic(self) -> float:
+        return self.source()
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock: Optional[object]) -> object:
+    """
+    Aktif saati değiştir (None = sistem saati).
+
+    Returns:
+        The previously active clock (to restore it afterwards)
+    """
+    global _clock
+    previous = _clock
+    _clock = clock if clock is not None else SystemClock()
+    return previous
+
+
+def now_utc() -> datetime:
+    return _clock.now_utc()
+
+
+def now_local() -> datetime:
+    return _clock.now_local()
+
+
+def wall_time() -> float:
+    """Epoch saniye (time.time() karşılığı)."""
+    return _clock.time()
+
+
+def monotonic() -> float:
+    return _clock.monotonic()
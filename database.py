@@ -107,10 +107,18 @@ class Setting(Base):
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
 
 
+def _message_text_hash(context) -> str:
+    # Insert'te text'ten türetilir (toplu insert'ler dahil); açıkça verilen değer korunur
+    from backend.behavior.deduplication import text_hash
+
+    return text_hash(context.get_current_parameters().get("text") or "")
+
+
 class Message(Base):
     __tablename__ = "messages"
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # SQLite yalnızca INTEGER PRIMARY KEY için otomatik id üretir (toplu insert'ler dahil)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
     bot_id = Column(Integer, ForeignKey("bots.id", ondelete="SET NULL"), nullable=True, index=True)
     # Not: Chat tablosunun 'id' alanına (INT) referans veriyoruz. Telegram chat_id ile
     # karışmaması için kolon adını 'chat_db_id' tuttuk.
@@ -119,6 +127,8 @@ class Message(Base):
     # Telegram message_id (int). Bazı istemciler BIGINT olarak işlemek isteyebilir.
     telegram_message_id = Column(BigInteger, nullable=True, index=True)
     text = Column(Text, nullable=True)
+    # normalize_text(text) hash'i: birebir tekrar kontrolü tek indeksli sorgu olur
+    text_hash = Column(String(16), default=_message_text_hash, nullable=True)
     reply_to_message_id = Column(BigInteger, nullable=True, index=True)
 
     # Performans için index
@@ -142,6 +152,8 @@ class Message(Base):
         Index("ix_messages_reply_lookup", "chat_db_id", "bot_id", "telegram_message_id"),
         # Index for incoming message processing (bot_id NULL check + created_at)
         Index("ix_messages_incoming", "bot_id", "created_at", "chat_db_id"),
+        # Index for exact-duplicate check (is_duplicate_recent)
+        Index("ix_messages_bot_text_hash_created", "bot_id", "text_hash", "created_at"),
     )
 
 
@@ -127,14 +127,14 @@ async def fetch_recent_messages_async(
 
     Args:
         session: Async database session
-        chat_id: Chat ID
+        chat_id: Chat DB ID (messages.chat_db_id)
         limit: Maximum number of messages
         include_bot: Include bot relationship in query
 
     Returns:
         List of Message objects
     """
-    query = select(Message).where(Message.chat_id == chat_id).order_by(Message.created_at.desc()).limit(limit)
+    query = select(Message).where(Message.chat_db_id == chat_id).order_by(Message.created_at.desc()).limit(limit)
 
     if include_bot:
         query = query.options(selectinload(Message.bot))
@@ -203,7 +203,7 @@ async def create_message_async(
     Args:
         session: Async database session
         bot_id: Bot ID
-        chat_id: Chat ID
+        chat_id: Chat DB ID (messages.chat_db_id)
         text: Message text
         telegram_message_id: Telegram message ID
         reply_to_message_id: ID of message being replied to
@@ -213,7 +213,7 @@ async def create_message_async(
     """
     message = Message(
         bot_id=bot_id,
-        chat_id=chat_id,
+        chat_db_id=chat_id,
         text=text,
         telegram_message_id=telegram_message_id,
         reply_to_message_id=reply_to_message_id,
@@ -4,47 +4,141 @@ Embedding Cache Module
 P0.1 Critical Fix: Cache sentence transformer embeddings to avoid recomputation
 Reduces 50,000 embeddings/hour to ~1,000 with 100 bots
 
-Uses Redis for distributed cache with 24-hour TTL
+Two layers:
+- L1: bounded in-process LRU (backend.caching.LRUCache), no network
+- L2: Redis with 24-hour TTL; batches go out as one MGET / one pipelined
+  SETEX round trip
+
+Redis values are raw little-endian float16/float32 buffers behind an 8-byte
+header (magic, dtype, dimension) and decode zero-copy with np.frombuffer;
+pickled arrays were 2-3x larger and slower to load.
 """
 
 import hashlib
 import logging
-import pickle
+import os
+import struct
 from typing import Optional, List
 import numpy as np
 
+from backend.caching.lru_cache import LRUCache
+
 logger = logging.getLogger(__name__)
 
+try:
+    from backend.metrics import embedding_cache_bytes_total, embedding_cache_lookups_total
+    METRICS_ENABLED = True
+except Exception:  # prometheus_client yoksa sadece get_stats()
+    METRICS_ENABLED = False
+
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16").strip().lower()
+EMBEDDING_CACHE_L1_SIZE = int(os.getenv("EMBEDDING_CACHE_L1_SIZE", "4096"))
+
+# ---- Binary encoding ----
+# magic(2) + dtype kodu(1) + pad(1) + boyut(uint32) = 8 byte: float32 veri hizalı kalır
+_HEADER = struct.Struct("<2sBxI")
+_MAGIC = b"EB"
+_DTYPE_CODES = {"float16": 1, "float32": 2}
+_CODE_DTYPES = {code: np.dtype(name).newbyteorder("<") for name, code in _DTYPE_CODES.items()}
+
+
+def encode_embedding(embedding, dtype: str = "float16") -> bytes:
+    """
+    Embedding'i header + ham buffer olarak kodla.
+
+    Args:
+        embedding: 1D array-like
+        dtype: "float16" (yarı boyut) or "float32"
+
+    Returns:
+        Encoded bytes
+    """
+    code = _DTYPE_CODES.get(dtype)
+    if code is None:
+        raise ValueError(f"Unsupported embedding dtype '{dtype}' (expected float16 or float32)")
+    vector = np.ascontiguousarray(np.asarray(embedding).reshape(-1), dtype=_CODE_DTYPES[code])
+    return _HEADER.pack(_MAGIC, code, vector.shape[0]) + vector.tobytes()
+
+
+def decode_embedding(raw: bytes) -> np.ndarray:
+    """
+    encode_embedding çıktısını kopyalamadan çöz (read-only view).
+
+    Raises:
+        ValueError: Header or length does not match
+    """
+    if len(raw) < _HEADER.size:
+        raise ValueError("Embedding payload too short")
+    magic, code, dim = _HEADER.unpack_from(raw)
+    dtype = _CODE_DTYPES.get(code)
+    if magic != _MAGIC or dtype is None:
+        raise ValueError("Not an encoded embedding")
+    if len(raw) != _HEADER.size + dim * dtype.itemsize:
+        raise ValueError(f"Embedding payload length mismatch for dim={dim}")
+    return np.frombuffer(raw, dtype=dtype, count=dim, offset=_HEADER.size)
+
+
+def _binary_client(redis_client):
+    """
+    decode_responses=True istemcilerden aynı bağlantı ayarlarıyla bytes döndüren bir kopya üret.
+    """
+    pool = getattr(redis_client, "connection_pool", None)
+    kwargs = getattr(pool, "connection_kwargs", None)
+    if not kwargs or not kwargs.get("decode_responses"):
+        return redis_client
+    import redis
+
+    binary_kwargs = dict(kwargs)
+    binary_kwargs["decode_responses"] = False
+    return redis.Redis(connection_pool=redis.ConnectionPool(connection_class=pool.connection_class, **binary_kwargs))
+
 
 class EmbeddingCache:
     """
-    Redis-backed cache for sentence transformer embeddings
+    Two-layer cache for sentence transformer embeddings
 
-    Cache key format: "embedding:{message_hash}"
+    Cache key format: "embedding:v2:{message_hash}" (v2: binary values)
     TTL: 24 hours (embeddings don't change, long cache is safe)
     """
 
-    def __init__(self, redis_client=None, ttl_seconds: int = 86400):
+    def __init__(
+        self,
+        redis_client=None,
+        ttl_seconds: int = 86400,
+        l1_size: Optional[int] = None,
+        dtype: Optional[str] = None,
+    ):
         """
         Initialize embedding cache
 
         Args:
             redis_client: Redis client instance (optional, graceful degradation if None)
             ttl_seconds: Cache TTL in seconds (default: 24 hours)
+            l1_size: In-process LRU entries (default EMBEDDING_CACHE_L1_SIZE, 0 disables)
+            dtype: Redis value precision, float16 or float32 (default EMBEDDING_CACHE_DTYPE)
         """
-        self.redis = redis_client
+        self.redis = _binary_client(redis_client) if redis_client is not None else None
         self.ttl = ttl_seconds
-        self.enabled = redis_client is not None
+        self.dtype = dtype or EMBEDDING_CACHE_DTYPE
+        if self.dtype not in _DTYPE_CODES:
+            raise ValueError(f"Unsupported embedding dtype '{self.dtype}' (expected float16 or float32)")
+        l1_size = EMBEDDING_CACHE_L1_SIZE if l1_size is None else l1_size
+        self.l1 = LRUCache(max_size=l1_size, default_ttl_seconds=ttl_seconds) if l1_size > 0 else None
+        self.enabled = self.redis is not None or self.l1 is not None
 
         # Metrics
         self.hits = 0
         self.misses = 0
+        self.l1_hits = 0
+        self.redis_hits = 0
         self.errors = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
 
-        if not self.enabled:
-            logger.warning("EmbeddingCache initialized without Redis - cache disabled")
+        if self.redis is None:
+            logger.warning("EmbeddingCache initialized without Redis - in-process L1 only")
         else:
-            logger.info(f"EmbeddingCache initialized with TTL={ttl_seconds}s")
+            logger.info(f"EmbeddingCache initialized with TTL={ttl_seconds}s (dtype={self.dtype}, l1={l1_size})")
 
     def _hash_text(self, text: str) -> str:
         """Generate stable hash for text"""
@@ -53,7 +147,7 @@ class EmbeddingCache:
     def _cache_key(self, text: str) -> str:
         """Generate Redis cache key"""
         text_hash = self._hash_text(text)
-        return f"embedding:{text_hash}"
+        return f"embedding:v2:{text_hash}"
 
     def get(self, text: str) -> Optional[np.ndarray]:
         """
@@ -65,28 +159,7 @@ class EmbeddingCache:
         Returns:
             Embedding array or None if not cached
         """
-        if not self.enabled:
-            return None
-
-        try:
-            key = self._cache_key(text)
-            cached = self.redis.get(key)
-
-            if cached is None:
-                self.misses += 1
-                return None
-
-            # Deserialize numpy array
-            embedding = pickle.loads(cached)
-            self.hits += 1
-
-            logger.debug(f"Cache HIT: {text[:30]}... (key={key})")
-            return embedding
-
-        except Exception as e:
-            self.errors += 1
-            logger.error(f"Cache get error: {e}")
-            return None
+        return self.get_many([text])[0]
 
     def set(self, text: str, embedding: np.ndarray) -> bool:
         """
@@ -99,29 +172,11 @@ class EmbeddingCache:
         Returns:
             True if successful
         """
-        if not self.enabled:
-            return False
-
-        try:
-            key = self._cache_key(text)
-
-            # Serialize numpy array
-            serialized = pickle.dumps(embedding)
-
-            # Store with TTL
-            self.redis.setex(key, self.ttl, serialized)
-
-            logger.debug(f"Cache SET: {text[:30]}... (key={key})")
-            return True
-
-        except Exception as e:
-            self.errors += 1
-            logger.error(f"Cache set error: {e}")
-            return False
+        return self.set_many([text], [embedding]) == 1
 
     def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
         """
-        Retrieve multiple embeddings (batch operation)
+        Retrieve multiple embeddings (L1, then a single Redis MGET)
 
         Args:
             texts: List of message texts
@@ -129,19 +184,61 @@ class EmbeddingCache:
         Returns:
             List of embeddings (None for cache misses)
         """
-        if not self.enabled:
-            return [None] * len(texts)
-
-        results = []
-        for text in texts:
-            embedding = self.get(text)
-            results.append(embedding)
-
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        if not self.enabled or not texts:
+            return results
+
+        keys = [self._cache_key(text) for text in texts]
+        remote = []
+        for i, key in enumerate(keys):
+            cached = self.l1.get(key) if self.l1 is not None else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                remote.append(i)
+        l1_hits = len(texts) - len(remote)
+        self.l1_hits += l1_hits
+        self._count("l1", "hit", l1_hits)
+        if self.l1 is not None:
+            self._count("l1", "miss", len(remote))
+
+        redis_hits = 0
+        if remote and self.redis is not None:
+            try:
+                raws = self.redis.mget([keys[i] for i in remote])
+            except Exception as e:
+                self.errors += 1
+                self._count("redis", "error", 1)
+                logger.error(f"Cache get error: {e}")
+                raws = [None] * len(remote)
+
+            for i, raw in zip(remote, raws):
+                if raw is None:
+                    continue
+                try:
+                    embedding = decode_embedding(raw)
+                except ValueError as e:
+                    self.errors += 1
+                    self._count("redis", "error", 1)
+                    logger.debug(f"Cache decode error ({keys[i]}): {e}")
+                    continue
+                results[i] = embedding
+                redis_hits += 1
+                self.bytes_read += len(raw)
+                self._count_bytes("read", len(raw))
+                if self.l1 is not None:
+                    self.l1.set(keys[i], embedding)
+            self._count("redis", "hit", redis_hits)
+            self._count("redis", "miss", len(remote) - redis_hits)
+
+        self.redis_hits += redis_hits
+        self.hits += l1_hits + redis_hits
+        self.misses += len(remote) - redis_hits
         return results
 
     def set_many(self, texts: List[str], embeddings: List[np.ndarray]) -> int:
         """
-        Store multiple embeddings (batch operation)
+        Store multiple embeddings (L1 and one pipelined SETEX round trip)
 
         Args:
             texts: List of message texts
@@ -156,20 +253,41 @@ class EmbeddingCache:
         if len(texts) != len(embeddings):
             logger.error(f"Texts/embeddings length mismatch: {len(texts)} vs {len(embeddings)}")
             return 0
+        if not texts:
+            return 0
 
-        success_count = 0
-        for text, embedding in zip(texts, embeddings):
-            if self.set(text, embedding):
-                success_count += 1
+        keys = [self._cache_key(text) for text in texts]
+        encoded = [encode_embedding(embedding, self.dtype) for embedding in embeddings]
+        if self.l1 is not None:
+            for key, payload in zip(keys, encoded):
+                # L1'e Redis'tekiyle aynı (çözülmüş) değer girer
+                self.l1.set(key, decode_embedding(payload))
 
-        return success_count
+        if self.redis is None:
+            return len(keys)
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, payload in zip(keys, encoded):
+                pipe.setex(key, self.ttl, payload)
+            pipe.execute()
+        except Exception as e:
+            self.errors += 1
+            self._count("redis", "error", 1)
+            logger.error(f"Cache set error: {e}")
+            return 0
+
+        written = sum(len(payload) for payload in encoded)
+        self.bytes_written += written
+        self._count_bytes("write", written)
+        return len(keys)
 
     def get_stats(self) -> dict:
         """
         Get cache statistics
 
         Returns:
-            Dict with hits, misses, hit_rate, errors
+            Dict with hits, misses, hit_rate, per-layer hits, bytes, errors
         """
         total = self.hits + self.misses
         hit_rate = (self.hits / total * 100) if total > 0 else 0.0
@@ -178,17 +296,37 @@ class EmbeddingCache:
             "hits": self.hits,
             "misses": self.misses,
             "hit_rate_percent": round(hit_rate, 2),
+            "l1_hits": self.l1_hits,
+            "redis_hits": self.redis_hits,
+            "l1_size": self.l1.size() if self.l1 is not None else 0,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
             "errors": self.errors,
-            "enabled": self.enabled
+            "enabled": self.enabled,
+            "dtype": self.dtype,
         }
 
     def clear_stats(self):
         """Reset statistics counters"""
         self.hits = 0
         self.misses = 0
+        self.l1_hits = 0
+        self.redis_hits = 0
         self.errors = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
         logger.info("Cache statistics cleared")
 
+    @staticmethod
+    def _count(layer: str, result: str, amount: int) -> None:
+        if METRICS_ENABLED and amount:
+            embedding_cache_lookups_total.labels(layer=layer, result=result).inc(amount)
+
+    @staticmethod
+    def _count_bytes(direction: str, amount: int) -> None:
+        if METRICS_ENABLED and amount:
+            embedding_cache_bytes_total.labels(direction=direction).inc(amount)
+
 
 # Test function
 def test_embedding_cache():
@@ -220,7 +358,7 @@ def test_embedding_cache():
     cache.set(text1, embedding1)
     result = cache.get(text1)
     assert result is not None, "Cache miss on fresh set!"
-    assert np.array_equal(result, embedding1), "Embedding mismatch!"
+    assert np.allclose(result, embedding1, atol=1e-3), "Embedding mismatch!"
     print(f"✅ Set and get successful: {result}")
 
     # Test 2: Cache miss
@@ -234,8 +372,8 @@ def test_embedding_cache():
     cache.set_many([text1, text2], [embedding1, embedding2])
     results = cache.get_many([text1, text2])
     assert len(results) == 2, "Wrong result count!"
-    assert np.array_equal(results[0], embedding1), "Embedding1 mismatch!"
-    assert np.array_equal(results[1], embedding2), "Embedding2 mismatch!"
+    assert np.allclose(results[0], embedding1, atol=1e-3), "Embedding1 mismatch!"
+    assert np.allclose(results[1], embedding2, atol=1e-3), "Embedding2 mismatch!"
     print(f"✅ Batch operations successful: {len(results)} embeddings")
 
     # Test 4: Statistics
@@ -0,0 +1,172 @@
+"""
+Embedding Service Module
+
+Micro-batched embedding inference off the event loop.
+
+SentenceTransformer.encode is CPU-bound; called from a coroutine it stalls
+every pipeline on the worker, and concurrent dedup checks from different
+chats each paid for their own forward pass. EmbeddingService queues encode
+requests, waits up to `max_wait_ms` for more to arrive (or until
+`max_batch_size` texts are pending), and runs one model.encode for the whole
+batch on a dedicated thread pool. torch/onnxruntime release the GIL during
+inference, so the loop keeps running while the batch is encoded.
+
+Usage:
+    service = EmbeddingService(model.encode)
+    vectors = await service.encode(["mesaj 1", "mesaj 2"])  # (2, dim) float32
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BATCH_MAX = int(os.getenv("EMBEDDING_BATCH_MAX", "64"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))
+
+
+class EmbeddingService:
+    """
+    Awaitable, micro-batching front end for a sync batch encoder.
+
+    Args:
+        encode_fn: Sync function mapping a list of texts to a (n, dim) array
+        max_batch_size: Texts that trigger an immediate flush (default EMBEDDING_BATCH_MAX)
+        max_wait_ms: Longest a request waits for companions (default EMBEDDING_BATCH_WAIT_MS)
+        workers: Inference threads (default EMBEDDING_WORKERS)
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], Sequence],
+        *,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        workers: Optional[int] = None,
+    ) -> None:
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, int(max_batch_size or EMBEDDING_BATCH_MAX))
+        self.max_wait = max(0.0, float(EMBEDDING_BATCH_WAIT_MS if max_wait_ms is None else max_wait_ms)) / 1000.0
+        self.workers = max(1, int(workers or EMBEDDING_WORKERS))
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batches_in_flight: Set[asyncio.Task] = set()
+
+        # Metrics
+        self.requests = 0
+        self.batches = 0
+        self.texts_encoded = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Inference thread pool (lazily created)."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="embedding",
+                    )
+        return self._executor
+
+    async def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Encode texts as part of the next micro-batch.
+
+        Returns:
+            float32 array of shape (len(texts), dim), rows in input order
+        """
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_texts += len(texts)
+        self.requests += 1
+
+        if self._pending_texts >= self.max_batch_size:
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush, loop)
+        return await future
+
+    def encode_sync(self, texts: Sequence[str]) -> np.ndarray:
+        """Batch'lemeden, çağıran thread'de encode (script/sync kullanım)."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(self.encode_fn(texts), dtype=np.float32)
+
+    def get_stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts_encoded": self.texts_encoded,
+            "avg_batch_size": round(self.texts_encoded / self.batches, 2) if self.batches else 0.0,
+            "pending": self._pending_texts,
+            "workers": self.workers,
+        }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Release the inference pool (engine shutdown)."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending, self._pending_texts = self._pending, [], 0
+        for _texts, future in pending:
+            if not future.done():
+                future.cancel()
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+            logger.info("EmbeddingService executor shut down")
+
+    # ---- Batching ----
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending, self._pending_texts = self._pending, [], 0
+        if not batch:
+            return
+        task = loop.create_task(self._run_batch(batch), name="embedding_batch")
+        self._batches_in_flight.add(task)
+        task.add_done_callback(self._batches_in_flight.discard)
+
+    async def _run_batch(self, batch: List[Tuple[List[str], asyncio.Future]]) -> None:
+        # Aynı metin (ör. iki chat'te aynı kontrol) tek satır olarak encode edilir
+        unique = list(dict.fromkeys(text for texts, _future in batch for text in texts))
+        loop = asyncio.get_running_loop()
+        try:
+            vectors = await loop.run_in_executor(self.executor, self.encode_sync, unique)
+        except asyncio.CancelledError:
+            for _texts, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc:
+            logger.error(f"Embedding batch failed ({len(unique)} texts): {exc}")
+            for _texts, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.texts_encoded += len(unique)
+        row = {text: index for index, text in enumerate(unique)}
+        for texts, future in batch:
+            if not future.done():  # İptal edilen bekleyen atlanır
+                future.set_result(vectors[[row[text] for text in texts]])
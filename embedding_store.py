@@ -0,0 +1,157 @@
+"""
+Embedding Store Module
+
+Per-bot matrix of recent message embeddings for semantic dedup.
+
+Each bot keeps its last `capacity` embeddings L2-normalized in one contiguous
+float32 array (ring buffer, grown by doubling up to capacity), so
+"max cosine similarity against the last K messages" is a single
+matrix-vector product instead of a Python loop of np.dot/np.linalg.norm.
+Sent messages are appended as they go out; recent messages never have to be
+re-fetched or re-encoded.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(vectors) -> np.ndarray:
+    """
+    L2-normalize embeddings as float32 (1D vector or 2D rows).
+
+    Zero vectors stay zero (similarity 0 instead of NaN).
+    """
+    array = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(array, axis=-1, keepdims=True)
+    np.maximum(norms, 1e-12, out=norms)
+    return array / norms
+
+
+class _BotMatrix:
+    """Tek bot için ring buffer (satırların sırası benzerlik için önemsiz)."""
+
+    __slots__ = ("vectors", "count", "head")
+
+    def __init__(self, dim: int, rows: int) -> None:
+        self.vectors = np.zeros((rows, dim), dtype=np.float32)
+        self.count = 0
+        self.head = 0
+
+
+class EmbeddingStore:
+    """
+    Recent normalized embeddings per bot.
+
+    Args:
+        capacity: Embeddings kept per bot (K); the oldest are overwritten
+        initial_rows: First allocation per bot (grows by doubling up to capacity)
+    """
+
+    def __init__(self, capacity: int = 256, initial_rows: int = 16) -> None:
+        self.capacity = max(1, int(capacity))
+        self.initial_rows = max(1, min(int(initial_rows), self.capacity))
+        self._bots: Dict[int, Optional[_BotMatrix]] = {}  # None: ısınmış ama henüz boş
+
+        # Metrics
+        self.queries = 0
+        self.appended = 0
+
+    def __contains__(self, bot_id: int) -> bool:
+        return bot_id in self._bots
+
+    def size(self, bot_id: int) -> int:
+        matrix = self._bots.get(bot_id)
+        return matrix.count if matrix is not None else 0
+
+    def ensure(self, bot_id: int) -> None:
+        """Bot için (boş) kayıt aç; geçmişi olmayan bot da 'ısınmış' sayılır."""
+        self._bots.setdefault(bot_id, None)
+
+    def extend(self, bot_id: int, embeddings: Iterable, *, normalized: bool = False) -> None:
+        """
+        Append embeddings (oldest first) for a bot.
+
+        Args:
+            bot_id: Bot ID
+            embeddings: 2D array-like, one row per message
+            normalized: Rows are already L2-normalized float32
+        """
+        rows = np.asarray(embeddings, dtype=np.float32)
+        if rows.ndim == 1:
+            rows = rows[np.newaxis, :]
+        if rows.shape[0] == 0:
+            self.ensure(bot_id)
+            return
+        if not normalized:
+            rows = normalize(rows)
+        rows = rows[-self.capacity:]
+
+        matrix = self._bots.get(bot_id)
+        if matrix is None or matrix.vectors.shape[1] != rows.shape[1]:
+            if matrix is not None:
+                logger.warning("Embedding dimension changed for bot %s; resetting its store", bot_id)
+            matrix = _BotMatrix(rows.shape[1], self.initial_rows)
+            self._bots[bot_id] = matrix
+
+        needed = min(self.capacity, matrix.count + rows.shape[0])
+        if needed > matrix.vectors.shape[0]:
+            self._grow(matrix, needed)
+
+        size = matrix.vectors.shape[0]
+        first = min(rows.shape[0], size - matrix.head)
+        matrix.vectors[matrix.head:matrix.head + first] = rows[:first]
+        if first < rows.shape[0]:
+            matrix.vectors[: rows.shape[0] - first] = rows[first:]
+        matrix.head = (matrix.head + rows.shape[0]) % size
+        matrix.count = min(size, matrix.count + rows.shape[0])
+        self.appended += rows.shape[0]
+
+    def append(self, bot_id: int, embedding, *, normalized: bool = False) -> None:
+        self.extend(bot_id, np.asarray(embedding)[np.newaxis, :], normalized=normalized)
+
+    def similarities(self, bot_id: int, embedding, *, normalized: bool = False) -> np.ndarray:
+        """Cosine similarity of `embedding` to each stored row of the bot."""
+        matrix = self._bots.get(bot_id)
+        if matrix is None or matrix.count == 0:
+            return np.zeros(0, dtype=np.float32)
+        query = np.asarray(embedding, dtype=np.float32) if normalized else normalize(embedding)
+        self.queries += 1
+        return matrix.vectors[: matrix.count] @ query
+
+    def max_similarity(self, bot_id: int, embedding, *, normalized: bool = False) -> float:
+        scores = self.similarities(bot_id, embedding, normalized=normalized)
+        return float(scores.max()) if scores.size else 0.0
+
+    def bot_ids(self) -> List[int]:
+        return list(self._bots)
+
+    def drop(self, bot_id: int) -> None:
+        self._bots.pop(bot_id, None)
+
+    def clear(self) -> None:
+        self._bots.clear()
+
+    def get_stats(self) -> dict:
+        matrices = [m for m in self._bots.values() if m is not None]
+        return {
+            "bots": len(self._bots),
+            "embeddings": sum(m.count for m in matrices),
+            "bytes": sum(m.vectors.nbytes for m in matrices),
+            "capacity": self.capacity,
+            "queries": self.queries,
+            "appended": self.appended,
+        }
+
+    def _grow(self, matrix: _BotMatrix, needed: int) -> None:
+        # Büyütme sadece buffer dolmadan önce olur: satırlar [0, count) aralığında, head == count
+        rows = matrix.vectors.shape[0]
+        while rows < needed:
+            rows *= 2
+        grown = np.zeros((min(rows, self.capacity), matrix.vectors.shape[1]), dtype=np.float32)
+        grown[: matrix.count] = matrix.vectors[: matrix.count]
+        matrix.vectors = grown
+        matrix.head = matrix.count
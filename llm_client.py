@@ -1,8 +1,12 @@
 # llm_client.py
 from __future__ import annotations
 
-from typing import Optional, List
+from typing import Any, AsyncIterator, Awaitable, Optional, List, Set, Tuple
 from abc import ABC, abstractmethod
+from contextvars import ContextVar
+import asyncio
+import contextlib
+import inspect
 import os
 import time
 import random
@@ -10,9 +14,11 @@ import logging
 
 # OpenAI SDK v1.x
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI, DefaultAsyncHttpxClient
 except Exception:  # pragma: no cover
     OpenAI = None  # type: ignore
+    AsyncOpenAI = None  # type: ignore
+    DefaultAsyncHttpxClient = None  # type: ignore
 
 # Google Gemini SDK
 try:
@@ -22,9 +28,17 @@ except Exception:  # pragma: no cover
 
 # Groq SDK
 try:
-    from groq import Groq
+    from groq import Groq, AsyncGroq
+    from groq import DefaultAsyncHttpxClient as GroqAsyncHttpxClient
 except Exception:  # pragma: no cover
     Groq = None  # type: ignore
+    AsyncGroq = None  # type: ignore
+    GroqAsyncHttpxClient = None  # type: ignore
+
+try:
+    import httpx
+except Exception:  # pragma: no cover
+    httpx = None  # type: ignore
 
 # Circuit Breaker
 from backend.resilience import CircuitBreaker
@@ -69,6 +83,11 @@ except Exception:
 logger = logging.getLogger("llm")
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 
+# agenerate(timeout=...) için: ilk istek slotunun alındığı an (kuyruk beklemesi zaman aşımına sayılmaz)
+_FIRST_SLOT: ContextVar[Optional[asyncio.Future]] = ContextVar("llm_first_slot", default=None)
+# Loop değişince kapatılan eski async istemcilerin task'ları (GC'ye karşı güçlü referans)
+_CLOSING_CLIENTS: Set[asyncio.Task] = set()
+
 REACTION_KEYWORDS = {
     "positive": {
         "artış",
@@ -121,9 +140,21 @@ REACTION_EMOJIS = {
 class BaseLLMProvider(ABC):
     """
     Abstract base class for LLM providers.
-    Implements generate(), generate_reaction(), and pick_reaction_for_text().
+    Implements generate(), agenerate(), generate_reaction(), and pick_reaction_for_text().
+
+    agenerate() async yoldur: provider'ın async SDK istemcisini kullanır, backoff
+    için asyncio.sleep çağırır ve provider başına bir semaphore ile eşzamanlı
+    istek sayısını LLM_MAX_CONCURRENCY ile sınırlar. Slot her denemede yalnızca
+    istek süresince tutulur (_request_slot); backoff beklemeleri slot dışındadır.
+    Native async istemcisi olmayan provider'larda sync generate() bir thread'de
+    çalıştırılır.
     """
 
+    # Event loop'a bağlı kaynaklar (semaphore + async SDK istemcisi)
+    _async_loop: Optional[asyncio.AbstractEventLoop] = None
+    _async_semaphore: Optional[asyncio.Semaphore] = None
+    _async_client: Any = None
+
     @abstractmethod
     def generate(
         self,
@@ -135,6 +166,180 @@ class BaseLLMProvider(ABC):
         """Generate a message using the LLM provider."""
         pass
 
+    @property
+    def max_concurrency(self) -> int:
+        """Provider başına aynı anda açık olabilecek maksimum async istek."""
+        return max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+
+    def _create_async_client(self) -> Any:
+        """Native async SDK istemcisi (yoksa None -> thread fallback)."""
+        return None
+
+    def _async_resources(self) -> Tuple[asyncio.Semaphore, Any]:
+        """
+        Çalışan event loop için semaphore ve async istemciyi döndürür.
+
+        Hem asyncio.Semaphore hem de httpx bağlantı havuzu oluşturuldukları
+        loop'a bağlıdır; loop değişirse (ör. testlerde asyncio.run) yeniden
+        oluşturulur ve önceki istemci kapatılır.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            previous = self._async_client
+            self._async_loop = loop
+            self._async_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._async_client = self._create_async_client()
+            if previous is not None and previous is not self._async_client:
+                task = loop.create_task(self._close_async_client(previous))
+                _CLOSING_CLIENTS.add(task)
+                task.add_done_callback(_CLOSING_CLIENTS.discard)
+        return self._async_semaphore, self._async_client  # type: ignore[return-value]
+
+    async def _close_async_client(self, client: Any) -> None:
+        """Async SDK istemcisini kapat (httpx bağlantı havuzu sızmasın)."""
+        close = getattr(client, "close", None)
+        if client is self or close is None:
+            return
+        try:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as exc:
+            # Eski loop kapandıysa bağlantılar düzgün kapatılamayabilir
+            logger.debug("Async LLM client close failed: %s", exc)
+
+    async def aclose(self) -> None:
+        """Çalışan loop'a ait async istemciyi kapat (shutdown)."""
+        client, self._async_client, self._async_loop = self._async_client, None, None
+        if client is not None:
+            await self._close_async_client(client)
+
+    @contextlib.asynccontextmanager
+    async def _request_slot(self) -> AsyncIterator[None]:
+        """Tek bir istek denemesi için eşzamanlılık slotu (backoff beklemeleri dışarıda kalır)."""
+        semaphore, _ = self._async_resources()
+        async with semaphore:
+            started = _FIRST_SLOT.get()
+            if started is not None and not started.done():
+                started.set_result(time.perf_counter())
+            yield
+
+    def _async_http_limits(self) -> Any:
+        """Async istemciler için bağlantı havuzu limitleri (semaphore ile uyumlu)."""
+        if httpx is None:
+            return None
+        return httpx.Limits(
+            max_connections=self.max_concurrency * 2,
+            max_keepalive_connections=self.max_concurrency,
+        )
+
+    async def agenerate(
+        self,
+        *,
+        user_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 220,
+        system_prompt: Optional[str] = None,
+        top_p: float = 0.95,
+        frequency_penalty: float = 0.4,
+        timeout: Optional[float] = None,
+    ) -> Optional[str]:
+        """
+        Async mesaj üretimi; event loop'u bloklamaz.
+
+        Args:
+            timeout: Saniye; ilk istek slotu alındığında başlar (slot kuyruğunda
+                bekleme dahil değil). Aşılırsa asyncio.TimeoutError.
+        """
+        call = self._agenerate_call(
+            user_prompt=user_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+        )
+        if timeout is None or timeout <= 0:
+            return await call
+        text, _ = await self._from_first_slot(call, timeout)
+        return text
+
+    async def _agenerate_call(self, **kwargs: Any) -> Optional[str]:
+        _, client = self._async_resources()
+        if client is None:
+            return await self._agenerate_in_thread(**kwargs)
+        return await self._agenerate(client, **kwargs)
+
+    async def _agenerate(self, client: Any, **kwargs: Any) -> Optional[str]:
+        """
+        Native async üretim; _create_async_client() sağlayan provider'lar override eder
+        (her denemeyi _request_slot() içinde yaparak). Override edilmezse sync generate()
+        bir thread'de çalışır.
+        """
+        return await self._agenerate_in_thread(**kwargs)
+
+    async def _agenerate_in_thread(self, **kwargs: Any) -> Optional[str]:
+        # generate() kendi backoff'unu thread içinde uyur; slot çağrı boyunca tutulur
+        async with self._request_slot():
+            return await asyncio.to_thread(self.generate, **kwargs)
+
+    @staticmethod
+    async def _from_first_slot(call: Awaitable[Any], timeout: Optional[float] = None) -> Tuple[Any, float]:
+        """
+        `call`'ı çalıştır; zaman aşımı ilk _request_slot() alındığında başlar.
+
+        Returns:
+            (sonuç, slotun alındığı perf_counter zamanı; slot alınmadıysa bitiş zamanı)
+        """
+        started = asyncio.get_running_loop().create_future()
+        token = _FIRST_SLOT.set(started)
+        try:
+            task = asyncio.ensure_future(call)  # Task, context'i (started) burada kopyalar
+        finally:
+            _FIRST_SLOT.reset(token)
+        try:
+            await asyncio.wait({task, started}, return_when=asyncio.FIRST_COMPLETED)
+            if not task.done():
+                await asyncio.wait_for(task, timeout)
+            result = task.result()
+            return result, started.result() if started.done() else time.perf_counter()
+        finally:
+            if not task.done():
+                task.cancel()
+            if not started.done():
+                started.cancel()
+
+    @staticmethod
+    def _retry_delay(attempt: int) -> float:
+        """Exponential backoff + jitter (maks. 6 sn)."""
+        base = 0.6 * (2 ** (attempt - 1))
+        return min(base + random.uniform(0, 0.3), 6.0)
+
+    def _circuit_is_open(self, label: str) -> bool:
+        circuit_state = self.circuit_breaker.get_state()  # type: ignore[attr-defined]
+        if circuit_state["state"] == "open":
+            logger.warning(
+                f"Circuit breaker OPEN for {label} API. "
+                f"Retry after {circuit_state['retry_after']:.1f}s. Request blocked."
+            )
+            return True
+        return False
+
+    @staticmethod
+    def _finalize_output(text: Optional[str], empty_error: str) -> str:
+        """Boş yanıt kontrolü + içerik filtresi + post-process (başarısızsa RuntimeError)."""
+        text = (text or "").strip()
+        if not text:
+            raise RuntimeError(empty_error)
+
+        # İçerik filtresi (varsa)
+        filtered = _filter_content(text)
+        if filtered is None:
+            raise RuntimeError("Filtered by content rules")
+
+        # Son işlem (AI izleri törpüleme vb.)
+        return _postprocess(filtered)
+
     @staticmethod
     def generate_reaction() -> str:
         """Generate a random reaction emoji."""
@@ -177,6 +382,7 @@ class OpenAIProvider(BaseLLMProvider):
         self.max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
 
         base_url = os.getenv("OPENAI_BASE_URL") or None
+        self.base_url = base_url
         self.client = OpenAI(base_url=base_url, timeout=self.timeout)
 
         # Circuit breaker
@@ -216,27 +422,12 @@ class OpenAIProvider(BaseLLMProvider):
             frequency_penalty: Frequency penalty (default 0.4)
         """
         # Circuit breaker check
-        circuit_state = self.circuit_breaker.get_state()
-        if circuit_state["state"] == "open":
-            logger.warning(
-                f"Circuit breaker OPEN for OpenAI API. "
-                f"Retry after {circuit_state['retry_after']:.1f}s. Request blocked."
-            )
+        if self._circuit_is_open("OpenAI"):
             return None
 
-        # System prompt: custom varsa onu kullan, yoksa default
-        system_content = system_prompt if system_prompt is not None else _SYSTEM_CONTENT
-
-        messages = [
-            {"role": "system", "content": system_content},
-            {"role": "user", "content": user_prompt},
-        ]
-
-        models: List[str] = [self.model]
-        if self.fallback_model and self.fallback_model != self.model:
-            models.append(self.fallback_model)
+        messages = self._build_messages(user_prompt, system_prompt)
 
-        for model in models:
+        for model in self._models():
             for attempt in range(1, self.max_retries + 1):
                 try:
                     resp = self.client.chat.completions.create(
@@ -248,17 +439,7 @@ class OpenAIProvider(BaseLLMProvider):
                         presence_penalty=0.4,
                         frequency_penalty=frequency_penalty,
                     )
-                    text = (resp.choices[0].message.content or "").strip()
-                    if not text:
-                        raise RuntimeError("Empty LLM response")
-
-                    # İçerik filtresi (varsa)
-                    filtered = _filter_content(text)
-                    if filtered is None:
-                        raise RuntimeError("Filtered by content rules")
-
-                    # Son işlem (AI izleri törpüleme vb.)
-                    processed = _postprocess(filtered)
+                    processed = self._finalize_output(resp.choices[0].message.content, "Empty LLM response")
 
                     # Circuit breaker: track success
                     self.circuit_breaker._on_success()
@@ -269,8 +450,7 @@ class OpenAIProvider(BaseLLMProvider):
                     # Circuit breaker: track failure
                     self.circuit_breaker._on_failure(e)
 
-                    base = 0.6 * (2 ** (attempt - 1))
-                    sleep_s = min(base + random.uniform(0, 0.3), 6.0)
+                    sleep_s = self._retry_delay(attempt)
                     logger.warning(
                         "OpenAI generate error (model=%s, attempt=%d/%d): %s; sleep=%.2fs",
                         model, attempt, self.max_retries, e, sleep_s
@@ -282,6 +462,79 @@ class OpenAIProvider(BaseLLMProvider):
 
         return None
 
+    def _models(self) -> List[str]:
+        models: List[str] = [self.model]
+        if self.fallback_model and self.fallback_model != self.model:
+            models.append(self.fallback_model)
+        return models
+
+    @staticmethod
+    def _build_messages(user_prompt: str, system_prompt: Optional[str]) -> List[dict]:
+        # System prompt: custom varsa onu kullan, yoksa default
+        system_content = system_prompt if system_prompt is not None else _SYSTEM_CONTENT
+        return [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": user_prompt},
+        ]
+
+    def _create_async_client(self) -> Any:
+        if AsyncOpenAI is None:
+            return None
+        kwargs: dict = {"base_url": self.base_url, "timeout": self.timeout}
+        limits = self._async_http_limits()
+        if DefaultAsyncHttpxClient is not None and limits is not None:
+            kwargs["http_client"] = DefaultAsyncHttpxClient(limits=limits)
+        return AsyncOpenAI(**kwargs)
+
+    async def _agenerate(
+        self,
+        client: Any,
+        *,
+        user_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 220,
+        system_prompt: Optional[str] = None,
+        top_p: float = 0.95,
+        frequency_penalty: float = 0.4,
+    ) -> Optional[str]:
+        """generate() ile aynı akış; AsyncOpenAI + asyncio.sleep backoff."""
+        if self._circuit_is_open("OpenAI"):
+            return None
+
+        messages = self._build_messages(user_prompt, system_prompt)
+
+        for model in self._models():
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    async with self._request_slot():
+                        resp = await client.chat.completions.create(
+                            model=model,
+                            messages=messages,
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            top_p=top_p,
+                            presence_penalty=0.4,
+                            frequency_penalty=frequency_penalty,
+                        )
+                    processed = self._finalize_output(resp.choices[0].message.content, "Empty LLM response")
+                    self.circuit_breaker._on_success()
+                    return processed
+
+                except Exception as e:
+                    self.circuit_breaker._on_failure(e)
+
+                    sleep_s = self._retry_delay(attempt)
+                    logger.warning(
+                        "OpenAI agenerate error (model=%s, attempt=%d/%d): %s; sleep=%.2fs",
+                        model, attempt, self.max_retries, e, sleep_s
+                    )
+                    if attempt == self.max_retries:
+                        break
+                    await asyncio.sleep(sleep_s)
+            logger.info("Switching to fallback model: %s", model if model != self.model else (self.fallback_model or "-"))
+
+        return None
+
 
 # -------------------------------------------------------------------
 # Google Gemini Provider
@@ -362,14 +615,49 @@ class GeminiProvider(BaseLLMProvider):
         Circuit breaker ile fail-fast protection.
         """
         # Circuit breaker check
-        circuit_state = self.circuit_breaker.get_state()
-        if circuit_state["state"] == "open":
-            logger.warning(
-                f"Circuit breaker OPEN for Gemini API. "
-                f"Retry after {circuit_state['retry_after']:.1f}s. Request blocked."
-            )
+        if self._circuit_is_open("Gemini"):
             return None
 
+        combined_prompt, generation_config = self._build_request(
+            user_prompt, system_prompt, temperature, max_tokens
+        )
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                response = self.model.generate_content(
+                    combined_prompt,
+                    generation_config=generation_config,
+                    safety_settings=self.safety_settings,
+                )
+                processed = self._extract_text(response)
+
+                # Circuit breaker: track success
+                self.circuit_breaker._on_success()
+
+                return processed
+
+            except Exception as e:
+                # Circuit breaker: track failure
+                self.circuit_breaker._on_failure(e)
+
+                sleep_s = self._retry_delay(attempt)
+                logger.warning(
+                    "Gemini generate error (model=%s, attempt=%d/%d): %s; sleep=%.2fs",
+                    self.model_name, attempt, self.max_retries, e, sleep_s
+                )
+                if attempt == self.max_retries:
+                    break
+                time.sleep(sleep_s)
+
+        return None
+
+    @staticmethod
+    def _build_request(
+        user_prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+    ) -> Tuple[str, Any]:
         # System prompt: custom varsa onu kullan, yoksa default
         system_content = system_prompt if system_prompt is not None else _SYSTEM_CONTENT
 
@@ -382,55 +670,71 @@ class GeminiProvider(BaseLLMProvider):
             top_p=0.95,
             top_k=40,
         )
+        return combined_prompt, generation_config
 
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                response = self.model.generate_content(
-                    combined_prompt,
-                    generation_config=generation_config,
-                    safety_settings=self.safety_settings,
-                )
+    def _extract_text(self, response: Any) -> str:
+        # Gemini response structure check
+        if not response.candidates:
+            raise RuntimeError("No candidates in Gemini response")
 
-                # Gemini response structure check
-                if not response.candidates:
-                    raise RuntimeError("No candidates in Gemini response")
+        candidate = response.candidates[0]
 
-                candidate = response.candidates[0]
+        # Check if blocked by safety filters
+        if candidate.finish_reason.name in ["SAFETY", "RECITATION", "OTHER"]:
+            raise RuntimeError(f"Gemini blocked response: {candidate.finish_reason.name}")
 
-                # Check if blocked by safety filters
-                if candidate.finish_reason.name in ["SAFETY", "RECITATION", "OTHER"]:
-                    raise RuntimeError(f"Gemini blocked response: {candidate.finish_reason.name}")
+        return self._finalize_output(candidate.content.parts[0].text, "Empty Gemini response")
 
-                text = candidate.content.parts[0].text.strip()
-                if not text:
-                    raise RuntimeError("Empty Gemini response")
+    def _create_async_client(self) -> Any:
+        # GenerativeModel.generate_content_async kendi grpc.aio kanalını yönetir
+        return self.model
 
-                # İçerik filtresi (varsa)
-                filtered = _filter_content(text)
-                if filtered is None:
-                    raise RuntimeError("Filtered by content rules")
+    async def _close_async_client(self, client: Any) -> None:
+        # Sync yol da aynı GenerativeModel'i kullanır; kapatılacak ayrı istemci yok
+        return None
 
-                # Son işlem
-                processed = _postprocess(filtered)
+    async def _agenerate(
+        self,
+        client: Any,
+        *,
+        user_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 220,
+        system_prompt: Optional[str] = None,
+        top_p: float = 0.95,
+        frequency_penalty: float = 0.4,
+    ) -> Optional[str]:
+        """generate() ile aynı akış; generate_content_async + asyncio.sleep backoff."""
+        if self._circuit_is_open("Gemini"):
+            return None
 
-                # Circuit breaker: track success
-                self.circuit_breaker._on_success()
+        combined_prompt, generation_config = self._build_request(
+            user_prompt, system_prompt, temperature, max_tokens
+        )
 
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with self._request_slot():
+                    response = await client.generate_content_async(
+                        combined_prompt,
+                        generation_config=generation_config,
+                        safety_settings=self.safety_settings,
+                    )
+                processed = self._extract_text(response)
+                self.circuit_breaker._on_success()
                 return processed
 
             except Exception as e:
-                # Circuit breaker: track failure
                 self.circuit_breaker._on_failure(e)
 
-                base = 0.6 * (2 ** (attempt - 1))
-                sleep_s = min(base + random.uniform(0, 0.3), 6.0)
+                sleep_s = self._retry_delay(attempt)
                 logger.warning(
-                    "Gemini generate error (model=%s, attempt=%d/%d): %s; sleep=%.2fs",
+                    "Gemini agenerate error (model=%s, attempt=%d/%d): %s; sleep=%.2fs",
                     self.model_name, attempt, self.max_retries, e, sleep_s
                 )
                 if attempt == self.max_retries:
                     break
-                time.sleep(sleep_s)
+                await asyncio.sleep(sleep_s)
 
         return None
 
@@ -455,6 +759,7 @@ class GroqProvider(BaseLLMProvider):
         if not api_key:
             raise RuntimeError("GROQ_API_KEY environment variable gerekli.")
 
+        self.api_key = api_key
         self.client = Groq(api_key=api_key)
 
         # Model selection: llama-3.3-70b-versatile (en iyi), mixtral-8x7b-32768 (hızlı)
@@ -489,21 +794,10 @@ class GroqProvider(BaseLLMProvider):
         Circuit breaker ile fail-fast protection.
         """
         # Circuit breaker check
-        circuit_state = self.circuit_breaker.get_state()
-        if circuit_state["state"] == "open":
-            logger.warning(
-                f"Circuit breaker OPEN for Groq API. "
-                f"Retry after {circuit_state['retry_after']:.1f}s. Request blocked."
-            )
+        if self._circuit_is_open("Groq"):
             return None
 
-        # System prompt: custom varsa onu kullan, yoksa default
-        system_content = system_prompt if system_prompt is not None else _SYSTEM_CONTENT
-
-        messages = [
-            {"role": "system", "content": system_content},
-            {"role": "user", "content": user_prompt},
-        ]
+        messages = OpenAIProvider._build_messages(user_prompt, system_prompt)
 
         for attempt in range(1, self.max_retries + 1):
             try:
@@ -517,17 +811,7 @@ class GroqProvider(BaseLLMProvider):
                     presence_penalty=0.7,
                 )
 
-                text = (completion.choices[0].message.content or "").strip()
-                if not text:
-                    raise RuntimeError("Empty Groq response")
-
-                # İçerik filtresi (varsa)
-                filtered = _filter_content(text)
-                if filtered is None:
-                    raise RuntimeError("Filtered by content rules")
-
-                # Son işlem
-                processed = _postprocess(filtered)
+                processed = self._finalize_output(completion.choices[0].message.content, "Empty Groq response")
 
                 # Circuit breaker: track success
                 self.circuit_breaker._on_success()
@@ -538,8 +822,7 @@ class GroqProvider(BaseLLMProvider):
                 # Circuit breaker: track failure
                 self.circuit_breaker._on_failure(e)
 
-                base = 0.6 * (2 ** (attempt - 1))
-                sleep_s = min(base + random.uniform(0, 0.3), 6.0)
+                sleep_s = self._retry_delay(attempt)
                 logger.warning(
                     "Groq generate error (model=%s, attempt=%d/%d): %s; sleep=%.2fs",
                     self.model, attempt, self.max_retries, e, sleep_s
@@ -550,6 +833,62 @@ class GroqProvider(BaseLLMProvider):
 
         return None
 
+    def _create_async_client(self) -> Any:
+        if AsyncGroq is None:
+            return None
+        kwargs: dict = {"api_key": self.api_key}
+        limits = self._async_http_limits()
+        if GroqAsyncHttpxClient is not None and limits is not None:
+            kwargs["http_client"] = GroqAsyncHttpxClient(limits=limits)
+        return AsyncGroq(**kwargs)
+
+    async def _agenerate(
+        self,
+        client: Any,
+        *,
+        user_prompt: str,
+        temperature: float = 1.7,
+        max_tokens: int = 220,
+        system_prompt: Optional[str] = None,
+        top_p: float = 0.95,
+        frequency_penalty: float = 0.4,
+    ) -> Optional[str]:
+        """generate() ile aynı akış; AsyncGroq + asyncio.sleep backoff."""
+        if self._circuit_is_open("Groq"):
+            return None
+
+        messages = OpenAIProvider._build_messages(user_prompt, system_prompt)
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with self._request_slot():
+                    completion = await client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        top_p=top_p,
+                        frequency_penalty=frequency_penalty,
+                        presence_penalty=0.7,
+                    )
+                processed = self._finalize_output(completion.choices[0].message.content, "Empty Groq response")
+                self.circuit_breaker._on_success()
+                return processed
+
+            except Exception as e:
+                self.circuit_breaker._on_failure(e)
+
+                sleep_s = self._retry_delay(attempt)
+                logger.warning(
+                    "Groq agenerate error (model=%s, attempt=%d/%d): %s; sleep=%.2fs",
+                    self.model, attempt, self.max_retries, e, sleep_s
+                )
+                if attempt == self.max_retries:
+                    break
+                await asyncio.sleep(sleep_s)
+
+        return None
+
 
 # -------------------------------------------------------------------
 # LLMClient Factory
@@ -565,17 +904,32 @@ class LLMClient:
     def __init__(self) -> None:
         """Initialize the appropriate provider based on LLM_PROVIDER env variable."""
         if LLMClient._instance is None:
-            provider = os.getenv("LLM_PROVIDER", "openai").lower()
-
-            if provider == "gemini":
-                LLMClient._instance = GeminiProvider()
-            elif provider == "groq":
-                LLMClient._instance = GroqProvider()
-            elif provider == "openai":
-                LLMClient._instance = OpenAIProvider()
-            else:
-                logger.error("Unknown LLM_PROVIDER: %s, falling back to OpenAI", provider)
-                LLMClient._instance = OpenAIProvider()
+            LLMClient._instance = LLMClient.create_provider(os.getenv("LLM_PROVIDER", "openai"))
+
+    @staticmethod
+    def create_provider(provider: str) -> BaseLLMProvider:
+        """Provider adından yeni bir provider örneği oluştur."""
+        provider = (provider or "openai").lower()
+
+        if provider == "gemini":
+            return GeminiProvider()
+        if provider == "groq":
+            return GroqProvider()
+        if provider == "openai":
+            return OpenAIProvider()
+        if provider == "fake":
+            # Benchmark/yerel çalışma: ağ yok, seed'li çıktı ve gecikme
+            from backend.simulation.fake_llm import FakeLLMProvider
+
+            return FakeLLMProvider.from_env()
+        if provider == "replay":
+            # Kayıt (gerçek provider'ı sarar) / tekrar oynatma (cassette'ten)
+            from backend.simulation.replay_llm import ReplayProvider
+
+            return ReplayProvider.from_env()
+
+        logger.error("Unknown LLM_PROVIDER: %s, falling back to OpenAI", provider)
+        return OpenAIProvider()
 
     def generate(
         self,
@@ -597,6 +951,33 @@ class LLMClient:
             frequency_penalty=frequency_penalty,
         )
 
+    async def agenerate(
+        self,
+        *,
+        user_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 220,
+        system_prompt: Optional[str] = None,
+        top_p: float = 0.95,
+        frequency_penalty: float = 0.4,
+        timeout: Optional[float] = None,
+    ) -> Optional[str]:
+        """Delegate to the active provider's non-blocking path."""
+        return await LLMClient._instance.agenerate(
+            user_prompt=user_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            timeout=timeout,
+        )
+
+    async def aclose(self) -> None:
+        """Close the active provider's async client."""
+        if LLMClient._instance is not None:
+            await LLMClient._instance.aclose()
+
     @staticmethod
     def generate_reaction() -> str:
         """Generate a random reaction emoji."""
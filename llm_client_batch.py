@@ -3,7 +3,8 @@
 LLM Batch Generation Module
 
 Provides batch generation capabilities for multiple prompts simultaneously.
-Uses ThreadPoolExecutor for parallel processing of LLM requests.
+Uses a long-lived ThreadPoolExecutor for parallel processing of LLM requests
+(sync API) and the providers' native async path for generate_batch_async().
 
 Benefits:
 - 3-5x speedup for parallel message generation
@@ -17,14 +18,21 @@ Usage:
     prompts = ["prompt1", "prompt2", "prompt3"]
     results = client.generate_batch(prompts=prompts, temperature=0.7)
     # returns: ["response1", "response2", "response3"]
+
+    # Async: sonuçlar tamamlandıkça (index, text) olarak gelir
+    async for index, text in client.generate_batch_async(prompts):
+        ...
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Optional, Dict, Any
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 
 from llm_client import LLMClient
 
@@ -35,24 +43,70 @@ logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 class LLMBatchClient:
     """
     Batch generation client that wraps LLMClient for parallel processing.
-    Uses ThreadPoolExecutor to process multiple prompts concurrently.
+
+    Sync generate_batch() uses a persistent ThreadPoolExecutor that is created
+    once and reused for every batch (call shutdown() on exit). The async
+    generate_batch_async() runs on the event loop via LLMClient.agenerate() and
+    yields results as they complete. Both apply a per-prompt timeout, measured
+    from when the prompt starts running, so one slow request cannot hold up the
+    rest of the batch.
     """
 
-    def __init__(self, max_workers: Optional[int] = None):
+    def __init__(self, max_workers: Optional[int] = None, prompt_timeout: Optional[float] = None):
         """
         Initialize batch client.
 
         Args:
             max_workers: Maximum number of parallel workers (default: min(32, cpu_count + 4))
+            prompt_timeout: Seconds before a single prompt is given up (default: LLM_BATCH_PROMPT_TIMEOUT or 45)
         """
         self.llm_client = LLMClient()
         self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.prompt_timeout = float(
+            prompt_timeout if prompt_timeout is not None else os.getenv("LLM_BATCH_PROMPT_TIMEOUT", "45")
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         logger.info(
-            "LLMBatchClient initialized (max_workers=%d, provider=%s)",
+            "LLMBatchClient initialized (max_workers=%d, prompt_timeout=%.1fs, provider=%s)",
             self.max_workers,
+            self.prompt_timeout,
             os.getenv("LLM_PROVIDER", "openai")
         )
 
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Long-lived worker pool (lazily created, reused across batches)."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="llm-batch",
+                    )
+        return self._executor
+
+    def _retire_executor(self) -> None:
+        """
+        Swap in a fresh pool; the old one finishes its stuck calls in the background.
+
+        A timed-out sync LLM call cannot be interrupted and keeps its worker
+        thread until the provider's own HTTP timeout fires.
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+            logger.warning("LLMBatchClient executor retired after prompt timeout")
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Release the worker pool (engine shutdown)."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+            logger.info("LLMBatchClient executor shut down")
+
     def generate_batch(
         self,
         prompts: List[str],
@@ -63,6 +117,7 @@ class LLMBatchClient:
         top_p: float = 0.95,
         frequency_penalty: float = 0.4,
         preserve_order: bool = True,
+        prompt_timeout: Optional[float] = None,
     ) -> List[Optional[str]]:
         """
         Generate responses for multiple prompts in parallel.
@@ -75,9 +130,10 @@ class LLMBatchClient:
             top_p: Nucleus sampling parameter (default 0.95)
             frequency_penalty: Frequency penalty (default 0.4)
             preserve_order: If True, returns results in same order as prompts (default True)
+            prompt_timeout: Per-prompt timeout in seconds (default: self.prompt_timeout)
 
         Returns:
-            List of generated responses (None for failed generations)
+            List of generated responses (None for failed or timed out generations)
 
         Example:
             >>> client = LLMBatchClient()
@@ -93,30 +149,41 @@ class LLMBatchClient:
         num_prompts = len(prompts)
         logger.info(f"Starting batch generation for {num_prompts} prompts (workers={self.max_workers})")
 
-        # Use ThreadPoolExecutor for parallel processing
+        timeout = self.prompt_timeout if prompt_timeout is None else float(prompt_timeout)
+
+        # Persistent executor: thread'ler her batch'te yeniden oluşturulmaz
         results: Dict[int, Optional[str]] = {}
+        started: Dict[int, float] = {}  # Prompt'un worker'da başladığı an (timeout buradan ölçülür)
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all tasks
-            future_to_index = {
-                executor.submit(
-                    self._generate_single,
-                    prompt=prompt,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    system_prompt=system_prompt,
-                    top_p=top_p,
-                    frequency_penalty=frequency_penalty,
-                ): index
-                for index, prompt in enumerate(prompts)
-            }
-
-            # Collect results
-            completed_count = 0
-            failed_count = 0
-
-            for future in as_completed(future_to_index):
-                index = future_to_index[future]
+        def run(index: int, prompt: str) -> Optional[str]:
+            started[index] = time.monotonic()
+            return self._generate_single(
+                prompt=prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                system_prompt=system_prompt,
+                top_p=top_p,
+                frequency_penalty=frequency_penalty,
+            )
+
+        pending: Dict[Future, int] = {
+            self.executor.submit(run, index, prompt): index
+            for index, prompt in enumerate(prompts)
+        }
+
+        # Collect results
+        completed_count = 0
+        failed_count = 0
+
+        while pending:
+            wait_for = None
+            if timeout > 0:
+                # En erken başlayan prompt'un süresi dolana kadar; henüz başlamamışlar için en fazla timeout
+                deadlines = [started[i] + timeout for i in pending.values() if i in started]
+                wait_for = max(0.0, min(deadlines, default=time.monotonic() + timeout) - time.monotonic())
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
                 try:
                     result = future.result()
                     results[index] = result
@@ -129,6 +196,23 @@ class LLMBatchClient:
                     results[index] = None
                     failed_count += 1
 
+            if timeout <= 0:
+                continue
+            now = time.monotonic()
+            expired = [f for f, i in pending.items() if i in started and now - started[i] >= timeout]
+            for future in expired:
+                index = pending.pop(future)
+                logger.warning(f"Batch generation timed out for prompt {index} after {timeout:.1f}s")
+                results[index] = None
+                failed_count += 1
+            if expired:
+                # Takılı thread'ler havuzu tutmasın: sıradaki prompt'lar yeni havuzda başlasın
+                self._retire_executor()
+                for future, index in list(pending.items()):
+                    if future.cancel():
+                        del pending[future]
+                        pending[self.executor.submit(run, index, prompts[index])] = index
+
         logger.info(
             f"Batch generation complete: {completed_count}/{num_prompts} succeeded, "
             f"{failed_count}/{num_prompts} failed"
@@ -140,6 +224,85 @@ class LLMBatchClient:
         else:
             return list(results.values())
 
+    async def generate_batch_async(
+        self,
+        prompts: List[str],
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 220,
+        system_prompt: Optional[str] = None,
+        top_p: float = 0.95,
+        frequency_penalty: float = 0.4,
+        prompt_timeout: Optional[float] = None,
+    ) -> AsyncIterator[Tuple[int, Optional[str]]]:
+        """
+        Generate responses concurrently and yield them as they complete.
+
+        Runs on the event loop through LLMClient.agenerate(), so nothing blocks
+        while the batch is in flight. At most max_workers prompts run at once.
+
+        Args:
+            prompts: List of user prompts to process
+            temperature: LLM temperature (default 0.7)
+            max_tokens: Maximum tokens per response (default 220)
+            system_prompt: Optional custom system prompt
+            top_p: Nucleus sampling parameter (default 0.95)
+            frequency_penalty: Frequency penalty (default 0.4)
+            prompt_timeout: Per-prompt timeout in seconds, counted from when the
+                request gets a provider slot (default: self.prompt_timeout)
+
+        Yields:
+            (index, response) tuples in completion order; response is None on
+            failure or timeout
+
+        Example:
+            >>> async for index, text in client.generate_batch_async(prompts):
+            ...     await send(index, text)
+        """
+        if not prompts:
+            logger.warning("generate_batch_async called with empty prompts list")
+            return
+
+        timeout = self.prompt_timeout if prompt_timeout is None else float(prompt_timeout)
+        semaphore = asyncio.Semaphore(self.max_workers)
+        logger.info(f"Starting async batch generation for {len(prompts)} prompts (limit={self.max_workers})")
+
+        async def run_one(index: int, prompt: str) -> Tuple[int, Optional[str]]:
+            async with semaphore:
+                try:
+                    # Süre provider slotu alındığında başlar; slot kuyruğu süreye sayılmaz
+                    result = await self.llm_client.agenerate(
+                        user_prompt=prompt,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        system_prompt=system_prompt,
+                        top_p=top_p,
+                        frequency_penalty=frequency_penalty,
+                        timeout=timeout if timeout > 0 else None,
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"Async batch generation timed out for prompt {index} after {timeout:.1f}s")
+                    result = None
+                except Exception as e:
+                    logger.error(f"Async batch generation error for prompt {index}: {e}")
+                    result = None
+                return index, result
+
+        tasks = [asyncio.create_task(run_one(i, p)) for i, p in enumerate(prompts)]
+        completed_count = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, result = await next_done
+                if result is not None:
+                    completed_count += 1
+                yield index, result
+        finally:
+            # Tüketici erken çıkarsa kalan istekleri iptal et
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            logger.info(f"Async batch generation complete: {completed_count}/{len(prompts)} succeeded")
+
     def _generate_single(
         self,
         prompt: str,
@@ -70,6 +70,8 @@ from schemas import (
 )
 from security import mask_token, SecurityConfigError
 from settings_utils import normalize_message_length_profile, unwrap_setting_value
+from backend.behavior.message_features import attach_message_features
+from backend.behavior_engine.roster import bump_roster_version
 
 # Cache invalidation helpers
 try:
@@ -619,6 +621,7 @@ def create_demo_bots(payload: DemoBotsCreate, db: Session = Depends(get_db)):
     db.commit()
 
     if created_bots:
+        bump_roster_version(db, get_redis())
         publish_config_update(get_redis(), {
             "type": "demo_bots_created",
             "count": len(created_bots)
@@ -714,12 +717,12 @@ async def telegram_webhook(
             telegram_message_id=telegram_msg_id,
             text=text,
             reply_to_message_id=reply_to_msg_id,
-            msg_metadata={
+            msg_metadata=attach_message_features({
                 "from_user_id": user_id,
                 "username": username,
                 "is_incoming": True,
                 "update_id": update.update_id,
-            },
+            }, text),
         )
         db.add(incoming_msg)
         db.commit()
@@ -0,0 +1,346 @@
+"""
+Runtime Profiler
+Low-overhead sampling CPU profiler for live API/worker processes
+
+A background thread reads every thread's current Python stack
+(sys._current_frames) at a fixed interval and counts identical stacks; the
+profiled code is never instrumented, so the cost is one stack walk per
+thread per interval (~100 Hz by default) and the capture is safe against
+production traffic. Optionally a tracemalloc snapshot of the top allocation
+sites is taken over the same window (tracemalloc itself is not free; leave
+it off unless memory is the question).
+
+Artifacts:
+- collapsed: Brendan Gregg "folded" stacks (flamegraph.pl, speedscope, inferno)
+- pstats:    marshal'd pstats data synthesized from the samples
+             (python -m pstats, snakeviz); times are sample estimates
+- json:      top functions by self/cumulative time, per-thread sample counts,
+             allocations
+"""
+
+import asyncio
+import base64
+import json
+import marshal
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+FrameKey = Tuple[str, int, str]  # (filename, firstlineno, function) — pstats anahtarı
+Stack = Tuple[FrameKey, ...]  # En dıştaki frame'den yaprağa
+
+PROFILE_FORMATS = ("collapsed", "pstats", "json")
+MAX_PROFILE_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "120"))
+
+# Worker profili: API config_updates kanalına istek yayınlar, worker sonucu Redis'e yazar
+PROFILE_REQUEST_TYPE = "profile_request"
+PROFILE_RESULT_TTL = int(os.getenv("PROFILE_RESULT_TTL", "900"))
+
+# Yaprak frame'i bunlardan biriyse thread boşta bekliyor demektir (select, lock, queue)
+_IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socket.py", "accept"),
+    ("socketserver.py", "serve_forever"),
+}
+
+_capture_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Bu process'te zaten bir profil alınıyor."""
+
+
+class ProfileResult:
+    """Collected samples of one capture and its exports."""
+
+    def __init__(
+        self,
+        *,
+        stacks: Counter,
+        thread_samples: Counter,
+        rounds: int,
+        duration: float,
+        interval: float,
+        allocations: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.stacks = stacks  # (thread name, Stack) -> sample count
+        self.thread_samples = thread_samples
+        self.rounds = rounds
+        self.duration = duration
+        self.interval = interval
+        self.allocations = allocations
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    @property
+    def seconds_per_sample(self) -> float:
+        # Gerçekleşen tur sayısına göre (sleep taşmaları interval'i uzatır)
+        return self.duration / self.rounds if self.rounds else self.interval
+
+    def collapsed(self) -> str:
+        lines = []
+        for (thread_name, stack), count in self.stacks.most_common():
+            frames = [thread_name] + [f"{func} ({_short_path(path)}:{line})" for path, line, func in stack]
+            lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def pstats_data(self) -> Dict[FrameKey, Tuple]:
+        """pstats.Stats'ın beklediği {func: (cc, nc, tt, ct, callers)} sözlüğü."""
+        weight = self.seconds_per_sample
+        entries: Dict[FrameKey, List[Any]] = {}
+        for (_thread_name, stack), count in self.stacks.items():
+            seen = set()
+            for index, func in enumerate(stack):
+                entry = entries.setdefault(func, [0, 0, 0.0, 0.0, {}])
+                leaf = index == len(stack) - 1
+                if func not in seen:  # Özyinelemede kümülatif süre bir kez sayılır
+                    seen.add(func)
+                    entry[0] += count
+                    entry[1] += count
+                    entry[3] += count * weight
+                if leaf:
+                    entry[2] += count * weight
+                if index:
+                    edge = entry[4].setdefault(stack[index - 1], [0, 0, 0.0, 0.0])
+                    edge[0] += count
+                    edge[1] += count
+                    edge[3] += count * weight
+                    if leaf:
+                        edge[2] += count * weight
+        return {
+            func: (cc, nc, tt, ct, {caller: tuple(edge) for caller, edge in callers.items()})
+            for func, (cc, nc, tt, ct, callers) in entries.items()
+        }
+
+    def to_dict(self, top: int = 30) -> Dict[str, Any]:
+        weight = self.seconds_per_sample
+        stats = self.pstats_data()
+
+        def ranked(index: int) -> List[Dict[str, Any]]:
+            rows = sorted(stats.items(), key=lambda item: item[1][index], reverse=True)[:top]
+            return [
+                {
+                    "function": func,
+                    "file": _short_path(path),
+                    "line": line,
+                    "self_seconds": round(tt, 4),
+                    "cumulative_seconds": round(ct, 4),
+                    "samples": cc,
+                }
+                for (path, line, func), (cc, _nc, tt, ct, _callers) in rows
+                if (tt if index == 2 else ct) > 0
+            ]
+
+        return {
+            "duration": round(self.duration, 3),
+            "interval": self.interval,
+            "rounds": self.rounds,
+            "samples": self.samples,
+            "seconds_per_sample": round(weight, 6),
+            "threads": dict(self.thread_samples.most_common()),
+            "top_self": ranked(2),
+            "top_cumulative": ranked(3),
+            "allocations": self.allocations,
+        }
+
+    def artifact(self, fmt: str = "collapsed") -> Tuple[bytes, str, str]:
+        """
+        Export in one of PROFILE_FORMATS.
+
+        Returns:
+            (body, media type, suggested filename)
+        """
+        if fmt == "collapsed":
+            return self.collapsed().encode("utf-8"), "text/plain; charset=utf-8", "profile.collapsed.txt"
+        if fmt == "pstats":
+            return marshal.dumps(self.pstats_data()), "application/octet-stream", "profile.pstats"
+        if fmt == "json":
+            body = json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+            return body.encode("utf-8"), "application/json", "profile.json"
+        raise ValueError(f"Unknown profile format '{fmt}' (expected one of {', '.join(PROFILE_FORMATS)})")
+
+
+class SamplingProfiler:
+    """
+    Samples all threads' stacks from a daemon thread.
+
+    Args:
+        interval: Seconds between sampling rounds
+        include_idle: Keep samples of threads parked in select/lock/queue waits
+        trace_memory: Take a tracemalloc snapshot over the same window
+        max_depth: Frames kept per stack (innermost)
+        memory_top: Allocation sites reported
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.01,
+        *,
+        include_idle: bool = False,
+        trace_memory: bool = False,
+        max_depth: int = 64,
+        memory_top: int = 25,
+    ) -> None:
+        self.interval = max(0.001, float(interval))
+        self.include_idle = include_idle
+        self.trace_memory = trace_memory
+        self.max_depth = max(1, int(max_depth))
+        self.memory_top = memory_top
+
+        self._stacks: Counter = Counter()
+        self._thread_samples: Counter = Counter()
+        self._rounds = 0
+        self._started = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        if not _capture_lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile capture is already running in this process")
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> ProfileResult:
+        self._stop.set()
+        try:
+            if self._thread is not None:
+                self._thread.join()
+            duration = time.perf_counter() - self._started
+            allocations = self._memory_snapshot() if self.trace_memory else None
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+            _capture_lock.release()
+        return ProfileResult(
+            stacks=self._stacks,
+            thread_samples=self._thread_samples,
+            rounds=self._rounds,
+            duration=duration,
+            interval=self.interval,
+            allocations=allocations,
+        )
+
+    # ---- Sampling ----
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            self._rounds += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = self._stack(frame)
+                if not self.include_idle and (os.path.basename(stack[-1][0]), stack[-1][2]) in _IDLE_LEAVES:
+                    continue
+                name = names.get(thread_id, str(thread_id))
+                self._stacks[(name, stack)] += 1
+                self._thread_samples[name] += 1
+
+    def _stack(self, frame: Any) -> Stack:
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            code = frame.f_code
+            frames.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        frames.reverse()
+        return tuple(frames)
+
+    def _memory_snapshot(self) -> Dict[str, Any]:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        stats = snapshot.statistics("lineno")
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {
+                    "file": _short_path(stat.traceback[0].filename),
+                    "line": stat.traceback[0].lineno,
+                    "size_bytes": stat.size,
+                    "count": stat.count,
+                }
+                for stat in stats[: self.memory_top]
+            ],
+        }
+
+
+def profile_for(duration: float, **options: Any) -> ProfileResult:
+    """Çağıran thread'i bloklayarak duration saniye profil al (script/sync kullanım)."""
+    profiler = SamplingProfiler(**options)
+    profiler.start()
+    try:
+        time.sleep(_clamp_duration(duration))
+    finally:
+        result = profiler.stop()
+    return result
+
+
+async def aprofile_for(duration: float, **options: Any) -> ProfileResult:
+    """Event loop'u bloklamadan duration saniye profil al (loop thread'i de örneklenir)."""
+    profiler = SamplingProfiler(**options)
+    profiler.start()
+    try:
+        await asyncio.sleep(_clamp_duration(duration))
+    finally:
+        result = await asyncio.to_thread(profiler.stop)
+    return result
+
+
+def _clamp_duration(duration: float) -> float:
+    return min(max(0.1, float(duration)), MAX_PROFILE_SECONDS)
+
+
+def _short_path(path: str) -> str:
+    """Site-packages/stdlib öneklerini at; flame graph etiketleri kısa kalsın."""
+    for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+        if marker in path:
+            return path.split(marker, 1)[1]
+    for prefix in sorted({os.getcwd(), sys.prefix, sys.base_prefix}, key=len, reverse=True):
+        if prefix and path.startswith(prefix + os.sep):
+            return path[len(prefix) + 1:]
+    return path
+
+
+# ---- Worker result transport (Redis) ----
+def profile_result_key(request_id: str, worker_id: int) -> str:
+    return f"profile:result:{request_id}:{worker_id}"
+
+
+def encode_artifact(result: ProfileResult, fmt: str, *, worker_id: int) -> str:
+    """Artifact'ı Redis'e (decode_responses=True istemci) yazılabilir JSON metnine çevir."""
+    body, media_type, filename = result.artifact(fmt)
+    return json.dumps({
+        "worker_id": worker_id,
+        "format": fmt,
+        "media_type": media_type,
+        "filename": filename,
+        "samples": result.samples,
+        "duration": round(result.duration, 3),
+        "body": base64.b64encode(body).decode("ascii"),
+    })
+
+
+def decode_artifact(raw: str) -> Dict[str, Any]:
+    """encode_artifact çıktısı; 'body' bytes olarak, hata kaydında 'error' alanı."""
+    payload = json.loads(raw)
+    if "body" in payload:
+        payload["body"] = base64.b64decode(payload["body"])
+    return payload
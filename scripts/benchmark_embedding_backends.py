@@ -0,0 +1,208 @@
+"""
+Benchmark: Semantic Dedup Embedding Backends
+
+Compares the inference backends of the dedup embedding model
+(SEMANTIC_DEDUP_BACKEND: torch | torch-int8 | onnx | onnx-int8) on a
+Turkish market-chat corpus:
+
+- load time and RSS (each backend runs in its own subprocess)
+- encode latency p50/p95 and texts/sec per batch size
+- agreement with the reference backend: cosine similarity of the same
+  text's embeddings, mean abs. difference of the pairwise similarity
+  matrix, and how often the dedup decision (similarity > threshold) and
+  the nearest neighbour stay the same
+
+Usage:
+    python scripts/benchmark_embedding_backends.py
+    python scripts/benchmark_embedding_backends.py --backends torch,onnx-int8 --runs 100 --output emb.json
+
+Needs sentence-transformers (and onnxruntime/optimum for the onnx backends:
+pip install "sentence-transformers[onnx]"); unavailable backends are
+reported as errors and skipped.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+INSTRUMENTS = ["BIST 100", "dolar/TL", "euro", "altın", "Bitcoin", "THYAO", "ASELS", "faiz", "Brent petrol", "Nasdaq"]
+# Çiftler birbirinin paraphrase'i: dedup eşiği civarında benzerlik üretir
+TEMPLATES = [
+    "{x} bugün sert yükseldi",
+    "{x} bugün ciddi şekilde değer kazandı",
+    "{x} güne düşüşle başladı",
+    "{x} sabah saatlerinde geriledi",
+    "{x} yatay seyrediyor, hacim düşük",
+    "{x} tarafında işlem hacmi zayıf, yön yok",
+]
+
+
+def corpus():
+    return [template.format(x=name) for name in INSTRUMENTS for template in TEMPLATES]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark semantic dedup embedding backends")
+    parser.add_argument("--backends", default="torch,torch-int8,onnx,onnx-int8",
+                        help="Comma-separated backends; the first one is the reference")
+    parser.add_argument("--model", default="paraphrase-multilingual-MiniLM-L12-v2", help="Sentence transformer model")
+    parser.add_argument("--batch-sizes", default="1,8,32", help="Comma-separated encode batch sizes")
+    parser.add_argument("--runs", type=int, default=50, help="Timed encode calls per batch size")
+    parser.add_argument("--threshold", type=float, default=0.85, help="Dedup similarity threshold")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--embeddings-out", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+# ---- Worker (one backend per process) ----
+def rss_mb():
+    """Current and peak RSS in MB (Linux /proc, otherwise peak from getrusage)."""
+    try:
+        fields = {}
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                key, _, value = line.partition(":")
+                fields[key] = value.strip()
+        return int(fields["VmRSS"].split()[0]) / 1024.0, int(fields["VmHWM"].split()[0]) / 1024.0
+    except (OSError, KeyError, ValueError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+        return peak, peak
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_worker(args):
+    import numpy as np
+
+    from semantic_dedup import load_embedding_model
+
+    texts = corpus()
+    rss_start, _ = rss_mb()
+    started = time.perf_counter()
+    model = load_embedding_model(args.model, args.worker)
+    load_seconds = time.perf_counter() - started
+    model.encode(texts[:8])  # İlk çağrı (graph/JIT hazırlığı) ölçüme girmesin
+    rss_loaded, _ = rss_mb()
+
+    latency = {}
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        timings = []
+        for run in range(args.runs):
+            start = (run * batch_size) % len(texts)
+            batch = (texts[start:] + texts)[:batch_size]
+            t0 = time.perf_counter()
+            model.encode(batch, batch_size=batch_size)
+            timings.append(time.perf_counter() - t0)
+        latency[str(batch_size)] = {
+            "p50_ms": round(percentile(timings, 50) * 1000, 2),
+            "p95_ms": round(percentile(timings, 95) * 1000, 2),
+            "texts_per_sec": round(batch_size * len(timings) / sum(timings), 1),
+        }
+
+    embeddings = np.asarray(model.encode(texts, batch_size=32), dtype=np.float32)
+    np.save(args.embeddings_out, embeddings)
+    _, rss_peak = rss_mb()
+    print(json.dumps({
+        "backend": args.worker,
+        "load_seconds": round(load_seconds, 2),
+        "rss_model_mb": round(rss_loaded - rss_start, 1),
+        "rss_peak_mb": round(rss_peak, 1),
+        "latency": latency,
+    }))
+
+
+# ---- Comparison ----
+def agreement(reference, candidate, threshold):
+    import numpy as np
+
+    from embedding_store import normalize
+
+    ref, cand = normalize(reference), normalize(candidate)
+    same_text = np.sum(ref * cand, axis=1)
+    ref_sim, cand_sim = ref @ ref.T, cand @ cand.T
+    upper = np.triu_indices(len(ref), k=1)
+    np.fill_diagonal(ref_sim, -1.0)
+    np.fill_diagonal(cand_sim, -1.0)
+    return {
+        "same_text_cosine_mean": round(float(same_text.mean()), 5),
+        "same_text_cosine_min": round(float(same_text.min()), 5),
+        "pairwise_abs_diff_mean": round(float(np.abs(ref_sim[upper] - cand_sim[upper]).mean()), 5),
+        "dedup_decision_agreement": round(float(((ref_sim[upper] > threshold) == (cand_sim[upper] > threshold)).mean()), 5),
+        "reference_duplicates": int((ref_sim[upper] > threshold).sum()),
+        "candidate_duplicates": int((cand_sim[upper] > threshold).sum()),
+        "nearest_neighbour_agreement": round(float((ref_sim.argmax(axis=1) == cand_sim.argmax(axis=1)).mean()), 5),
+    }
+
+
+def main():
+    args = parse_args()
+    if args.worker:
+        run_worker(args)
+        return
+
+    import numpy as np
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    tmp_dir = tempfile.mkdtemp(prefix="emb_bench_")
+    results, embeddings = {}, {}
+    for backend in backends:
+        out = os.path.join(tmp_dir, f"{backend}.npy")
+        print(f"Benchmarking {backend} ...", flush=True)
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", backend, "--embeddings-out", out,
+             "--model", args.model, "--batch-sizes", args.batch_sizes, "--runs", str(args.runs)],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            error = (proc.stderr.strip().splitlines() or ["failed"])[-1]
+            print(f"  {backend}: {error}")
+            results[backend] = {"backend": backend, "error": error}
+            continue
+        results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+        embeddings[backend] = np.load(out)
+
+    reference = next((b for b in backends if b in embeddings), None)
+    for backend in embeddings:
+        if backend != reference:
+            results[backend]["agreement"] = agreement(embeddings[reference], embeddings[backend], args.threshold)
+
+    sizes = args.batch_sizes.split(",")
+    print(f"\n{'backend':<11} {'load s':>7} {'RSS MB':>7} " + " ".join(f"{'p50 b' + s + ' ms':>12}" for s in sizes)
+          + f" {'dedup agree':>12} {'cos(same)':>10}")
+    for backend in backends:
+        row = results[backend]
+        if "error" in row:
+            print(f"{backend:<11} error: {row['error']}")
+            continue
+        agree = row.get("agreement", {})
+        print(
+            f"{backend:<11} {row['load_seconds']:>7.2f} {row['rss_model_mb']:>7.1f} "
+            + " ".join(f"{row['latency'][s]['p50_ms']:>12.2f}" for s in sizes)
+            + f" {agree.get('dedup_decision_agreement', 1.0):>12.4f} {agree.get('same_text_cosine_mean', 1.0):>10.4f}"
+        )
+
+    if args.output:
+        payload = {"reference": reference, "model": args.model, "threshold": args.threshold,
+                   "corpus_size": len(corpus()), "results": results}
+        Path(args.output).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
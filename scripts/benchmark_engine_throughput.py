@@ -0,0 +1,153 @@
+"""
+Benchmark: Engine Throughput
+
+Runs BehaviorEngine end to end for N bots x M chats against a fake LLM
+provider and a local fake of the Telegram Bot API (no docker stack, API keys
+or network needed) and reports messages/sec plus p50/p95/p99 per pipeline
+stage (settings, roster, tick_data, context, llm, dedup, telegram_send, store,
+...).
+
+Usage:
+    python scripts/benchmark_engine_throughput.py --bots 8 --chats 4 --duration 30
+    python scripts/benchmark_engine_throughput.py --llm-latency lognormal:1.2,0.5 --output before.json
+    python scripts/benchmark_engine_throughput.py --output after.json --compare before.json
+    python scripts/benchmark_engine_throughput.py --llm-cassette prod.jsonl.gz --llm-latency-scale 0.5
+
+Latency specs: fixed:0.5 | uniform:0.2,1.2 | lognormal:<median>,<sigma>[,<cap>]
+Uses a throwaway SQLite database unless --database-url is given (the
+database is wiped and re-seeded).
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark engine throughput with fake LLM and Telegram")
+    parser.add_argument("--bots", type=int, default=8, help="Number of bots")
+    parser.add_argument("--chats", type=int, default=4, help="Number of chats")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measurement window (seconds)")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Warm-up before measuring (seconds)")
+    parser.add_argument("--llm-latency", default="lognormal:0.8,0.35", help="Fake LLM latency spec")
+    parser.add_argument("--llm-cassette", default=None, help="Replay a recorded LLM cassette (LLM_PROVIDER=replay)")
+    parser.add_argument("--llm-latency-scale", type=float, default=1.0, help="Scale the cassette's recorded latencies")
+    parser.add_argument("--telegram-latency", default="uniform:0.02,0.08", help="Fake Telegram latency spec")
+    parser.add_argument("--tick-delay", type=float, default=0.2, help="Mean pause between ticks of a chat (seconds)")
+    parser.add_argument("--typing", action="store_true", help="Enable typing simulation")
+    parser.add_argument("--telegram-rate-limits", action="store_true", help="Keep the 20 msg/min per chat limiter")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="Fraction of failing LLM requests")
+    parser.add_argument("--max-concurrent-chats", type=int, default=None, help="ENGINE_MAX_CONCURRENT_CHATS")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--database-url", default=None, help="Database URL (default: temporary SQLite)")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    parser.add_argument("--compare", default=None, help="Baseline JSON (from --output) to compare against")
+    return parser.parse_args()
+
+
+def configure_env(args):
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix="throughput_bench_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmp_dir) / 'bench.db'}"
+    os.environ.setdefault("TOKEN_ENCRYPTION_KEY", base64.urlsafe_b64encode(b"0" * 32).decode())
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ.pop("REDIS_URL", None)
+
+
+def git_revision():
+    try:
+        root = Path(__file__).parent.parent
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True,
+        ).stdout.strip()
+        return {"commit": commit, "dirty": bool(dirty)}
+    except Exception:
+        return {"commit": None, "dirty": None}
+
+
+def print_report(result):
+    t = result["throughput"]
+    print(f"\nMessages sent : {t['messages']} in {t['elapsed_seconds']:.1f}s")
+    print(f"Throughput    : {t['messages_per_sec']:.2f} msg/s")
+    print(f"LLM calls     : {t['llm_calls']}")
+    if "hits" in result.get("llm", {}):
+        print(f"Cassette      : {result['llm']['hits']} hits, {result['llm']['misses']} misses")
+    print(f"Outcomes      : {', '.join(f'{k}={v}' for k, v in result['outcomes'].items()) or '-'}")
+    print(f"\n{'stage':<20} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for stage, s in result["stages"].items():
+        print(
+            f"{stage:<20} {s['count']:>7} {s['p50_ms']:>10.2f} {s['p95_ms']:>10.2f} "
+            f"{s['p99_ms']:>10.2f} {s['max_ms']:>10.2f}"
+        )
+
+
+def print_comparison(rows, baseline):
+    base_rev = (baseline.get("revision") or {}).get("commit") or "baseline"
+    print(f"\nComparison against {base_rev}")
+    print(f"{'metric':<32} {'baseline':>12} {'current':>12} {'change':>9}")
+    for row in rows:
+        old = "-" if row["baseline"] is None else f"{row['baseline']:.2f}"
+        new = "-" if row["current"] is None else f"{row['current']:.2f}"
+        change = "-" if row["change_pct"] is None else f"{row['change_pct']:+.1f}%"
+        print(f"{row['metric']:<32} {old:>12} {new:>12} {change:>9}")
+
+
+def main():
+    args = parse_args()
+    configure_env(args)
+    logging.basicConfig(level=logging.ERROR)
+
+    from backend.simulation.benchmark import BenchmarkConfig, compare_results, run_engine_benchmark
+
+    config = BenchmarkConfig(
+        bots=args.bots,
+        chats=args.chats,
+        duration=args.duration,
+        warmup=args.warmup,
+        llm_latency=args.llm_latency,
+        llm_cassette=args.llm_cassette,
+        llm_latency_scale=args.llm_latency_scale,
+        telegram_latency=args.telegram_latency,
+        tick_delay=args.tick_delay,
+        typing=args.typing,
+        telegram_rate_limits=args.telegram_rate_limits,
+        llm_failure_rate=args.llm_failure_rate,
+        max_concurrent_chats=args.max_concurrent_chats,
+        seed=args.seed,
+    )
+
+    llm_desc = f"cassette {config.llm_cassette} x{config.llm_latency_scale:g}" if config.llm_cassette else config.llm_latency
+    print(
+        f"Running {config.bots} bots x {config.chats} chats for {config.duration:.0f}s "
+        f"(warm-up {config.warmup:.0f}s, llm={llm_desc}, telegram={config.telegram_latency}) ..."
+    )
+    result = run_engine_benchmark(config)
+    result["revision"] = git_revision()
+    print_report(result)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print_comparison(compare_results(baseline, result), baseline)
+
+
+if __name__ == "__main__":
+    main()
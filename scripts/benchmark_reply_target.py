@@ -0,0 +1,161 @@
+"""
+Benchmark: Reply Target Selection
+
+Measures pick_reply_target latency and query count on a chat with a large
+message history, comparing the old per-candidate reply COUNT queries with the
+grouped reply-count lookup used by the engine.
+
+Usage:
+    python scripts/benchmark_reply_target.py --messages 20000 --iterations 200
+
+Uses a throwaway SQLite database unless --database-url is given.
+"""
+
+import argparse
+import base64
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark reply target selection")
+    parser.add_argument("--messages", type=int, default=12000, help="Messages in the benchmark chat")
+    parser.add_argument("--bots", type=int, default=8, help="Number of bots")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed iterations per approach")
+    parser.add_argument("--database-url", default=None, help="Database URL (default: temporary SQLite)")
+    return parser.parse_args()
+
+
+def configure_env(args):
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix="reply_bench_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmp_dir) / 'bench.db'}"
+    os.environ.setdefault("TOKEN_ENCRYPTION_KEY", base64.urlsafe_b64encode(b"0" * 32).decode())
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.pop("REDIS_URL", None)
+
+
+def seed(database, n_messages, n_bots):
+    from database import Base, engine as db_engine
+
+    Base.metadata.drop_all(bind=db_engine)
+    Base.metadata.create_all(bind=db_engine)
+
+    db = database.SessionLocal()
+    try:
+        chat = database.Chat(chat_id="-100200300", title="Benchmark", is_enabled=True, topics=["BIST"])
+        db.add(chat)
+        bots = []
+        for i in range(n_bots):
+            bot = database.Bot(name=f"Bench {i}", username=f"bench_{i}_bot", is_enabled=True)
+            bot.token = f"12345:BENCH{i}"
+            bots.append(bot)
+        db.add_all(bots)
+        db.commit()
+
+        rows = []
+        for i in range(1, n_messages + 1):
+            reply_to = random.randint(max(1, i - 40), i - 1) if i > 1 and random.random() < 0.4 else None
+            rows.append({
+                "id": i,
+                "bot_id": random.choice(bots).id if random.random() < 0.8 else None,
+                "chat_db_id": chat.id,
+                "telegram_message_id": i,
+                "text": f"mesaj {i} BIST yorum",
+                "reply_to_message_id": reply_to,
+                "msg_metadata": {},
+            })
+        db.bulk_insert_mappings(database.Message, rows)
+        db.commit()
+        return chat.id, bots[0].id
+    finally:
+        db.close()
+
+
+def legacy_reply_counts(db, database, msgs):
+    # Eski davranış: aday başına bir COUNT sorgusu
+    counts = {}
+    for msg in msgs:
+        counts[msg.telegram_message_id] = db.query(database.Message).filter(
+            database.Message.reply_to_message_id == msg.telegram_message_id
+        ).count()
+    return counts
+
+
+def run(label, fn, iterations, counter):
+    timings = []
+    queries = []
+    for _ in range(iterations):
+        counter["n"] = 0
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+        queries.append(counter["n"])
+    p50 = statistics.median(timings)
+    p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+    print(f"{label:<28} p50={p50:7.2f} ms  p95={p95:7.2f} ms  queries/iter={statistics.mean(queries):.0f}")
+    return p50
+
+
+def main():
+    args = parse_args()
+    configure_env(args)
+    logging.basicConfig(level=logging.ERROR)
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    import database
+    import behavior_engine as behavior_engine_module
+
+    print(f"Seeding {args.messages} messages ...")
+    chat_db_id, bot_id = seed(database, args.messages, args.bots)
+
+    counter = {"n": 0}
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["n"] += 1
+
+    engine = behavior_engine_module.BehaviorEngine()
+    engine.cache = None  # Her iterasyon DB'ye gitsin
+
+    db = database.SessionLocal()
+    try:
+        chat = db.get(database.Chat, chat_db_id)
+        bot = db.get(database.Bot, bot_id)
+
+        def old_approach():
+            msgs = engine.fetch_recent_messages(db, chat.id, limit=30)
+            legacy_reply_counts(db, database, msgs)
+
+        def new_approach():
+            engine.pick_reply_target(
+                db, chat, 1.0,
+                active_bot_id=bot.id,
+                active_bot_username=bot.username,
+                active_bot=bot,
+            )
+
+        print(f"\nReply target selection ({args.iterations} iterations, {args.messages} messages/chat)")
+        old_p50 = run("per-candidate COUNT (old)", old_approach, args.iterations, counter)
+        new_p50 = run("grouped reply counts (new)", new_approach, args.iterations, counter)
+        if new_p50 > 0:
+            print(f"\nSpeedup (p50): {old_p50 / new_p50:.1f}x")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
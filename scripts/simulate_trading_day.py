@@ -0,0 +1,123 @@
+"""
+Simulation: Virtual Trading Day
+
+Runs BehaviorEngine with production settings for N bots x M chats on virtual
+time (fake LLM and Telegram, virtual clock), so 24 simulated hours finish in
+minutes. Reports message volume, database growth, cache hit rates and queue
+depths per simulated hour.
+
+Usage:
+    python scripts/simulate_trading_day.py --bots 200 --chats 20 --hours 24
+    python scripts/simulate_trading_day.py --start 2026-01-05T08:00 --hours 10 --output day.json
+    python scripts/simulate_trading_day.py --set max_msgs_per_min=12 --set typing_enabled=false
+
+Uses a throwaway SQLite database unless --database-url is given (the
+database is wiped and re-seeded).
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def parse_setting(raw):
+    key, sep, value = raw.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected key=value, got '{raw}'")
+    try:
+        return key.strip(), json.loads(value)
+    except ValueError:
+        return key.strip(), value
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Simulate a trading day on virtual time")
+    parser.add_argument("--bots", type=int, default=50, help="Number of bots")
+    parser.add_argument("--chats", type=int, default=10, help="Number of chats")
+    parser.add_argument("--hours", type=float, default=24.0, help="Simulated hours")
+    parser.add_argument("--start", default=None, help="Virtual start time, local ISO (default: today 00:00)")
+    parser.add_argument("--sample-minutes", type=float, default=15.0, help="Simulated minutes between samples")
+    parser.add_argument("--llm-latency", default="lognormal:0.8,0.35", help="Fake LLM latency spec")
+    parser.add_argument("--llm-cassette", default=None, help="Replay a recorded LLM cassette")
+    parser.add_argument("--llm-latency-scale", type=float, default=1.0, help="Scale the cassette's recorded latencies")
+    parser.add_argument("--telegram-latency", default="uniform:0.02,0.08", help="Fake Telegram latency spec")
+    parser.add_argument("--set", dest="settings", action="append", type=parse_setting, default=[],
+                        help="Setting override key=value (JSON value), repeatable")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--database-url", default=None, help="Database URL (default: temporary SQLite)")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    return parser.parse_args()
+
+
+def configure_env(args):
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix="day_sim_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmp_dir) / 'sim.db'}"
+    os.environ.setdefault("TOKEN_ENCRYPTION_KEY", base64.urlsafe_b64encode(b"0" * 32).decode())
+    os.environ.setdefault("OPENAI_API_KEY", "simulation")
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ.pop("REDIS_URL", None)
+
+
+def print_report(result):
+    totals = result["totals"]
+    print(
+        f"\nSimulated {result['simulated_hours']:g}h from {result['virtual_start']} "
+        f"in {result['real_seconds']:.0f}s real time (x{result['speedup']})"
+    )
+    print(
+        f"Messages: {totals['messages_sent']}  reactions: {totals['reactions']}  "
+        f"LLM calls: {totals['llm_calls']}  msgs/bot/hour: {totals['messages_per_bot_hour']}"
+    )
+    print(f"\n{'time':<17} {'sent':>6} {'rows':>8} {'db MB':>8} {'cache hit':>10} {'queue':>6} {'wbuf':>6} {'ticks':>6}")
+    for row in result["hourly"]:
+        db_mb = "-" if row["db_bytes"] is None else f"{row['db_bytes'] / 1_048_576:.2f}"
+        hit = "-" if row["cache_hit_rate"] is None else f"{row['cache_hit_rate'] * 100:.1f}%"
+        print(
+            f"{row['virtual_time']:<17} {row['messages_sent']:>6} {row['message_rows']:>8} {db_mb:>8} "
+            f"{hit:>10} {row['max_message_queue_depth']:>6} {row['max_write_buffer_depth']:>6} "
+            f"{row['max_ticks_in_flight']:>6}"
+        )
+
+
+def main():
+    args = parse_args()
+    configure_env(args)
+    logging.basicConfig(level=logging.ERROR)
+
+    from backend.simulation.day_simulation import DaySimulationConfig, run_day_simulation
+
+    config = DaySimulationConfig(
+        bots=args.bots,
+        chats=args.chats,
+        hours=args.hours,
+        start=args.start,
+        sample_minutes=args.sample_minutes,
+        llm_latency=args.llm_latency,
+        llm_cassette=args.llm_cassette,
+        llm_latency_scale=args.llm_latency_scale,
+        telegram_latency=args.telegram_latency,
+        settings=dict(args.settings),
+        seed=args.seed,
+    )
+    print(f"Simulating {config.bots} bots x {config.chats} chats for {config.hours:g} virtual hours ...")
+    result = run_day_simulation(config)
+    print_report(result)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
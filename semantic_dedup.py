@@ -5,24 +5,86 @@ PHASE 2 Week 3 Day 1-3: Anlamsal benzerlik kontrolü ile tekrar önleme
 P0.1 Critical Fix: Embedding cache to avoid recomputation
 
 Sentence transformers kullanarak embedding-based similarity detection.
+
+Inference backend (SEMANTIC_DEDUP_BACKEND):
+- torch:      full-precision PyTorch (default)
+- torch-int8: PyTorch with dynamically int8-quantized Linear layers
+- onnx:       ONNX Runtime (pip install "sentence-transformers[onnx]")
+- onnx-int8:  ONNX Runtime with the model repo's int8-quantized export
+Compare them with scripts/benchmark_embedding_backends.py.
 """
 
+import asyncio
+import contextlib
 import logging
-from typing import List, Tuple, Optional
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple, Optional
+
+import numpy as np
+
 from embedding_cache import EmbeddingCache
+from embedding_service import EmbeddingService
+from embedding_store import EmbeddingStore, normalize
 
 logger = logging.getLogger(__name__)
 
+# Bot başına benzerlik penceresi (son K mesaj embedding'i)
+SEMANTIC_DEDUP_WINDOW = int(os.getenv("SEMANTIC_DEDUP_WINDOW", "256"))
+# Son kontrol edilen mesajların vektörleri: gönderimde yeniden encode edilmesin
+_QUERY_VECTOR_CACHE_SIZE = 256
+
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+SEMANTIC_DEDUP_BACKEND = os.getenv("SEMANTIC_DEDUP_BACKEND", "torch").strip().lower()
+# onnx-int8: model reposundaki quantize export (avx2 geniş uyumlu; avx512_vnni/arm64 varyantları da var)
+SEMANTIC_DEDUP_ONNX_INT8_FILE = os.getenv("SEMANTIC_DEDUP_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+# Warm-up'ta modelden geçirilen örnek batch
+_WARMUP_TEXTS = ["BIST bugün yükseldi", "Dolar düştü, TL güçlendi", "Faiz kararı yarın açıklanacak"]
+
 # Optional: Lazy import for sentence-transformers (requires pip install)
 try:
     from sentence_transformers import SentenceTransformer
-    import numpy as np
     SEMANTIC_DEDUP_AVAILABLE = True
 except ImportError:
     SEMANTIC_DEDUP_AVAILABLE = False
     logger.warning("sentence-transformers not installed. Semantic dedup disabled. Install: pip install sentence-transformers")
 
 
+def load_embedding_model(model_name: str, backend: str = "torch"):
+    """
+    SentenceTransformer'ı seçilen inference backend'i ile yükle.
+
+    Args:
+        model_name: Sentence transformer model adı
+        backend: One of EMBEDDING_BACKENDS
+
+    Returns:
+        Model with an encode() method
+
+    Raises:
+        ValueError: Unknown backend
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}' (expected one of {', '.join(EMBEDDING_BACKENDS)})")
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx")
+    if backend == "onnx-int8":
+        return SentenceTransformer(
+            model_name,
+            backend="onnx",
+            model_kwargs={"file_name": SEMANTIC_DEDUP_ONNX_INT8_FILE},
+        )
+
+    model = SentenceTransformer(model_name, device="cpu")
+    if backend == "torch-int8":
+        import torch
+
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
 class SemanticDeduplicator:
     """
     Anlamsal benzerlik ile tekrar tespiti
@@ -31,7 +93,13 @@ class SemanticDeduplicator:
     Eşik değerini aşan benzer mesajları paraphrase eder veya reddeder.
     """
 
-    def __init__(self, similarity_threshold: float = 0.85, model_name: str = 'paraphrase-multilingual-MiniLM-L12-v2', redis_client=None):
+    def __init__(
+        self,
+        similarity_threshold: float = 0.85,
+        model_name: str = 'paraphrase-multilingual-MiniLM-L12-v2',
+        redis_client=None,
+        backend: Optional[str] = None,
+    ):
         """
         Initialize semantic deduplicator
 
@@ -39,6 +107,7 @@ class SemanticDeduplicator:
             similarity_threshold: Benzerlik eşiği (0.0-1.0). Default 0.85 (%85)
             model_name: Sentence transformer model adı
             redis_client: Redis client for embedding cache (optional)
+            backend: Inference backend (default SEMANTIC_DEDUP_BACKEND)
         """
         self.similarity_threshold = similarity_threshold
         self.model = None
@@ -54,17 +123,37 @@ class SemanticDeduplicator:
         # P1.3: Model name for lazy loading
         self.model_name = model_name
         self.model_loading = False
+        self._model_lock = threading.Lock()
+        self._warmup_task: Optional[asyncio.Future] = None
+        self.backend = (backend or SEMANTIC_DEDUP_BACKEND).strip().lower()
+        if self.backend not in EMBEDDING_BACKENDS:
+            logger.error(f"Unknown SEMANTIC_DEDUP_BACKEND '{self.backend}', falling back to torch")
+            self.backend = "torch"
+
+        # Bot başına normalize embedding matrisi; gönderilen mesajlar remember() ile eklenir
+        self.store = EmbeddingStore(capacity=SEMANTIC_DEDUP_WINDOW)
+        self._pending: Dict[int, List[str]] = {}
+        self._query_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        # Cache okuma/yazma + model çağrıları: ais_duplicate() bunları event loop dışında micro-batch'ler
+        self.encoder = EmbeddingService(self._encode_batch)
+        # Aynı bot için eşzamanlı async kontroller sırayla (seed/pending yarışı olmasın)
+        self._bot_locks: Dict[int, asyncio.Lock] = {}
+        self._bot_locks_loop: Optional[asyncio.AbstractEventLoop] = None
 
         if not SEMANTIC_DEDUP_AVAILABLE:
             logger.warning("SemanticDeduplicator initialized but sentence-transformers not available")
             return
 
         # P1.3: Lazy initialization - model will load on first use
-        logger.info(f"SemanticDeduplicator initialized (model: {model_name}, lazy load enabled)")
+        logger.info(f"SemanticDeduplicator initialized (model: {model_name}, backend: {self.backend}, lazy load enabled)")
 
     def _ensure_model_loaded(self):
         """
-        P1.3: Lazy load model on first use (non-blocking initialization)
+        P1.3: Lazy load model on first use
+
+        Concurrent callers wait for the load in progress instead of skipping
+        dedup. On the event loop use warm_up() (loads on a thread).
 
         Returns:
             bool: True if model loaded successfully
@@ -72,102 +161,279 @@ class SemanticDeduplicator:
         if self.model is not None:
             return True
 
-        if self.model_loading:
-            logger.debug("Model loading already in progress...")
+        if not SEMANTIC_DEDUP_AVAILABLE or not self.enabled:
             return False
 
-        if not SEMANTIC_DEDUP_AVAILABLE:
-            return False
+        with self._model_lock:
+            if self.model is not None:
+                return True
+            if not self.enabled:
+                return False
+            try:
+                self.model_loading = True
+                logger.info(f"Loading sentence transformer model: {self.model_name} (backend={self.backend})")
+                self.model = load_embedding_model(self.model_name, self.backend)
+                logger.info("Semantic deduplication model loaded successfully")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to load sentence transformer model: {e}")
+                self.enabled = False
+                return False
+            finally:
+                self.model_loading = False
 
-        try:
-            self.model_loading = True
-            logger.info(f"Loading sentence transformer model: {self.model_name}")
-            self.model = SentenceTransformer(self.model_name)
-            logger.info("Semantic deduplication model loaded successfully")
-            self.model_loading = False
+    async def warm_up(self) -> bool:
+        """
+        Modeli thread'de yükle ve örnek bir batch'ten geçir (ilk mesaj yükleme/JIT gecikmesi ödemesin).
+
+        Eşzamanlı çağıranlar aynı warm-up'ı bekler.
+
+        Returns:
+            bool: True if the model is ready
+        """
+        if not self.enabled:
+            return False
+        if self.model is not None and (self._warmup_task is None or self._warmup_task.done()):
             return True
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.ensure_future(asyncio.to_thread(self._load_and_warm))
+        try:
+            return await asyncio.shield(self._warmup_task)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to load sentence transformer model: {e}")
-            self.enabled = False
-            self.model_loading = False
+            logger.error(f"Semantic dedup warm-up failed: {e}")
             return False
 
-    def is_duplicate(self, new_message: str, recent_messages: List[str]) -> Tuple[bool, float]:
+    def _load_and_warm(self) -> bool:
+        started = time.perf_counter()
+        if not self._ensure_model_loaded():
+            return False
+        self.model.encode(list(_WARMUP_TEXTS), batch_size=32)
+        logger.info(f"Semantic dedup model warm ({self.backend}, {time.perf_counter() - started:.1f}s)")
+        return True
+
+    def is_duplicate(
+        self,
+        new_message: str,
+        recent_messages: List[str],
+        bot_id: Optional[int] = None,
+    ) -> Tuple[bool, float]:
         """
         Yeni mesaj mevcut mesajlara çok mu benziyor?
 
         P0.1 Fix: Uses embedding cache to avoid recomputation
         P1.3 Fix: Lazy loads model on first use
 
+        With bot_id, the bot's embedding store is used: recent_messages only
+        seed it on the bot's first check, afterwards messages recorded with
+        remember() are appended and the check is one matrix-vector product.
+        Encodes on the calling thread; use ais_duplicate() on the event loop.
+
         Args:
             new_message: Kontrol edilecek yeni mesaj
             recent_messages: Karşılaştırılacak son mesajlar listesi
+            bot_id: Bot ID (per-bot embedding store)
 
         Returns:
             (is_duplicate: bool, max_similarity: float)
         """
-        if not self.enabled:
+        if not self._ready(new_message, recent_messages, bot_id):
             return False, 0.0
 
-        # P1.3: Ensure model is loaded
-        if not self._ensure_model_loaded():
+        try:
+            texts, seed_count, pending_count = self._plan(new_message, recent_messages, bot_id)
+            resolved, to_encode = self._lookup(texts)
+            if to_encode:
+                self._store_encoded(resolved, to_encode, self.encoder.encode_sync(to_encode))
+            return self._score(bot_id, texts, seed_count, pending_count, resolved)
+        except Exception as e:
+            logger.error(f"Error in semantic deduplication: {e}")
             return False, 0.0
 
-        if not recent_messages or not new_message.strip():
+    async def ais_duplicate(
+        self,
+        new_message: str,
+        recent_messages: List[str],
+        bot_id: Optional[int] = None,
+    ) -> Tuple[bool, float]:
+        """
+        is_duplicate() for the event loop: embedding cache lookups and cache
+        misses run in the micro-batching EmbeddingService on its inference
+        thread, together with concurrent checks from other chats. Checks for
+        the same bot are serialized, so a concurrent check never scores
+        against a store that is still being seeded.
+        """
+        # Model henüz yoksa loop'u bloklamadan yükle (warm-up sürüyorsa onu bekle)
+        if self.enabled and self.model is None and not await self.warm_up():
+            return False, 0.0
+        if not self._ready(new_message, recent_messages, bot_id):
             return False, 0.0
 
-        try:
-            # P0.1: Try to get new message embedding from cache
-            new_embedding = self.embedding_cache.get(new_message)
-            if new_embedding is None:
-                # Cache miss - encode and cache
-                new_embedding = self.model.encode([new_message])[0]
-                self.embedding_cache.set(new_message, new_embedding)
-
-            # P0.1: Try to get recent embeddings from cache (batch)
-            recent_embeddings = []
-            cache_results = self.embedding_cache.get_many(recent_messages)
-
-            # Separate cache hits and misses
-            to_encode = []
-            to_encode_indices = []
-            for i, (msg, cached_emb) in enumerate(zip(recent_messages, cache_results)):
-                if cached_emb is not None:
-                    recent_embeddings.append(cached_emb)
-                else:
-                    to_encode.append(msg)
-                    to_encode_indices.append(i)
-
-            # Encode cache misses
-            if to_encode:
-                newly_encoded = self.model.encode(to_encode)
-                # Cache newly encoded embeddings
-                self.embedding_cache.set_many(to_encode, newly_encoded)
-                # Insert into results at correct indices
-                for idx, emb in zip(to_encode_indices, newly_encoded):
-                    recent_embeddings.insert(idx, emb)
+        async with self._bot_lock(bot_id) if bot_id is not None else contextlib.nullcontext():
+            try:
+                texts, seed_count, pending_count = self._plan(new_message, recent_messages, bot_id)
+                resolved, to_encode = self._lookup(texts)
+                if to_encode:
+                    self._store_encoded(resolved, to_encode, await self.encoder.encode(to_encode))
+                return self._score(bot_id, texts, seed_count, pending_count, resolved)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in semantic deduplication: {e}")
+                return False, 0.0
 
-            # Cosine similarity hesapla
-            similarities = []
-            for rec_emb in recent_embeddings:
-                # Cosine similarity = dot product / (norm1 * norm2)
-                similarity = np.dot(new_embedding, rec_emb) / (
-                    np.linalg.norm(new_embedding) * np.linalg.norm(rec_emb)
-                )
-                similarities.append(similarity)
+    def has_history(self, bot_id: int) -> bool:
+        """Bot'un embedding store'u ısınmış mı (boş olsa bile)."""
+        return bot_id in self.store
 
-            max_similarity = max(similarities) if similarities else 0.0
+    def remember(self, bot_id: int, text: str) -> None:
+        """
+        Gönderilen mesajı bot'un store'una ekle.
 
-            is_dup = max_similarity > self.similarity_threshold
+        Encode edilmez: bir sonraki kontrolde yeni mesajla aynı batch'te
+        vektöre çevrilir (son kontrol edilen metinse hiç encode edilmez).
+        """
+        if not self.enabled or bot_id not in self.store or not text or not text.strip():
+            return
+        pending = self._pending.setdefault(bot_id, [])
+        pending.append(text)
+        if len(pending) > self.store.capacity:
+            del pending[: len(pending) - self.store.capacity]
 
-            if is_dup:
-                logger.debug(f"Duplicate detected: similarity={max_similarity:.3f} (threshold={self.similarity_threshold})")
+    def forget(self, bot_ids: Iterable[int]) -> None:
+        """
+        Botların store'unu ve bekleyen gönderimlerini sil.
 
-            return is_dup, max_similarity
+        Store yalnızca bu worker'ın gönderimlerini görür; bot başka bir
+        worker'dan devralındığında bir sonraki kontrol DB'den yeniden seed'ler.
+        """
+        for bot_id in bot_ids:
+            self.store.drop(bot_id)
+            self._pending.pop(bot_id, None)
 
-        except Exception as e:
-            logger.error(f"Error in semantic deduplication: {e}")
-            return False, 0.0
+    def shutdown(self) -> None:
+        """Release the embedding inference pool."""
+        self.encoder.shutdown()
+
+    # ---- Embedding pipeline ----
+    def _ready(self, new_message: str, recent_messages: List[str], bot_id: Optional[int]) -> bool:
+        if not self.enabled:
+            return False
+        # P1.3: Ensure model is loaded
+        if not self._ensure_model_loaded():
+            return False
+        if not new_message.strip():
+            return False
+        return bot_id is not None or bool(recent_messages)
+
+    def _plan(
+        self, new_message: str, recent_messages: List[str], bot_id: Optional[int]
+    ) -> Tuple[List[str], int, int]:
+        """
+        Bu kontrol için gereken tüm metinler (tek encode batch'i), seed ve bekleyen sayısı.
+
+        Sıra: [seed (en eskiden yeniye)] + [yeni mesaj] + [remember() ile bekleyenler]
+
+        Durum değiştirmez: bot'un ısınmış sayılması ve bekleyenlerin tüketilmesi
+        _score() içinde, vektörler store'a yazıldıktan sonra olur (encode hatası
+        seed geçmişini ya da bekleyen gönderimleri kaybettirmez).
+        """
+        if bot_id is None:
+            return [new_message] + list(recent_messages), 0, 0
+        if bot_id not in self.store:
+            # İlk kontrol: DB'den gelen son mesajlarla store'u doldur
+            seed = list(reversed(recent_messages))
+            return seed + [new_message], len(seed), 0
+        pending = list(self._pending.get(bot_id, ()))
+        return [new_message] + pending, 0, len(pending)
+
+    def _score(
+        self,
+        bot_id: Optional[int],
+        texts: List[str],
+        seed_count: int,
+        pending_count: int,
+        resolved: Dict[str, np.ndarray],
+    ) -> Tuple[bool, float]:
+        vectors = np.stack([resolved[text] for text in texts])
+        query = vectors[seed_count]
+        self._remember_query_vector(texts[seed_count], query)
+
+        if bot_id is None:
+            max_similarity = float((vectors[1:] @ query).max())
+        else:
+            # Seed ve bekleyen gönderimler store'a eklenir; yeni mesaj henüz gönderilmedi
+            self.store.extend(bot_id, np.delete(vectors, seed_count, axis=0), normalized=True)
+            if pending_count:
+                # Plan'dan sonra remember() ile eklenenler listenin sonunda kalır
+                del self._pending[bot_id][:pending_count]
+                if not self._pending[bot_id]:
+                    del self._pending[bot_id]
+            max_similarity = self.store.max_similarity(bot_id, query, normalized=True)
+
+        is_dup = max_similarity > self.similarity_threshold
+
+        if is_dup:
+            logger.debug(f"Duplicate detected: similarity={max_similarity:.3f} (threshold={self.similarity_threshold})")
+
+        return is_dup, max_similarity
+
+    def _bot_lock(self, bot_id: int) -> asyncio.Lock:
+        # asyncio.Lock oluşturulduğu loop'a bağlıdır; loop değişirse (ör. testlerde asyncio.run) yenilenir
+        loop = asyncio.get_running_loop()
+        if self._bot_locks_loop is not loop:
+            self._bot_locks_loop = loop
+            self._bot_locks = {}
+        lock = self._bot_locks.get(bot_id)
+        if lock is None:
+            lock = self._bot_locks[bot_id] = asyncio.Lock()
+        return lock
+
+    def _lookup(self, texts: List[str]) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        """
+        Son kontrol edilenlerden bilinen normalize vektörler ve çözülmesi gerekenler.
+
+        Bellekte kalır; embedding cache (L1/Redis) ve model _encode_batch() içinde.
+        """
+        resolved: Dict[str, np.ndarray] = {}
+        to_encode = []
+        for text in dict.fromkeys(texts):  # Tekrarlanan metin bir kez çözülür
+            cached = self._query_vectors.get(text)
+            if cached is not None:
+                self._query_vectors.move_to_end(text)
+                resolved[text] = cached
+            else:
+                to_encode.append(text)
+        return resolved, to_encode
+
+    def _store_encoded(self, resolved: Dict[str, np.ndarray], texts: List[str], vectors: np.ndarray) -> None:
+        resolved.update(zip(texts, normalize(vectors)))
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Metinlerin ham embedding'leri: P0.1 cache (tek MGET) + kalanlar için tek model.encode.
+
+        EmbeddingService'in inference thread'inde çalışır (sync yolda çağıran
+        thread'de); Redis round trip'leri event loop'u bloklamaz.
+        """
+        cached = self.embedding_cache.get_many(texts)
+        misses = [text for text, vector in zip(texts, cached) if vector is None]
+        fresh: Dict[str, np.ndarray] = {}
+        if misses:
+            encoded = np.asarray(self.model.encode(misses, batch_size=max(32, len(misses))), dtype=np.float32)
+            self.embedding_cache.set_many(misses, encoded)
+            fresh = dict(zip(misses, encoded))
+        return np.stack([
+            np.asarray(vector if vector is not None else fresh[text], dtype=np.float32)
+            for text, vector in zip(texts, cached)
+        ])
+
+    def _remember_query_vector(self, text: str, vector: np.ndarray) -> None:
+        self._query_vectors[text] = vector
+        self._query_vectors.move_to_end(text)
+        while len(self._query_vectors) > _QUERY_VECTOR_CACHE_SIZE:
+            self._query_vectors.popitem(last=False)
 
     def _paraphrase_cache_key(self, message: str, bot_id: int = 0) -> str:
         """Generate cache key for paraphrase (P1.2)"""
@@ -176,7 +442,7 @@ class SemanticDeduplicator:
         msg_hash = hashlib.sha256(cache_input.encode('utf-8')).hexdigest()[:16]
         return f"paraphrase:{msg_hash}"
 
-    def paraphrase_message(self, message: str, llm_client, bot_id: int = 0, max_tokens: int = 200) -> str:
+    async def paraphrase_message(self, message: str, llm_client, bot_id: int = 0, max_tokens: int = 200) -> str:
         """
         Mesajı paraphrase et (LLM ile)
 
@@ -212,7 +478,7 @@ class SemanticDeduplicator:
 Farklı kelimeler ve farklı cümle yapısı kullan ama aynı fikri anlat.
 Samimi ve doğal ol. Sadece yeni versiyonu yaz, başka bir şey yazma."""
 
-            paraphrased = llm_client.generate(
+            paraphrased = await llm_client.agenerate(
                 user_prompt=prompt,
                 temperature=1.2,  # Yüksek temperature = daha yaratıcı
                 max_tokens=max_tokens
@@ -322,6 +322,14 @@ class TelegramClient:
         except Exception:
             return None
 
+    async def send_chat_action(self, token: str, chat_id: str | int, action: str = "typing") -> bool:
+        """
+        Tek bir sendChatAction çağrısı (Telegram göstergeyi ~5 sn veya mesaj gelene kadar gösterir).
+        Arka plan typing göstergeleri (TypingPresence) bunu periyodik çağırır.
+        """
+        result = await self._post(token, "sendChatAction", {"chat_id": chat_id, "action": action})
+        return bool(result)
+
     async def send_typing(self, token: str, chat_id: str | int, duration_seconds: float = 3.0) -> None:
         """
         'typing' göstergesini duration boyunca 2.5 sn aralıklarla yeniler.
@@ -329,10 +337,9 @@ class TelegramClient:
         """
         duration_seconds = max(0.5, float(duration_seconds))
         end_ts = asyncio.get_event_loop().time() + duration_seconds
-        payload = {"chat_id": chat_id, "action": "typing"}
         while asyncio.get_event_loop().time() < end_ts:
             try:
-                await self._post(token, "sendChatAction", payload)
+                await self.send_chat_action(token, chat_id)
             except Exception as e:
                 logger.debug("sendChatAction error: %s", e)
             await asyncio.sleep(2.5)
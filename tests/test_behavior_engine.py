@@ -724,8 +724,14 @@ def test_short_reaction_skips_self_messages(tmp_path, monkeypatch):
     monkeypatch.setattr(engine.tg, "try_set_reaction", fake_try_set_reaction)
     monkeypatch.setattr(engine.tg, "send_message", fake_send_message)
     monkeypatch.setattr(engine.tg, "send_typing", fake_send_typing)
+    monkeypatch.setattr(engine.tg, "send_chat_action", fake_send_typing)
     monkeypatch.setattr(engine.llm, "generate", lambda **_: "selam")
 
+    async def fake_agenerate(**_):
+        return "selam"
+
+    monkeypatch.setattr(engine.llm, "agenerate", fake_agenerate)
+
     asyncio.run(engine.tick_once())
 
     assert calls["reaction"] is False, "bot kendi mesajına reaksiyon vermemeli"
@@ -812,3 +818,38 @@ def test_apply_natural_imperfections_respects_probability(monkeypatch):
     result = apply_natural_imperfections(text, probability=0.0)
 
     assert result == text
+
+
+def test_reply_counts_single_grouped_query(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    engine = behavior_engine_module.BehaviorEngine()
+
+    session = database.SessionLocal()
+    try:
+        chat = database.Chat(chat_id="-42", title="Replies", is_enabled=True)
+        other = database.Chat(chat_id="-43", title="Other", is_enabled=True)
+        session.add_all([chat, other])
+        session.commit()
+
+        rows = [
+            (1, chat.id, 100, None),
+            (2, chat.id, 101, 100),
+            (3, chat.id, 102, 100),
+            (4, chat.id, 103, 101),
+            (5, other.id, 100, 100),  # başka chat'teki aynı telegram id sayılmaz
+        ]
+        for msg_id, chat_db_id, tg_id, reply_to in rows:
+            session.add(database.Message(
+                id=msg_id,
+                chat_db_id=chat_db_id,
+                telegram_message_id=tg_id,
+                reply_to_message_id=reply_to,
+                text=f"m{msg_id}",
+            ))
+        session.commit()
+
+        counts = engine.reply_counts(session, chat.id, [100, 101, 102, None])
+        assert counts == {100: 2, 101: 1}
+        assert engine.reply_counts(session, chat.id, [None]) == {}
+    finally:
+        session.close()
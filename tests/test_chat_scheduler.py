@@ -0,0 +1,99 @@
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.behavior_engine.chat_scheduler import ChatPipelineScheduler  # noqa: E402
+from tests.test_behavior_engine import setup_behavior_engine  # noqa: E402
+
+
+def test_scheduler_runs_chats_concurrently_under_cap():
+    state = {"running": 0, "peak": 0, "ticks": {}}
+
+    async def run_tick(chat_id):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.05)
+        state["running"] -= 1
+        state["ticks"][chat_id] = state["ticks"].get(chat_id, 0) + 1
+        return 0.0
+
+    async def list_chats():
+        return [1, 2, 3, 4, 5, 6]
+
+    async def scenario():
+        scheduler = ChatPipelineScheduler(
+            run_tick, list_chats, max_concurrency=3, start_jitter=0.0
+        )
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.3)
+        assert scheduler.active_chats == 6
+        await scheduler.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert state["peak"] == 3
+    assert set(state["ticks"]) == {1, 2, 3, 4, 5, 6}
+
+
+def test_scheduler_stops_pipelines_for_removed_chats():
+    chats = {"ids": [1, 2]}
+    ticks = []
+
+    async def run_tick(chat_id):
+        ticks.append(chat_id)
+        return 0.01
+
+    async def list_chats():
+        return list(chats["ids"])
+
+    async def scenario():
+        scheduler = ChatPipelineScheduler(
+            run_tick, list_chats, max_concurrency=4, start_jitter=0.0
+        )
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.05)
+        chats["ids"] = [2]
+        scheduler.request_refresh()
+        await asyncio.sleep(0.05)
+        ticks.clear()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert ticks and set(ticks) == {2}
+
+
+def test_inflight_reservations_count_towards_rate_limits(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    engine = behavior_engine_module.BehaviorEngine()
+
+    session = database.SessionLocal()
+    try:
+        bot = database.Bot(name="Busy", username="busy_bot", is_enabled=True)
+        bot.token = "12345:BUSY"
+        session.add(bot)
+        session.commit()
+
+        monkeypatch.setattr(
+            engine, "settings", lambda _db: {"max_msgs_per_min": 2}
+        )
+        assert engine.global_rate_ok(session) is True
+        engine._reserve_send_slot(bot.id)
+        engine._reserve_send_slot(bot.id)
+        assert engine.global_rate_ok(session) is False
+        assert engine.pick_bot(session, {"max": 2}) is None
+
+        engine._release_send_slot(bot.id)
+        assert engine.global_rate_ok(session) is True
+        assert engine.pick_bot(session, {"max": 2}).id == bot.id
+    finally:
+        session.close()
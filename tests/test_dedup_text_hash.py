@@ -0,0 +1,110 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from sqlalchemy import event
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tests.test_behavior_engine import setup_behavior_engine  # noqa: E402
+
+
+def _seed(database, behavior_engine_module):
+    session = database.SessionLocal()
+    try:
+        bot = database.Bot(name="Dedup", username="dedup_bot", is_enabled=True)
+        bot.token = "12345:DEDUP"
+        chat = database.Chat(chat_id="-600", title="Chat", is_enabled=True, topics=["BIST"])
+        session.add_all([bot, chat])
+        session.commit()
+        old = behavior_engine_module.now_utc() - behavior_engine_module.timedelta(hours=30)
+        session.add(database.Message(bot_id=bot.id, chat_db_id=chat.id, text="Eski mesaj!", created_at=old))
+        session.add(database.Message(bot_id=bot.id, chat_db_id=chat.id, text="Dolar  düştü!!"))
+        session.commit()
+        return bot.id, chat.id
+    finally:
+        session.close()
+
+
+def test_text_hash_is_stored_on_insert_and_drives_duplicate_check(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    bot_id, chat_id = _seed(database, behavior_engine_module)
+    engine = behavior_engine_module.BehaviorEngine()
+    from backend.behavior import text_hash
+
+    session = database.SessionLocal()
+    try:
+        bot = session.get(database.Bot, bot_id)
+        engine.write_buffer.add_message(
+            bot=bot, chat_db_id=chat_id, telegram_message_id=1,
+            text="BIST sakin.", reply_to_message_id=None, msg_metadata={},
+        )
+        check = lambda text: engine.is_duplicate_recent(session, bot_id=bot_id, text=text, hours=12)
+        # Henüz yazılmamış mesaj bellekteki buffer'dan yakalanır
+        assert check("bist sakin")
+
+        engine.write_buffer.flush()
+        rows = {m.text: m.text_hash for m in session.query(database.Message)}
+        assert rows["Dolar  düştü!!"] == text_hash("dolar düştü")
+        assert rows["BIST sakin."] == text_hash("bist sakin!")
+
+        assert check("DOLAR düştü")
+        assert check("bist sakin")
+        assert not check("eski mesaj")  # Pencere dışında
+        assert not check("dolar yükseldi")
+    finally:
+        session.close()
+    asyncio.run(engine.shutdown())
+
+
+def test_prefetch_path_uses_indexed_exists_instead_of_row_fetch(tmp_path, monkeypatch):
+    monkeypatch.setenv("ENGINE_TICK_PREFETCH", "true")
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    bot_id, chat_id = _seed(database, behavior_engine_module)
+    engine = behavior_engine_module.BehaviorEngine()
+    engine.cache = None
+    assert engine.tick_prefetch_enabled
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", record)
+    try:
+        session = database.SessionLocal()
+        try:
+            chat = session.get(database.Chat, chat_id)
+            bot = session.get(database.Bot, bot_id)
+        finally:
+            session.close()
+
+        tick_data = asyncio.run(engine._load_tick_data(chat, bot))
+        assert tick_data is not None
+        # Prefetch bot'un son mesajlarını dedup için çekmez
+        assert not any(
+            "FROM messages" in st and "messages.bot_id = " in st and "LIMIT" in st and "msg_metadata" not in st
+            for st in statements
+        )
+
+        statements.clear()
+        assert asyncio.run(engine.ais_duplicate_recent(bot_id=bot_id, text="dolar düştü", hours=12))
+        assert not asyncio.run(engine.ais_duplicate_recent(bot_id=bot_id, text="eski mesaj", hours=12))
+        assert len(statements) == 2
+        assert all("EXISTS" in st and "text_hash" in st and "LIMIT" not in st for st in statements)
+    finally:
+        event.remove(database.engine, "before_cursor_execute", record)
+
+    # Sorgu (bot_id, text_hash, created_at) indeksini kullanır
+    from backend.behavior_engine.tick_data import duplicate_exists_stmt
+
+    with database.engine.connect() as conn:
+        compiled = duplicate_exists_stmt(bot_id, "0" * 16, behavior_engine_module.now_utc()).compile(conn)
+        params = compiled.construct_params()
+        plan = conn.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {compiled}", tuple(str(params[key]) for key in compiled.positiontup)
+        ).all()
+    assert any("ix_messages_bot_text_hash_created" in str(row[-1]) for row in plan)
+    asyncio.run(engine.shutdown())
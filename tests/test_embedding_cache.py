@@ -0,0 +1,97 @@
+import pickle
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from embedding_cache import EmbeddingCache, decode_embedding, encode_embedding
+
+
+class FakeRedis:
+    """MGET/pipelined SETEX; her çağrı bir round trip sayılır."""
+
+    def __init__(self):
+        self.values = {}
+        self.round_trips = 0
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.pending = []
+
+    def setex(self, key, ttl, value):
+        assert isinstance(value, bytes) and ttl > 0
+        self.pending.append((key, value))
+
+    def execute(self):
+        self.redis.round_trips += 1
+        self.redis.values.update(self.pending)
+
+
+def test_binary_encoding_is_compact_and_zero_copy():
+    vector = np.random.default_rng(1).normal(size=384).astype(np.float32)
+
+    half = encode_embedding(vector, "float16")
+    full = encode_embedding(vector, "float32")
+    assert len(half) == 8 + 384 * 2 and len(full) == 8 + 384 * 4
+    assert len(full) < len(pickle.dumps(vector))
+
+    decoded = decode_embedding(full)
+    assert np.array_equal(decoded, vector)
+    assert not decoded.flags.writeable  # np.frombuffer görünümü, kopya değil
+    assert np.allclose(decode_embedding(half), vector, atol=1e-2)
+
+    with pytest.raises(ValueError):
+        decode_embedding(pickle.dumps(vector))
+    with pytest.raises(ValueError):
+        decode_embedding(full[:-4])
+
+
+def test_batches_use_one_round_trip_and_l1_absorbs_repeats():
+    redis = FakeRedis()
+    texts = [f"mesaj {i}" for i in range(20)]
+    vectors = np.random.default_rng(2).normal(size=(20, 32)).astype(np.float32)
+
+    writer = EmbeddingCache(redis, l1_size=0, dtype="float32")
+    assert writer.set_many(texts, vectors) == 20
+    assert redis.round_trips == 1
+
+    reader = EmbeddingCache(redis, l1_size=8)
+    results = reader.get_many(texts + ["bilinmeyen"])
+    assert redis.round_trips == 2
+    assert all(np.array_equal(r, v) for r, v in zip(results, vectors))
+    assert results[-1] is None
+
+    # Son 8 metin L1'de: Redis'e gidilmez
+    again = reader.get_many(texts[-8:])
+    assert redis.round_trips == 2
+    assert all(np.array_equal(r, v) for r, v in zip(again, vectors[-8:]))
+
+    stats = reader.get_stats()
+    assert (stats["hits"], stats["misses"], stats["l1_hits"], stats["redis_hits"]) == (28, 1, 8, 20)
+    assert stats["bytes_read"] == 20 * (8 + 32 * 4)
+
+
+def test_cache_without_redis_still_serves_l1_and_exports_metrics():
+    from backend.metrics import embedding_cache_lookups_total
+
+    hits_before = embedding_cache_lookups_total.labels(layer="l1", result="hit")._value.get()
+    cache = EmbeddingCache(None, l1_size=4)
+    assert cache.enabled
+    cache.set("dolar", np.ones(4))
+    assert np.allclose(cache.get("dolar"), 1.0)
+    assert cache.get("euro") is None
+    assert embedding_cache_lookups_total.labels(layer="l1", result="hit")._value.get() == hits_before + 1
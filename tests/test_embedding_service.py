@@ -0,0 +1,86 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from embedding_service import EmbeddingService
+
+
+class SlowEncoder:
+    """Her çağrı sabit süre (model forward'u gibi) tutar; thread'i ve batch'i kaydeder."""
+
+    def __init__(self, seconds=0.05):
+        self.seconds = seconds
+        self.batches = []
+        self.threads = set()
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.seconds)  # GIL'i bırakır (torch inference gibi)
+        return np.array([[len(text), text.count("a")] for text in texts], dtype=np.float32)
+
+
+def test_concurrent_requests_share_one_batch_off_the_loop():
+    encoder = SlowEncoder()
+    service = EmbeddingService(encoder, max_batch_size=64, max_wait_ms=5)
+
+    async def main():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        results = await asyncio.gather(*(service.encode([f"chat {i}", "ortak"]) for i in range(10)))
+        beat.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(main())
+    service.shutdown()
+
+    assert len(encoder.batches) == 1
+    assert len(encoder.batches[0]) == 11  # "ortak" bir kez encode edilir
+    assert encoder.threads and all(name.startswith("embedding") for name in encoder.threads)
+    assert ticks >= 3  # Encode sürerken loop çalışmaya devam etti
+    for i, vectors in enumerate(results):
+        assert vectors.shape == (2, 2)
+        assert vectors[0][0] == len(f"chat {i}")
+    assert service.get_stats()["avg_batch_size"] == 11
+
+
+def test_full_batch_flushes_immediately_and_errors_reach_every_caller():
+    encoder = SlowEncoder(seconds=0.0)
+    service = EmbeddingService(encoder, max_batch_size=4, max_wait_ms=10_000)
+
+    async def main():
+        return await asyncio.wait_for(
+            asyncio.gather(service.encode(["a", "b"]), service.encode(["c", "d"])), timeout=2
+        )
+
+    first, second = asyncio.run(main())
+    assert [len(batch) for batch in encoder.batches] == [4]
+    assert second.shape == (2, 2)
+
+    def broken(texts):
+        raise RuntimeError("model exploded")
+
+    failing = EmbeddingService(broken, max_wait_ms=1)
+
+    async def fail():
+        return await asyncio.gather(failing.encode(["x"]), failing.encode(["y"]), return_exceptions=True)
+
+    errors = asyncio.run(fail())
+    assert all(isinstance(err, RuntimeError) for err in errors)
+    service.shutdown()
+    failing.shutdown()
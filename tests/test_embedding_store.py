@@ -0,0 +1,194 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from embedding_store import EmbeddingStore, normalize
+
+
+def test_store_keeps_last_k_normalized_rows_per_bot():
+    rng = np.random.default_rng(7)
+    data = rng.normal(size=(40, 16))
+    store = EmbeddingStore(capacity=8, initial_rows=2)
+
+    for start in range(0, 40, 3):  # Karışık batch boyutları ring'i sarar
+        store.extend(1, data[start:start + 3])
+        window = normalize(data[max(0, start + 3 - 8):start + 3])
+        query = rng.normal(size=16)
+        expected = float((window @ normalize(query)).max())
+        assert store.max_similarity(1, query) == pytest.approx(expected, abs=1e-5)
+
+    assert store.size(1) == 8
+    assert store.max_similarity(1, data[39]) == pytest.approx(1.0, abs=1e-5)
+    assert store.max_similarity(1, data[0]) < 0.99  # En eski satırlar düştü
+    assert 2 not in store and store.max_similarity(2, data[0]) == 0.0
+    store.ensure(2)
+    assert 2 in store and store.size(2) == 0
+    assert store.get_stats()["bytes"] == 8 * 16 * 4
+
+
+class _FakeModel:
+    """Kelime torbası encoder: aynı kelimeler aynı vektör."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        self.encoded.append(list(texts))
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, hash(word) % 64] += 1.0
+        return vectors
+
+
+def test_semantic_dedup_seeds_once_and_appends_sent_messages():
+    from semantic_dedup import SemanticDeduplicator
+
+    dedup = SemanticDeduplicator(similarity_threshold=0.85)
+    dedup.enabled = True
+    dedup.model = _FakeModel()
+
+    recent = ["dolar bugün yükseldi", "bist sakin seyrediyor"]
+    is_dup, similarity = dedup.is_duplicate("altın rekor kırdı", recent, bot_id=5)
+    assert not is_dup and similarity < 0.85
+    assert dedup.store.size(5) == 2
+
+    dedup.remember(5, "altın rekor kırdı")
+    dedup.remember(5, "faiz kararı yarın açıklanacak")
+    dedup.model.encoded.clear()
+
+    is_dup, similarity = dedup.is_duplicate("faiz kararı yarın açıklanacak", recent, bot_id=5)
+    assert is_dup and similarity == pytest.approx(1.0, abs=1e-5)
+    # Kontrol edilen metin önceden bilinmiyordu; gönderilenlerden sadece yeni olan encode edilir
+    assert dedup.model.encoded == [["faiz kararı yarın açıklanacak"]]
+    assert dedup.store.size(5) == 4
+
+    # bot_id'siz eski yol da vektörize sonuç verir
+    assert dedup.is_duplicate("bist sakin seyrediyor", recent)[0]
+
+    # Event loop yolu: encode EmbeddingService üzerinden, sonuç aynı
+    import asyncio
+
+    assert asyncio.run(dedup.ais_duplicate("bist sakin seyrediyor", recent, bot_id=9))[0]
+    assert dedup.store.size(9) == 2
+    dedup.shutdown()
+
+
+def test_warm_up_loads_model_once_and_concurrent_checks_wait(monkeypatch):
+    import asyncio
+    import threading
+
+    import semantic_dedup
+    from semantic_dedup import SemanticDeduplicator
+
+    loads = []
+    release = threading.Event()
+
+    def fake_load(model_name, backend):
+        loads.append(backend)
+        release.wait(5)  # Yükleme sürerken gelen kontroller beklemeli, atlanmamalı
+        return _FakeModel()
+
+    monkeypatch.setattr(semantic_dedup, "SEMANTIC_DEDUP_AVAILABLE", True)
+    monkeypatch.setattr(semantic_dedup, "load_embedding_model", fake_load)
+    dedup = SemanticDeduplicator(similarity_threshold=0.85, backend="onnx-int8")
+    dedup.enabled = True
+    assert SemanticDeduplicator(backend="tensorrt").backend == "torch"
+
+    async def scenario():
+        warm = asyncio.create_task(dedup.warm_up())
+        check = asyncio.create_task(dedup.ais_duplicate("dolar bugün yükseldi", ["dolar bugün yükseldi"], bot_id=1))
+        await asyncio.sleep(0.05)
+        assert not check.done()
+        release.set()
+        return await warm, await check
+
+    ready, (is_dup, similarity) = asyncio.run(scenario())
+    assert ready and is_dup and similarity == pytest.approx(1.0, abs=1e-5)
+    assert loads == ["onnx-int8"]
+    # Warm-up batch'i modelden geçti
+    assert dedup.model.encoded[0] == semantic_dedup._WARMUP_TEXTS
+    dedup.shutdown()
+
+
+def test_failed_encode_keeps_seed_history_and_pending_sends():
+    import asyncio
+
+    from semantic_dedup import SemanticDeduplicator
+
+    dedup = SemanticDeduplicator(similarity_threshold=0.85)
+    dedup.enabled = True
+    dedup.model = _FakeModel()
+    model_encode = dedup.model.encode
+    failures = []
+
+    def flaky_encode(texts, **kwargs):
+        if failures:
+            failures.pop()
+            raise RuntimeError("transient")
+        return model_encode(texts, **kwargs)
+
+    dedup.model.encode = flaky_encode
+    recent = ["dolar bugün yükseldi"]
+
+    # Seed sırasında hata: bot ısınmış sayılmaz, sonraki kontrol yeniden seed'ler
+    failures.append(1)
+    assert asyncio.run(dedup.ais_duplicate("altın rekor kırdı", recent, bot_id=1)) == (False, 0.0)
+    assert not dedup.has_history(1)
+    is_dup, similarity = asyncio.run(dedup.ais_duplicate("dolar bugün yükseldi", recent, bot_id=1))
+    assert is_dup and similarity == pytest.approx(1.0, abs=1e-5)
+
+    # Bekleyen gönderimler hata sonrası kaybolmaz
+    dedup.remember(1, "faiz kararı yarın açıklanacak")
+    failures.append(1)
+    assert dedup.is_duplicate("bist sakin", recent, bot_id=1) == (False, 0.0)
+    assert dedup.is_duplicate("faiz kararı yarın açıklanacak", recent, bot_id=1)[0]
+    assert dedup.store.size(1) == 2
+    dedup.shutdown()
+
+
+def test_concurrent_checks_for_one_bot_seed_once_off_the_loop():
+    import asyncio
+    import threading
+    import time
+
+    from semantic_dedup import SemanticDeduplicator
+
+    dedup = SemanticDeduplicator(similarity_threshold=0.85)
+    dedup.enabled = True
+    dedup.model = _FakeModel()
+    dedup.encoder.max_wait = 0.0
+    model_encode = dedup.model.encode
+    cache_threads = []
+    cache_get_many = dedup.embedding_cache.get_many
+
+    def slow_encode(texts, **kwargs):
+        time.sleep(0.05)  # İkinci kontrol seed sürerken gelsin
+        return model_encode(texts, **kwargs)
+
+    def tracking_get_many(texts):
+        cache_threads.append(threading.get_ident())
+        return cache_get_many(texts)
+
+    dedup.model.encode = slow_encode
+    dedup.embedding_cache.get_many = tracking_get_many
+    recent = ["dolar bugün yükseldi", "bist sakin seyrediyor"]
+
+    async def scenario():
+        return await asyncio.gather(
+            dedup.ais_duplicate("altın rekor kırdı", recent, bot_id=1),
+            dedup.ais_duplicate("dolar bugün yükseldi", recent, bot_id=1),
+        ), threading.get_ident()
+
+    (first, second), loop_thread = asyncio.run(scenario())
+    assert not first[0]
+    assert second[0] and second[1] == pytest.approx(1.0, abs=1e-5)
+    assert dedup.store.size(1) == 2  # Seed bir kez eklendi
+    assert cache_threads and loop_thread not in cache_threads
+    dedup.shutdown()
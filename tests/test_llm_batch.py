@@ -4,6 +4,9 @@ Tests for LLM Batch Generation
 Tests batch generation functionality with mock LLM responses.
 """
 
+import asyncio
+import time
+
 import pytest
 from unittest.mock import Mock, patch
 from llm_client_batch import LLMBatchClient, generate_batch
@@ -137,6 +140,74 @@ class TestLLMBatchClient:
         assert len(results) == 2
         assert all(result == "Response" for result in results)
 
+    @patch('llm_client_batch.LLMClient')
+    def test_executor_is_reused_between_batches(self, mock_llm_class):
+        """Test that the worker pool persists across generate_batch calls"""
+        mock_llm = Mock()
+        mock_llm.generate.return_value = "Response"
+        mock_llm_class.return_value = mock_llm
+
+        client = LLMBatchClient(max_workers=2)
+        client.generate_batch(prompts=["Prompt 1"])
+        executor = client.executor
+        client.generate_batch(prompts=["Prompt 2", "Prompt 3"])
+
+        assert client.executor is executor
+        client.shutdown()
+        assert client._executor is None
+
+    @patch('llm_client_batch.LLMClient')
+    def test_generate_batch_timeout_is_per_prompt(self, mock_llm_class):
+        """Test that queued prompts get their full timeout and a stuck call does not block the pool"""
+        delays = {"slow": 1.0, "medium": 0.12}
+
+        def fake_generate(user_prompt, **kwargs):
+            time.sleep(delays.get(user_prompt, 0.0))
+            return f"Response for: {user_prompt}"
+
+        mock_llm = Mock()
+        mock_llm.generate.side_effect = fake_generate
+        mock_llm_class.return_value = mock_llm
+
+        # 3 x 0.12s on 2 workers: the last prompt finishes after 0.24s but ran only 0.12s
+        client = LLMBatchClient(max_workers=2, prompt_timeout=0.2)
+        assert client.generate_batch(prompts=["medium"] * 3) == ["Response for: medium"] * 3
+
+        # Stuck prompt times out; the queued one still runs on a fresh pool
+        client = LLMBatchClient(max_workers=1, prompt_timeout=0.2)
+        started = time.monotonic()
+        results = client.generate_batch(prompts=["slow", "fast"])
+        assert results == [None, "Response for: fast"]
+        assert time.monotonic() - started < 0.8
+        client.shutdown()
+
+    @patch('llm_client_batch.LLMClient')
+    def test_generate_batch_async_yields_as_completed(self, mock_llm_class):
+        """Test that async batch yields fast results first and times out slow ones"""
+        delays = {"fast": 0.0, "medium": 0.05, "slow": 5.0}
+
+        async def fake_agenerate(user_prompt, timeout=None, **kwargs):
+            await asyncio.wait_for(asyncio.sleep(delays[user_prompt]), timeout)
+            return f"Response for: {user_prompt}"
+
+        mock_llm = Mock()
+        mock_llm.agenerate = fake_agenerate
+        mock_llm_class.return_value = mock_llm
+
+        client = LLMBatchClient(prompt_timeout=0.2)
+
+        async def collect():
+            return [item async for item in client.generate_batch_async(["slow", "medium", "fast"])]
+
+        results = asyncio.run(collect())
+
+        assert results == [
+            (2, "Response for: fast"),
+            (1, "Response for: medium"),
+            (0, None),
+        ]
+
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,159 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import llm_client
+
+
+class FakeCompletions:
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+        self.running = 0
+        self.peak = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.calls <= self.failures:
+                raise RuntimeError("temporary failure")
+            message = SimpleNamespace(content=f"yanıt {self.calls}")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        finally:
+            self.running -= 1
+
+
+def make_provider(monkeypatch, completions, max_concurrency="8"):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-openai")
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", max_concurrency)
+    provider = llm_client.OpenAIProvider()
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(provider, "_create_async_client", lambda: fake_client)
+    return provider
+
+
+def test_agenerate_retries_without_blocking_sleep(monkeypatch):
+    completions = FakeCompletions(failures=1)
+    provider = make_provider(monkeypatch, completions)
+
+    def forbidden_sleep(_seconds):
+        raise AssertionError("time.sleep must not be used on the async path")
+
+    monkeypatch.setattr(llm_client.time, "sleep", forbidden_sleep)
+    monkeypatch.setattr(provider, "_retry_delay", lambda attempt: 0.0)
+
+    result = asyncio.run(provider.agenerate(user_prompt="merhaba"))
+
+    assert result
+    assert completions.calls == 2
+
+
+def test_agenerate_respects_provider_concurrency_limit(monkeypatch):
+    completions = FakeCompletions(delay=0.02)
+    provider = make_provider(monkeypatch, completions, max_concurrency="2")
+
+    async def scenario():
+        return await asyncio.gather(
+            *(provider.agenerate(user_prompt=f"soru {i}") for i in range(6))
+        )
+
+    results = asyncio.run(scenario())
+
+    assert len(results) == 6 and all(results)
+    assert completions.peak == 2
+
+
+class RecordingCompletions(FakeCompletions):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.prompts = []
+
+    async def create(self, **kwargs):
+        self.prompts.append(kwargs["messages"][-1]["content"])
+        return await super().create(**kwargs)
+
+
+def test_agenerate_releases_the_concurrency_slot_during_backoff(monkeypatch):
+    completions = RecordingCompletions(failures=1)
+    provider = make_provider(monkeypatch, completions, max_concurrency="1")
+    monkeypatch.setattr(provider, "_retry_delay", lambda attempt: 0.05)
+
+    async def scenario():
+        first = asyncio.create_task(provider.agenerate(user_prompt="ilk"))
+        await asyncio.sleep(0)
+        return await asyncio.gather(first, provider.agenerate(user_prompt="ikinci"))
+
+    results = asyncio.run(scenario())
+
+    assert all(results)
+    # "ilk" backoff'ta beklerken slot "ikinci"ye geçer
+    assert completions.prompts == ["ilk", "ikinci", "ilk"]
+
+
+def test_agenerate_timeout_starts_when_the_request_gets_a_slot(monkeypatch):
+    completions = FakeCompletions(delay=0.1)
+    provider = make_provider(monkeypatch, completions, max_concurrency="1")
+
+    async def scenario():
+        return await asyncio.gather(
+            *(provider.agenerate(user_prompt=f"soru {i}", timeout=0.15) for i in range(3))
+        )
+
+    # Sıradaki istekler 0.1-0.2 sn slot bekler ama her biri kendi 0.15 sn'sini alır
+    assert all(asyncio.run(scenario()))
+
+    slow = make_provider(monkeypatch, FakeCompletions(delay=1.0), max_concurrency="1")
+    try:
+        asyncio.run(slow.agenerate(user_prompt="yavaş", timeout=0.05))
+    except asyncio.TimeoutError:
+        pass
+    else:
+        raise AssertionError("expected asyncio.TimeoutError")
+
+
+def test_agenerate_falls_back_to_thread_without_native_implementation(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "2")
+
+    class SyncOnlyProvider(llm_client.BaseLLMProvider):
+        def generate(self, *, user_prompt, **_kwargs):
+            return f"sync {user_prompt}"
+
+        def _create_async_client(self):
+            return object()
+
+    assert asyncio.run(SyncOnlyProvider().agenerate(user_prompt="merhaba")) == "sync merhaba"
+
+
+def test_async_client_is_closed_when_the_loop_changes(monkeypatch):
+    closed = []
+
+    class ClosableClient:
+        def __init__(self):
+            self.chat = SimpleNamespace(completions=FakeCompletions())
+
+        async def close(self):
+            closed.append(self)
+
+    provider = make_provider(monkeypatch, None)
+    monkeypatch.setattr(provider, "_create_async_client", ClosableClient)
+
+    async def generate():
+        return await provider.agenerate(user_prompt="merhaba")
+
+    assert asyncio.run(generate())
+    first = provider._async_client
+    assert asyncio.run(generate())
+    assert closed == [first]
+
+    second = provider._async_client
+    asyncio.run(provider.aclose())
+    assert closed == [first, second] and provider._async_client is None
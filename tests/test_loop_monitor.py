@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.behavior_engine.loop_monitor import LoopLagMonitor
+
+
+def _blocking_sync_call(seconds):
+    time.sleep(seconds)
+
+
+def test_loop_monitor_measures_lag_and_logs_blocking_stack(caplog):
+    monitor = LoopLagMonitor(interval=0.02, stall_threshold=0.1, debug=True)
+
+    async def main():
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.1)
+        quiet = monitor.stats()
+        _blocking_sync_call(0.4)
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return quiet
+
+    with caplog.at_level(logging.WARNING, logger="behavior.loop"):
+        quiet = asyncio.run(main())
+
+    assert quiet["samples"] > 0 and quiet["stalls"] == 0
+    stats = monitor.stats()
+    assert stats["stalls"] == 1
+    assert stats["max_lag"] >= 0.3
+    assert stats["stacks_logged"] == 1
+    stack_logs = [r.getMessage() for r in caplog.records if "currently at" in r.getMessage()]
+    assert len(stack_logs) == 1 and "_blocking_sync_call" in stack_logs[0]
+    assert monitor._stop.is_set()  # İptal watchdog thread'ini de durdurur
+
+
+def test_loop_monitor_exports_prometheus_metrics():
+    from backend.metrics import event_loop_lag_seconds, event_loop_stalls_total
+
+    before = event_loop_stalls_total._value.get()
+    count_before = sum(b.get() for b in event_loop_lag_seconds._buckets)
+    monitor = LoopLagMonitor(stall_threshold=0.5)
+    monitor.record(0.01)
+    monitor.record(0.75)
+
+    assert event_loop_stalls_total._value.get() == before + 1
+    assert sum(b.get() for b in event_loop_lag_seconds._buckets) == count_before + 2
+    assert monitor.stats()["last_lag"] == 0.75
@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.behavior import message_features  # noqa: E402
+from backend.behavior.message_features import (  # noqa: E402
+    attach_message_features,
+    compute_message_features,
+    get_message_features,
+)
+from backend.behavior.topic_manager import score_topics_from_messages  # noqa: E402
+
+
+def test_compute_message_features():
+    features = compute_message_features("BIST bugün yükseldi, THYAO için ne dersiniz?")
+
+    assert features["topics"] == ["BIST"]
+    assert features["sentiment"] > 0
+    assert "THYAO" in features["symbols"]
+    assert features["is_question"] is True
+    assert features["tokens"][:2] == ["bist", "bugün"]
+
+
+def test_attach_keeps_existing_metadata():
+    metadata = attach_message_features({"topic": "BIST"}, "dolar kuru")
+
+    assert metadata["topic"] == "BIST"
+    assert metadata["features"]["topics"] == ["FX"]
+
+
+def test_get_message_features_uses_stored_features(monkeypatch):
+    msg = SimpleNamespace(
+        text="btc düştü",
+        msg_metadata=attach_message_features({}, "btc düştü"),
+    )
+
+    def forbidden(_text):
+        raise AssertionError("stored features must be reused")
+
+    monkeypatch.setattr(message_features, "detect_topics", forbidden)
+    assert get_message_features(msg)["topics"] == ["Kripto"]
+
+    legacy = SimpleNamespace(text="btc düştü", msg_metadata={"topic": "Kripto"})
+    monkeypatch.undo()
+    assert get_message_features(legacy)["sentiment"] < 0
+
+
+def test_topic_scoring_matches_with_precomputed_tokens():
+    texts = ["Borsa bugün hisse tarafında hareketli!", "Faiz kararı enflasyon beklentisi"]
+    plain = [SimpleNamespace(text=t, msg_metadata=None) for t in texts]
+    stored = [SimpleNamespace(text=t, msg_metadata=attach_message_features(None, t)) for t in texts]
+    topics = ["BIST", "Makro", "FX"]
+
+    assert score_topics_from_messages(stored, topics) == score_topics_from_messages(plain, topics)
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.behavior_engine.priority_consumer import PriorityQueueConsumer  # noqa: E402
+
+
+class FakeAsyncRedis:
+    """LPUSH/RPOP/BRPOP'un küçük bellek içi karşılığı."""
+
+    def __init__(self):
+        self.lists = {}
+        self.changed = asyncio.Event()
+
+    def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+        self.changed.set()
+
+    async def rpop(self, key):
+        items = self.lists.get(key)
+        return items.pop() if items else None
+
+    async def brpop(self, keys, timeout=0):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            for key in keys:
+                items = self.lists.get(key)
+                if items:
+                    return key, items.pop()
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            self.changed.clear()
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return None
+
+
+def _item(n, chat_id=1, priority="normal"):
+    return json.dumps({"message_id": n, "chat_id": chat_id, "priority": priority})
+
+
+async def _run_until(consumer, predicate, timeout=2.0):
+    task = asyncio.create_task(consumer.run())
+    try:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not predicate() and loop.time() < deadline:
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def test_high_priority_items_are_served_first():
+    async def scenario():
+        redis = FakeAsyncRedis()
+        redis.lpush("priority_queue:normal", _item(1, chat_id=1))
+        redis.lpush("priority_queue:high", _item(2, chat_id=2))
+        handled = []
+
+        async def handler(items):
+            handled.extend(i["message_id"] for i in items)
+
+        consumer = PriorityQueueConsumer(redis, handler, max_concurrency=1, block_timeout=1)
+        await _run_until(consumer, lambda: len(handled) == 2)
+        return handled
+
+    assert asyncio.run(scenario()) == [2, 1]
+
+
+def test_items_processed_concurrently_with_cap_and_per_chat_order():
+    async def scenario():
+        redis = FakeAsyncRedis()
+        for n in range(6):
+            redis.lpush("priority_queue:normal", _item(n, chat_id=n % 3))
+        running = {"now": 0, "max": 0}
+        order = {}
+
+        async def handler(items):
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            await asyncio.sleep(0.05)
+            for item in items:
+                order.setdefault(item["chat_id"], []).append(item["message_id"])
+            running["now"] -= 1
+
+        consumer = PriorityQueueConsumer(redis, handler, max_concurrency=2, block_timeout=1)
+        await _run_until(consumer, lambda: consumer.processed == 6)
+        return running["max"], order, consumer
+
+    max_running, order, consumer = asyncio.run(scenario())
+    assert max_running == 2
+    assert order == {0: [0, 3], 1: [1, 4], 2: [2, 5]}
+    assert consumer._chat_locks == {}
+
+
+def test_batch_mode_drains_waiting_items_without_blocking():
+    async def scenario():
+        redis = FakeAsyncRedis()
+        for n in range(5):
+            redis.lpush("priority_queue:normal", _item(n, chat_id=n))
+        redis.lpush("priority_queue:high", _item(9, chat_id=9, priority="high"))
+        batches = []
+
+        async def handler(items):
+            batches.append([i["message_id"] for i in items])
+
+        consumer = PriorityQueueConsumer(redis, handler, block_timeout=1, batch_size=lambda: 4)
+        await _run_until(consumer, lambda: consumer.processed == 6)
+        return batches
+
+    assert asyncio.run(scenario()) == [[9, 0, 1, 2], [3, 4]]
+
+
+def test_inactive_consumer_leaves_items_queued():
+    async def scenario():
+        redis = FakeAsyncRedis()
+        redis.lpush("priority_queue:high", _item(1))
+        handled = []
+
+        async def handler(items):
+            handled.extend(items)
+
+        async def inactive():
+            return False
+
+        consumer = PriorityQueueConsumer(redis, handler, is_active=inactive, idle_delay=0.05)
+        await _run_until(consumer, lambda: False, timeout=0.2)
+        return handled, redis.lists["priority_queue:high"]
+
+    handled, remaining = asyncio.run(scenario())
+    assert handled == []
+    assert len(remaining) == 1
@@ -0,0 +1,126 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tests.test_behavior_engine import setup_behavior_engine  # noqa: E402
+
+
+def _seed(database):
+    db = database.SessionLocal()
+    try:
+        bots = []
+        for i in range(3):
+            bot = database.Bot(name=f"Bot {i}", username=f"bot_{i}", is_enabled=True)
+            bot.token = f"12345:TOKEN{i}"
+            bots.append(bot)
+        chats = [
+            database.Chat(chat_id=f"-100{i}", title=f"Chat {i}", is_enabled=True, topics=["BIST"])
+            for i in range(2)
+        ]
+        db.add_all(bots + chats)
+        db.commit()
+        return [b.id for b in bots], [c.id for c in chats]
+    finally:
+        db.close()
+
+
+def test_batch_delivery_runs_concurrently_and_keeps_chat_order(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    bot_ids, chat_ids = _seed(database)
+    engine = behavior_engine_module.BehaviorEngine()
+
+    settings_payload = {
+        "simulation_active": True,
+        "consistency_guard_enabled": False,
+        "news_trigger_enabled": False,
+        "typing_enabled": True,
+    }
+    monkeypatch.setattr(engine, "settings", lambda _db: settings_payload)
+    monkeypatch.setattr(engine, "typing_seconds", lambda *_, **__: 0.2)
+
+    # chat 0: item 0 ve 2 (sıra korunmalı), chat 1: item 1 ve 3
+    items = [
+        {"bot_id": bot_ids[i % 3], "chat_id": chat_ids[i % 2], "telegram_message_id": 100 + i, "text": f"soru {i}?"}
+        for i in range(4)
+    ]
+
+    async def fake_batch(prompts, **_):
+        # Sonuçlar ters sırada tamamlanır
+        for index in reversed(range(len(prompts))):
+            await asyncio.sleep(0.01)
+            yield index, f"cevap {index}"
+
+    sent = []
+
+    async def fake_chat_action(*_args, **_kwargs):
+        return True
+
+    async def fake_send_message(*, token, chat_id, text, reply_to_message_id, **_):
+        sent.append((chat_id, reply_to_message_id))
+        return 900 + len(sent)
+
+    monkeypatch.setattr(engine.llm_batch, "generate_batch_async", fake_batch)
+    monkeypatch.setattr(engine.tg, "send_chat_action", fake_chat_action)
+    monkeypatch.setattr(engine.tg, "send_message", fake_send_message)
+
+    async def scenario():
+        db = database.SessionLocal()
+        try:
+            start = time.perf_counter()
+            count = await engine._process_priority_queue_batch(db, items)
+            return count, time.perf_counter() - start
+        finally:
+            db.close()
+
+    count, elapsed = asyncio.run(scenario())
+    asyncio.run(engine.shutdown())
+
+    assert count == 4
+    # Sıralı teslimat 4 x 0.2s sürerdi; chat başına 2 mesaj sırayla ~0.4s
+    assert elapsed < 0.75
+    per_chat = {}
+    for chat_id, reply_to in sent:
+        per_chat.setdefault(chat_id, []).append(reply_to)
+    assert per_chat == {"-1000": [100, 102], "-1001": [101, 103]}
+
+
+def test_missing_batch_result_does_not_block_following_items(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    bot_ids, chat_ids = _seed(database)
+    engine = behavior_engine_module.BehaviorEngine()
+
+    settings_payload = {"consistency_guard_enabled": False, "news_trigger_enabled": False, "typing_enabled": False}
+    monkeypatch.setattr(engine, "settings", lambda _db: settings_payload)
+
+    items = [
+        {"bot_id": bot_ids[0], "chat_id": chat_ids[0], "telegram_message_id": 200 + i, "text": "selam"}
+        for i in range(2)
+    ]
+
+    async def fake_batch(prompts, **_):
+        yield 1, "ikinci"  # İlk item'ın sonucu hiç gelmez
+
+    sent = []
+
+    async def fake_send_message(*, reply_to_message_id, **_):
+        sent.append(reply_to_message_id)
+        return 901
+
+    monkeypatch.setattr(engine.llm_batch, "generate_batch_async", fake_batch)
+    monkeypatch.setattr(engine.tg, "send_message", fake_send_message)
+
+    async def scenario():
+        db = database.SessionLocal()
+        try:
+            return await asyncio.wait_for(engine._process_priority_queue_batch(db, items), timeout=2)
+        finally:
+            db.close()
+
+    assert asyncio.run(scenario()) == 1
+    asyncio.run(engine.shutdown())
+    assert sent == [201]
@@ -0,0 +1,227 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.behavior_engine.rate_accounting import (  # noqa: E402
+    RateAccountant,
+    SlidingWindowCounter,
+)
+from tests.test_behavior_engine import setup_behavior_engine  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_sliding_window_drops_expired_buckets():
+    counter = SlidingWindowCounter(60)
+    counter.add(1000)
+    counter.add(1000)
+    counter.add(1030)
+
+    assert counter.count(1030) == 3
+    assert counter.count(1060) == 1
+    assert counter.count(1090) == 0
+
+
+def test_sliding_window_accepts_out_of_order_records():
+    counter = SlidingWindowCounter(60)
+    counter.add(1010)
+    counter.add(1005)
+    counter.add(1010)
+
+    assert counter.count(1065) == 2
+    assert counter.count(1070) == 0
+
+
+def test_accountant_tracks_global_bot_and_pending_counts():
+    clock = FakeClock()
+    rates = RateAccountant(clock=clock)
+
+    rates.record(1)
+    rates.record(1)
+    rates.record(2)
+    rates.reserve(2)
+
+    assert rates.global_count() == 4
+    assert rates.global_count(include_pending=False) == 3
+    assert rates.bot_counts([1, 2, 3]) == {1: 2, 2: 2, 3: 0}
+
+    clock.now += 61
+    rates.release(2)
+    assert rates.global_count() == 0
+    assert rates.bot_count(1) == 2
+
+    clock.now += 3600
+    assert rates.bot_count(1) == 0
+
+
+def test_engine_hydrates_counters_once_from_recent_messages(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    engine = behavior_engine_module.BehaviorEngine()
+
+    session = database.SessionLocal()
+    try:
+        bot = database.Bot(name="Counted", username="counted_bot", is_enabled=True)
+        bot.token = "12345:COUNTED"
+        chat = database.Chat(chat_id="-100", title="Chat", is_enabled=True)
+        session.add_all([bot, chat])
+        session.commit()
+
+        now = datetime.now(timezone.utc)
+        for idx, minutes_ago in enumerate((0, 5, 30, 90), start=1):
+            session.add(database.Message(
+                id=idx,
+                bot_id=bot.id,
+                chat_db_id=chat.id,
+                text=f"mesaj {minutes_ago}",
+                created_at=now - timedelta(minutes=minutes_ago),
+            ))
+        session.commit()
+
+        monkeypatch.setattr(engine, "settings", lambda _db: {"max_msgs_per_min": 2})
+        assert engine.global_rate_ok(session) is True
+        assert engine.rates.bot_count(bot.id) == 3
+        assert engine.pick_bot(session, {"max": 3}) is None
+
+        # Sonraki kontroller DB'ye gitmez; yeni mesajlar record() ile sayılır
+        engine.rates.record(bot.id)
+        assert engine.global_rate_ok(session) is False
+    finally:
+        session.close()
+
+
+class FakeRedis:
+    """Rate sayaçlarının kullandığı string/hash komutlarının bellek içi karşılığı."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.values = {}
+        self.expires = {}
+
+    def _alive(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= self.clock():
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.values
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and self._alive(key):
+            return None
+        self.values[key] = value
+        if ex is not None:
+            self.expires[key] = self.clock() + ex
+        return True
+
+    def incr(self, key):
+        self.values[key] = int(self.values[key]) + 1 if self._alive(key) else 1
+
+    def hincrby(self, key, field, amount):
+        mapping = self.values[key] if self._alive(key) else {}
+        mapping[field] = int(mapping.get(field, 0)) + amount
+        self.values[key] = mapping
+
+    def expire(self, key, seconds):
+        if self._alive(key):
+            self.expires[key] = self.clock() + seconds
+
+    def mget(self, keys):
+        return [self.values[k] if self._alive(k) else None for k in keys]
+
+    def hgetall(self, key):
+        return dict(self.values[key]) if self._alive(key) else {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def query(self, *_):
+        return self
+
+    def filter(self, *_):
+        return self
+
+    def order_by(self, *_):
+        return self
+
+    def all(self):
+        return list(self.rows)
+
+
+def test_shared_hydration_does_not_double_count_live_buckets():
+    clock = FakeClock()
+    redis = FakeRedis(clock)
+    rows = []
+
+    def send(rates, bot_id):
+        rows.append((bot_id, datetime.fromtimestamp(clock.now, tz=timezone.utc)))
+        rates.record(bot_id)
+
+    first = RateAccountant(redis_client=redis, clock=clock)
+    first.ensure_hydrated(FakeSession(rows))
+    send(first, 1)
+    # İlk hydrate bayrağının süresi dolduktan sonra da gönderimler sürüyor
+    for _ in range(3):
+        clock.now += 1800
+        send(first, 1)
+    assert first.bot_count(1) == 2
+
+    later = RateAccountant(redis_client=redis, clock=clock)
+    later.ensure_hydrated(FakeSession(rows))
+    clock.now += 1
+    assert later.bot_count(1) == 2
+    assert first.bot_count(1) == 2
+
+
+def test_multi_worker_without_redis_counts_from_db(tmp_path, monkeypatch):
+    monkeypatch.setenv("TOTAL_WORKERS", "4")
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.delenv("RATE_ACCOUNTING_SHARED", raising=False)
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    engine = behavior_engine_module.BehaviorEngine()
+    assert engine.rates.count_from_db
+
+    session = database.SessionLocal()
+    try:
+        bot = database.Bot(name="Counted", username="counted_bot", is_enabled=True)
+        bot.token = "12345:COUNTED"
+        chat = database.Chat(chat_id="-100", title="Chat", is_enabled=True)
+        session.add_all([bot, chat])
+        session.commit()
+        monkeypatch.setattr(engine, "settings", lambda _db: {"max_msgs_per_min": 2})
+        assert engine.global_rate_ok(session) is True
+
+        # Başka bir worker'ın gönderimleri: bu worker record() görmez, DB'den sayılır
+        session.add_all([
+            database.Message(bot_id=bot.id, chat_db_id=chat.id, text=f"mesaj {i}") for i in range(2)
+        ])
+        session.commit()
+        assert engine.global_rate_ok(session) is False
+        assert engine.rates.bot_count(bot.id, db=session) == 2
+    finally:
+        session.close()
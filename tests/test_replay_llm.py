@@ -0,0 +1,85 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def cassette(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-openai")
+    from backend.simulation.fake_llm import FakeLLMProvider
+    from backend.simulation.replay_llm import ReplayProvider
+
+    path = tmp_path / "llm.jsonl.gz"
+    recorder = ReplayProvider(path, mode="record", target=FakeLLMProvider("fixed:0.05", seed=3), flush_every=2)
+
+    async def record():
+        return [await recorder.agenerate(user_prompt=f"soru {i}", system_prompt="persona") for i in range(3)]
+
+    texts = asyncio.run(record())
+    assert recorder.flush() == 1  # 2 kayıt flush_every ile yazıldı, 1 tanesi bekliyordu
+    return path, texts
+
+
+def test_replay_serves_recorded_responses_with_scaled_latency(cassette):
+    from backend.simulation.replay_llm import ReplayProvider, load_cassette
+
+    path, texts = cassette
+    header, entries = load_cassette(path)
+    assert header["provider"] == "FakeLLMProvider"
+    assert [e["r"] for e in entries] == texts
+    assert all(e["t"] >= 0.04 for e in entries)
+
+    replay = ReplayProvider(path, latency_scale=0.0)
+
+    async def run():
+        # Boşluk farkı aynı parmak izini verir; sıra kaydınkinden farklı
+        return [
+            await replay.agenerate(user_prompt="soru  2", system_prompt="persona"),
+            await replay.agenerate(user_prompt="soru 0", system_prompt="persona"),
+        ]
+
+    start = time.perf_counter()
+    assert asyncio.run(run()) == [texts[2], texts[0]]
+    assert time.perf_counter() - start < 0.04
+    assert replay.stats()["hits"] == 2
+
+    slow = ReplayProvider(path, latency_scale=1.0)
+    start = time.perf_counter()
+    assert slow.generate(user_prompt="soru 1", system_prompt="persona") == texts[1]
+    assert time.perf_counter() - start >= 0.04
+
+
+def test_replay_miss_policies(cassette):
+    from backend.simulation.replay_llm import ReplayProvider
+
+    path, texts = cassette
+    sequence = ReplayProvider(path, latency_scale=0.0)
+    served = [sequence.generate(user_prompt=f"yeni prompt {i}") for i in range(4)]
+    assert served == texts + texts[:1]
+    assert sequence.misses == 4
+
+    strict = ReplayProvider(path, latency_scale=0.0, on_miss="error")
+    assert strict.generate(user_prompt="yeni prompt") is None
+
+
+def test_replay_provider_selected_via_env(cassette, monkeypatch):
+    from llm_client import LLMClient
+    from backend.simulation.replay_llm import ReplayProvider
+
+    path, _ = cassette
+    monkeypatch.setenv("LLM_REPLAY_CASSETTE", str(path))
+    monkeypatch.setenv("LLM_REPLAY_LATENCY_SCALE", "0.5")
+    provider = LLMClient.create_provider("replay")
+    assert isinstance(provider, ReplayProvider)
+    assert provider.latency_scale == 0.5
+
+    monkeypatch.setenv("LLM_REPLAY_CASSETTE", str(path.parent / "missing.jsonl.gz"))
+    with pytest.raises(RuntimeError):
+        LLMClient.create_provider("replay")
@@ -0,0 +1,92 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.behavior_engine.roster import (  # noqa: E402
+    BotRecord,
+    RosterCache,
+    bump_roster_version,
+)
+from tests.test_behavior_engine import setup_behavior_engine  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _add_bot(database, session, name, **kwargs):
+    bot = database.Bot(name=name, username=f"{name.lower()}_bot", is_enabled=True, **kwargs)
+    bot.token = f"12345:{name.upper()}"
+    session.add(bot)
+    session.commit()
+    return bot
+
+
+def test_bot_record_precomputed_active_hours():
+    record = BotRecord(id=1, username="x", active_ranges=((22 * 60, 2 * 60),))
+
+    assert record.is_active_at(23 * 60) is True
+    assert record.is_active_at(60) is True
+    assert record.is_active_at(12 * 60) is False
+    assert BotRecord(id=2, username="y").is_active_at(12 * 60) is True
+    # active_hours dolu ama hiçbiri parse edilemiyor: eskisi gibi aktif değil
+    assert BotRecord(id=3, username="z", active_ranges=()).is_active_at(12 * 60) is False
+
+
+def test_roster_rebuilds_only_when_version_moves(tmp_path, monkeypatch):
+    _, database = setup_behavior_engine(tmp_path, monkeypatch)
+    clock = FakeClock()
+    roster = RosterCache(version_check_interval=5.0, clock=clock)
+
+    session = database.SessionLocal()
+    try:
+        _add_bot(database, session, "Alpha")
+        first = roster.get(session)
+        assert [b.username for b in first.bots] == ["alpha_bot"]
+
+        # Versiyon değişmeden yeni bot snapshot'a girmez
+        _add_bot(database, session, "Beta")
+        clock.now += 10
+        assert roster.get(session) is first
+
+        bump_roster_version(session)
+        assert roster.get(session) is first  # kontrol aralığı dolmadı
+        clock.now += 10
+        second = roster.get(session)
+        assert second is not first
+        assert len(second.bots) == 2
+
+        # config_updates ile invalidate anında yeniden oluşturur
+        session.add(database.Chat(chat_id="-1001", title="Chat", is_enabled=True))
+        session.commit()
+        roster.invalidate()
+        assert len(roster.get(session).chats) == 1
+    finally:
+        session.close()
+
+
+def test_roster_precomputes_worker_shard(tmp_path, monkeypatch):
+    _, database = setup_behavior_engine(tmp_path, monkeypatch)
+    roster = RosterCache(worker_id=1, total_workers=2)
+
+    session = database.SessionLocal()
+    try:
+        bots = [_add_bot(database, session, name) for name in ("One", "Two", "Three", "Four")]
+        night = _add_bot(database, session, "Night", active_hours=["03:00-03:01"])
+
+        snapshot = roster.get(session)
+        shard_ids = {b.id for b in snapshot.shard_bots}
+        assert shard_ids == {b.id for b in bots + [night] if b.id % 2 == 1}
+
+        active = snapshot.active_shard_bots(datetime(2024, 1, 1, 12, 0))
+        assert night.id not in {b.id for b in active}
+    finally:
+        session.close()
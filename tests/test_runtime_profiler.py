@@ -0,0 +1,106 @@
+import json
+import marshal
+import pstats
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from runtime_profiler import ProfilerBusyError, SamplingProfiler, decode_artifact, encode_artifact, profile_for
+
+
+def _hot_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(500))
+
+
+def test_sampling_profiler_exports_collapsed_pstats_and_json(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=_hot_loop, args=(stop,), name="hot-worker")
+    worker.start()
+    try:
+        result = profile_for(0.4, interval=0.005, trace_memory=True)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert result.rounds > 10
+    assert result.thread_samples["hot-worker"] > 0
+
+    collapsed = result.collapsed()
+    assert any(line.startswith("hot-worker;") and "_hot_loop (" in line for line in collapsed.splitlines())
+
+    body, media_type, filename = result.artifact("pstats")
+    path = tmp_path / filename
+    path.write_bytes(body)
+    stats = pstats.Stats(str(path))
+    hot = [key for key in stats.stats if key[2] == "_hot_loop"]
+    assert hot and stats.stats[hot[0]][3] > 0.1  # Kümülatif süre örneklerden tahmin edilir
+
+    report = json.loads(result.artifact("json")[0])
+    assert "_hot_loop" in {row["function"] for row in report["top_cumulative"]}
+    assert report["allocations"]["top"]
+
+    with pytest.raises(ValueError):
+        result.artifact("svg")
+
+
+def test_profiler_allows_one_capture_per_process_and_round_trips_artifacts():
+    profiler = SamplingProfiler(interval=0.005)
+    profiler.start()
+    try:
+        with pytest.raises(ProfilerBusyError):
+            SamplingProfiler().start()
+    finally:
+        result = profiler.stop()
+
+    payload = decode_artifact(encode_artifact(result, "pstats", worker_id=3))
+    assert payload["worker_id"] == 3
+    assert marshal.loads(payload["body"]) == result.pstats_data()
+    profile_for(0.1)  # Kilit bırakıldı
+
+
+def test_profile_endpoint_requires_admin_and_returns_artifact(api_client):
+    from database import create_api_user
+
+    create_api_user("operator", "Password!123", role="operator", api_key="operator-key", mfa_secret="JBSWY3DPEHPK3PZQ")
+    denied = api_client.post("/system/profile?duration=0.1", headers={"X-API-Key": "operator-key"})
+    assert denied.status_code == 403
+
+    admin = {"X-API-Key": "bootstrap-key"}
+    response = api_client.post("/system/profile?duration=0.2&format=json", headers=admin)
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].startswith("attachment; filename=api_")
+    assert response.json()["rounds"] > 0
+
+    assert api_client.post("/system/profile?duration=0.1&format=svg", headers=admin).status_code == 400
+
+
+def test_engine_answers_profile_request_through_redis(tmp_path, monkeypatch):
+    import asyncio
+
+    from tests.test_behavior_engine import setup_behavior_engine
+
+    behavior_engine_module, _database = setup_behavior_engine(tmp_path, monkeypatch)
+    engine = behavior_engine_module.BehaviorEngine()
+
+    class _Redis:
+        def __init__(self):
+            self.store = {}
+
+        async def set(self, key, value, ex=None):
+            self.store[key] = (value, ex)
+
+    engine._redis = _Redis()
+    request = {"type": "profile_request", "request_id": "abc", "duration": 0.2, "format": "collapsed"}
+    asyncio.run(engine._capture_profile(request))
+
+    raw, ttl = engine._redis.store[f"profile:result:abc:{engine.worker_id}"]
+    payload = decode_artifact(raw)
+    assert ttl > 0 and payload["format"] == "collapsed"
+    assert payload["duration"] >= 0.2 and isinstance(payload["body"], bytes)
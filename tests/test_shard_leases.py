@@ -0,0 +1,247 @@
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.behavior_engine import shard_leases  # noqa: E402
+from backend.behavior_engine.roster import RosterCache  # noqa: E402
+from backend.behavior_engine.shard_leases import (  # noqa: E402
+    ConsistentHashRing,
+    ShardLeaseManager,
+)
+from tests.test_behavior_engine import setup_behavior_engine  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """Lease script'leri ve sorted set komutlarının küçük bellek içi karşılığı."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.values = {}
+        self.expires = {}
+        self.zsets = {}
+
+    def _alive(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= self.clock():
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.values
+
+    def get(self, key):
+        return self.values[key] if self._alive(key) else None
+
+    def eval(self, script, numkeys, key, *args):
+        owner = self.get(key)
+        if script == shard_leases._ACQUIRE_SCRIPT:
+            me, ttl = args
+            if owner == me:
+                self.expires[key] = self.clock() + int(ttl)
+                return 1
+            if owner is None:
+                self.values[key] = me
+                self.expires[key] = self.clock() + int(ttl)
+                return 1
+            return 0
+        if script == shard_leases._RELEASE_SCRIPT:
+            if owner == args[0]:
+                self.values.pop(key, None)
+                self.expires.pop(key, None)
+                return 1
+            return 0
+        raise AssertionError("unexpected script")
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zremrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        for member in [m for m, score in zset.items() if score <= high]:
+            del zset[member]
+
+    def zrange(self, key, start, end):
+        zset = self.zsets.get(key, {})
+        return [m for m, _ in sorted(zset.items(), key=lambda item: item[1])]
+
+    def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(member, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+def _manager(redis, clock, name, **kwargs):
+    return ShardLeaseManager(redis, worker_name=name, partitions=32, lease_ttl=15, clock=clock, **kwargs)
+
+
+def test_ring_moves_few_partitions_when_member_joins():
+    keys = [f"partition:{p}" for p in range(256)]
+    before = ConsistentHashRing(["w1", "w2", "w3"])
+    after = ConsistentHashRing(["w1", "w2", "w3", "w4"])
+
+    moved = [k for k in keys if before.owner(k) != after.owner(k)]
+
+    # Sadece yeni üyeye geçenler taşınır
+    assert all(after.owner(k) == "w4" for k in moved)
+    assert len(moved) < len(keys) / 2
+
+
+def test_two_workers_split_partitions_without_overlap():
+    clock = FakeClock()
+    redis = FakeRedis(clock)
+    a = _manager(redis, clock, "worker-a")
+    b = _manager(redis, clock, "worker-b")
+
+    a.step()  # Tek başınayken hepsini alır
+    assert a.owned_partitions == frozenset(range(32))
+
+    b.step()  # b'nin payı hâlâ a'nın lease'inde
+    assert b.owned_partitions == frozenset()
+
+    a.step()  # a yeni üyeyi görür ve b'nin payını bırakır
+    b.step()
+
+    assert a.owned_partitions and b.owned_partitions
+    assert a.owned_partitions.isdisjoint(b.owned_partitions)
+    assert a.owned_partitions | b.owned_partitions == frozenset(range(32))
+    assert all(a.owns_bot(p) != b.owns_bot(p) for p in range(32))
+
+
+def test_dead_worker_partitions_taken_over_after_ttl():
+    clock = FakeClock()
+    redis = FakeRedis(clock)
+    a = _manager(redis, clock, "worker-a")
+    b = _manager(redis, clock, "worker-b")
+    for _ in range(2):
+        a.step()
+        b.step()
+    assert b.owned_partitions != frozenset(range(32))
+
+    # a heartbeat atmayı bırakır; lease'leri ve üyeliği TTL sonunda düşer
+    clock.now += 16
+    b.step()
+
+    assert b.members == ("worker-b",)
+    assert b.owned_partitions == frozenset(range(32))
+
+
+def test_release_all_hands_over_without_waiting_for_ttl():
+    clock = FakeClock()
+    redis = FakeRedis(clock)
+    a = _manager(redis, clock, "worker-a")
+    b = _manager(redis, clock, "worker-b")
+    for _ in range(2):
+        a.step()
+        b.step()
+
+    a.release_all()
+    b.step()
+
+    assert a.owned_partitions == frozenset()
+    assert b.owned_partitions == frozenset(range(32))
+
+
+def test_ownership_change_invalidates_roster_and_filters_bots(tmp_path, monkeypatch):
+    _, database = setup_behavior_engine(tmp_path, monkeypatch)
+    db = database.SessionLocal()
+    try:
+        for i in range(4):
+            bot = database.Bot(name=f"Bot {i}", username=f"bot_{i}", is_enabled=True)
+            bot.token = f"12345:TOKEN{i}"
+            db.add(bot)
+        db.commit()
+        bot_ids = [b.id for b in db.query(database.Bot).all()]
+
+        clock = FakeClock()
+        redis = FakeRedis(clock)
+        roster = None
+        manager = ShardLeaseManager(
+            redis, worker_name="solo", partitions=2, clock=clock,
+            on_change=lambda _owned: roster.invalidate(),
+        )
+        roster = RosterCache(owns_bot=manager.owns_bot, version_check_interval=3600)
+
+        assert roster.get(db).shard_bots == ()  # Henüz lease yok
+
+        manager.step()
+        assert sorted(b.id for b in roster.get(db).shard_bots) == sorted(bot_ids)
+
+        manager.release_all()
+        assert roster.get(db).shard_bots == ()
+    finally:
+        db.close()
+
+
+def test_reassigned_bots_reseed_semantic_dedup_store(tmp_path, monkeypatch):
+    behavior_engine_module, _ = setup_behavior_engine(tmp_path, monkeypatch)
+    from semantic_dedup import SemanticDeduplicator
+    from tests.test_embedding_store import _FakeModel
+
+    engine = behavior_engine_module.BehaviorEngine()
+    dedup = SemanticDeduplicator(similarity_threshold=0.85)
+    dedup.enabled = True
+    dedup.model = _FakeModel()
+    engine.semantic_dedup = dedup
+
+    clock = FakeClock()
+    redis = FakeRedis(clock)
+    b = _manager(redis, clock, "worker-b", on_change=engine._on_shard_change)
+    engine.shard_leases = b
+    b.step()
+    assert b.owned_partitions == frozenset(range(32))
+
+    bot_ids = list(range(1, 41))
+
+    def seed_all():
+        for bot_id in bot_ids:
+            if not dedup.has_history(bot_id):
+                dedup.is_duplicate("yeni mesaj", ["eski mesaj"], bot_id=bot_id)
+            dedup.remember(bot_id, "gönderilen mesaj")
+
+    seed_all()
+    a = _manager(redis, clock, "worker-a")
+    a.step()
+    b.step()
+    a.step()
+    lost = frozenset(range(32)) - b.owned_partitions
+    assert lost
+    # Bırakılan botların store'u başka worker'ın gönderimlerini göremez: silinir
+    assert [i for i in bot_ids if dedup.has_history(i)] == [i for i in bot_ids if b.owns_bot(i)]
+
+    seed_all()
+    a.release_all()
+    b.step()
+    assert b.owned_partitions == frozenset(range(32))
+    # Geri alınan botlar bir sonraki kontrolde DB'deki son mesajlarla yeniden seed'lenir
+    regained = [i for i in bot_ids if b.partition_for_bot(i) in lost]
+    assert regained
+    assert not any(dedup.has_history(i) or i in dedup._pending for i in regained)
+    assert all(dedup.has_history(i) for i in bot_ids if i not in regained)
+    asyncio.run(engine.shutdown())
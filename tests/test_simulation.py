@@ -0,0 +1,98 @@
+import asyncio
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tests.test_behavior_engine import setup_behavior_engine
+
+
+def test_latency_model_parses_specs_and_respects_cap():
+    from backend.simulation.latency import LatencyModel
+
+    assert LatencyModel.parse("0.5").sample(random.Random(0)) == 0.5
+    assert LatencyModel.parse(None).sample(random.Random(0)) == 0.0
+
+    uniform = LatencyModel.parse("uniform:0.3,0.1")
+    assert uniform.params == (0.1, 0.3)
+    rng = random.Random(1)
+    assert all(0.1 <= uniform.sample(rng) <= 0.3 for _ in range(200))
+
+    capped = LatencyModel.parse("lognormal:1.0,2.0,1.5")
+    assert capped.spec == "lognormal:1,2,1.5"
+    assert max(capped.sample(rng) for _ in range(500)) <= 1.5
+
+    with pytest.raises(ValueError):
+        LatencyModel.parse("gamma:1,2")
+    with pytest.raises(ValueError):
+        LatencyModel.parse("uniform:1")
+
+
+def test_fake_llm_is_deterministic_per_seed(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-openai")
+    from backend.simulation.fake_llm import FakeLLMProvider
+
+    async def run(seed):
+        llm = FakeLLMProvider("fixed:0", seed=seed)
+        return [await llm.agenerate(user_prompt=f"prompt {i}") for i in range(5)]
+
+    first = asyncio.run(run(7))
+    assert first == asyncio.run(run(7))
+    assert first != asyncio.run(run(8))
+    assert len(set(first)) == 5  # Sayaç sayesinde dedup'a takılmaz
+
+    failing = FakeLLMProvider("fixed:0", failure_rate=1.0)
+    assert failing.generate(user_prompt="x") is None
+    assert failing.failures == 1
+
+
+def test_fake_telegram_serves_telegram_client(tmp_path, monkeypatch):
+    setup_behavior_engine(tmp_path, monkeypatch)
+    from backend.simulation.fake_telegram import FakeTelegramAPI, attach_fake_telegram
+    from telegram_client import TelegramClient
+
+    async def scenario():
+        tg = TelegramClient()
+        api = attach_fake_telegram(tg, FakeTelegramAPI("fixed:0"))
+        try:
+            first = await tg.send_message(token="1:A", chat_id="-1001", text="merhaba")
+            second = await tg.send_message(token="1:A", chat_id="-1001", text="tekrar", reply_to_message_id=first)
+            typing = await tg.send_chat_action("1:A", "-1001")
+        finally:
+            await tg.close()
+        return api, first, second, typing
+
+    api, first, second, typing = asyncio.run(scenario())
+    assert second == first + 1
+    assert typing is True
+    assert api.calls == {"sendMessage": 2, "sendChatAction": 1}
+    assert api.messages_by_chat == {"-1001": 2}
+
+
+def test_engine_benchmark_reports_throughput_and_stages(tmp_path, monkeypatch):
+    setup_behavior_engine(tmp_path, monkeypatch)
+    from backend.simulation.benchmark import BenchmarkConfig, compare_results, run_engine_benchmark
+    from llm_client import LLMClient
+
+    previous = LLMClient._instance
+    config = BenchmarkConfig(
+        bots=2, chats=2, duration=1.5, warmup=0.3,
+        llm_latency="fixed:0.02", telegram_latency="fixed:0.005", tick_delay=0.05,
+    )
+    result = run_engine_benchmark(config)
+
+    assert LLMClient._instance is previous
+    assert result["throughput"]["messages"] > 0
+    assert result["throughput"]["messages_per_sec"] > 0
+    for stage in ("settings", "tick_data", "telegram_send", "total"):
+        assert result["stages"][stage]["count"] > 0
+    assert result["stages"]["total"]["p50_ms"] <= result["stages"]["total"]["p99_ms"]
+
+    rows = {row["metric"]: row for row in compare_results(result, result)}
+    assert rows["messages_per_sec"]["change_pct"] == 0.0
+    assert "llm.p95_ms" in rows
@@ -0,0 +1,350 @@
+import asyncio
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tests.test_behavior_engine import setup_behavior_engine  # noqa: E402
+
+
+def _seed(database):
+    from backend.behavior import now_utc
+
+    db = database.SessionLocal()
+    try:
+        bot = database.Bot(name="Loader", username="loader_bot", is_enabled=True)
+        bot.token = "12345:LOADER"
+        other = database.Bot(name="Other", username="other_bot", is_enabled=True)
+        other.token = "12345:OTHER"
+        chat = database.Chat(chat_id="-1009", title="Loader Chat", is_enabled=True, topics=["BIST"])
+        db.add_all([bot, other, chat])
+        db.commit()
+
+        now = now_utc()
+        rows = []
+        for i in range(1, 51):
+            rows.append(database.Message(
+                bot_id=bot.id if i % 2 else other.id,
+                chat_db_id=chat.id,
+                telegram_message_id=i,
+                text=f"mesaj {i}",
+                reply_to_message_id=i - 1 if i % 5 == 0 else None,
+                msg_metadata={"topic": "BIST", "symbols": ["THYAO"]},
+                created_at=now - timedelta(minutes=60 - i),
+            ))
+        # Geçmiş referans penceresine düşen eski mesaj (son 2 saat hariç)
+        rows.append(database.Message(
+            bot_id=bot.id,
+            chat_db_id=chat.id,
+            telegram_message_id=999,
+            text="dün THYAO aldım",
+            msg_metadata={"topic": "BIST", "symbols": ["THYAO"]},
+            created_at=now - timedelta(hours=20),
+        ))
+        db.add_all(rows)
+        db.add(database.BotStance(bot_id=bot.id, topic="BIST", stance_text="pozitif", confidence=0.7))
+        db.add(database.BotHolding(bot_id=bot.id, symbol="THYAO", avg_price=250.0, size=10))
+        db.add(database.BotMemory(bot_id=bot.id, memory_type="personal_fact", content="İstanbul'dayım"))
+        db.commit()
+        return chat.id, bot.id
+    finally:
+        db.close()
+
+
+def test_tick_data_matches_inline_queries(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    from backend.behavior_engine.metadata_analyzer import (
+        fetch_bot_memories,
+        find_relevant_past_messages,
+        memories_to_dicts,
+        score_past_messages,
+    )
+    from backend.behavior_engine.tick_data import TickDataLoader
+
+    chat_db_id, bot_id = _seed(database)
+    engine = behavior_engine_module.BehaviorEngine()
+    engine.cache = None
+
+    loader = TickDataLoader(database.SessionLocal)
+    assert loader.mode == "thread"
+    data = asyncio.run(loader.load(chat_db_id=chat_db_id, bot_id=bot_id))
+
+    db = database.SessionLocal()
+    try:
+        bot = db.get(database.Bot, bot_id)
+        inline_recent = engine.fetch_recent_messages(db, chat_db_id, limit=40)
+        assert [m.id for m in data.recent_messages] == [m.id for m in inline_recent]
+        # İlişkiler session kapandıktan sonra da okunabilir
+        assert data.recent_messages[0].bot.username in {"loader_bot", "other_bot"}
+
+        inline_counts = engine.reply_counts(db, chat_db_id, [m.telegram_message_id for m in inline_recent[:30]])
+        assert data.reply_counts == inline_counts
+
+        assert engine._shape_psh(bot, data.stances, data.holdings, None) == engine.fetch_psh(db, bot, None)
+        assert memories_to_dicts(data.memories) == fetch_bot_memories(db, bot_id, limit=8)
+
+        kwargs = dict(current_topic="BIST", current_symbols=["THYAO"], days_back=7, limit=3)
+        assert [r["id"] for r in score_past_messages(data.past_messages, **kwargs)] == [
+            r["id"] for r in find_relevant_past_messages(db, bot_id=bot_id, **kwargs)
+        ]
+
+        for text in ("mesaj 49", "hiç yazılmamış"):
+            assert asyncio.run(
+                engine.ais_duplicate_recent(bot_id=bot_id, text=text, hours=12)
+            ) == engine.is_duplicate_recent(db, bot_id=bot_id, text=text, hours=12)
+    finally:
+        db.close()
+    asyncio.run(engine.shutdown())
+
+
+def test_prefetch_failure_falls_back_to_inline_queries(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    chat_db_id, bot_id = _seed(database)
+    engine = behavior_engine_module.BehaviorEngine()
+
+    async def broken_load(**_):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(engine.tick_data, "load", broken_load)
+    db = database.SessionLocal()
+    try:
+        chat = db.get(database.Chat, chat_db_id)
+        bot = db.get(database.Bot, bot_id)
+        assert asyncio.run(engine._load_tick_data(chat, bot)) is None
+
+        engine.tick_prefetch_enabled = False
+        assert asyncio.run(engine._load_tick_data(chat, bot)) is None
+    finally:
+        db.close()
+    asyncio.run(engine.shutdown())
+
+
+def _seed_batch(database, n_chats):
+    """Her chat'e bir kullanıcı mesajı; iki bot dönüşümlü cevap veriyor."""
+    from backend.behavior import now_utc
+
+    db = database.SessionLocal()
+    try:
+        bots = []
+        for i in range(2):
+            bot = database.Bot(name=f"Batch{i}", username=f"batch_bot_{i}", is_enabled=True)
+            bot.token = f"12345:BATCH{i}"
+            bots.append(bot)
+        chats = [
+            database.Chat(chat_id=f"-200{i}", title=f"Batch Chat {i}", is_enabled=True, topics=["BIST"])
+            for i in range(n_chats)
+        ]
+        db.add_all(bots + chats)
+        db.commit()
+
+        now = now_utc()
+        items = []
+        for c, chat in enumerate(chats):
+            for i in range(1, 46):
+                db.add(database.Message(
+                    bot_id=bots[i % 2].id if i % 3 else None,
+                    chat_db_id=chat.id,
+                    telegram_message_id=i,
+                    text=f"chat {c} mesaj {i}",
+                    msg_metadata={"topic": "BIST", "symbols": ["THYAO"]},
+                    created_at=now - timedelta(minutes=50 - i),
+                ))
+            items.append({
+                "bot_id": bots[c % 2].id,
+                "chat_id": chat.id,
+                "telegram_message_id": 45,
+                "text": "THYAO ne olur?",
+            })
+        for bot in bots:
+            db.add(database.BotStance(bot_id=bot.id, topic="BIST", stance_text="temkinli", confidence=0.6))
+            db.add(database.BotHolding(bot_id=bot.id, symbol="THYAO", avg_price=250.0, size=5))
+            for m in range(10):
+                db.add(database.BotMemory(
+                    bot_id=bot.id,
+                    memory_type="personal_fact",
+                    content=f"hafıza {m}",
+                    relevance_score=m / 10,
+                ))
+            db.add(database.Message(
+                bot_id=bot.id,
+                chat_db_id=chats[0].id,
+                telegram_message_id=900 + bot.id,
+                text="geçen hafta THYAO aldım",
+                msg_metadata={"topic": "BIST", "symbols": ["THYAO"]},
+                created_at=now - timedelta(days=2),
+            ))
+        db.commit()
+        return items
+    finally:
+        db.close()
+
+
+def _count_statements(database, coro):
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", before_execute)
+    try:
+        result = asyncio.run(coro)
+    finally:
+        event.remove(database.engine, "before_cursor_execute", before_execute)
+    return result, len(statements)
+
+
+def test_load_batch_matches_inline_queries(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    from backend.behavior_engine.metadata_analyzer import fetch_bot_memories, memories_to_dicts
+    from backend.behavior_engine.tick_data import TickDataLoader, batch_statements
+
+    items = _seed_batch(database, n_chats=3)
+    engine = behavior_engine_module.BehaviorEngine()
+    engine.cache = None
+
+    ctx = asyncio.run(TickDataLoader(database.SessionLocal).load_batch(items))
+
+    db = database.SessionLocal()
+    try:
+        for item in items:
+            bot = db.get(database.Bot, item["bot_id"])
+            assert ctx.bots[bot.id].username == bot.username
+            assert ctx.chats[item["chat_id"]].chat_id == db.get(database.Chat, item["chat_id"]).chat_id
+            incoming = ctx.incoming[(item["chat_id"], item["telegram_message_id"])]
+            assert incoming.text.endswith("mesaj 45")
+
+            inline_recent = engine.fetch_recent_messages(db, item["chat_id"], limit=40)
+            assert [m.id for m in ctx.recent_messages[item["chat_id"]]] == [m.id for m in inline_recent]
+            assert engine._shape_psh(
+                bot, ctx.stances[bot.id], ctx.holdings[bot.id], None
+            ) == engine.fetch_psh(db, bot, None)
+            assert memories_to_dicts(ctx.memories[bot.id]) == fetch_bot_memories(db, bot.id, limit=8)
+            assert [m.text for m in ctx.past_messages[bot.id]] == ["geçen hafta THYAO aldım"]
+
+        # Hafıza limiti SQL penceresinde uygulanır (bot başına 10 satırdan 8'i okunur)
+        bot_ids = sorted({item["bot_id"] for item in items})
+        stmt = batch_statements(bot_ids, [], [], recent_limit=40, past_days=7, memory_limit=8)["memories"]
+        assert len(db.execute(stmt).scalars().all()) == 8 * len(bot_ids)
+    finally:
+        db.close()
+    asyncio.run(engine.shutdown())
+
+
+def test_load_batch_round_trips_do_not_grow_with_batch_size(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    from backend.behavior_engine.tick_data import TickDataLoader
+
+    items = _seed_batch(database, n_chats=6)
+    loader = TickDataLoader(database.SessionLocal)
+
+    small, small_count = _count_statements(database, loader.load_batch(items[:2]))
+    large, large_count = _count_statements(database, loader.load_batch(items))
+
+    assert len(small.chats) == 2 and len(large.chats) == 6
+    assert small_count == large_count
+
+
+def test_priority_message_reads_context_off_the_event_loop(tmp_path, monkeypatch):
+    import threading
+
+    from sqlalchemy import event
+
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    item = _seed_batch(database, n_chats=1)[0]
+    engine = behavior_engine_module.BehaviorEngine()
+    engine.cache = None
+    monkeypatch.setattr(engine, "settings", lambda _db: {"news_trigger_enabled": False, "typing_enabled": False})
+
+    prompts = []
+
+    async def fake_agenerate(**kwargs):
+        prompts.append(kwargs["user_prompt"])
+        return "bence yükselir"
+
+    async def fake_guard(*_args, **_kwargs):
+        return None
+
+    async def fake_send_message(**_):
+        return 777
+
+    monkeypatch.setattr(engine.llm, "agenerate", fake_agenerate)
+    monkeypatch.setattr(behavior_engine_module, "apply_consistency_guard", fake_guard)
+    monkeypatch.setattr(engine.tg, "send_message", fake_send_message)
+
+    loop_thread = threading.get_ident()
+    on_loop = []
+
+    def before_execute(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT") and threading.get_ident() == loop_thread:
+            on_loop.append(statement)
+
+    async def scenario():
+        session = database.SessionLocal()
+        try:
+            return await engine._process_priority_message(session, item)
+        finally:
+            session.close()
+
+    async def broken_load_batch(*_args, **_kwargs):
+        raise RuntimeError("db down")
+
+    event.listen(database.engine, "before_cursor_execute", before_execute)
+    try:
+        assert asyncio.run(scenario()) is True
+        # Loader hata verirse inline sorgular da thread'de çalışır
+        monkeypatch.setattr(engine.tick_data, "load_batch", broken_load_batch)
+        assert asyncio.run(scenario()) is True
+    finally:
+        event.remove(database.engine, "before_cursor_execute", before_execute)
+
+    assert on_loop == []
+    assert len(prompts) == 2
+    asyncio.run(engine.shutdown())
+
+
+def test_async_loads_share_a_bounded_number_of_sessions(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    from backend.behavior_engine.tick_data import TickDataLoader
+
+    chat_db_id, bot_id = _seed(database)
+    open_sessions = {"now": 0, "peak": 0}
+
+    class FakeAsyncSession:
+        """AsyncSession yerine: sorguyu thread'de sync session ile çalıştırır, açık session sayar."""
+
+        async def __aenter__(self):
+            open_sessions["now"] += 1
+            open_sessions["peak"] = max(open_sessions["peak"], open_sessions["now"])
+            self.db = database.SessionLocal()
+            return self
+
+        async def __aexit__(self, *exc):
+            self.db.close()
+            open_sessions["now"] -= 1
+
+        async def execute(self, stmt):
+            await asyncio.sleep(0.01)
+            result = await asyncio.to_thread(self.db.execute, stmt)
+            return result.freeze()()
+
+    loader = TickDataLoader(database.SessionLocal, async_session_factory=FakeAsyncSession, max_connections=3)
+    assert loader.mode == "async"
+
+    async def run_ticks():
+        return await asyncio.gather(*(loader.load(chat_db_id=chat_db_id, bot_id=bot_id) for _ in range(8)))
+
+    results = asyncio.run(run_ticks())
+    # 8 tick x 6 sorgu = 48 session açılır ama aynı anda en fazla 3'ü açık
+    assert open_sessions["peak"] == 3
+    assert open_sessions["now"] == 0
+
+    expected = asyncio.run(TickDataLoader(database.SessionLocal).load(chat_db_id=chat_db_id, bot_id=bot_id))
+    for data in results:
+        assert [m.id for m in data.recent_messages] == [m.id for m in expected.recent_messages]
+        assert data.reply_counts == expected.reply_counts
+        assert [m.id for m in data.past_messages] == [m.id for m in expected.past_messages]
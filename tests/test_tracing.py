@@ -0,0 +1,127 @@
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.behavior_engine import tracing  # noqa: E402
+from backend.behavior_engine.tracing import Trace, current_trace, span  # noqa: E402
+from tests.test_behavior_engine import setup_behavior_engine  # noqa: E402
+
+
+def test_spans_attach_to_active_trace_and_log_one_line(caplog):
+    trace = Trace("tick", log_enabled=True, chat_db_id=7).activate()
+    assert current_trace() is trace
+
+    with span("settings"):
+        pass
+    with span("dedup") as sp:
+        sp.outcome = "skip"
+    with pytest.raises(RuntimeError):
+        with span("llm"):
+            raise RuntimeError("provider down")
+    with span("dedup"):
+        pass
+
+    with caplog.at_level(logging.INFO, logger="behavior.trace"):
+        trace.finish("skip")
+
+    assert current_trace() is None
+    assert [(stage, outcome) for stage, _, outcome in trace.spans] == [
+        ("settings", "ok"),
+        ("dedup", "skip"),
+        ("llm", "error"),
+        ("dedup", "ok"),
+    ]
+    lines = [r.getMessage() for r in caplog.records if r.name == "behavior.trace"]
+    assert len(lines) == 1
+    payload = json.loads(lines[0].split(" ", 1)[1])
+    assert payload["kind"] == "tick" and payload["outcome"] == "skip" and payload["chat_db_id"] == 7
+    assert set(payload["stages_ms"]) == {"settings", "dedup", "llm"}
+
+
+def test_idle_trace_is_not_logged(caplog):
+    trace = Trace("tick", log_enabled=True).activate()
+    with caplog.at_level(logging.INFO, logger="behavior.trace"):
+        trace.finish()
+    assert not [r for r in caplog.records if r.name == "behavior.trace"]
+
+
+def test_span_overhead_is_negligible():
+    trace = Trace("tick", log_enabled=False).activate()
+    n = 20000
+    start = time.perf_counter()
+    for _ in range(n):
+        with span("settings"):
+            pass
+    per_span = (time.perf_counter() - start) / n
+    trace.finish()
+    # Ölçülen en ucuz aşamalar (settings cache, roster) bile milisaniye mertebesinde
+    assert per_span < 50e-6
+
+
+def test_priority_message_records_stage_spans(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    db = database.SessionLocal()
+    try:
+        bot = database.Bot(name="Tracer", username="tracer_bot", is_enabled=True)
+        bot.token = "12345:TRACE"
+        chat = database.Chat(chat_id="-1007", title="Trace Chat", is_enabled=True, topics=["BIST"])
+        db.add_all([bot, chat])
+        db.commit()
+        item = {"bot_id": bot.id, "chat_id": chat.id, "telegram_message_id": 1, "text": "BIST ne olur?"}
+    finally:
+        db.close()
+
+    engine = behavior_engine_module.BehaviorEngine()
+    settings_payload = {"consistency_guard_enabled": True, "news_trigger_enabled": False, "typing_enabled": False}
+    monkeypatch.setattr(engine, "settings", lambda _db: settings_payload)
+
+    async def fake_agenerate(**_):
+        return "bence yükselir"
+
+    async def fake_guard(*_args, **_kwargs):
+        return None
+
+    async def fake_send_message(**_):
+        return 501
+
+    monkeypatch.setattr(engine.llm, "agenerate", fake_agenerate)
+    monkeypatch.setattr(behavior_engine_module, "apply_consistency_guard", fake_guard)
+    monkeypatch.setattr(engine.tg, "send_message", fake_send_message)
+
+    traces = []
+
+    class RecordingTrace(Trace):
+        __slots__ = ()
+
+        def finish(self, outcome=None):
+            traces.append(self)
+            return super().finish(outcome)
+
+    monkeypatch.setattr(behavior_engine_module, "Trace", RecordingTrace)
+
+    async def scenario():
+        session = database.SessionLocal()
+        try:
+            return await engine._process_priority_message(session, item)
+        finally:
+            session.close()
+
+    assert asyncio.run(scenario()) is True
+    asyncio.run(engine.shutdown())
+
+    assert len(traces) == 1
+    trace = traces[0]
+    assert trace.kind == "priority" and trace.outcome == "sent"
+    stages = [stage for stage, _, _ in trace.spans]
+    assert stages[:3] == ["context", "llm", "consistency_guard"]
+    assert "telegram_send" in stages and stages[-1] == "store"
+    assert tracing.current_trace() is None
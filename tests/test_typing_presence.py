@@ -0,0 +1,82 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.behavior_engine.typing_presence import TypingPresence  # noqa: E402
+
+
+def _recorder():
+    calls = []
+
+    async def send_action(token, chat_id):
+        calls.append((token, chat_id))
+        return True
+
+    return calls, send_action
+
+
+def test_handles_for_same_bot_and_chat_share_one_refresher():
+    calls, send_action = _recorder()
+    presence = TypingPresence(send_action, refresh_interval=0.1)
+
+    async def scenario():
+        first = presence.start("tok", "-100")
+        second = presence.start("tok", "-100")
+        other = presence.start("tok", "-200")
+        await asyncio.sleep(0.25)
+        assert presence.active == 2
+        for handle in (first, second, other):
+            handle.cancel()
+        await asyncio.sleep(0)
+        assert presence.active == 0
+
+    asyncio.run(scenario())
+
+    per_chat = {chat: sum(1 for _, c in calls if c == chat) for chat in ("-100", "-200")}
+    # Her chat ~0.1 sn'de bir yenilenir; iki handle çağrı sayısını ikiye katlamaz
+    assert per_chat["-100"] == per_chat["-200"]
+    assert 2 <= per_chat["-100"] <= 4
+    assert presence.coalesced == 1
+
+
+def test_join_waits_only_for_remaining_typing_time():
+    _calls, send_action = _recorder()
+    presence = TypingPresence(send_action, refresh_interval=1.0)
+
+    async def scenario():
+        handle = presence.start("tok", "-100")
+        await asyncio.sleep(0.2)  # LLM üretimi sürerken gösterge açık
+        start = time.perf_counter()
+        await handle.join(0.3)
+        waited = time.perf_counter() - start
+        await handle.join(0.1)  # Süre zaten dolmuş: beklemez
+        handle.cancel(message_sent=True)
+        return waited
+
+    waited = asyncio.run(scenario())
+    assert 0.05 <= waited < 0.2
+
+
+def test_sent_message_refreshes_indicator_for_pending_handles():
+    calls, send_action = _recorder()
+    presence = TypingPresence(send_action, refresh_interval=10.0)
+
+    async def scenario():
+        first = presence.start("tok", "-100")
+        second = presence.start("tok", "-100")
+        await asyncio.sleep(0.05)
+        assert len(calls) == 1
+        # İlk mesaj gitti: Telegram göstergeyi söndürdü, ikincisi hâlâ yazılıyor
+        first.cancel(message_sent=True)
+        await asyncio.sleep(0.05)
+        assert len(calls) == 2
+        second.cancel(message_sent=True)
+        await presence.aclose()
+
+    asyncio.run(scenario())
+    assert presence.actions_sent == 2
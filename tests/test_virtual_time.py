@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tests.test_behavior_engine import setup_behavior_engine
+
+
+def test_virtual_loop_jumps_timers_and_holds_clock_for_threads():
+    import clock
+    from backend.behavior import is_within_active_hours, now_utc
+    from backend.simulation.virtual_time import run_virtual
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        seen = [is_within_active_hours(["09:00-10:00"])]
+        await asyncio.sleep(6 * 3600)
+        seen.append(is_within_active_hours(["09:00-10:00"]))
+
+        before = loop.time()
+        value = await asyncio.to_thread(lambda: (time.sleep(0.05), 42)[1])
+        assert loop.time() == before  # Thread işi sanal süre harcamaz
+
+        results = await asyncio.gather(
+            asyncio.sleep(30, result="a"),
+            asyncio.wait_for(asyncio.sleep(10, result="b"), timeout=60),
+        )
+        return seen, value, results, loop.time(), now_utc()
+
+    real_start = time.perf_counter()
+    seen, value, results, elapsed, virtual_now = run_virtual(main, start=datetime(2026, 1, 5, 3, 30))
+
+    assert time.perf_counter() - real_start < 2.0
+    assert seen == [False, True]
+    assert value == 42
+    assert results == ["a", "b"]
+    assert elapsed == 6 * 3600 + 30
+    assert virtual_now.astimezone().replace(tzinfo=None) == datetime(2026, 1, 5, 9, 30, 30)
+    assert isinstance(clock.get_clock(), clock.SystemClock)
+
+
+def test_day_simulation_applies_hourly_limits_on_virtual_time(tmp_path, monkeypatch):
+    setup_behavior_engine(tmp_path, monkeypatch)
+    from backend.simulation.day_simulation import DaySimulationConfig, run_day_simulation
+
+    config = DaySimulationConfig(
+        bots=2,
+        chats=1,
+        hours=2,
+        start="2026-01-05T10:00",
+        sample_minutes=30,
+        llm_latency="fixed:1.5",
+        telegram_latency="fixed:0.05",
+        settings={"bot_hourly_msg_limit": {"min": 3, "max": 3}, "typing_enabled": False},
+    )
+    result = run_day_simulation(config)
+
+    assert result["real_seconds"] < 60
+    assert [row["virtual_time"] for row in result["hourly"]] == ["2026-01-05T11:00", "2026-01-05T12:00"]
+    for row in result["hourly"]:
+        # Saatlik limit sanal saatle sayılır: bot başına saatte en fazla 3 mesaj
+        assert 0 < row["messages_sent"] <= 6
+    assert result["totals"]["message_rows"] == result["totals"]["messages_sent"]
+    assert len(result["samples"]) == 4
@@ -0,0 +1,185 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.behavior_engine.write_buffer import WriteBehindBuffer  # noqa: E402
+from tests.test_behavior_engine import setup_behavior_engine  # noqa: E402
+
+
+def _seed(database):
+    session = database.SessionLocal()
+    try:
+        bot = database.Bot(name="Writer", username="writer_bot", is_enabled=True)
+        bot.token = "12345:WRITER"
+        chat = database.Chat(chat_id="-500", title="Chat", is_enabled=True)
+        session.add_all([bot, chat])
+        session.commit()
+        memory = database.BotMemory(bot_id=bot.id, memory_type="personal_fact", content="İstanbul", usage_count=0)
+        session.add(memory)
+        session.commit()
+        return bot.id, chat.id, memory.id
+    finally:
+        session.close()
+
+
+def test_flush_writes_messages_and_memory_usage_in_one_transaction(tmp_path, monkeypatch):
+    _, database = setup_behavior_engine(tmp_path, monkeypatch)
+    bot_id, chat_id, memory_id = _seed(database)
+
+    flushed_chats = []
+    buffer = WriteBehindBuffer(database.SessionLocal, on_flushed=flushed_chats.extend)
+    bot = SimpleNamespace(id=bot_id, name="Writer", username="writer_bot")
+
+    for i in range(3):
+        buffer.add_message(
+            bot=bot, chat_db_id=chat_id, telegram_message_id=100 + i,
+            text=f"mesaj {i}", reply_to_message_id=None, msg_metadata={"topic": "BIST"},
+        )
+    buffer.increment_memory_usage(memory_id)
+    buffer.increment_memory_usage(memory_id)
+
+    pending = buffer.pending_messages(chat_db_id=chat_id)
+    assert [m.text for m in pending] == ["mesaj 2", "mesaj 1", "mesaj 0"]
+    assert pending[0].bot.username == "writer_bot"
+
+    assert buffer.flush() == 4
+    assert buffer.pending_messages() == []
+    assert flushed_chats == [chat_id]
+
+    session = database.SessionLocal()
+    try:
+        texts = [m.text for m in session.query(database.Message).order_by(database.Message.id)]
+        assert texts == ["mesaj 0", "mesaj 1", "mesaj 2"]
+        assert session.get(database.BotMemory, memory_id).usage_count == 2
+    finally:
+        session.close()
+
+
+def test_engine_reads_see_buffered_messages(tmp_path, monkeypatch):
+    behavior_engine_module, database = setup_behavior_engine(tmp_path, monkeypatch)
+    bot_id, chat_id, _ = _seed(database)
+    engine = behavior_engine_module.BehaviorEngine()
+    engine.cache = None
+
+    session = database.SessionLocal()
+    try:
+        bot = session.get(database.Bot, bot_id)
+        chat = session.get(database.Chat, chat_id)
+        engine._store_bot_message(
+            session, bot=bot, chat=chat, telegram_message_id=777,
+            text="Bugün BIST sakin", reply_to_message_id=None, msg_metadata={},
+        )
+
+        assert session.query(database.Message).count() == 0
+        assert [m.text for m in engine.fetch_recent_messages(session, chat_id, limit=5)] == ["Bugün BIST sakin"]
+        assert engine.is_duplicate_recent(session, bot_id=bot_id, text="bugün bist sakin", hours=1)
+        assert engine.rates.bot_count(bot_id) == 1
+
+        engine.write_buffer.flush()
+        recent = engine.fetch_recent_messages(session, chat_id, limit=5)
+        assert [m.text for m in recent] == ["Bugün BIST sakin"]
+        assert recent[0].id is not None
+    finally:
+        session.close()
+
+
+def test_background_flusher_flushes_on_size_threshold(tmp_path, monkeypatch):
+    _, database = setup_behavior_engine(tmp_path, monkeypatch)
+    bot_id, chat_id, _ = _seed(database)
+    buffer = WriteBehindBuffer(database.SessionLocal, max_items=2, flush_interval=30.0)
+    bot = SimpleNamespace(id=bot_id, name="Writer", username="writer_bot")
+
+    async def scenario():
+        task = asyncio.create_task(buffer.run())
+        await asyncio.sleep(0.01)
+        for i in range(2):
+            buffer.add_message(
+                bot=bot, chat_db_id=chat_id, telegram_message_id=i,
+                text=f"m{i}", reply_to_message_id=None, msg_metadata={},
+            )
+        for _ in range(50):
+            if not len(buffer) and not buffer.pending_messages():
+                break
+            await asyncio.sleep(0.02)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    session = database.SessionLocal()
+    try:
+        assert session.query(database.Message).count() == 2
+    finally:
+        session.close()
+
+
+def test_failing_row_is_dropped_and_the_rest_of_the_batch_is_written(tmp_path, monkeypatch):
+    from sqlalchemy import event
+
+    _, database = setup_behavior_engine(tmp_path, monkeypatch)
+    bot_id, chat_id, memory_id = _seed(database)
+
+    def enable_foreign_keys(dbapi_connection, _record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    event.listen(database.engine, "connect", enable_foreign_keys)
+    database.engine.dispose()
+    buffer = WriteBehindBuffer(database.SessionLocal)
+    bot = SimpleNamespace(id=bot_id, name="Writer", username="writer_bot")
+
+    def add(text, chat_db_id=chat_id):
+        return buffer.add_message(
+            bot=bot, chat_db_id=chat_db_id, telegram_message_id=None,
+            text=text, reply_to_message_id=None, msg_metadata={},
+        )
+
+    add("önce")
+    add("silinmiş chat", chat_db_id=chat_id + 1000)  # FK ihlali: her denemede başarısız olur
+    add("sonra")
+    buffer.increment_memory_usage(memory_id)
+
+    assert buffer.flush() == 3
+    assert len(buffer) == 0 and buffer.pending_messages() == []
+
+    # Sonraki flush'lar aynı satırda takılmaz
+    add("yeni")
+    assert buffer.flush() == 1
+
+    session = database.SessionLocal()
+    try:
+        texts = [m.text for m in session.query(database.Message).order_by(database.Message.id)]
+        assert texts == ["önce", "sonra", "yeni"]
+        assert session.get(database.BotMemory, memory_id).usage_count == 1
+    finally:
+        session.close()
+        event.remove(database.engine, "connect", enable_foreign_keys)
+        database.engine.dispose()
+
+
+def test_flush_requeues_the_batch_when_the_database_is_unreachable(tmp_path, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    _, database = setup_behavior_engine(tmp_path, monkeypatch)
+    bot_id, chat_id, _ = _seed(database)
+    buffer = WriteBehindBuffer(database.SessionLocal)
+    bot = SimpleNamespace(id=bot_id, name="Writer", username="writer_bot")
+    for i in range(2):
+        buffer.add_message(
+            bot=bot, chat_db_id=chat_id, telegram_message_id=i,
+            text=f"m{i}", reply_to_message_id=None, msg_metadata={},
+        )
+
+    def unreachable(*_args, **_kwargs):
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(buffer, "_apply", unreachable)
+    assert buffer.flush() == 0
+    assert [m.text for m in buffer.pending_messages()] == ["m1", "m0"]
+
+    monkeypatch.undo()
+    assert buffer.flush() == 2
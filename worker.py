@@ -6,6 +6,7 @@ import logging
 import os
 import signal
 import sys
+import time
 from contextlib import suppress
 
 from dotenv import load_dotenv
@@ -29,6 +30,9 @@ except Exception:
 # ---- Konfig ----
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "15"))  # saniye
+# SIGUSR2 ile alınan profilin süresi ve yazılacağı dizin
+PROFILE_SIGNAL_SECONDS = float(os.getenv("PROFILE_SIGNAL_SECONDS", "30"))
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "/tmp")
 # Long polling veya webhook modu (varsayılan: webhook)
 USE_LONG_POLLING = os.getenv("USE_LONG_POLLING", "false").lower() in {"1", "true", "yes", "on"}
 
@@ -55,6 +59,45 @@ def _install_signal_handlers(loop: asyncio.AbstractEventLoop):
             loop.add_signal_handler(sig, _handler)
 
 
+async def _profile_to_disk() -> None:
+    """SIGUSR2: canlı worker'ın profilini al, tüm formatları PROFILE_OUTPUT_DIR'e yaz."""
+    from runtime_profiler import PROFILE_FORMATS, ProfilerBusyError, aprofile_for
+
+    trace_memory = os.getenv("PROFILE_SIGNAL_TRACEMALLOC", "false").lower() in {"1", "true", "yes"}
+    logger.info("SIGUSR2: profiling worker for %.0fs …", PROFILE_SIGNAL_SECONDS)
+    try:
+        result = await aprofile_for(PROFILE_SIGNAL_SECONDS, trace_memory=trace_memory)
+    except ProfilerBusyError as exc:
+        logger.warning("SIGUSR2 profile skipped: %s", exc)
+        return
+
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    prefix = os.path.join(PROFILE_OUTPUT_DIR, f"worker{os.getenv('WORKER_ID', '0')}_{os.getpid()}_{stamp}")
+    for fmt in PROFILE_FORMATS:
+        body, _media_type, filename = result.artifact(fmt)
+        path = f"{prefix}_{filename}"
+        try:
+            with open(path, "wb") as fh:
+                fh.write(body)
+        except OSError as exc:
+            logger.warning("Failed to write profile %s: %s", path, exc)
+            return
+    logger.info("Worker profile written: %s_* (%d samples)", prefix, result.samples)
+
+
+def _install_profile_signal(loop: asyncio.AbstractEventLoop):
+    """SIGUSR2 geldiğinde (kill -USR2 <pid>) arka planda profil al."""
+    tasks: set[asyncio.Task] = set()
+
+    def _handler():
+        task = loop.create_task(_profile_to_disk(), name="profile_signal")
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    with suppress(NotImplementedError, AttributeError):
+        loop.add_signal_handler(signal.SIGUSR2, _handler)
+
+
 def _get_redis_client() -> redis.Redis | None:
     """Redis client oluştur (varsa)"""
     redis_url = os.getenv("REDIS_URL")
@@ -123,6 +166,7 @@ def main(argv: list[str] | None = None) -> int:
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     _install_signal_handlers(loop)
+    _install_profile_signal(loop)
 
     try:
         loop.run_until_complete(_amain())